@@ -1,3 +1,13 @@
+class NodeFieldType:
+
+    BOOLEAN = "boolean"
+    DATE = "date"
+    FLOAT = "float"
+    INT = "int"
+    STRING = "string"
+    STRING_ARRAY = "string[]"
+
+
 class NodeField:
 
     ID = "nodeId:ID"
@@ -16,6 +26,12 @@ class NodeField:
     IS_GOAL = "isGoal"
     SORT_ORDER = "sortOrder"
     TEXT = "text"
+    GOALS = "goals"
+    SHOTS = "shots"
+    SHOTS_ON_TARGET = "shotsOnTarget"
+    ASSISTS = "assists"
+    YELLOW_CARDS = "yellowCards"
+    RED_CARDS = "redCards"
     ALL = [
         ID,
         LABEL,
@@ -34,3 +50,39 @@ class NodeField:
         SORT_ORDER,
         TEXT,
     ]
+    # the single nodes file writes SEASON_STATS nodes to a file of their own, so it keeps its columns
+    SEASON_STATS_FIELDS = [
+        GOALS,
+        SHOTS,
+        SHOTS_ON_TARGET,
+        ASSISTS,
+        YELLOW_CARDS,
+        RED_CARDS,
+    ]
+    # neo4j-admin import types, fields not listed here are imported as strings
+    TYPES = {
+        FULLTIME_HOME_GOALS: NodeFieldType.INT,
+        FULLTIME_AWAY_GOALS: NodeFieldType.INT,
+        HOME_ODDS: NodeFieldType.FLOAT,
+        AWAY_ODDS: NodeFieldType.FLOAT,
+        DRAW_ODDS: NodeFieldType.FLOAT,
+        OVER_25_GOAL_ODDS: NodeFieldType.FLOAT,
+        UNDER_25_GOAL_ODDS: NodeFieldType.FLOAT,
+        BOTH_TEAMS_TO_SCORE_ODDS: NodeFieldType.FLOAT,
+        NOT_BOTH_TEAMS_TO_SCORE_ODDS: NodeFieldType.FLOAT,
+        MATCH_EVENT_TIME: NodeFieldType.INT,
+        IS_FAST_BREAK: NodeFieldType.BOOLEAN,
+        IS_GOAL: NodeFieldType.BOOLEAN,
+        SORT_ORDER: NodeFieldType.INT,
+        GOALS: NodeFieldType.INT,
+        SHOTS: NodeFieldType.INT,
+        SHOTS_ON_TARGET: NodeFieldType.INT,
+        ASSISTS: NodeFieldType.INT,
+        YELLOW_CARDS: NodeFieldType.INT,
+        RED_CARDS: NodeFieldType.INT,
+    }
+
+    @staticmethod
+    def typed_header(field: str) -> str:
+        fieldType = NodeField.TYPES.get(field)
+        return field if fieldType is None else f"{field}:{fieldType}"
@@ -1,4 +1,26 @@
+import hashlib
+from functools import lru_cache
+
+# integer node IDs carry the letter group in the high bits, so IDs of different node kinds can never collide
+# while all of them still fit a positive signed 64-bit integer for neo4j-admin --id-type=INTEGER
+INTEGER_ID_LOCAL_BITS = 59
+INTEGER_ID_LOCAL_MASK = (1 << INTEGER_ID_LOCAL_BITS) - 1
+# bits of SeasonStatsId.local_integer: 4 for the entity's letter group, 16 for the season, 39 for the entity
+SEASON_STATS_ENTITY_LETTER_SHIFT = 55
+SEASON_STATS_SEASON_SHIFT = 39
+# formatted IDs of bounded dimensions kept per NodeIdFormat
+DEFAULT_ID_CACHE_SIZE = 1 << 16
+
+
+def hashed_local_integer(value: str) -> int:
+    # stable across processes and runs, unlike hash()
+    digest = hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") & INTEGER_ID_LOCAL_MASK
+
+
 class BaseNodeId:
+    __slots__ = ("letter", "ids", "_string")
+
     class Letters:
 
         COUNTRY = "C"
@@ -10,51 +32,161 @@ class BaseNodeId:
         SEASON = "S"
         TEAM = "TEAM"
         TIME_DIVISION = "T"
+        SEASON_STATS = "SS"
+        COMMENTARY_TEMPLATE = "CT"
+        # new letters go last, the position is the integer ID group
+        ALL = [
+            COUNTRY,
+            LEAGUE,
+            EVENT_CONTEXT,
+            MATCH,
+            MATCH_EVENT,
+            PLAYER,
+            SEASON,
+            TEAM,
+            TIME_DIVISION,
+            SEASON_STATS,
+            COMMENTARY_TEMPLATE,
+        ]
 
     def __init__(self, letter, *args):
         self.letter = letter
         self.ids = args
+        self._string = None
 
-    def __str__(self):
+    @staticmethod
+    def integer_group(letter: str) -> int:
+        return BaseNodeId.Letters.ALL.index(letter) << INTEGER_ID_LOCAL_BITS
+
+    def local_integer(self) -> int:
+        return hashed_local_integer(value="_".join([str(value) for value in self.ids]))
+
+    def __int__(self):
+        return BaseNodeId.integer_group(self.letter) | self.local_integer()
+
+    def string_id(self) -> str:
         return f'{self.letter}{"_".join([str(value) for value in self.ids])}'
 
+    def __str__(self):
+        # always the string ID, NodeIdFormat writes the integer form
+        if self._string is None:
+            self._string = self.string_id()
+        return self._string
+
+    def __eq__(self, other):
+        return isinstance(other, BaseNodeId) and str(self) == str(other)
+
+    def __hash__(self):
+        return hash(str(self))
+
+
+class NodeIdFormat:
+    # How node IDs are written, handed to every builder and handler that writes them: "MEV123"-style strings, or
+    # with integerIds the positive 64-bit integers of neo4j-admin --id-type=INTEGER
+    def __init__(self, integerIds: bool = False, cacheSize: int = DEFAULT_ID_CACHE_SIZE):
+        self.integerIds = integerIds
+        self.cacheSize = cacheSize
+        # cached(TeamId, 3) reuses the strings of bounded dimensions (teams, players, contexts, dates...), the least
+        # recently used are formatted again when they come back
+        self.cached = lru_cache(maxsize=cacheSize)(self._format_new)
+
+    def __reduce__(self):
+        # worker processes get a format with an empty cache
+        return NodeIdFormat, (self.integerIds, self.cacheSize)
+
+    def format(self, nodeId: BaseNodeId) -> str:
+        return str(int(nodeId)) if self.integerIds else nodeId.string_id()
+
+    def _format_new(self, nodeIdClass: type, *args) -> str:
+        return self.format(nodeIdClass(*args))
+
+
+class NumericNodeId(BaseNodeId):
+    __slots__ = ()
+
+    def local_integer(self) -> int:
+        return int(self.ids[0])
+
+
+class CommentaryTemplateId(NumericNodeId):
+    __slots__ = ()
+
+    def __init__(self, templateId):
+        super().__init__(BaseNodeId.Letters.COMMENTARY_TEMPLATE, templateId)
+
+
+class CountryId(NumericNodeId):
+    __slots__ = ()
 
-class CountryId(BaseNodeId):
     def __init__(self, countryId):
         super().__init__(BaseNodeId.Letters.COUNTRY, countryId)
 
 
 class EventContextId(BaseNodeId):
+    __slots__ = ()
+
     def __init__(self, eventType, eventId):
         super().__init__(BaseNodeId.Letters.EVENT_CONTEXT, eventType, eventId)
 
 
-class LeagueId(BaseNodeId):
+class LeagueId(NumericNodeId):
+    __slots__ = ()
+
     def __init__(self, leagueId):
         super().__init__(BaseNodeId.Letters.LEAGUE, leagueId)
 
 
 class MatchId(BaseNodeId):
+    __slots__ = ()
+
     def __init__(self, matchId):
         super().__init__(BaseNodeId.Letters.MATCH, matchId)
 
 
 class MatchEventId(BaseNodeId):
+    __slots__ = ()
+
     def __init__(self, matchEventId):
         super().__init__(BaseNodeId.Letters.MATCH_EVENT, matchEventId)
 
 
-class PlayerId(BaseNodeId):
+class PlayerId(NumericNodeId):
+    __slots__ = ()
+
     def __init__(self, playerId):
         super().__init__(BaseNodeId.Letters.PLAYER, playerId)
 
 
-class SeasonId(BaseNodeId):
+class SeasonId(NumericNodeId):
+    __slots__ = ()
+
     def __init__(self, seasonId):
         super().__init__(BaseNodeId.Letters.SEASON, seasonId)
 
 
-class TeamId(BaseNodeId):
+class SeasonStatsId(BaseNodeId):
+    __slots__ = ()
+
+    def __init__(self, entityLetter, entityId, seasonId):
+        super().__init__(
+            BaseNodeId.Letters.SEASON_STATS, entityLetter, entityId, seasonId
+        )
+
+    def local_integer(self) -> int:
+        # the letter group of the entity, the season and the entity ID packed into separate bits, so unlike a
+        # hash these never collide
+        entityLetter, entityId, seasonId = self.ids
+        return (
+            BaseNodeId.Letters.ALL.index(entityLetter)
+            << SEASON_STATS_ENTITY_LETTER_SHIFT
+            | int(seasonId) << SEASON_STATS_SEASON_SHIFT
+            | int(entityId)
+        )
+
+
+class TeamId(NumericNodeId):
+    __slots__ = ()
+
     def __init__(self, teamId):
         super().__init__(BaseNodeId.Letters.TEAM, teamId)
 
@@ -66,17 +198,34 @@ class TimeType:
     DATE = "D"
 
 
-class YearId(BaseNodeId):
+class TimeDivisionId(BaseNodeId):
+    __slots__ = ()
+
+    def local_integer(self) -> int:
+        # yyyy, yyyymm and yyyymmdd never overlap, so the time tree shares one integer group
+        localInteger = 0
+        for value in self.ids[1:]:
+            localInteger = localInteger * 100 + int(value)
+        return localInteger
+
+
+class YearId(TimeDivisionId):
+    __slots__ = ()
+
     def __init__(self, year):
         super().__init__(BaseNodeId.Letters.TIME_DIVISION, TimeType.YEAR, year)
 
 
-class MonthId(BaseNodeId):
+class MonthId(TimeDivisionId):
+    __slots__ = ()
+
     def __init__(self, year, month):
         super().__init__(BaseNodeId.Letters.TIME_DIVISION, TimeType.MONTH, year, month)
 
 
-class DateId(BaseNodeId):
+class DateId(TimeDivisionId):
+    __slots__ = ()
+
     def __init__(self, year, month, day):
         super().__init__(
             BaseNodeId.Letters.TIME_DIVISION, TimeType.DATE, year, month, day
@@ -0,0 +1,85 @@
+from typing import List
+
+from datamodel.node_field import NodeField
+from datamodel.node_labels import NodeLabel
+
+
+class NodeKind:
+
+    COMMENTARY_TEMPLATE = "commentary_template"
+    COUNTRY = "country"
+    DATE = "date"
+    LEAGUE = "league"
+    MATCH = "match"
+    MATCH_EVENT = "match_event"
+    MATCH_EVENT_CONTEXT = "match_event_context"
+    MONTH = "month"
+    PLAYER = "player"
+    SEASON = "season"
+    SEASON_STATS = "season_stats"
+    TEAM = "team"
+    YEAR = "year"
+
+    # the label that decides which kind (and therefore which file and columns) a node belongs to
+    LABEL_TO_KIND = {
+        NodeLabel.COMMENTARY_TEMPLATE: COMMENTARY_TEMPLATE,
+        NodeLabel.COUNTRY: COUNTRY,
+        NodeLabel.DATE: DATE,
+        NodeLabel.LEAGUE: LEAGUE,
+        NodeLabel.MATCH: MATCH,
+        NodeLabel.MATCH_EVENT: MATCH_EVENT,
+        NodeLabel.MATCH_EVENT_CONTEXT: MATCH_EVENT_CONTEXT,
+        NodeLabel.MONTH: MONTH,
+        NodeLabel.PLAYER: PLAYER,
+        NodeLabel.SEASON: SEASON,
+        NodeLabel.SEASON_STATS: SEASON_STATS,
+        NodeLabel.TEAM: TEAM,
+        NodeLabel.YEAR: YEAR,
+    }
+
+    MATCH_FIELDS = [
+        NodeField.ID,
+        NodeField.LABEL,
+        NodeField.FULLTIME_HOME_GOALS,
+        NodeField.FULLTIME_AWAY_GOALS,
+        NodeField.HOME_ODDS,
+        NodeField.AWAY_ODDS,
+        NodeField.DRAW_ODDS,
+        NodeField.OVER_25_GOAL_ODDS,
+        NodeField.UNDER_25_GOAL_ODDS,
+        NodeField.BOTH_TEAMS_TO_SCORE_ODDS,
+        NodeField.NOT_BOTH_TEAMS_TO_SCORE_ODDS,
+    ]
+    MATCH_EVENT_FIELDS = [
+        NodeField.ID,
+        NodeField.LABEL,
+        NodeField.MATCH_EVENT_TIME,
+        NodeField.IS_FAST_BREAK,
+        NodeField.IS_GOAL,
+        NodeField.SORT_ORDER,
+        NodeField.TEXT,
+    ]
+    SEASON_STATS_FIELDS = [
+        NodeField.ID,
+        NodeField.LABEL,
+        NodeField.TEXT,
+    ] + NodeField.SEASON_STATS_FIELDS
+    TEXT_FIELDS = [NodeField.ID, NodeField.LABEL, NodeField.TEXT]
+
+    @staticmethod
+    def of(nodeLabels: List[NodeLabel]) -> str:
+        for label in nodeLabels:
+            kind = NodeKind.LABEL_TO_KIND.get(label)
+            if kind is not None:
+                return kind
+        raise ValueError(f"No node kind for labels {nodeLabels}")
+
+    @staticmethod
+    def fields(kind: str) -> List[str]:
+        if kind == NodeKind.MATCH:
+            return NodeKind.MATCH_FIELDS
+        if kind == NodeKind.MATCH_EVENT:
+            return NodeKind.MATCH_EVENT_FIELDS
+        if kind == NodeKind.SEASON_STATS:
+            return NodeKind.SEASON_STATS_FIELDS
+        return NodeKind.TEXT_FIELDS
@@ -1,6 +1,7 @@
 class NodeLabel:
 
     ANNOUNCEMENT = "ANNOUNCEMENT"
+    COMMENTARY_TEMPLATE = "COMMENTARY_TEMPLATE"
     CORNER = "CORNER"
     COUNTRY = "COUNTRY"
     DATE = "DATE"
@@ -21,6 +22,7 @@ class NodeLabel:
     PLAYER = "PLAYER"
     RED_CARD = "RED_CARD"
     SEASON = "SEASON"
+    SEASON_STATS = "SEASON_STATS"
     SECOND_YELLOW_CARD = "SECOND_YELLOW_CARD"
     SENDING_OFF = "SENDING_OFF"
     SHOT_ATTEMPT = "SHOT_ATTEMPT"
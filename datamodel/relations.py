@@ -1,3 +1,8 @@
+from typing import List
+
+from datamodel.node_field import NodeFieldType
+
+
 class Relation:
 
     START_ID = ":START_ID"
@@ -5,6 +10,14 @@ class Relation:
     TYPE = ":TYPE"
     ALL = [START_ID, END_ID, TYPE]
 
+    @staticmethod
+    def typed_header(relationType: str) -> List[str]:
+        # the header of the file of a relation type written with properties
+        return Relation.ALL + [
+            RelationField.typed_header(field)
+            for field in RelationField.fields(relationType)
+        ]
+
 
 class BaseRelationType:
     pass
@@ -37,4 +50,62 @@ class GeneralRelationType(BaseRelationType):
     IN_SEASON = "IN_SEASON"
     IN_YEAR = "IN_YEAR"
     NEXT = "NEXT"
+    NEXT_EVENT = "NEXT_EVENT"
     ON_DATE = "ON_DATE"
+    PLAYED_FOR = "PLAYED_FOR"
+    PLAYER_SEASON_STATS = "PLAYER_SEASON_STATS"
+    TEAM_SEASON_STATS = "TEAM_SEASON_STATS"
+    FOR_SEASON = "FOR_SEASON"
+    HAS_COMMENTARY = "HAS_COMMENTARY"
+
+
+class RelationField:
+
+    SEASON = "season"
+    FIRST_APPEARANCE = "firstAppearance"
+    LAST_APPEARANCE = "lastAppearance"
+    APPEARANCES = "appearances"
+    MATCH_EVENT_TIME = "matchEventTime"
+    IS_GOAL = "isGoal"
+    MATCH_DATE = "matchDate"
+    COMMENTARY_PARAMETERS = "commentaryParameters"
+
+    # denormalised from the match event and its match onto the relations of the event, so traversals can filter
+    # on them without expanding to the MATCH_EVENT nodes
+    EVENT_FIELDS = [MATCH_EVENT_TIME, IS_GOAL, MATCH_DATE]
+
+    TYPES = {
+        SEASON: NodeFieldType.INT,
+        FIRST_APPEARANCE: NodeFieldType.DATE,
+        LAST_APPEARANCE: NodeFieldType.DATE,
+        APPEARANCES: NodeFieldType.INT,
+        MATCH_EVENT_TIME: NodeFieldType.INT,
+        IS_GOAL: NodeFieldType.BOOLEAN,
+        MATCH_DATE: NodeFieldType.DATE,
+        COMMENTARY_PARAMETERS: NodeFieldType.STRING_ARRAY,
+    }
+
+    # relation types that can be written with properties, they get their own file with these columns
+    FIELDS = {
+        GeneralRelationType.HAS_MATCH_EVENT: EVENT_FIELDS,
+        EventRelationType.EVENT_TEAM: EVENT_FIELDS,
+        EventRelationType.PLAYER_1: EVENT_FIELDS,
+        GeneralRelationType.PLAYED_FOR: [
+            SEASON,
+            FIRST_APPEARANCE,
+            LAST_APPEARANCE,
+            APPEARANCES,
+        ],
+        GeneralRelationType.HAS_COMMENTARY: [COMMENTARY_PARAMETERS],
+    }
+    # the properties that tell relations of a type between the same two nodes apart
+    KEYS = {GeneralRelationType.PLAYED_FOR: [SEASON]}
+
+    @staticmethod
+    def fields(relationType: str) -> List[str]:
+        return RelationField.FIELDS.get(relationType, [])
+
+    @staticmethod
+    def typed_header(field: str) -> str:
+        fieldType = RelationField.TYPES.get(field)
+        return field if fieldType is None else f"{field}:{fieldType}"
@@ -0,0 +1,128 @@
+import logging
+from pathlib import Path
+from typing import Any, Dict, Hashable, Optional, Union
+
+import pandas as pd
+
+from internal.columnar import last_event_for_match, match_event_sequence
+from internal.commentary_templates import CommentaryTemplates
+from internal.database_builders import create_database_builder
+from internal.export_stages import add_football_events
+from internal.metered_graph_database_builder import MeteredGraphDatabaseBuilder
+from store.export_checkpoint import ExportCheckpoint
+from utils.dataframe_functions import shard_indices
+from utils.event_shards import EventShards
+from utils.input_readers import read_match_events
+from utils.stage_metrics import MetricsRecorder
+
+EVENT_SEQUENCE_COLUMNS = ["id_odsp", "id_event", "sort_order", "time"]
+
+
+def add_checkpointed_football_events(
+    matchEventsFilepath: Union[str, Path],
+    checkpoint: ExportCheckpoint,
+    teamToIdMap: Dict[str, int],
+    playerToIdMap: Dict[str, int],
+    columnar: bool,
+    nextEventRelations: bool,
+    matchDates: Optional[Dict[Hashable, str]],
+    commentaryTemplates: Optional[CommentaryTemplates],
+    chunkSize: int,
+    outputOptions: Dict[str, Any],
+    metricsRecorder: MetricsRecorder,
+    logger: Optional[logging.Logger] = None,
+    eventShards: Optional[EventShards] = None,
+) -> None:
+    # Every chunk of events is written to its own files and committed with its row range, reading starts after
+    # the last committed chunk. Workers read their matches of every chunk from the eventShards and commit to their
+    # part checkpoint
+    if checkpoint.committedRows and logger is not None:
+        logger.info(msg=f"Resuming football events at row {checkpoint.committedRows}")
+    lastEventForMatch = None
+    if nextEventRelations and checkpoint.committedRows:
+        # NEXT_EVENT chains continue from the events of the committed chunks
+        with metricsRecorder.stage(name="committed_event_sequence"):
+            lastEventForMatch = committed_last_event_for_match(
+                matchEventsFilepath=matchEventsFilepath,
+                rows=checkpoint.committedRows,
+                chunkSize=chunkSize,
+                shardCount=None if eventShards is None else eventShards.shardCount,
+                shardIndex=checkpoint.partIndex,
+            )
+    if eventShards is None:
+        eventChunks = (
+            (eventChunk, len(eventChunk))
+            for eventChunk in read_match_events(
+                matchEventsFilepath=matchEventsFilepath,
+                chunkSize=chunkSize,
+                firstRow=checkpoint.committedRows,
+            )
+        )
+    else:
+        eventChunks = eventShards.chunks(
+            shardIndex=checkpoint.partIndex, firstRow=checkpoint.committedRows
+        )
+    for eventData, chunkRows in metricsRecorder.chunks(
+        name="read_match_events", chunks=eventChunks
+    ):
+        databaseBuilder = MeteredGraphDatabaseBuilder(
+            databaseBuilder=create_database_builder(
+                outputDirectory=checkpoint.stagingDirectory,
+                outputOptions=outputOptions,
+                partIndex=checkpoint.partIndex,
+                chunkIndex=len(checkpoint.chunks),
+            ),
+            recorder=metricsRecorder,
+            meterHandlers=outputOptions.get("meterHandlers", False),
+        )
+        lastEventForMatch = add_football_events(
+            eventData=eventData,
+            databaseBuilder=databaseBuilder,
+            teamToIdMap=teamToIdMap,
+            playerToIdMap=playerToIdMap,
+            columnar=columnar,
+            nextEventRelations=nextEventRelations,
+            matchDates=matchDates,
+            commentaryTemplates=commentaryTemplates,
+            lastEventForMatch=lastEventForMatch,
+        )
+        with metricsRecorder.stage(name="close"):
+            databaseBuilder.close()
+        metricsRecorder.rename_output_files(
+            renamedFiles=checkpoint.commit_chunk(rows=chunkRows)
+        )
+        if logger is not None:
+            logger.info(
+                msg=f"Committed football events up to row {checkpoint.committedRows}"
+            )
+
+
+def committed_last_event_for_match(
+    matchEventsFilepath: Union[str, Path],
+    rows: int,
+    chunkSize: int,
+    shardCount: Optional[int] = None,
+    shardIndex: Optional[int] = None,
+) -> Optional[pd.DataFrame]:
+    # the last event of every match in the first rows of the file, only reading the columns that order them
+    lastEventForMatch = None
+    for eventChunk in read_match_events(
+        matchEventsFilepath=matchEventsFilepath,
+        columns=EVENT_SEQUENCE_COLUMNS,
+        chunkSize=chunkSize,
+    ):
+        eventChunk = eventChunk.iloc[:rows]
+        rows -= len(eventChunk)
+        if shardCount is not None:
+            eventChunk = eventChunk[
+                shard_indices(values=eventChunk["id_odsp"], shardCount=shardCount)
+                == shardIndex
+            ]
+        lastEventForMatch = last_event_for_match(
+            eventSequence=match_event_sequence(
+                eventData=eventChunk, lastEventForMatch=lastEventForMatch
+            )
+        )
+        if rows == 0:
+            break
+    return lastEventForMatch
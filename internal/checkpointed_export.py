@@ -0,0 +1,404 @@
+import logging
+import os
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Optional, Union
+
+from internal.checkpointed_events import add_checkpointed_football_events
+from internal.commentary_templates import CommentaryTemplates
+from internal.database_builders import create_database_builder
+from internal.export_options import ExportOptions
+from internal.export_stages import (
+    add_match_event_context_nodes,
+    add_player_rosters,
+    add_season_stats,
+    collect_commentary_templates,
+    full_build_manifest,
+    metadata_id_maps,
+    player_id_map,
+    process_match_metadata_file,
+)
+from internal.graph_database_builder import GraphDatabaseBuilder
+from internal.metered_graph_database_builder import MeteredGraphDatabaseBuilder
+from internal.parallel_export import process_match_events_in_parallel
+from store.build_manifest import save_build_state
+from store.export_checkpoint import ExportCheckpoint
+from store.graph_output_handlers.neo4j_output_handlers.nodes_file import NodesFile
+from store.graph_output_handlers.neo4j_output_handlers.relations_file import (
+    RelationsFile,
+)
+from store.id_registry import IdDimension, IdRegistry
+from store.stage_cache import StageCache
+from utils.input_readers import read_match_metadata
+from utils.stage_metrics import MetricsRecorder
+
+METADATA_NODES_STAGE = "metadata_nodes"
+PLAYER_NODES_STAGE = "player_nodes"
+MATCH_EVENTS_STAGE = "match_events"
+SEASON_STATS_STAGE = "season_stats"
+PLAYED_FOR_STAGE = "played_for"
+# the ID registry dimensions whose names a cached stage's IDs depend on
+STAGE_ID_DIMENSIONS = {
+    METADATA_NODES_STAGE: [
+        IdDimension.COUNTRY,
+        IdDimension.LEAGUE,
+        IdDimension.SEASON,
+        IdDimension.TEAM,
+    ],
+    PLAYER_NODES_STAGE: [IdDimension.PLAYER],
+    SEASON_STATS_STAGE: [IdDimension.PLAYER, IdDimension.SEASON, IdDimension.TEAM],
+    PLAYED_FOR_STAGE: [IdDimension.PLAYER, IdDimension.SEASON, IdDimension.TEAM],
+}
+
+
+def process_all_files_with_checkpoint(
+    matchMetadataFilepath: Union[str, Path],
+    matchEventsFilepath: Union[str, Path],
+    outputDirectory: Union[str, Path],
+    exportOptions: ExportOptions,
+    idRegistry: IdRegistry,
+    matchDates: Optional[Dict[Hashable, str]],
+    runReport: Dict[str, Any],
+    metricsRecorder: MetricsRecorder,
+    logger: logging.Logger,
+) -> None:
+    # a run that commits its output stage by stage, skipping what an earlier run with the same inputs and
+    # options has committed when resumed
+    outputOptions = exportOptions.output_options()
+    checkpointOptions = exportOptions.checkpoint_options()
+    chunkSize = exportOptions.chunkSize
+    checkpoint = ExportCheckpoint(
+        directory=outputDirectory,
+        runKey={
+            "inputFiles": {
+                str(filepath): [
+                    os.path.getsize(filepath),
+                    os.path.getmtime(filepath),
+                ]
+                for filepath in (matchMetadataFilepath, matchEventsFilepath)
+            },
+            "chunkSize": chunkSize,
+            **checkpointOptions,
+        },
+        resume=exportOptions.resume,
+    )
+    if not exportOptions.resume:
+        # the first stage is written to the staging directory, so typed relation files of earlier runs
+        # and season stats nodes files of earlier runs that weren't checkpointed are removed here
+        RelationsFile.remove_typed_files(
+            fileName=f"{outputDirectory}/football_event_graph_relations.csv.gz"
+        )
+        NodesFile.remove_season_stats_files(
+            fileName=f"{outputDirectory}/football_event_graph_nodes.csv.gz"
+        )
+    stageCache = None
+    if exportOptions.stageCacheDirectory is not None:
+        # the chunk size only changes the file names of a stage, which its chunk index is keyed on. The
+        # IDs of a stage also depend on the names the registry held before the run
+        stageCache = StageCache(
+            directory=exportOptions.stageCacheDirectory,
+            options={
+                **checkpointOptions,
+                **{
+                    key: value
+                    for key, value in outputOptions.items()
+                    if key not in ("traceMemory", "meterHandlers")
+                },
+            },
+            idRegistryNames=idRegistry.names,
+        )
+    runReport["checkpoint"] = {
+        "committedStages": list(checkpoint.stages),
+        "committedRows": checkpoint.committedRows,
+    }
+    process_files_with_checkpoint(
+        matchMetadataFilepath=matchMetadataFilepath,
+        matchEventsFilepath=matchEventsFilepath,
+        checkpoint=checkpoint,
+        columnar=exportOptions.columnar,
+        nextEventRelations=exportOptions.nextEventRelations,
+        matchDates=matchDates,
+        internCommentary=exportOptions.internCommentary,
+        chunkSize=chunkSize,
+        workers=exportOptions.workers,
+        outputOptions=outputOptions,
+        idRegistry=idRegistry,
+        stageCache=stageCache,
+        metricsRecorder=metricsRecorder,
+        logger=logger,
+    )
+    # written like more chunks of this process after its last one and the player nodes, so no committed
+    # file is replaced
+    aggregateStages = {
+        SEASON_STATS_STAGE: add_season_stats if exportOptions.seasonStats else None,
+        PLAYED_FOR_STAGE: (
+            add_player_rosters if exportOptions.playedForRelations else None
+        ),
+    }
+    for i, (stage, addAggregate) in enumerate(aggregateStages.items()):
+        if addAggregate is None:
+            continue
+        add_checkpointed_stage(
+            stage=stage,
+            addStage=partial(
+                addAggregate,
+                matchMetadataFilepath=matchMetadataFilepath,
+                matchEventsFilepath=matchEventsFilepath,
+                idRegistry=idRegistry,
+                chunkSize=chunkSize,
+                logger=logger,
+            ),
+            inputFiles=[matchMetadataFilepath, matchEventsFilepath],
+            chunkIndex=len(checkpoint.chunks) + 1 + i,
+            checkpoint=checkpoint,
+            stageCache=stageCache,
+            outputOptions=outputOptions,
+            metricsRecorder=metricsRecorder,
+            logger=logger,
+        )
+    if stageCache is not None:
+        stageCache.prune()
+        runReport["stageCache"] = stageCache.report()
+    with metricsRecorder.stage(name="build_manifest"):
+        save_build_state(
+            idRegistry=idRegistry,
+            buildManifest=full_build_manifest(
+                matchMetadataFilepath=matchMetadataFilepath,
+                matchEventsFilepath=matchEventsFilepath,
+                idRegistry=idRegistry,
+                chunkSize=chunkSize,
+            ),
+        )
+    checkpoint.finish()
+
+
+def process_files_with_checkpoint(
+    matchMetadataFilepath: Union[str, Path],
+    matchEventsFilepath: Union[str, Path],
+    checkpoint: ExportCheckpoint,
+    columnar: bool,
+    nextEventRelations: bool,
+    matchDates: Optional[Dict[Hashable, str]],
+    internCommentary: bool,
+    chunkSize: int,
+    workers: int,
+    outputOptions: Dict[str, Any],
+    idRegistry: IdRegistry,
+    stageCache: Optional[StageCache],
+    metricsRecorder: MetricsRecorder,
+    logger: logging.Logger,
+) -> None:
+    # The metadata and context nodes are committed as one stage, then the match events chunk by chunk and the
+    # player nodes last. Committed or cached stages are skipped, their ID maps are rebuilt from the input files,
+    # which assign IDs the same way every time
+    add_checkpointed_stage(
+        stage=METADATA_NODES_STAGE,
+        addStage=partial(
+            add_metadata_nodes,
+            matchMetadataFilepath=matchMetadataFilepath,
+            idRegistry=idRegistry,
+            logger=logger,
+        ),
+        inputFiles=[matchMetadataFilepath],
+        chunkIndex=None,
+        checkpoint=checkpoint,
+        stageCache=stageCache,
+        outputOptions=outputOptions,
+        metricsRecorder=metricsRecorder,
+        logger=logger,
+    )
+    with metricsRecorder.stage(name="read_match_metadata"):
+        matchMetadataDataframe = read_match_metadata(
+            matchMetadataFilepath=matchMetadataFilepath
+        )
+    with metricsRecorder.stage(name="id_maps"):
+        teamToIdMap = metadata_id_maps(
+            matchMetadataDataframe=matchMetadataDataframe, idRegistry=idRegistry
+        )[IdDimension.TEAM]
+    with metricsRecorder.stage(name="player_id_map"):
+        playerToIdMap = player_id_map(
+            matchEventsFilepath=matchEventsFilepath,
+            chunkSize=chunkSize,
+            idRegistry=idRegistry,
+            logger=logger,
+        )
+    commentaryTemplates = None
+    if internCommentary:
+        with metricsRecorder.stage(name="commentary_templates"):
+            commentaryTemplates = collect_commentary_templates(
+                matchEventsFilepath=matchEventsFilepath,
+                chunkSize=chunkSize,
+                logger=logger,
+            )
+    add_checkpointed_match_events(
+        matchEventsFilepath=matchEventsFilepath,
+        checkpoint=checkpoint,
+        teamToIdMap=teamToIdMap,
+        playerToIdMap=playerToIdMap,
+        columnar=columnar,
+        nextEventRelations=nextEventRelations,
+        matchDates=matchDates,
+        commentaryTemplates=commentaryTemplates,
+        chunkSize=chunkSize,
+        workers=workers,
+        outputOptions=outputOptions,
+        metricsRecorder=metricsRecorder,
+        logger=logger,
+    )
+    # written like one more chunk of this process after its last one
+    add_checkpointed_stage(
+        stage=PLAYER_NODES_STAGE,
+        addStage=partial(
+            add_player_nodes,
+            playerToIdMap=playerToIdMap,
+            commentaryTemplates=commentaryTemplates,
+            logger=logger,
+        ),
+        inputFiles=[matchEventsFilepath],
+        chunkIndex=len(checkpoint.chunks),
+        checkpoint=checkpoint,
+        stageCache=stageCache,
+        outputOptions=outputOptions,
+        metricsRecorder=metricsRecorder,
+        logger=logger,
+    )
+
+
+def add_metadata_nodes(
+    matchMetadataFilepath: Union[str, Path],
+    databaseBuilder: GraphDatabaseBuilder,
+    idRegistry: IdRegistry,
+    logger: logging.Logger,
+) -> None:
+    process_match_metadata_file(
+        matchMetadataFilepath=matchMetadataFilepath,
+        databaseBuilder=databaseBuilder,
+        logger=logger,
+        idRegistry=idRegistry,
+    )
+    add_match_event_context_nodes(databaseBuilder=databaseBuilder, logger=logger)
+
+
+def add_player_nodes(
+    databaseBuilder: GraphDatabaseBuilder,
+    playerToIdMap: Dict[str, int],
+    commentaryTemplates: Optional[CommentaryTemplates],
+    logger: logging.Logger,
+) -> None:
+    metricsRecorder = databaseBuilder.metricsRecorder
+    logger.info(msg="Adding player nodes")
+    with metricsRecorder.stage(name="add_players"):
+        databaseBuilder.add_players(playerToIdMap=playerToIdMap)
+    if commentaryTemplates is not None:
+        logger.info(msg="Adding commentary template nodes")
+        with metricsRecorder.stage(name="add_commentary_templates"):
+            databaseBuilder.add_commentary_templates(
+                templateToIdMap=commentaryTemplates.templateToIdMap
+            )
+
+
+def add_checkpointed_match_events(
+    matchEventsFilepath: Union[str, Path],
+    checkpoint: ExportCheckpoint,
+    teamToIdMap: Dict[str, int],
+    playerToIdMap: Dict[str, int],
+    columnar: bool,
+    nextEventRelations: bool,
+    matchDates: Optional[Dict[Hashable, str]],
+    commentaryTemplates: Optional[CommentaryTemplates],
+    chunkSize: int,
+    workers: int,
+    outputOptions: Dict[str, Any],
+    metricsRecorder: MetricsRecorder,
+    logger: logging.Logger,
+) -> None:
+    # the match event chunks are committed one by one and never cached, they only share the ID maps of the stages
+    if checkpoint.is_committed(stage=MATCH_EVENTS_STAGE):
+        logger.info(msg="Skipping the committed football events")
+        return
+    logger.info(msg="Adding football event nodes and relations")
+    if workers > 1:
+        process_match_events_in_parallel(
+            matchEventsFilepath=matchEventsFilepath,
+            outputDirectory=checkpoint.directory,
+            teamToIdMap=teamToIdMap,
+            playerToIdMap=playerToIdMap,
+            columnar=columnar,
+            nextEventRelations=nextEventRelations,
+            matchDates=matchDates,
+            commentaryTemplates=commentaryTemplates,
+            chunkSize=chunkSize,
+            workers=workers,
+            outputOptions=outputOptions,
+            logger=logger,
+            metricsRecorder=metricsRecorder,
+            checkpoint=checkpoint,
+        )
+    else:
+        add_checkpointed_football_events(
+            matchEventsFilepath=matchEventsFilepath,
+            checkpoint=checkpoint,
+            teamToIdMap=teamToIdMap,
+            playerToIdMap=playerToIdMap,
+            columnar=columnar,
+            nextEventRelations=nextEventRelations,
+            matchDates=matchDates,
+            commentaryTemplates=commentaryTemplates,
+            chunkSize=chunkSize,
+            outputOptions=outputOptions,
+            metricsRecorder=metricsRecorder,
+            logger=logger,
+        )
+    checkpoint.commit_stage(stage=MATCH_EVENTS_STAGE)
+
+
+def add_checkpointed_stage(
+    stage: str,
+    addStage: Callable[..., None],
+    inputFiles: List[Union[str, Path]],
+    chunkIndex: Optional[int],
+    checkpoint: ExportCheckpoint,
+    stageCache: Optional[StageCache],
+    outputOptions: Dict[str, Any],
+    metricsRecorder: MetricsRecorder,
+    logger: logging.Logger,
+) -> None:
+    # a stage written as a whole by addStage, committed at once. With a stage cache, a stage whose input files,
+    # code and options haven't changed is copied from the cache instead, and a fresh one is added to it
+    if checkpoint.is_committed(stage=stage):
+        logger.info(msg=f"Skipping the committed {stage} stage")
+        return
+    if stageCache is not None and stageCache.restore(
+        stage=stage,
+        inputFiles=inputFiles,
+        stagingDirectory=checkpoint.stagingDirectory,
+        chunkIndex=chunkIndex,
+        idDimensions=STAGE_ID_DIMENSIONS[stage],
+    ):
+        checkpoint.commit_stage(stage=stage)
+        logger.info(msg=f"Committed the {stage} stage from the stage cache")
+        return
+    databaseBuilder = MeteredGraphDatabaseBuilder(
+        databaseBuilder=create_database_builder(
+            outputDirectory=checkpoint.stagingDirectory,
+            outputOptions=outputOptions,
+            chunkIndex=chunkIndex,
+        ),
+        recorder=metricsRecorder,
+        meterHandlers=outputOptions.get("meterHandlers", False),
+    )
+    addStage(databaseBuilder=databaseBuilder)
+    with metricsRecorder.stage(name="close"):
+        databaseBuilder.close()
+    if stageCache is not None:
+        stageCache.store(
+            stage=stage,
+            inputFiles=inputFiles,
+            stagingDirectory=checkpoint.stagingDirectory,
+            chunkIndex=chunkIndex,
+            idDimensions=STAGE_ID_DIMENSIONS[stage],
+        )
+    metricsRecorder.rename_output_files(
+        renamedFiles=checkpoint.commit_stage(stage=stage)
+    )
+    logger.info(msg=f"Committed the {stage} stage")
@@ -0,0 +1,710 @@
+from typing import Dict, Hashable, Iterable, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_numeric_dtype
+
+from datamodel.existing_data_maps.assist_method_map import idToAssistMethodMap
+from datamodel.existing_data_maps.body_part_map import idToBodyPartMap
+from datamodel.existing_data_maps.event_situation import idToEventSituationMap
+from datamodel.existing_data_maps.event_types import idToEventTypeMap
+from datamodel.existing_data_maps.pitch_location_map import idToPitchLocationMap
+from datamodel.existing_data_maps.shot_outcome import idToShotOutcomeMap
+from datamodel.existing_data_maps.shot_placement import idToShotPlacementMap
+from datamodel.node_field import NodeField
+from datamodel.node_ids import BaseNodeId
+from datamodel.node_ids import CommentaryTemplateId
+from datamodel.node_ids import CountryId
+from datamodel.node_ids import DateId
+from datamodel.node_ids import EventContextId
+from datamodel.node_ids import LeagueId
+from datamodel.node_ids import MatchEventId
+from datamodel.node_ids import MatchId
+from datamodel.node_ids import NodeIdFormat
+from datamodel.node_ids import NumericNodeId
+from datamodel.node_ids import PlayerId
+from datamodel.node_ids import SeasonId
+from datamodel.node_ids import SeasonStatsId
+from datamodel.node_ids import TeamId
+from datamodel.node_ids import hashed_local_integer
+from datamodel.node_labels import NodeLabel
+from datamodel.relations import BaseRelationType
+from datamodel.relations import EventRelationType
+from datamodel.relations import GeneralRelationType
+from datamodel.relations import RelationField
+from internal.commentary_templates import CommentaryTemplates
+
+
+class NodeColumns(NamedTuple):
+    nodeIds: np.ndarray
+    nodeLabels: np.ndarray
+    nodeProperties: Dict[NodeField, np.ndarray]
+
+
+class RelationColumns(NamedTuple):
+    startNodeIds: np.ndarray
+    endNodeIds: np.ndarray
+    relationTypes: np.ndarray
+    relationProperties: Optional[Dict[RelationField, np.ndarray]] = None
+
+
+class _RelationBlock(NamedTuple):
+    rowPositions: np.ndarray
+    startNodeIds: np.ndarray
+    endNodeIds: np.ndarray
+    relationType: BaseRelationType
+    relationProperties: Optional[Dict[RelationField, np.ndarray]] = None
+
+
+def column_node_ids(
+    nodeIdClass: type, values: pd.Series, nodeIdFormat: NodeIdFormat
+) -> np.ndarray:
+    # same formatting as NodeIdFormat.format for single-valued ids, applied to the whole column at once
+    letter = nodeIdClass(None).letter
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # formatted once per category and taken by code
+        categoryNodeIds = column_node_ids(
+            nodeIdClass=nodeIdClass,
+            values=values.cat.categories.to_series(),
+            nodeIdFormat=nodeIdFormat,
+        )
+        return categoryNodeIds[values.cat.codes.to_numpy()]
+    if not nodeIdFormat.integerIds:
+        return (letter + values.astype(str)).to_numpy(dtype=object)
+    integerGroup = BaseNodeId.integer_group(letter=letter)
+    if issubclass(nodeIdClass, NumericNodeId):
+        localIntegers = values.to_numpy(dtype=np.int64)
+    else:
+        localIntegers = np.fromiter(
+            (hashed_local_integer(value=str(value)) for value in values),
+            dtype=np.int64,
+            count=len(values),
+        )
+    return (integerGroup | localIntegers).astype(str).astype(object)
+
+
+def map_to_node_ids(
+    values: pd.Series, valueToNodeIdMap: Dict[Hashable, str]
+) -> np.ndarray:
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # mapped once per category and taken by code, nulls are masked out by the callers
+        values = values.cat.remove_unused_categories()
+        categoryNodeIds = values.cat.categories.to_series().map(valueToNodeIdMap)
+        missing = categoryNodeIds.isnull()
+        if missing.any():
+            raise KeyError(categoryNodeIds.index[missing.to_numpy()][0])
+        return categoryNodeIds.to_numpy(dtype=object)[values.cat.codes.to_numpy()]
+    nodeIds = values.map(valueToNodeIdMap)
+    missing = nodeIds.isnull()
+    if missing.any():
+        raise KeyError(values[missing].iloc[0])
+    return nodeIds.to_numpy(dtype=object)
+
+
+def node_id_lookup(
+    keyToIdMap: Dict[Hashable, int], nodeIdClass: type, nodeIdFormat: NodeIdFormat
+) -> Dict[Hashable, str]:
+    return {
+        key: nodeIdFormat.format(nodeIdClass(int(i))) for key, i in keyToIdMap.items()
+    }
+
+
+def event_context_id_lookup(
+    idToContextMap: Dict[int, str], nodeIdFormat: NodeIdFormat
+) -> Dict[int, str]:
+    return {
+        i: nodeIdFormat.format(EventContextId(eventType=context, eventId=i))
+        for i, context in idToContextMap.items()
+    }
+
+
+def object_column(values: pd.Series) -> np.ndarray:
+    # equivalent of replace_nan_with_none_in_dataframe for a single column: numeric nulls stay NaN, which the
+    # nodes file writes as nan like the row builder, the nulls of other columns become None
+    column = values.to_numpy(dtype=object, copy=True)
+    if not is_numeric_dtype(values.dtype):
+        column[values.isnull().to_numpy()] = None
+    return column
+
+
+def interleave_relation_blocks(blocks: List[_RelationBlock]) -> RelationColumns:
+    # blocks are concatenated in emission order, so a stable sort on the row position reproduces row-by-row output
+    rowPositions = np.concatenate([block.rowPositions for block in blocks])
+    order = np.argsort(rowPositions, kind="stable")
+    startNodeIds = np.concatenate([block.startNodeIds for block in blocks])
+    endNodeIds = np.concatenate([block.endNodeIds for block in blocks])
+    relationTypes = np.concatenate(
+        [
+            np.full(len(block.rowPositions), block.relationType, dtype=object)
+            for block in blocks
+        ]
+    )
+    # blocks without properties get None values, their relation types have no fields
+    fields = dict.fromkeys(
+        field for block in blocks for field in (block.relationProperties or {})
+    )
+    relationProperties = {
+        field: np.concatenate(
+            [
+                (block.relationProperties or {}).get(
+                    field, np.full(len(block.rowPositions), None, dtype=object)
+                )
+                for block in blocks
+            ]
+        )[order]
+        for field in fields
+    }
+    return RelationColumns(
+        startNodeIds=startNodeIds[order],
+        endNodeIds=endNodeIds[order],
+        relationTypes=relationTypes[order],
+        relationProperties=relationProperties or None,
+    )
+
+
+def constant_labels(labels: List[str], size: int) -> np.ndarray:
+    nodeLabels = np.empty(size, dtype=object)
+    nodeLabels[:] = [labels] * size
+    return nodeLabels
+
+
+def date_node_ids(dates: pd.Series, nodeIdFormat: NodeIdFormat) -> np.ndarray:
+    dateNodeIds = {
+        date: nodeIdFormat.format(DateId(*date.split("-"))) for date in dates.unique()
+    }
+    return map_to_node_ids(values=dates, valueToNodeIdMap=dateNodeIds)
+
+
+def match_node_columns(
+    metadata: pd.DataFrame, nodeIdFormat: NodeIdFormat
+) -> NodeColumns:
+    return NodeColumns(
+        nodeIds=column_node_ids(
+            nodeIdClass=MatchId, values=metadata["id_odsp"], nodeIdFormat=nodeIdFormat
+        ),
+        nodeLabels=constant_labels(labels=[NodeLabel.MATCH], size=len(metadata)),
+        nodeProperties={
+            nodeField: object_column(values=metadata[column])
+            for nodeField, column in (
+                (NodeField.FULLTIME_HOME_GOALS, "fthg"),
+                (NodeField.FULLTIME_AWAY_GOALS, "ftag"),
+                (NodeField.HOME_ODDS, "odd_h"),
+                (NodeField.AWAY_ODDS, "odd_a"),
+                (NodeField.DRAW_ODDS, "odd_d"),
+                (NodeField.OVER_25_GOAL_ODDS, "odd_over"),
+                (NodeField.UNDER_25_GOAL_ODDS, "odd_under"),
+                (NodeField.BOTH_TEAMS_TO_SCORE_ODDS, "odd_bts"),
+                (NodeField.NOT_BOTH_TEAMS_TO_SCORE_ODDS, "odd_bts_n"),
+            )
+        },
+    )
+
+
+def team_match_sequence(
+    metadata: pd.DataFrame, lastMatchForTeam: Optional[pd.DataFrame] = None
+) -> pd.DataFrame:
+    # one row per (team, match) appearance, with the team's previous match by date. Matches from earlier runs
+    # (team, date, id_odsp) take part in the ordering with a row position of -1, so new matches link back to them
+    appearances = [
+        pd.DataFrame(
+            {
+                "team": metadata[teamColumn].to_numpy(),
+                "rowPosition": np.arange(len(metadata)),
+                "date": metadata["date"].to_numpy(),
+                "matchId": metadata["id_odsp"].to_numpy(),
+            }
+        )
+        for teamColumn in ("ht", "at")
+    ]
+    if lastMatchForTeam is not None:
+        appearances.append(
+            pd.DataFrame(
+                {
+                    "team": lastMatchForTeam["team"].to_numpy(),
+                    "rowPosition": -1,
+                    "date": lastMatchForTeam["date"].to_numpy(),
+                    "matchId": lastMatchForTeam["id_odsp"].to_numpy(),
+                }
+            )
+        )
+    appearances = pd.concat(appearances, ignore_index=True).sort_values(
+        by=["team", "date", "matchId"], kind="mergesort"
+    )
+    appearances["previousMatchId"] = appearances.groupby("team")["matchId"].shift(1)
+    return appearances
+
+
+def match_relation_columns(
+    metadata: pd.DataFrame,
+    nodeIdFormat: NodeIdFormat,
+    lastMatchForTeam: Optional[pd.DataFrame] = None,
+    existingLeagues: Iterable[int] = (),
+) -> RelationColumns:
+    rowPositions = np.arange(len(metadata))
+    matchIds = column_node_ids(
+        nodeIdClass=MatchId, values=metadata["id_odsp"], nodeIdFormat=nodeIdFormat
+    )
+    leagueIds = column_node_ids(
+        nodeIdClass=LeagueId, values=metadata["league"], nodeIdFormat=nodeIdFormat
+    )
+    countryIds = column_node_ids(
+        nodeIdClass=CountryId, values=metadata["country"], nodeIdFormat=nodeIdFormat
+    )
+    blocks = [
+        _RelationBlock(
+            rowPositions=rowPositions,
+            startNodeIds=date_node_ids(
+                dates=metadata["date"], nodeIdFormat=nodeIdFormat
+            ),
+            endNodeIds=matchIds,
+            relationType=GeneralRelationType.ON_DATE,
+        ),
+        _RelationBlock(
+            rowPositions=rowPositions,
+            startNodeIds=column_node_ids(
+                nodeIdClass=SeasonId,
+                values=metadata["season"],
+                nodeIdFormat=nodeIdFormat,
+            ),
+            endNodeIds=matchIds,
+            relationType=GeneralRelationType.IN_SEASON,
+        ),
+        _RelationBlock(
+            rowPositions=rowPositions,
+            startNodeIds=matchIds,
+            endNodeIds=column_node_ids(
+                nodeIdClass=TeamId, values=metadata["ht"], nodeIdFormat=nodeIdFormat
+            ),
+            relationType=GeneralRelationType.HOME_TEAM,
+        ),
+        _RelationBlock(
+            rowPositions=rowPositions,
+            startNodeIds=matchIds,
+            endNodeIds=column_node_ids(
+                nodeIdClass=TeamId, values=metadata["at"], nodeIdFormat=nodeIdFormat
+            ),
+            relationType=GeneralRelationType.AWAY_TEAM,
+        ),
+    ]
+
+    # both teams can share the same consecutive pair of matches, so pairs are deduplicated.
+    # Matches from earlier runs are never the later end of a NEXT relation, their relations already exist
+    nextMatches = team_match_sequence(
+        metadata=metadata, lastMatchForTeam=lastMatchForTeam
+    )
+    nextMatches = nextMatches[
+        nextMatches["previousMatchId"].notnull() & (nextMatches["rowPosition"] >= 0)
+    ].drop_duplicates(subset=["previousMatchId", "rowPosition"])
+    nextRowPositions = nextMatches["rowPosition"].to_numpy()
+    blocks.append(
+        _RelationBlock(
+            rowPositions=nextRowPositions,
+            startNodeIds=column_node_ids(
+                nodeIdClass=MatchId,
+                values=nextMatches["previousMatchId"],
+                nodeIdFormat=nodeIdFormat,
+            ),
+            endNodeIds=matchIds[nextRowPositions],
+            relationType=GeneralRelationType.NEXT,
+        )
+    )
+    blocks.append(
+        _RelationBlock(
+            rowPositions=rowPositions,
+            startNodeIds=matchIds,
+            endNodeIds=leagueIds,
+            relationType=GeneralRelationType.IN_LEAGUE,
+        )
+    )
+    # league -> country is a property of the league, so it's only emitted for the first match of each league
+    firstLeagueRows = (
+        pd.DataFrame({"league": leagueIds, "country": countryIds})[
+            ~metadata["league"].isin(list(existingLeagues)).to_numpy()
+        ]
+        .drop_duplicates()
+        .index.to_numpy()
+    )
+    blocks.append(
+        _RelationBlock(
+            rowPositions=firstLeagueRows,
+            startNodeIds=leagueIds[firstLeagueRows],
+            endNodeIds=countryIds[firstLeagueRows],
+            relationType=GeneralRelationType.IN_COUNTRY,
+        )
+    )
+    return interleave_relation_blocks(blocks=blocks)
+
+
+def _match_event_labels(eventData: pd.DataFrame) -> np.ndarray:
+    eventType1 = eventData["event_type"].map(idToEventTypeMap).fillna("")
+    eventType2 = eventData["event_type2"].map(idToEventTypeMap).fillna("")
+    codes, uniqueLabelPairs = pd.MultiIndex.from_arrays(
+        [eventType1, eventType2]
+    ).factorize()
+    uniqueLabels = np.empty(len(uniqueLabelPairs), dtype=object)
+    for i, labelPair in enumerate(uniqueLabelPairs):
+        uniqueLabels[i] = [NodeLabel.MATCH_EVENT] + [v for v in labelPair if v]
+    return uniqueLabels[codes]
+
+
+def flag_column(values: pd.Series) -> np.ndarray:
+    # missing flags are False, like bool(None) in the row-wise path, a plain astype(bool) would make NaN True
+    return values.fillna(False).astype(bool).to_numpy()
+
+
+def match_event_node_columns(
+    eventData: pd.DataFrame, nodeIdFormat: NodeIdFormat, internCommentary: bool = False
+) -> NodeColumns:
+    # with internCommentary the text is left to the commentary templates
+    return NodeColumns(
+        nodeIds=column_node_ids(
+            nodeIdClass=MatchEventId,
+            values=eventData["id_event"],
+            nodeIdFormat=nodeIdFormat,
+        ),
+        nodeLabels=_match_event_labels(eventData=eventData),
+        nodeProperties={
+            NodeField.IS_FAST_BREAK: flag_column(values=eventData["fast_break"]),
+            NodeField.IS_GOAL: flag_column(values=eventData["is_goal"]),
+            NodeField.TEXT: (
+                np.full(len(eventData), None, dtype=object)
+                if internCommentary
+                else object_column(values=eventData["text"])
+            ),
+            NodeField.MATCH_EVENT_TIME: eventData["time"].to_numpy(dtype=object),
+            NodeField.SORT_ORDER: eventData["sort_order"].to_numpy(dtype=object),
+        },
+    )
+
+
+def event_relation_properties(
+    eventData: pd.DataFrame, matchDates: Dict[Hashable, str]
+) -> Dict[RelationField, np.ndarray]:
+    # RelationField.EVENT_FIELDS of every event, matches without a date leave it empty
+    return {
+        RelationField.MATCH_EVENT_TIME: eventData["time"].to_numpy(dtype=object),
+        RelationField.IS_GOAL: flag_column(values=eventData["is_goal"]).astype(object),
+        RelationField.MATCH_DATE: object_column(
+            values=eventData["id_odsp"].astype(object).map(matchDates)
+        ),
+    }
+
+
+def match_event_relation_columns(
+    eventData: pd.DataFrame,
+    teamToIdMap: Dict[str, int],
+    playerToIdMap: Dict[str, int],
+    nodeIdFormat: NodeIdFormat,
+    matchDates: Optional[Dict[Hashable, str]] = None,
+) -> RelationColumns:
+    # with matchDates, the HAS_MATCH_EVENT, EVENT_TEAM and PLAYER_1 relations get the event_relation_properties
+    rowPositions = np.arange(len(eventData))
+    matchIds = column_node_ids(
+        nodeIdClass=MatchId, values=eventData["id_odsp"], nodeIdFormat=nodeIdFormat
+    )
+    matchEventIds = column_node_ids(
+        nodeIdClass=MatchEventId,
+        values=eventData["id_event"],
+        nodeIdFormat=nodeIdFormat,
+    )
+    teamNodeIds = node_id_lookup(
+        keyToIdMap=teamToIdMap, nodeIdClass=TeamId, nodeIdFormat=nodeIdFormat
+    )
+    playerNodeIds = node_id_lookup(
+        keyToIdMap=playerToIdMap, nodeIdClass=PlayerId, nodeIdFormat=nodeIdFormat
+    )
+    eventProperties = (
+        None
+        if matchDates is None
+        else event_relation_properties(eventData=eventData, matchDates=matchDates)
+    )
+
+    def _block_properties(
+        relationType: BaseRelationType, mask: np.ndarray
+    ) -> Optional[Dict[RelationField, np.ndarray]]:
+        if eventProperties is None or not RelationField.fields(relationType):
+            return None
+        return {field: values[mask] for field, values in eventProperties.items()}
+
+    blocks = [
+        _RelationBlock(
+            rowPositions=rowPositions,
+            startNodeIds=matchIds,
+            endNodeIds=matchEventIds,
+            relationType=GeneralRelationType.HAS_MATCH_EVENT,
+            relationProperties=_block_properties(
+                relationType=GeneralRelationType.HAS_MATCH_EVENT,
+                mask=np.ones(len(eventData), dtype=bool),
+            ),
+        )
+    ]
+
+    def _add_block(
+        column: str,
+        valueToNodeIdMap: Dict[Hashable, str],
+        relationType: BaseRelationType,
+        asInteger: bool = False,
+    ) -> None:
+        mask = eventData[column].notnull().to_numpy()
+        values = eventData[column][mask]
+        if asInteger:
+            values = values.astype(int)
+        blocks.append(
+            _RelationBlock(
+                rowPositions=rowPositions[mask],
+                startNodeIds=matchEventIds[mask],
+                endNodeIds=map_to_node_ids(
+                    values=values, valueToNodeIdMap=valueToNodeIdMap
+                ),
+                relationType=relationType,
+                relationProperties=_block_properties(
+                    relationType=relationType, mask=mask
+                ),
+            )
+        )
+
+    # same emission order as GraphDatabaseBuilder.add_football_events
+    _add_block("event_team", teamNodeIds, EventRelationType.EVENT_TEAM)
+    _add_block("opponent", teamNodeIds, EventRelationType.OPPONENT_TEAM)
+    # player + player2 pairs are always distinct from playerIn + playerOut pairs
+    _add_block("player", playerNodeIds, EventRelationType.PLAYER_1)
+    _add_block("player2", playerNodeIds, EventRelationType.PLAYER_2)
+    _add_block("player_in", playerNodeIds, EventRelationType.PLAYER_1)
+    _add_block("player_out", playerNodeIds, EventRelationType.PLAYER_2)
+    for column, idToContextMap, relationType in (
+        ("shot_place", idToShotPlacementMap, EventRelationType.SHOT_PLACEMENT),
+        ("shot_outcome", idToShotOutcomeMap, EventRelationType.SHOT_OUTCOME),
+        ("location", idToPitchLocationMap, EventRelationType.PITCH_LOCATION),
+        ("bodypart", idToBodyPartMap, EventRelationType.BODY_PART),
+        ("assist_method", idToAssistMethodMap, EventRelationType.ASSIST_METHOD),
+        ("situation", idToEventSituationMap, EventRelationType.EVENT_SITUATION),
+    ):
+        _add_block(
+            column,
+            event_context_id_lookup(
+                idToContextMap=idToContextMap, nodeIdFormat=nodeIdFormat
+            ),
+            relationType,
+            asInteger=True,
+        )
+    return interleave_relation_blocks(blocks=blocks)
+
+
+def match_event_sequence(
+    eventData: pd.DataFrame, lastEventForMatch: Optional[pd.DataFrame] = None
+) -> pd.DataFrame:
+    # one row per event in match order (sort_order, then time), with the match's previous event. The last events
+    # of earlier chunks (id_odsp, sort_order, time, id_event) take part in the ordering with a row position of -1,
+    # so events of a match that continues in this chunk link back to them
+    events = []
+    if lastEventForMatch is not None:
+        events.append(
+            pd.DataFrame(
+                {
+                    "matchId": lastEventForMatch["id_odsp"].to_numpy(dtype=object),
+                    "rowPosition": -1,
+                    "sortOrder": lastEventForMatch["sort_order"].to_numpy(),
+                    "time": lastEventForMatch["time"].to_numpy(),
+                    "eventId": lastEventForMatch["id_event"].to_numpy(dtype=object),
+                }
+            )
+        )
+    events.append(
+        pd.DataFrame(
+            {
+                "matchId": eventData["id_odsp"].to_numpy(dtype=object),
+                "rowPosition": np.arange(len(eventData)),
+                "sortOrder": eventData["sort_order"].to_numpy(),
+                "time": eventData["time"].to_numpy(),
+                "eventId": eventData["id_event"].to_numpy(dtype=object),
+            }
+        )
+    )
+    events = pd.concat(events, ignore_index=True).sort_values(
+        by=["matchId", "sortOrder", "time"], kind="mergesort"
+    )
+    events["previousEventId"] = events.groupby("matchId")["eventId"].shift(1)
+    return events
+
+
+def last_event_for_match(eventSequence: pd.DataFrame) -> pd.DataFrame:
+    # the state match_event_sequence continues from in the next chunk
+    return (
+        eventSequence.drop_duplicates(subset=["matchId"], keep="last")[
+            ["matchId", "sortOrder", "time", "eventId"]
+        ]
+        .set_axis(["id_odsp", "sort_order", "time", "id_event"], axis=1)
+        .reset_index(drop=True)
+    )
+
+
+def next_event_relation_columns(
+    eventSequence: pd.DataFrame, nodeIdFormat: NodeIdFormat
+) -> RelationColumns:
+    # events of earlier chunks are never the later end of a NEXT_EVENT relation, theirs were emitted with them.
+    # Relations are in the row order of their later event
+    nextEvents = eventSequence[
+        eventSequence["previousEventId"].notnull() & (eventSequence["rowPosition"] >= 0)
+    ].sort_values(by="rowPosition", kind="mergesort")
+    return RelationColumns(
+        startNodeIds=column_node_ids(
+            nodeIdClass=MatchEventId,
+            values=nextEvents["previousEventId"],
+            nodeIdFormat=nodeIdFormat,
+        ),
+        endNodeIds=column_node_ids(
+            nodeIdClass=MatchEventId,
+            values=nextEvents["eventId"],
+            nodeIdFormat=nodeIdFormat,
+        ),
+        relationTypes=np.full(
+            len(nextEvents), GeneralRelationType.NEXT_EVENT, dtype=object
+        ),
+    )
+
+
+SEASON_STATS_ENTITIES = {
+    BaseNodeId.Letters.PLAYER: (PlayerId, GeneralRelationType.PLAYER_SEASON_STATS),
+    BaseNodeId.Letters.TEAM: (TeamId, GeneralRelationType.TEAM_SEASON_STATS),
+}
+
+
+def season_stats_node_ids(
+    seasonStats: pd.DataFrame, nodeIdFormat: NodeIdFormat
+) -> np.ndarray:
+    # one node per player or team and season, so there are at most a few hundred thousand of them
+    return np.array(
+        [
+            nodeIdFormat.format(SeasonStatsId(entityLetter, entityId, seasonId))
+            for entityLetter, entityId, seasonId in zip(
+                seasonStats["entityLetter"],
+                seasonStats["entityId"],
+                seasonStats["seasonId"],
+            )
+        ],
+        dtype=object,
+    )
+
+
+def season_stats_node_columns(
+    seasonStats: pd.DataFrame, nodeIdFormat: NodeIdFormat
+) -> NodeColumns:
+    return NodeColumns(
+        nodeIds=season_stats_node_ids(
+            seasonStats=seasonStats, nodeIdFormat=nodeIdFormat
+        ),
+        nodeLabels=constant_labels(
+            labels=[NodeLabel.SEASON_STATS], size=len(seasonStats)
+        ),
+        nodeProperties={
+            NodeField.TEXT: seasonStats["text"].to_numpy(dtype=object),
+            **{
+                field: seasonStats[field].to_numpy(dtype=object)
+                for field in NodeField.SEASON_STATS_FIELDS
+            },
+        },
+    )
+
+
+def season_stats_relation_columns(
+    seasonStats: pd.DataFrame, nodeIdFormat: NodeIdFormat
+) -> RelationColumns:
+    rowPositions = np.arange(len(seasonStats))
+    statsIds = season_stats_node_ids(seasonStats=seasonStats, nodeIdFormat=nodeIdFormat)
+    blocks = []
+    for entityLetter, (nodeIdClass, relationType) in SEASON_STATS_ENTITIES.items():
+        mask = (seasonStats["entityLetter"] == entityLetter).to_numpy()
+        blocks.append(
+            _RelationBlock(
+                rowPositions=rowPositions[mask],
+                startNodeIds=column_node_ids(
+                    nodeIdClass=nodeIdClass,
+                    values=seasonStats["entityId"][mask],
+                    nodeIdFormat=nodeIdFormat,
+                ),
+                endNodeIds=statsIds[mask],
+                relationType=relationType,
+            )
+        )
+    blocks.append(
+        _RelationBlock(
+            rowPositions=rowPositions,
+            startNodeIds=statsIds,
+            endNodeIds=column_node_ids(
+                nodeIdClass=SeasonId,
+                values=seasonStats["seasonId"],
+                nodeIdFormat=nodeIdFormat,
+            ),
+            relationType=GeneralRelationType.FOR_SEASON,
+        )
+    )
+    return interleave_relation_blocks(blocks=blocks)
+
+
+def played_for_relation_columns(
+    playerRosters: pd.DataFrame, nodeIdFormat: NodeIdFormat
+) -> RelationColumns:
+    # one PLAYED_FOR relation per row of PlayerRosterAggregator.result, from the player to the team
+    return RelationColumns(
+        startNodeIds=column_node_ids(
+            nodeIdClass=PlayerId,
+            values=playerRosters["playerId"],
+            nodeIdFormat=nodeIdFormat,
+        ),
+        endNodeIds=column_node_ids(
+            nodeIdClass=TeamId,
+            values=playerRosters["teamId"],
+            nodeIdFormat=nodeIdFormat,
+        ),
+        relationTypes=np.full(
+            len(playerRosters), GeneralRelationType.PLAYED_FOR, dtype=object
+        ),
+        relationProperties={
+            field: playerRosters[field].to_numpy(dtype=object)
+            for field in RelationField.fields(GeneralRelationType.PLAYED_FOR)
+        },
+    )
+
+
+def commentary_relation_columns(
+    eventData: pd.DataFrame,
+    commentaryTemplates: CommentaryTemplates,
+    nodeIdFormat: NodeIdFormat,
+) -> RelationColumns:
+    # a HAS_COMMENTARY relation from every event with text to its template, with the names cut out of the text
+    templateIds, parameters = commentaryTemplates.event_splits(eventData=eventData)
+    mask = templateIds >= 0
+    return RelationColumns(
+        startNodeIds=column_node_ids(
+            nodeIdClass=MatchEventId,
+            values=eventData["id_event"],
+            nodeIdFormat=nodeIdFormat,
+        )[mask],
+        endNodeIds=column_node_ids(
+            nodeIdClass=CommentaryTemplateId,
+            values=pd.Series(templateIds[mask], dtype=np.int64),
+            nodeIdFormat=nodeIdFormat,
+        ),
+        relationTypes=np.full(
+            int(mask.sum()), GeneralRelationType.HAS_COMMENTARY, dtype=object
+        ),
+        relationProperties={RelationField.COMMENTARY_PARAMETERS: parameters[mask]},
+    )
+
+
+def commentary_template_node_columns(
+    templateToIdMap: Dict[str, int], nodeIdFormat: NodeIdFormat
+) -> NodeColumns:
+    return NodeColumns(
+        nodeIds=column_node_ids(
+            nodeIdClass=CommentaryTemplateId,
+            values=pd.Series(list(templateToIdMap.values()), dtype=np.int64),
+            nodeIdFormat=nodeIdFormat,
+        ),
+        nodeLabels=constant_labels(
+            labels=[NodeLabel.COMMENTARY_TEMPLATE], size=len(templateToIdMap)
+        ),
+        nodeProperties={
+            NodeField.TEXT: np.array(list(templateToIdMap.keys()), dtype=object)
+        },
+    )
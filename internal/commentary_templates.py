@@ -0,0 +1,139 @@
+import re
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# the names of an event that are cut out of its commentary line as parameters
+COMMENTARY_PARAMETER_COLUMNS = [
+    "player",
+    "player2",
+    "player_in",
+    "player_out",
+    "event_team",
+    "opponent",
+]
+# the events are split while the templates are collected, and looked up by id_event when they are written
+COMMENTARY_COLUMNS = ["id_event", "text"] + COMMENTARY_PARAMETER_COLUMNS
+# neo4j-admin import splits string[] properties on it, so names containing it stay in the template
+ARRAY_DELIMITER = ";"
+# compiled once per player or team name, of which there are only thousands
+_namePatterns: Dict[str, "re.Pattern[str]"] = {}
+
+
+def _name_pattern(name: str) -> "re.Pattern[str]":
+    # whole names only and ignoring case, the event columns of the Kaggle data hold the names in lower case
+    pattern = _namePatterns.get(name)
+    if pattern is None:
+        pattern = _namePatterns[name] = re.compile(
+            rf"(?<!\w){re.escape(name)}(?!\w)", flags=re.IGNORECASE
+        )
+    return pattern
+
+
+def split_commentary(text: str, names: Iterable[Any]) -> Tuple[str, List[str]]:
+    # Cuts the names of an event out of its commentary line, leaving a printf-style template that many events
+    # share and the names as they are written in the text. Longer names are cut first, so a name is never taken
+    # for the start of a longer one. render_commentary puts the line back together
+    spans: List[Tuple[int, int]] = []
+    names = {
+        name
+        for name in names
+        if isinstance(name, str) and name.strip() and ARRAY_DELIMITER not in name
+    }
+    for name in sorted(names, key=lambda name: (-len(name), name)):
+        for match in _name_pattern(name).finditer(text):
+            start, end = match.span()
+            if all(
+                end <= spanStart or start >= spanEnd for spanStart, spanEnd in spans
+            ):
+                spans.append((start, end))
+    pieces: List[str] = []
+    parameters: List[str] = []
+    position = 0
+    for start, end in sorted(spans):
+        pieces.append(text[position:start].replace("%", "%%"))
+        pieces.append("%s")
+        parameters.append(text[start:end])
+        position = end
+    pieces.append(text[position:].replace("%", "%%"))
+    return "".join(pieces), parameters
+
+
+def render_commentary(template: str, parameters: Sequence[str]) -> str:
+    # the commentary line of an event from its template and the commentaryParameters of its HAS_COMMENTARY
+    # relation, like apoc.text.format(template.text, relation.commentaryParameters) in Cypher
+    return template % tuple(parameters or ())
+
+
+def split_commentaries(eventData: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    # the template and parameters of every event, both None for events without text
+    templates = np.full(len(eventData), None, dtype=object)
+    parameters = np.full(len(eventData), None, dtype=object)
+    texts = eventData["text"].to_numpy(dtype=object)
+    names = zip(
+        *[
+            eventData[column].to_numpy(dtype=object)
+            for column in COMMENTARY_PARAMETER_COLUMNS
+        ]
+    )
+    for i, (text, eventNames) in enumerate(zip(texts, names)):
+        if isinstance(text, str):
+            templates[i], parameters[i] = split_commentary(text=text, names=eventNames)
+    return templates, parameters
+
+
+class CommentaryTemplates:
+    # The template and parameters of every event, split once while the templates are collected and looked up by
+    # id_event when the events are written. The template IDs follow the sorted templates, so they are the same in
+    # every run on the same input
+    def __init__(self):
+        self.eventIdParts: List[np.ndarray] = []
+        self.templateParts: List[np.ndarray] = []
+        self.parameterParts: List[np.ndarray] = []
+        self.templateToIdMap: Dict[str, int] = {}
+        self.eventIndex = pd.Index([], dtype=object)
+        self.templateIds = np.zeros(0, dtype=np.int64)
+        self.parameters = np.zeros(0, dtype=object)
+
+    def add(self, eventData: pd.DataFrame) -> None:
+        templates, parameters = split_commentaries(eventData=eventData)
+        mask = pd.notnull(templates)
+        self.eventIdParts.append(eventData["id_event"].to_numpy(dtype=object)[mask])
+        self.templateParts.append(templates[mask])
+        self.parameterParts.append(parameters[mask])
+
+    def finish(self) -> "CommentaryTemplates":
+        eventIds = np.concatenate([np.zeros(0, dtype=object)] + self.eventIdParts)
+        templates = np.concatenate([np.zeros(0, dtype=object)] + self.templateParts)
+        parameters = np.concatenate([np.zeros(0, dtype=object)] + self.parameterParts)
+        self.eventIdParts, self.templateParts, self.parameterParts = [], [], []
+        uniqueTemplates, templateIds = np.unique(templates, return_inverse=True)
+        self.templateToIdMap = {
+            template: i for i, template in enumerate(uniqueTemplates)
+        }
+        # an id_event that occurs more than once may have different texts, those events are split when written
+        unique = ~pd.Index(eventIds).duplicated(keep=False)
+        self.eventIndex = pd.Index(eventIds[unique], dtype=object)
+        self.templateIds = templateIds[unique].astype(np.int64)
+        self.parameters = parameters[unique]
+        return self
+
+    def event_splits(self, eventData: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        # the template ID and parameters of every event, -1 and None for events without text
+        positions = self.eventIndex.get_indexer(
+            eventData["id_event"].to_numpy(dtype=object)
+        )
+        found = positions >= 0
+        templateIds = np.full(len(eventData), -1, dtype=np.int64)
+        parameters = np.full(len(eventData), None, dtype=object)
+        templateIds[found] = self.templateIds[positions[found]]
+        parameters[found] = self.parameters[positions[found]]
+        missing = ~found & pd.notnull(eventData["text"]).to_numpy()
+        if missing.any():
+            templates, missingParameters = split_commentaries(
+                eventData=eventData[missing]
+            )
+            templateIds[missing] = [self.templateToIdMap[t] for t in templates]
+            parameters[missing] = missingParameters
+        return templateIds, parameters
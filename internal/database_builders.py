@@ -0,0 +1,150 @@
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from datamodel.node_ids import NodeIdFormat
+from internal.graph_database_builder import GraphDatabaseBuilder
+from store.graph_output_handlers.csr_output_handlers.csr_graph_store import (
+    CsrGraphStore,
+)
+from store.graph_output_handlers.csr_output_handlers.csr_nodes import CsrNodes
+from store.graph_output_handlers.csr_output_handlers.csr_relations import CsrRelations
+from store.graph_output_handlers.neo4j_output_handlers.bolt_batch_writer import (
+    create_bolt_driver,
+)
+from store.graph_output_handlers.neo4j_output_handlers.bolt_nodes import BoltNodes
+from store.graph_output_handlers.neo4j_output_handlers.bolt_relations import (
+    BoltRelations,
+)
+from store.graph_output_handlers.neo4j_output_handlers.nodes_file import NodesFile
+from store.graph_output_handlers.neo4j_output_handlers.relations_file import (
+    RelationsFile,
+)
+from store.graph_output_handlers.neo4j_output_handlers.typed_nodes_files import (
+    TypedNodesFiles,
+)
+
+CSR_GRAPH_DIRECTORY = "csr_graph"
+
+
+def create_database_builder(
+    outputDirectory: Union[str, Path],
+    outputOptions: Dict[str, Any],
+    partIndex: Optional[int] = None,
+    chunkIndex: Optional[int] = None,
+) -> GraphDatabaseBuilder:
+    fileOptions = {
+        key: value
+        for key, value in outputOptions.items()
+        if key in ("compressionLevel", "pipelined", "compressionThreads")
+    }
+    # built from the options in the parent and in every worker process, so they all format node IDs the same way
+    nodeIdFormat = NodeIdFormat(integerIds=outputOptions.get("integerIds", False))
+    if outputOptions.get("boltUri"):
+        return create_bolt_database_builder(
+            outputOptions=outputOptions,
+            nodeIdFormat=nodeIdFormat,
+            createIndexes=partIndex is None,
+        )
+    if outputOptions.get("csrOutput"):
+        graphStore = CsrGraphStore(
+            directory=f"{outputDirectory}/{CSR_GRAPH_DIRECTORY}",
+            integerIds=nodeIdFormat.integerIds,
+        )
+        return GraphDatabaseBuilder(
+            nodeOutputHandler=CsrNodes(graphStore=graphStore),
+            relationsOutputHandler=CsrRelations(graphStore=graphStore),
+            nodeIdFormat=nodeIdFormat,
+        )
+    if outputOptions.get("parquetOutput"):
+        return create_parquet_database_builder(
+            outputDirectory=outputDirectory,
+            nodeIdFormat=nodeIdFormat,
+            partIndex=partIndex,
+        )
+    # part and chunk files share the header files written with the first stage of the parent process
+    writeHeader = partIndex is None and chunkIndex is None
+    partSuffix = "" if partIndex is None else f"_part_{partIndex:04d}"
+    if chunkIndex is not None:
+        partSuffix += f"_chunk_{chunkIndex:06d}"
+    if outputOptions.get("typedNodeFiles"):
+        nodeOutputHandler = TypedNodesFiles(
+            directory=outputDirectory,
+            partIndex=partIndex,
+            writeHeader=writeHeader,
+            chunkIndex=chunkIndex,
+            **fileOptions,
+        )
+    else:
+        nodeOutputHandler = NodesFile(
+            fileName=f"{outputDirectory}/football_event_graph_nodes{partSuffix}.csv.gz",
+            writeHeader=writeHeader,
+            **fileOptions,
+        )
+    relationOutputHandler = RelationsFile(
+        fileName=f"{outputDirectory}/football_event_graph_relations{partSuffix}.csv.gz",
+        writeHeader=writeHeader,
+        **fileOptions,
+    )
+    return GraphDatabaseBuilder(
+        nodeOutputHandler=nodeOutputHandler,
+        relationsOutputHandler=relationOutputHandler,
+        nodeIdFormat=nodeIdFormat,
+    )
+
+
+def create_parquet_database_builder(
+    outputDirectory: Union[str, Path],
+    nodeIdFormat: NodeIdFormat,
+    partIndex: Optional[int] = None,
+) -> GraphDatabaseBuilder:
+    # imported here, so pyarrow is only needed for Parquet output
+    from store.graph_output_handlers.parquet_output_handlers.parquet_nodes import (
+        ParquetNodes,
+    )
+    from store.graph_output_handlers.parquet_output_handlers.parquet_relations import (
+        ParquetRelations,
+    )
+
+    return GraphDatabaseBuilder(
+        nodeOutputHandler=ParquetNodes(
+            directory=outputDirectory,
+            partIndex=partIndex,
+            integerIds=nodeIdFormat.integerIds,
+        ),
+        relationsOutputHandler=ParquetRelations(
+            directory=outputDirectory,
+            partIndex=partIndex,
+            integerIds=nodeIdFormat.integerIds,
+        ),
+        nodeIdFormat=nodeIdFormat,
+    )
+
+
+def create_bolt_database_builder(
+    outputOptions: Dict[str, Any],
+    nodeIdFormat: NodeIdFormat,
+    createIndexes: bool = True,
+) -> GraphDatabaseBuilder:
+    # credentials come from the environment rather than the command line
+    driver = create_bolt_driver(
+        uri=outputOptions["boltUri"],
+        user=os.environ.get("NEO4J_USER", "neo4j"),
+        password=os.environ.get("NEO4J_PASSWORD", ""),
+        maxConnectionPoolSize=outputOptions["boltSessions"],
+    )
+    boltOptions = {
+        "driver": driver,
+        "batchSize": outputOptions["boltBatchSize"],
+        "sessions": outputOptions["boltSessions"],
+    }
+    nodeOutputHandler = BoltNodes(createIndexes=createIndexes, **boltOptions)
+    # GraphDatabaseBuilder.close closes the relations last, so they close the shared driver
+    relationOutputHandler = BoltRelations(
+        nodeOutputHandler=nodeOutputHandler, closeDriver=True, **boltOptions
+    )
+    return GraphDatabaseBuilder(
+        nodeOutputHandler=nodeOutputHandler,
+        relationsOutputHandler=relationOutputHandler,
+        nodeIdFormat=nodeIdFormat,
+    )
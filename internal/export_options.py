@@ -0,0 +1,149 @@
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from internal.export_stages import DEFAULT_SHARD_CHUNK_SIZE
+from store.graph_output_handlers.neo4j_output_handlers.bolt_batch_writer import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_SESSIONS,
+)
+
+# a checkpointed run can only be resumed with the same values of these
+CHECKPOINT_RUN_OPTIONS = [
+    "columnar",
+    "workers",
+    "typedNodeFiles",
+    "integerIds",
+    "idRegistryDirectory",
+    "nextEventRelations",
+    "seasonStats",
+    "playedForRelations",
+    "eventRelationProperties",
+    "internCommentary",
+]
+
+
+class ExportOptions:
+    # The options of an export, see the readme. Combinations that can't work are rejected before anything is
+    # written, and the options implied by others are set here
+    def __init__(
+        self,
+        columnar: bool = False,
+        chunkSize: Optional[int] = None,
+        workers: int = 1,
+        compressionLevel: int = 9,
+        pipelinedCompression: bool = False,
+        compressionThreads: int = 1,
+        typedNodeFiles: bool = False,
+        integerIds: bool = False,
+        idRegistryDirectory: Optional[Union[str, Path]] = None,
+        incremental: bool = False,
+        boltUri: Optional[str] = None,
+        boltSessions: int = DEFAULT_SESSIONS,
+        boltBatchSize: int = DEFAULT_BATCH_SIZE,
+        parquetOutput: bool = False,
+        csrOutput: bool = False,
+        profile: bool = False,
+        traceMemory: bool = False,
+        meterHandlers: bool = False,
+        checkpointed: bool = False,
+        resume: bool = False,
+        validate: bool = False,
+        nextEventRelations: bool = False,
+        seasonStats: bool = False,
+        playedForRelations: bool = False,
+        eventRelationProperties: bool = False,
+        internCommentary: bool = False,
+        stageCacheDirectory: Optional[Union[str, Path]] = None,
+    ):
+        # as given, for the run report
+        self.runOptions = {
+            key: value for key, value in locals().items() if key != "self"
+        }
+        self.columnar = columnar
+        self.chunkSize = chunkSize
+        self.workers = workers
+        self.compressionLevel = compressionLevel
+        self.pipelinedCompression = pipelinedCompression
+        self.compressionThreads = compressionThreads
+        self.typedNodeFiles = typedNodeFiles
+        self.integerIds = integerIds
+        self.idRegistryDirectory = idRegistryDirectory
+        self.incremental = incremental
+        self.boltUri = boltUri
+        self.boltSessions = boltSessions
+        self.boltBatchSize = boltBatchSize
+        self.parquetOutput = parquetOutput
+        self.csrOutput = csrOutput
+        self.profile = profile
+        self.traceMemory = traceMemory
+        self.meterHandlers = meterHandlers
+        # the stage cache reuses the stages of checkpointed runs
+        self.checkpointed = checkpointed or resume or stageCacheDirectory is not None
+        self.resume = resume
+        self.validate = validate
+        # the output of workers and checkpointed runs is validated from the written files afterwards
+        self.validateFiles = validate and (workers > 1 or self.checkpointed)
+        self.nextEventRelations = nextEventRelations
+        self.seasonStats = seasonStats
+        self.playedForRelations = playedForRelations
+        self.eventRelationProperties = eventRelationProperties
+        self.internCommentary = internCommentary
+        self.stageCacheDirectory = stageCacheDirectory
+        self._check()
+        if self.checkpointed and chunkSize is None:
+            # chunks of match events are what a checkpointed run commits
+            self.chunkSize = DEFAULT_SHARD_CHUNK_SIZE
+
+    def _check(self) -> None:
+        if self.csrOutput and self.workers > 1:
+            raise ValueError("The CSR graph is built in memory by a single process")
+        if self.incremental and self.idRegistryDirectory is None:
+            raise ValueError(
+                "Incremental builds need an idRegistryDirectory to keep their manifest in"
+            )
+        if self.checkpointed and (
+            self.incremental or self.boltUri or self.parquetOutput or self.csrOutput
+        ):
+            raise ValueError(
+                "Checkpointed runs write neo4j-admin import files and can't be incremental"
+            )
+        if self.validateFiles and (self.boltUri or self.parquetOutput):
+            raise ValueError(
+                "The output of several processes is validated from neo4j-admin import files"
+            )
+        if self.validate and self.incremental:
+            raise ValueError(
+                "Incremental deltas reference nodes of earlier runs, validate the whole export instead"
+            )
+        if self.seasonStats and self.incremental:
+            raise ValueError(
+                "Season stats are aggregated over every event, they can't be added to by a delta"
+            )
+        if self.playedForRelations and self.incremental:
+            raise ValueError(
+                "PLAYED_FOR relations are aggregated over every event, they can't be added to by a delta"
+            )
+        if self.internCommentary and self.incremental:
+            raise ValueError(
+                "Commentary template IDs are assigned over every event, a delta would reassign them"
+            )
+
+    def output_options(self) -> Dict[str, Any]:
+        # what create_database_builder builds the output handlers of the parent and every worker from
+        return {
+            "compressionLevel": self.compressionLevel,
+            "pipelined": self.pipelinedCompression,
+            "compressionThreads": self.compressionThreads,
+            "typedNodeFiles": self.typedNodeFiles,
+            "integerIds": self.integerIds,
+            "boltUri": self.boltUri,
+            "boltSessions": self.boltSessions,
+            "boltBatchSize": self.boltBatchSize,
+            "parquetOutput": self.parquetOutput,
+            "csrOutput": self.csrOutput,
+            "traceMemory": self.traceMemory,
+            "meterHandlers": self.meterHandlers,
+        }
+
+    def checkpoint_options(self) -> Dict[str, Any]:
+        return {key: getattr(self, key) for key in CHECKPOINT_RUN_OPTIONS}
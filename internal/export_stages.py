@@ -0,0 +1,396 @@
+import logging
+from pathlib import Path
+from typing import Dict, Hashable, Optional, Set, Union
+
+import numpy as np
+import pandas as pd
+
+from internal.commentary_templates import COMMENTARY_COLUMNS, CommentaryTemplates
+from internal.graph_database_builder import GraphDatabaseBuilder
+from internal.player_rosters import PLAYER_ROSTER_COLUMNS, PlayerRosterAggregator
+from internal.season_stats import SEASON_STATS_COLUMNS, SeasonStatsAggregator
+from store.build_manifest import BuildManifest
+from store.id_registry import IdDimension, IdRegistry
+from utils.dataframe_functions import categorical_ids
+from utils.input_readers import read_match_events, read_match_metadata
+
+DEFAULT_SHARD_CHUNK_SIZE = 100000
+PLAYER_COLUMNS = ["player", "player2", "player_in", "player_out"]
+
+
+def process_match_metadata_file(
+    matchMetadataFilepath: Union[str, Path],
+    databaseBuilder: GraphDatabaseBuilder,
+    logger: logging.Logger,
+    idRegistry: Optional[IdRegistry] = None,
+    buildManifest: Optional[BuildManifest] = None,
+) -> Dict[str, int]:
+    idRegistry = idRegistry or IdRegistry()
+    metricsRecorder = databaseBuilder.metricsRecorder
+    with metricsRecorder.stage(name="read_match_metadata"):
+        matchMetadataDataframe = read_match_metadata(
+            matchMetadataFilepath=matchMetadataFilepath
+        )
+    if buildManifest is not None:
+        matchMetadataDataframe = buildManifest.new_matches(
+            matchMetadata=matchMetadataDataframe
+        )
+        logger.info(msg=f"Found {len(matchMetadataDataframe)} new matches")
+    logger.info(msg="Building maps for categorical variables")
+    with metricsRecorder.stage(name="id_maps"):
+        idMaps = metadata_id_maps(
+            matchMetadataDataframe=matchMetadataDataframe, idRegistry=idRegistry
+        )
+    leagueToIdMap = idMaps[IdDimension.LEAGUE]
+    countryToIdMap = idMaps[IdDimension.COUNTRY]
+    seasonToIdMap = idMaps[IdDimension.SEASON]
+    teamToIdMap = idMaps[IdDimension.TEAM]
+    logger.info(msg="Adding league nodes")
+    with metricsRecorder.stage(name="add_leagues"):
+        databaseBuilder.add_leagues(
+            leagueToIdMap=nodes_to_add(
+                idMap=leagueToIdMap,
+                dimension=IdDimension.LEAGUE,
+                buildManifest=buildManifest,
+            )
+        )
+    logger.info(msg="Adding country nodes")
+    with metricsRecorder.stage(name="add_countries"):
+        databaseBuilder.add_countries(
+            countryToIdMap=nodes_to_add(
+                idMap=countryToIdMap,
+                dimension=IdDimension.COUNTRY,
+                buildManifest=buildManifest,
+            )
+        )
+    logger.info(msg="Adding season nodes")
+    with metricsRecorder.stage(name="add_seasons"):
+        databaseBuilder.add_seasons(
+            seasonToIdMap=nodes_to_add(
+                idMap=seasonToIdMap,
+                dimension=IdDimension.SEASON,
+                buildManifest=buildManifest,
+            )
+        )
+    logger.info(msg="Adding team nodes")
+    with metricsRecorder.stage(name="add_teams"):
+        databaseBuilder.add_teams(
+            teamToIdMap=nodes_to_add(
+                idMap=teamToIdMap,
+                dimension=IdDimension.TEAM,
+                buildManifest=buildManifest,
+            )
+        )
+    logger.info(msg="Adding date nodes")
+    with metricsRecorder.stage(name="add_dates"):
+        databaseBuilder.add_dates(
+            allDates=set(matchMetadataDataframe["date"]),
+            existingDates=() if buildManifest is None else buildManifest.dates,
+        )
+
+    logger.info(msg="Remapping categorical metadata columns")
+    with metricsRecorder.stage(name="remap_metadata"):
+        remappedMetadata = matchMetadataDataframe.assign(
+            **{
+                column: categorical_ids(
+                    values=matchMetadataDataframe[column], nameToId=nameToId
+                )
+                for column, nameToId in (
+                    ("league", leagueToIdMap),
+                    ("country", countryToIdMap),
+                    ("season", seasonToIdMap),
+                    ("ht", teamToIdMap),
+                    ("at", teamToIdMap),
+                )
+            }
+        )
+    logger.info(msg="Adding football match nodes and relations")
+    if buildManifest is None:
+        with metricsRecorder.stage(name="add_football_matches"):
+            databaseBuilder.add_football_matches(remappedMetadata=remappedMetadata)
+    else:
+        # NEXT relations continue from each team's last match of earlier runs
+        with metricsRecorder.stage(name="add_football_matches"):
+            databaseBuilder.add_football_matches(
+                remappedMetadata=remappedMetadata,
+                lastMatchForTeam=buildManifest.lastMatchForTeam,
+                existingLeagues=buildManifest.nodeIds[IdDimension.LEAGUE],
+            )
+        buildManifest.add_matches(remappedMetadata=remappedMetadata)
+        for dimension, idMap in idMaps.items():
+            buildManifest.add_nodes(dimension=dimension, nodeIds=idMap.values())
+        # events of new matches can still reference teams from earlier runs
+        teamToIdMap = idRegistry.nameToId[IdDimension.TEAM]
+    logger.info(msg="Finished processing match metadata file")
+    return teamToIdMap
+
+
+def full_build_manifest(
+    matchMetadataFilepath: Union[str, Path],
+    matchEventsFilepath: Union[str, Path],
+    idRegistry: IdRegistry,
+    chunkSize: Optional[int],
+) -> Optional[BuildManifest]:
+    # everything a full build has emitted, rebuilt from its input files like the ID maps of a resumed run
+    if idRegistry.directory is None:
+        return None
+    buildManifest = BuildManifest(directory=idRegistry.directory, load=False)
+    matchMetadataDataframe = read_match_metadata(
+        matchMetadataFilepath=matchMetadataFilepath
+    )
+    idMaps = metadata_id_maps(
+        matchMetadataDataframe=matchMetadataDataframe, idRegistry=idRegistry
+    )
+    idMaps[IdDimension.PLAYER] = idRegistry.id_map(
+        dimension=IdDimension.PLAYER,
+        names=read_player_names(
+            matchEventsFilepath=matchEventsFilepath,
+            chunkSize=chunkSize or DEFAULT_SHARD_CHUNK_SIZE,
+        ),
+    )
+    for dimension, idMap in idMaps.items():
+        buildManifest.add_nodes(dimension=dimension, nodeIds=idMap.values())
+    buildManifest.add_matches(
+        remappedMetadata=matchMetadataDataframe.assign(
+            ht=categorical_ids(
+                values=matchMetadataDataframe["ht"], nameToId=idMaps[IdDimension.TEAM]
+            ),
+            at=categorical_ids(
+                values=matchMetadataDataframe["at"], nameToId=idMaps[IdDimension.TEAM]
+            ),
+        )
+    )
+    buildManifest.contextNodesAdded = True
+    for eventIdChunk in read_match_events(
+        matchEventsFilepath=matchEventsFilepath,
+        columns=["id_event"],
+        chunkSize=chunkSize or DEFAULT_SHARD_CHUNK_SIZE,
+    ):
+        buildManifest.add_events(eventIds=eventIdChunk["id_event"])
+    return buildManifest
+
+
+def metadata_id_maps(
+    matchMetadataDataframe: pd.DataFrame, idRegistry: IdRegistry
+) -> Dict[str, Dict[Hashable, int]]:
+    return {
+        IdDimension.LEAGUE: idRegistry.id_map(
+            dimension=IdDimension.LEAGUE,
+            names=matchMetadataDataframe["league"].unique(),
+        ),
+        IdDimension.COUNTRY: idRegistry.id_map(
+            dimension=IdDimension.COUNTRY,
+            names=matchMetadataDataframe["country"].unique(),
+        ),
+        IdDimension.SEASON: idRegistry.id_map(
+            dimension=IdDimension.SEASON,
+            names=matchMetadataDataframe["season"].unique(),
+        ),
+        IdDimension.TEAM: idRegistry.id_map(
+            dimension=IdDimension.TEAM,
+            names=pd.unique(
+                pd.concat([matchMetadataDataframe["ht"], matchMetadataDataframe["at"]])
+            ),
+        ),
+    }
+
+
+def add_match_event_context_nodes(
+    databaseBuilder: GraphDatabaseBuilder, logger: logging.Logger
+) -> None:
+    metricsRecorder = databaseBuilder.metricsRecorder
+    logger.info(msg="Adding assist method nodes")
+    with metricsRecorder.stage(name="add_assist_methods"):
+        databaseBuilder.add_assist_methods()
+    logger.info(msg="Adding event body part nodes")
+    with metricsRecorder.stage(name="add_event_body_parts"):
+        databaseBuilder.add_event_body_parts()
+    logger.info(msg="Adding event situation nodes")
+    with metricsRecorder.stage(name="add_event_situations"):
+        databaseBuilder.add_event_situations()
+    logger.info(msg="Adding pitch location nodes")
+    with metricsRecorder.stage(name="add_pitch_locations"):
+        databaseBuilder.add_pitch_locations()
+    logger.info(msg="Adding shot outcome nodes")
+    with metricsRecorder.stage(name="add_shot_outcomes"):
+        databaseBuilder.add_shot_outcomes()
+    logger.info(msg="Adding shot placement nodes")
+    with metricsRecorder.stage(name="add_shot_placements"):
+        databaseBuilder.add_shot_placements()
+
+
+def player_id_map(
+    matchEventsFilepath: Union[str, Path],
+    chunkSize: Optional[int],
+    idRegistry: IdRegistry,
+    logger: logging.Logger,
+    matchEventsDataframe: Optional[pd.DataFrame] = None,
+) -> Dict[str, int]:
+    # names come from the events already in memory, otherwise from reading only the player columns
+    if matchEventsDataframe is not None:
+        allPlayerNames = set()
+        for column in PLAYER_COLUMNS:
+            allPlayerNames.update(matchEventsDataframe[column].dropna().unique())
+    else:
+        logger.info(msg="Reading player names from match events file")
+        allPlayerNames = read_player_names(
+            matchEventsFilepath=matchEventsFilepath, chunkSize=chunkSize
+        )
+    return idRegistry.id_map(dimension=IdDimension.PLAYER, names=allPlayerNames)
+
+
+def collect_commentary_templates(
+    matchEventsFilepath: Union[str, Path],
+    chunkSize: Optional[int],
+    logger: logging.Logger,
+    matchEventsDataframe: Optional[pd.DataFrame] = None,
+) -> CommentaryTemplates:
+    # like the player names, the templates are collected before the events are written, so every process and
+    # chunk refers to a template by the same small ID
+    commentaryTemplates = CommentaryTemplates()
+    if matchEventsDataframe is not None:
+        commentaryTemplates.add(eventData=matchEventsDataframe)
+    else:
+        logger.info(msg="Reading commentary templates from match events file")
+        for eventChunk in read_match_events(
+            matchEventsFilepath=matchEventsFilepath,
+            columns=COMMENTARY_COLUMNS,
+            chunkSize=chunkSize,
+        ):
+            commentaryTemplates.add(eventData=eventChunk)
+    return commentaryTemplates.finish()
+
+
+def nodes_to_add(
+    idMap: Dict[str, int], dimension: str, buildManifest: Optional[BuildManifest]
+) -> Dict[str, int]:
+    # incremental builds only emit the nodes that earlier runs haven't
+    if buildManifest is None:
+        return idMap
+    return buildManifest.new_nodes(dimension=dimension, idMap=idMap)
+
+
+def add_football_events(
+    eventData: pd.DataFrame,
+    databaseBuilder: GraphDatabaseBuilder,
+    teamToIdMap: Dict[str, int],
+    playerToIdMap: Dict[str, int],
+    columnar: bool,
+    nextEventRelations: bool = False,
+    matchDates: Optional[Dict[Hashable, str]] = None,
+    commentaryTemplates: Optional[CommentaryTemplates] = None,
+    existingEventIds: Optional[np.ndarray] = None,
+    lastEventForMatch: Optional[pd.DataFrame] = None,
+) -> Optional[pd.DataFrame]:
+    # returns the last event of every match so far with nextEventRelations, to pass in with the next chunk
+    metricsRecorder = databaseBuilder.metricsRecorder
+    if existingEventIds is not None and len(existingEventIds):
+        eventData = eventData[~eventData["id_event"].isin(existingEventIds)]
+    if columnar:
+        with metricsRecorder.stage(name="add_football_events_columnar"):
+            databaseBuilder.add_football_events_columnar(
+                eventData=eventData,
+                teamToIdMap=teamToIdMap,
+                playerToIdMap=playerToIdMap,
+                matchDates=matchDates,
+                commentaryTemplates=commentaryTemplates,
+            )
+    else:
+        with metricsRecorder.stage(name="add_football_events"):
+            databaseBuilder.add_football_events(
+                remappedEventData=eventData,
+                teamToIdMap=teamToIdMap,
+                playerToIdMap=playerToIdMap,
+                matchDates=matchDates,
+                commentaryTemplates=commentaryTemplates,
+            )
+    if not nextEventRelations:
+        return None
+    with metricsRecorder.stage(name="add_next_event_relations"):
+        return databaseBuilder.add_next_event_relations(
+            eventData=eventData, lastEventForMatch=lastEventForMatch
+        )
+
+
+def add_season_stats(
+    matchMetadataFilepath: Union[str, Path],
+    matchEventsFilepath: Union[str, Path],
+    databaseBuilder: GraphDatabaseBuilder,
+    idRegistry: IdRegistry,
+    chunkSize: Optional[int],
+    logger: logging.Logger,
+) -> None:
+    # aggregated from the event columns they need only, after the events themselves have been written
+    metricsRecorder = databaseBuilder.metricsRecorder
+    logger.info(msg="Aggregating season stats of players and teams")
+    with metricsRecorder.stage(name="season_stats"):
+        aggregator = SeasonStatsAggregator(
+            matchMetadata=read_match_metadata(
+                matchMetadataFilepath=matchMetadataFilepath,
+                columns=["id_odsp", "season"],
+            ),
+            idRegistry=idRegistry,
+        )
+        eventChunks = read_match_events(
+            matchEventsFilepath=matchEventsFilepath,
+            columns=SEASON_STATS_COLUMNS,
+            chunkSize=chunkSize,
+        )
+        for eventChunk in [eventChunks] if chunkSize is None else eventChunks:
+            aggregator.add(eventData=eventChunk)
+    logger.info(msg="Adding season stats nodes")
+    with metricsRecorder.stage(name="add_season_stats"):
+        databaseBuilder.add_season_stats(seasonStats=aggregator.result())
+
+
+def add_player_rosters(
+    matchMetadataFilepath: Union[str, Path],
+    matchEventsFilepath: Union[str, Path],
+    databaseBuilder: GraphDatabaseBuilder,
+    idRegistry: IdRegistry,
+    chunkSize: Optional[int],
+    logger: logging.Logger,
+) -> None:
+    # like the season stats, from a read of the event columns they need only
+    metricsRecorder = databaseBuilder.metricsRecorder
+    logger.info(msg="Aggregating the players' appearances per team and season")
+    with metricsRecorder.stage(name="player_rosters"):
+        aggregator = PlayerRosterAggregator(
+            matchMetadata=read_match_metadata(
+                matchMetadataFilepath=matchMetadataFilepath,
+                columns=["id_odsp", "date", "season"],
+            ),
+            idRegistry=idRegistry,
+        )
+        eventChunks = read_match_events(
+            matchEventsFilepath=matchEventsFilepath,
+            columns=PLAYER_ROSTER_COLUMNS,
+            chunkSize=chunkSize,
+        )
+        for eventChunk in [eventChunks] if chunkSize is None else eventChunks:
+            aggregator.add(eventData=eventChunk)
+    logger.info(msg="Adding PLAYED_FOR relations")
+    with metricsRecorder.stage(name="add_player_rosters"):
+        databaseBuilder.add_player_rosters(playerRosters=aggregator.result())
+
+
+def match_dates(matchMetadataFilepath: Union[str, Path]) -> Dict[Hashable, str]:
+    # the date of every match, denormalised onto the relations of its events with eventRelationProperties
+    matchMetadata = read_match_metadata(
+        matchMetadataFilepath=matchMetadataFilepath, columns=["id_odsp", "date"]
+    )
+    return dict(zip(matchMetadata["id_odsp"], matchMetadata["date"]))
+
+
+def read_player_names(
+    matchEventsFilepath: Union[str, Path], chunkSize: int
+) -> Set[str]:
+    allPlayerNames = set()
+    for playerChunk in read_match_events(
+        matchEventsFilepath=matchEventsFilepath,
+        columns=PLAYER_COLUMNS,
+        chunkSize=chunkSize,
+    ):
+        for column in PLAYER_COLUMNS:
+            allPlayerNames.update(playerChunk[column].dropna().unique())
+    return allPlayerNames
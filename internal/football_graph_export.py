@@ -0,0 +1,451 @@
+import cProfile
+import json
+import logging
+import os
+import pstats
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Hashable, Optional, Union
+
+from internal.checkpointed_export import process_all_files_with_checkpoint
+from internal.database_builders import create_database_builder
+from internal.export_options import ExportOptions
+from internal.export_stages import (
+    DEFAULT_SHARD_CHUNK_SIZE,
+    add_football_events,
+    add_match_event_context_nodes,
+    add_player_rosters,
+    add_season_stats,
+    collect_commentary_templates,
+    full_build_manifest,
+    match_dates,
+    nodes_to_add,
+    player_id_map,
+    process_match_metadata_file,
+)
+from internal.graph_database_builder import GraphDatabaseBuilder
+from internal.hashed_node_ids import check_hashed_node_ids
+from internal.metered_graph_database_builder import MeteredGraphDatabaseBuilder
+from internal.parallel_export import process_match_events_in_parallel
+from store.build_manifest import BuildManifest, save_build_state
+from store.graph_integrity import (
+    INTEGRITY_REPORT_FILE_NAME,
+    GraphIntegrityValidator,
+    validate_graph_files,
+)
+from store.graph_output_handlers.validating_output_handlers import (
+    ValidatingNodes,
+    ValidatingRelations,
+)
+from store.id_registry import IdDimension, IdRegistry
+from utils.input_readers import read_match_events
+from utils.logger import get_logger
+from utils.stage_metrics import MetricsRecorder
+
+RUN_REPORT_FILE_NAME = "football_graph_run_report.json"
+PROFILE_FILE_NAME = "football_graph_profile.prof"
+PROFILE_SUMMARY_FILE_NAME = "football_graph_profile.txt"
+
+
+def export_football_graph(
+    matchMetadataFilepath: Union[str, Path],
+    matchEventsFilepath: Union[str, Path],
+    outputDirectory: Union[str, Path],
+    exportOptions: ExportOptions,
+) -> None:
+    Path(outputDirectory).mkdir(parents=True, exist_ok=True)
+    logOutputFilename = f"{outputDirectory}/football_graph_{datetime.now().date()}.log"
+    logger = get_logger(
+        logOutputFilename=logOutputFilename,
+        overwriteExistingFile=not exportOptions.resume,
+    )
+    metricsRecorder = MetricsRecorder(traceMemory=exportOptions.traceMemory)
+    runReport = {
+        "startedAt": datetime.now().isoformat(timespec="seconds"),
+        "inputFiles": {
+            str(filepath): os.path.getsize(filepath)
+            for filepath in (matchMetadataFilepath, matchEventsFilepath)
+        },
+        "options": {"outputDirectory": outputDirectory, **exportOptions.runOptions},
+    }
+    profiler = cProfile.Profile() if exportOptions.profile else None
+    if profiler is not None:
+        profiler.enable()
+    try:
+        idRegistry = IdRegistry(directory=exportOptions.idRegistryDirectory)
+        if exportOptions.integerIds:
+            # hashed integer IDs are checked for collisions before any output is written
+            with metricsRecorder.stage(name="hashed_node_ids"):
+                check_hashed_node_ids(
+                    matchMetadataFilepath=matchMetadataFilepath,
+                    matchEventsFilepath=matchEventsFilepath,
+                    buildManifest=(
+                        BuildManifest(directory=exportOptions.idRegistryDirectory)
+                        if exportOptions.incremental
+                        else None
+                    ),
+                    chunkSize=exportOptions.chunkSize,
+                )
+        matchDates = None
+        if exportOptions.eventRelationProperties:
+            with metricsRecorder.stage(name="match_dates"):
+                matchDates = match_dates(matchMetadataFilepath=matchMetadataFilepath)
+        validator = None
+        if exportOptions.validate and not exportOptions.validateFiles:
+            validator = GraphIntegrityValidator(integerIds=exportOptions.integerIds)
+        if exportOptions.checkpointed:
+            process_all_files_with_checkpoint(
+                matchMetadataFilepath=matchMetadataFilepath,
+                matchEventsFilepath=matchEventsFilepath,
+                outputDirectory=outputDirectory,
+                exportOptions=exportOptions,
+                idRegistry=idRegistry,
+                matchDates=matchDates,
+                runReport=runReport,
+                metricsRecorder=metricsRecorder,
+                logger=logger,
+            )
+        else:
+            process_all_files(
+                matchMetadataFilepath=matchMetadataFilepath,
+                matchEventsFilepath=matchEventsFilepath,
+                outputDirectory=outputDirectory,
+                exportOptions=exportOptions,
+                idRegistry=idRegistry,
+                matchDates=matchDates,
+                validator=validator,
+                metricsRecorder=metricsRecorder,
+                logger=logger,
+            )
+        if exportOptions.validate:
+            with metricsRecorder.stage(name="validate"):
+                integrityReport = (
+                    validate_graph_files(
+                        processedFileDirectory=outputDirectory,
+                        integerIds=exportOptions.integerIds,
+                    )
+                    if validator is None
+                    else validator.report()
+                )
+            runReport["integrity"] = save_integrity_report(
+                integrityReport=integrityReport,
+                outputDirectory=outputDirectory,
+                logger=logger,
+            )
+        runReport["status"] = "succeeded"
+        logger.info(msg="Finished processing all files")
+    except Exception as ex:
+        runReport.update(status="failed", error=repr(ex))
+        logger.exception(msg=ex)
+        raise ex
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            save_profile(profiler=profiler, outputDirectory=outputDirectory)
+        metricsRecorder.close()
+        write_run_report(
+            runReport=runReport,
+            metricsRecorder=metricsRecorder,
+            outputDirectory=outputDirectory,
+        )
+        logger.info(msg=f"Saved run report to {outputDirectory}/{RUN_REPORT_FILE_NAME}")
+
+
+def process_all_files(
+    matchMetadataFilepath: Union[str, Path],
+    matchEventsFilepath: Union[str, Path],
+    outputDirectory: Union[str, Path],
+    exportOptions: ExportOptions,
+    idRegistry: IdRegistry,
+    matchDates: Optional[Dict[Hashable, str]],
+    validator: Optional[GraphIntegrityValidator],
+    metricsRecorder: MetricsRecorder,
+    logger: logging.Logger,
+) -> None:
+    # a run that writes its output in one go, incremental if there's a manifest of earlier runs
+    outputOptions = exportOptions.output_options()
+    chunkSize = exportOptions.chunkSize
+    databaseBuilder = create_database_builder(
+        outputDirectory=outputDirectory, outputOptions=outputOptions
+    )
+    if validator is not None:
+        databaseBuilder = GraphDatabaseBuilder(
+            nodeOutputHandler=ValidatingNodes(
+                nodeOutputHandler=databaseBuilder.nodeOutputHandler,
+                validator=validator,
+            ),
+            relationsOutputHandler=ValidatingRelations(
+                relationOutputHandler=databaseBuilder.relationsOutputHandler,
+                validator=validator,
+            ),
+            nodeIdFormat=databaseBuilder.nodeIdFormat,
+        )
+    databaseBuilder = MeteredGraphDatabaseBuilder(
+        databaseBuilder=databaseBuilder,
+        recorder=metricsRecorder,
+        meterHandlers=exportOptions.meterHandlers,
+    )
+    # without a manifest every run is a full build
+    buildManifest = (
+        BuildManifest(directory=exportOptions.idRegistryDirectory)
+        if exportOptions.incremental
+        else None
+    )
+    teamToIdMap = process_match_metadata_file(
+        matchMetadataFilepath=matchMetadataFilepath,
+        databaseBuilder=databaseBuilder,
+        logger=logger,
+        idRegistry=idRegistry,
+        buildManifest=buildManifest,
+    )
+    process_match_events_file(
+        matchEventsFilepath=matchEventsFilepath,
+        databaseBuilder=databaseBuilder,
+        teamToIdMap=teamToIdMap,
+        logger=logger,
+        columnar=exportOptions.columnar,
+        nextEventRelations=exportOptions.nextEventRelations,
+        matchDates=matchDates,
+        internCommentary=exportOptions.internCommentary,
+        chunkSize=chunkSize,
+        workers=exportOptions.workers,
+        outputDirectory=outputDirectory,
+        outputOptions=outputOptions,
+        idRegistry=idRegistry,
+        buildManifest=buildManifest,
+    )
+    if exportOptions.seasonStats:
+        add_season_stats(
+            matchMetadataFilepath=matchMetadataFilepath,
+            matchEventsFilepath=matchEventsFilepath,
+            databaseBuilder=databaseBuilder,
+            idRegistry=idRegistry,
+            chunkSize=chunkSize,
+            logger=logger,
+        )
+    if exportOptions.playedForRelations:
+        add_player_rosters(
+            matchMetadataFilepath=matchMetadataFilepath,
+            matchEventsFilepath=matchEventsFilepath,
+            databaseBuilder=databaseBuilder,
+            idRegistry=idRegistry,
+            chunkSize=chunkSize,
+            logger=logger,
+        )
+    with metricsRecorder.stage(name="close"):
+        databaseBuilder.close()
+    # IDs and the manifest are only persisted once the export they were used in has been written completely.
+    # A full build with a registry starts a new manifest, so incremental runs can follow it
+    if buildManifest is None:
+        with metricsRecorder.stage(name="build_manifest"):
+            buildManifest = full_build_manifest(
+                matchMetadataFilepath=matchMetadataFilepath,
+                matchEventsFilepath=matchEventsFilepath,
+                idRegistry=idRegistry,
+                chunkSize=chunkSize,
+            )
+    save_build_state(idRegistry=idRegistry, buildManifest=buildManifest)
+
+
+def process_match_events_file(
+    matchEventsFilepath: Union[str, Path],
+    databaseBuilder: GraphDatabaseBuilder,
+    teamToIdMap: Dict[str, int],
+    logger: logging.Logger,
+    columnar: bool = False,
+    nextEventRelations: bool = False,
+    matchDates: Optional[Dict[Hashable, str]] = None,
+    internCommentary: bool = False,
+    chunkSize: Optional[int] = None,
+    workers: int = 1,
+    outputDirectory: Optional[Union[str, Path]] = None,
+    outputOptions: Optional[Dict[str, Any]] = None,
+    idRegistry: Optional[IdRegistry] = None,
+    buildManifest: Optional[BuildManifest] = None,
+) -> None:
+    idRegistry = idRegistry or IdRegistry()
+    metricsRecorder = databaseBuilder.metricsRecorder
+    if workers > 1 and chunkSize is None:
+        chunkSize = DEFAULT_SHARD_CHUNK_SIZE
+    if chunkSize is None:
+        with metricsRecorder.stage(name="read_match_events"):
+            matchEventsDataframe = read_match_events(
+                matchEventsFilepath=matchEventsFilepath
+            )
+    # the event context nodes are fixed, so an incremental build only emits them if no earlier run has
+    if buildManifest is None or not buildManifest.contextNodesAdded:
+        add_match_event_context_nodes(databaseBuilder=databaseBuilder, logger=logger)
+
+    with metricsRecorder.stage(name="player_id_map"):
+        playerToIdMap = player_id_map(
+            matchEventsFilepath=matchEventsFilepath,
+            chunkSize=chunkSize,
+            idRegistry=idRegistry,
+            logger=logger,
+            matchEventsDataframe=(
+                None if chunkSize is not None else matchEventsDataframe
+            ),
+        )
+    logger.info(msg="Adding player nodes")
+    with metricsRecorder.stage(name="add_players"):
+        databaseBuilder.add_players(
+            playerToIdMap=nodes_to_add(
+                idMap=playerToIdMap,
+                dimension=IdDimension.PLAYER,
+                buildManifest=buildManifest,
+            )
+        )
+    commentaryTemplates = None
+    if internCommentary:
+        with metricsRecorder.stage(name="commentary_templates"):
+            commentaryTemplates = collect_commentary_templates(
+                matchEventsFilepath=matchEventsFilepath,
+                chunkSize=chunkSize,
+                logger=logger,
+                matchEventsDataframe=(
+                    None if chunkSize is not None else matchEventsDataframe
+                ),
+            )
+        logger.info(msg="Adding commentary template nodes")
+        with metricsRecorder.stage(name="add_commentary_templates"):
+            databaseBuilder.add_commentary_templates(
+                templateToIdMap=commentaryTemplates.templateToIdMap
+            )
+    # workers only need the event IDs of earlier runs to skip them
+    existingEventIds = None if buildManifest is None else buildManifest.eventIds
+
+    # remapping is done inside the DB builder with dicts, because remapping the whole DF with pandas can be memory-intensive
+    logger.info(msg="Adding football event nodes and relations")
+    # batched database writers commit what they hold back at stage boundaries. Workers write relations to the
+    # nodes added so far, so those must not be held back in this process
+    with metricsRecorder.stage(name="flush"):
+        databaseBuilder.flush()
+    if workers > 1:
+        process_match_events_in_parallel(
+            matchEventsFilepath=matchEventsFilepath,
+            outputDirectory=outputDirectory,
+            teamToIdMap=teamToIdMap,
+            playerToIdMap=playerToIdMap,
+            columnar=columnar,
+            nextEventRelations=nextEventRelations,
+            matchDates=matchDates,
+            commentaryTemplates=commentaryTemplates,
+            chunkSize=chunkSize,
+            workers=workers,
+            outputOptions=outputOptions or {},
+            logger=logger,
+            existingEventIds=existingEventIds,
+            metricsRecorder=metricsRecorder,
+        )
+    elif chunkSize is None:
+        add_football_events(
+            eventData=matchEventsDataframe,
+            databaseBuilder=databaseBuilder,
+            teamToIdMap=teamToIdMap,
+            playerToIdMap=playerToIdMap,
+            columnar=columnar,
+            nextEventRelations=nextEventRelations,
+            matchDates=matchDates,
+            commentaryTemplates=commentaryTemplates,
+            existingEventIds=existingEventIds,
+        )
+    else:
+        # only one chunk of events is held in memory at a time
+        lastEventForMatch = None
+        for i, eventChunk in enumerate(
+            metricsRecorder.chunks(
+                name="read_match_events",
+                chunks=read_match_events(
+                    matchEventsFilepath=matchEventsFilepath, chunkSize=chunkSize
+                ),
+            )
+        ):
+            logger.info(msg=f"Adding football events chunk {i}")
+            lastEventForMatch = add_football_events(
+                eventData=eventChunk,
+                databaseBuilder=databaseBuilder,
+                teamToIdMap=teamToIdMap,
+                playerToIdMap=playerToIdMap,
+                columnar=columnar,
+                nextEventRelations=nextEventRelations,
+                matchDates=matchDates,
+                commentaryTemplates=commentaryTemplates,
+                existingEventIds=existingEventIds,
+                lastEventForMatch=lastEventForMatch,
+            )
+            with metricsRecorder.stage(name="flush"):
+                databaseBuilder.flush()
+
+    if buildManifest is not None:
+        buildManifest.contextNodesAdded = True
+        buildManifest.add_nodes(
+            dimension=IdDimension.PLAYER, nodeIds=playerToIdMap.values()
+        )
+        with metricsRecorder.stage(name="manifest_event_ids"):
+            if chunkSize is None:
+                buildManifest.add_events(eventIds=matchEventsDataframe["id_event"])
+            else:
+                for eventIdChunk in read_match_events(
+                    matchEventsFilepath=matchEventsFilepath,
+                    columns=["id_event"],
+                    chunkSize=chunkSize,
+                ):
+                    buildManifest.add_events(eventIds=eventIdChunk["id_event"])
+
+
+def save_profile(profiler: cProfile.Profile, outputDirectory: Union[str, Path]) -> None:
+    # the .prof file is for snakeviz/pstats, the summary lists the 50 most expensive calls
+    profiler.dump_stats(f"{outputDirectory}/{PROFILE_FILE_NAME}")
+    with open(f"{outputDirectory}/{PROFILE_SUMMARY_FILE_NAME}", "w") as file:
+        pstats.Stats(profiler, stream=file).sort_stats("cumulative").print_stats(50)
+
+
+def write_run_report(
+    runReport: Dict[str, Any],
+    metricsRecorder: MetricsRecorder,
+    outputDirectory: Union[str, Path],
+) -> None:
+    report = {
+        **runReport,
+        "finishedAt": datetime.now().isoformat(timespec="seconds"),
+        **metricsRecorder.report(),
+    }
+    # every file in the output directory with its size on disk, gzip files also with their uncompressed size
+    outputFiles = {
+        str(path): {"bytes": path.stat().st_size}
+        for path in sorted(Path(outputDirectory).rglob("*"))
+        if path.is_file() and path.name != RUN_REPORT_FILE_NAME
+    }
+    for fileName, stats in report["outputFiles"].items():
+        outputFiles.setdefault(str(Path(fileName)), {}).update(stats)
+    report["outputFiles"] = outputFiles
+    report["outputBytes"] = sum(stats.get("bytes", 0) for stats in outputFiles.values())
+    with open(f"{outputDirectory}/{RUN_REPORT_FILE_NAME}", "w") as file:
+        json.dump(report, file, indent=2, default=str)
+
+
+def save_integrity_report(
+    integrityReport: Dict[str, Any],
+    outputDirectory: Union[str, Path],
+    logger: logging.Logger,
+) -> Dict[str, Any]:
+    # the run report only gets the counts, samples are in the integrity report
+    fileName = f"{outputDirectory}/{INTEGRITY_REPORT_FILE_NAME}"
+    with open(fileName, "w") as file:
+        json.dump(integrityReport, file, indent=2)
+    duplicateNodes = integrityReport["duplicateNodes"]["count"]
+    orphanRelations = integrityReport["orphanRelations"]["count"]
+    if integrityReport["valid"]:
+        logger.info(
+            msg=f"Validated {integrityReport['nodes']} nodes and {integrityReport['relations']} relations"
+        )
+    else:
+        logger.warning(
+            msg=f"Found {duplicateNodes} duplicate node IDs and {orphanRelations} relations with a missing "
+            f"endpoint, see {fileName}"
+        )
+    return {
+        "valid": integrityReport["valid"],
+        "duplicateNodes": duplicateNodes,
+        "orphanRelations": orphanRelations,
+    }
@@ -1,4 +1,4 @@
-from typing import Dict, Iterable
+from typing import Dict, Hashable, Iterable, Optional
 
 import pandas as pd
 import math
@@ -12,6 +12,7 @@ from datamodel.existing_data_maps.pitch_location_map import idToPitchLocationMap
 from datamodel.existing_data_maps.shot_outcome import idToShotOutcomeMap
 from datamodel.existing_data_maps.shot_placement import idToShotPlacementMap
 from datamodel.node_field import NodeField
+from datamodel.node_ids import CommentaryTemplateId
 from datamodel.node_ids import CountryId
 from datamodel.node_ids import DateId
 from datamodel.node_ids import EventContextId
@@ -19,6 +20,7 @@ from datamodel.node_ids import LeagueId
 from datamodel.node_ids import MatchId
 from datamodel.node_ids import MatchEventId
 from datamodel.node_ids import MonthId
+from datamodel.node_ids import NodeIdFormat
 from datamodel.node_ids import PlayerId
 from datamodel.node_ids import SeasonId
 from datamodel.node_ids import TeamId
@@ -26,9 +28,26 @@ from datamodel.node_ids import YearId
 from datamodel.node_labels import NodeLabel
 from datamodel.relations import EventRelationType
 from datamodel.relations import GeneralRelationType
+from datamodel.relations import RelationField
+from internal.columnar import NodeColumns
+from internal.columnar import RelationColumns
+from internal.columnar import commentary_relation_columns
+from internal.columnar import commentary_template_node_columns
+from internal.columnar import last_event_for_match
+from internal.columnar import match_event_node_columns
+from internal.columnar import match_event_relation_columns
+from internal.columnar import match_event_sequence
+from internal.columnar import match_node_columns
+from internal.columnar import match_relation_columns
+from internal.columnar import next_event_relation_columns
+from internal.columnar import played_for_relation_columns
+from internal.columnar import season_stats_node_columns
+from internal.columnar import season_stats_relation_columns
+from internal.commentary_templates import CommentaryTemplates
 from store.graph_output_handlers.output_handler_base import NodeOutputHandlerBase
 from store.graph_output_handlers.output_handler_base import RelationOutputHandlerBase
 from utils.dataframe_functions import replace_nan_with_none_in_dataframe
+from utils.stage_metrics import MetricsRecorder
 
 
 class GraphDatabaseBuilder:
@@ -36,9 +55,19 @@ class GraphDatabaseBuilder:
         self,
         nodeOutputHandler: NodeOutputHandlerBase,
         relationsOutputHandler: RelationOutputHandlerBase,
+        metricsRecorder: Optional[MetricsRecorder] = None,
+        nodeIdFormat: Optional[NodeIdFormat] = None,
     ):
         self.nodeOutputHandler = nodeOutputHandler
         self.relationsOutputHandler = relationsOutputHandler
+        # string IDs unless the builder is created for integer IDs, every ID it emits is formatted with it
+        self.nodeIdFormat = nodeIdFormat or NodeIdFormat()
+        # records the steps within the stages, e.g. NaN conversion or building the ID columns
+        self.metricsRecorder = metricsRecorder or MetricsRecorder()
+
+    def flush(self) -> None:
+        self.nodeOutputHandler.flush()
+        self.relationsOutputHandler.flush()
 
     def close(self) -> None:
         self.nodeOutputHandler.close()
@@ -47,7 +76,7 @@ class GraphDatabaseBuilder:
     def add_leagues(self, leagueToIdMap: Dict[str, int]) -> None:
         for leagueName, i in leagueToIdMap.items():
             self.nodeOutputHandler.add(
-                nodeId=LeagueId(leagueId=i),
+                nodeId=self.nodeIdFormat.format(LeagueId(leagueId=i)),
                 nodeLabels=[NodeLabel.LEAGUE],
                 nodeProperties={NodeField.TEXT: leagueName},
             )
@@ -55,7 +84,7 @@ class GraphDatabaseBuilder:
     def add_countries(self, countryToIdMap: Dict[str, int]) -> None:
         for countryName, i in countryToIdMap.items():
             self.nodeOutputHandler.add(
-                nodeId=CountryId(countryId=i),
+                nodeId=self.nodeIdFormat.format(CountryId(countryId=i)),
                 nodeLabels=[NodeLabel.COUNTRY],
                 nodeProperties={NodeField.TEXT: countryName},
             )
@@ -63,136 +92,95 @@ class GraphDatabaseBuilder:
     def add_seasons(self, seasonToIdMap: Dict[str, int]) -> None:
         for season, i in seasonToIdMap.items():
             self.nodeOutputHandler.add(
-                nodeId=SeasonId(seasonId=i),
+                nodeId=self.nodeIdFormat.format(SeasonId(seasonId=i)),
                 nodeLabels=[NodeLabel.SEASON],
                 nodeProperties={NodeField.TEXT: season},
             )
 
-    def add_dates(self, allDates: Iterable[str]) -> None:
+    def add_dates(
+        self, allDates: Iterable[str], existingDates: Iterable[str] = ()
+    ) -> None:
         # dates are split into sets to try and avoid node collisions if they've already been added.
         # Time-tree method for temporal graphs: https://graphaware.com/neo4j/2014/08/20/graphaware-neo4j-timetree.html
         splitDates = {tuple(date.split("-")) for date in allDates}
         allYears = {d[0] for d in splitDates}
         allMonths = {(d[0], d[1]) for d in splitDates}
+        # incremental builds skip the parts of the time tree that earlier runs have already emitted
+        existingSplitDates = {tuple(date.split("-")) for date in existingDates}
+        if existingSplitDates:
+            splitDates -= existingSplitDates
+            allYears -= {d[0] for d in existingSplitDates}
+            allMonths -= {(d[0], d[1]) for d in existingSplitDates}
         for year in allYears:
             self.nodeOutputHandler.add(
-                nodeId=YearId(year=year), nodeLabels=[NodeLabel.YEAR], nodeProperties={NodeField.TEXT: f"{year}"}
+                nodeId=self.nodeIdFormat.format(YearId(year=year)),
+                nodeLabels=[NodeLabel.YEAR],
+                nodeProperties={NodeField.TEXT: f"{year}"},
             )
         for year, month in allMonths:
             self.nodeOutputHandler.add(
-                nodeId=MonthId(year=year, month=month),
+                nodeId=self.nodeIdFormat.format(MonthId(year=year, month=month)),
                 nodeLabels=[NodeLabel.MONTH],
                 nodeProperties={NodeField.TEXT: f"{year}-{month}"},
             )
             self.relationsOutputHandler.add(
-                    startNodeId=MonthId(year=year, month=month),
-                    endNodeId=YearId(year=year),
+                    startNodeId=self.nodeIdFormat.format(
+                        MonthId(year=year, month=month)
+                    ),
+                    endNodeId=self.nodeIdFormat.format(YearId(year=year)),
                     relationType=GeneralRelationType.IN_YEAR,
                 )
         for year, month, day in splitDates:
             self.nodeOutputHandler.add(
-                nodeId=DateId(year=year, month=month, day=day),
+                nodeId=self.nodeIdFormat.format(
+                    DateId(year=year, month=month, day=day)
+                ),
                 nodeLabels=[NodeLabel.DATE],
                 nodeProperties={NodeField.TEXT: f"{year}-{month}-{day}"},
             )
             self.relationsOutputHandler.add(
-                startNodeId=DateId(year=year, month=month, day=day),
-                endNodeId=MonthId(year=year, month=month),
+                startNodeId=self.nodeIdFormat.format(
+                    DateId(year=year, month=month, day=day)
+                ),
+                endNodeId=self.nodeIdFormat.format(MonthId(year=year, month=month)),
                 relationType=GeneralRelationType.IN_MONTH,
             )
 
     def add_teams(self, teamToIdMap: Dict[str, int]) -> None:
         for team, i in teamToIdMap.items():
             self.nodeOutputHandler.add(
-                nodeId=TeamId(teamId=i),
+                nodeId=self.nodeIdFormat.format(TeamId(teamId=i)),
                 nodeLabels=[NodeLabel.ENTITY, NodeLabel.TEAM],
                 nodeProperties={NodeField.TEXT: team},
             )
 
-    def add_football_matches(self, remappedMetadata: pd.DataFrame) -> None:
-        remappedMetadata = replace_nan_with_none_in_dataframe(
-            dataframe=remappedMetadata
-        )
-        lastMatchForTeam = {}
-        for _, metadataRow in tqdm(
-            remappedMetadata.iterrows(), total=len(remappedMetadata)
-        ):
-            nodeProperties = {
-                NodeField.FULLTIME_HOME_GOALS: metadataRow["fthg"],
-                NodeField.FULLTIME_AWAY_GOALS: metadataRow["ftag"],
-                NodeField.HOME_ODDS: metadataRow["odd_h"],
-                NodeField.AWAY_ODDS: metadataRow["odd_a"],
-                NodeField.DRAW_ODDS: metadataRow["odd_d"],
-                NodeField.OVER_25_GOAL_ODDS: metadataRow["odd_over"],
-                NodeField.UNDER_25_GOAL_ODDS: metadataRow["odd_under"],
-                NodeField.BOTH_TEAMS_TO_SCORE_ODDS: metadataRow["odd_bts"],
-                NodeField.NOT_BOTH_TEAMS_TO_SCORE_ODDS: metadataRow["odd_bts_n"],
-            }
-            matchId = MatchId(matchId=metadataRow["id_odsp"])
-            self.nodeOutputHandler.add(
-                nodeId=matchId,
-                nodeLabels=[NodeLabel.MATCH],
-                nodeProperties=nodeProperties,
-            )
-
-            year, month, day = metadataRow["date"].split("-")
-            dateId = DateId(year=year, month=month, day=day)
-            self.relationsOutputHandler.add(
-                startNodeId=dateId,
-                endNodeId=matchId,
-                relationType=GeneralRelationType.ON_DATE,
-            )
-            seasonId = SeasonId(seasonId=metadataRow["season"])
-            self.relationsOutputHandler.add(
-                startNodeId=seasonId,
-                endNodeId=matchId,
-                relationType=GeneralRelationType.IN_SEASON,
-            )
-
-            homeTeamId = TeamId(teamId=metadataRow["ht"])
-            awayTeamId = TeamId(teamId=metadataRow["at"])
-            self.relationsOutputHandler.add(
-                startNodeId=matchId,
-                endNodeId=homeTeamId,
-                relationType=GeneralRelationType.HOME_TEAM,
-            )
-            self.relationsOutputHandler.add(
-                startNodeId=matchId,
-                endNodeId=awayTeamId,
-                relationType=GeneralRelationType.AWAY_TEAM,
-            )
-            previousHomeMatch = lastMatchForTeam.get(homeTeamId)
-            if previousHomeMatch is not None:
-                self.relationsOutputHandler.add(
-                    startNodeId=previousHomeMatch,
-                    endNodeId=matchId,
-                    relationType=GeneralRelationType.NEXT,
-                )
-            previousAwayMatch = lastMatchForTeam.get(awayTeamId)
-            if previousAwayMatch is not None:
-                self.relationsOutputHandler.add(
-                    startNodeId=previousAwayMatch,
-                    endNodeId=matchId,
-                    relationType=GeneralRelationType.NEXT,
-                )
-
-            leagueId = LeagueId(leagueId=metadataRow["league"])
-            countryId = CountryId(countryId=metadataRow["country"])
-            self.relationsOutputHandler.add(
-                startNodeId=matchId,
-                endNodeId=leagueId,
-                relationType=GeneralRelationType.IN_LEAGUE,
+    def add_football_matches(
+        self,
+        remappedMetadata: pd.DataFrame,
+        lastMatchForTeam: Optional[pd.DataFrame] = None,
+        existingLeagues: Iterable[int] = (),
+    ) -> None:
+        remappedMetadata = remappedMetadata.dropna(axis=0, how="all")
+        with self.metricsRecorder.stage(name="node_columns"):
+            nodeColumns = match_node_columns(
+                metadata=remappedMetadata, nodeIdFormat=self.nodeIdFormat
             )
-            self.relationsOutputHandler.add(
-                startNodeId=leagueId,
-                endNodeId=countryId,
-                relationType=GeneralRelationType.IN_COUNTRY,
+        self._add_node_columns(nodeColumns=nodeColumns)
+        with self.metricsRecorder.stage(name="relation_columns"):
+            relationColumns = match_relation_columns(
+                metadata=remappedMetadata,
+                nodeIdFormat=self.nodeIdFormat,
+                lastMatchForTeam=lastMatchForTeam,
+                existingLeagues=existingLeagues,
             )
+        self._add_relation_columns(relationColumns=relationColumns)
 
     def add_assist_methods(self) -> None:
         for i, assistMethod in idToAssistMethodMap.items():
             self.nodeOutputHandler.add(
-                nodeId=EventContextId(eventType=assistMethod, eventId=i),
+                nodeId=self.nodeIdFormat.format(
+                    EventContextId(eventType=assistMethod, eventId=i)
+                ),
                 nodeLabels=[NodeLabel.MATCH_EVENT_CONTEXT],
                 nodeProperties={NodeField.TEXT: assistMethod},
             )
@@ -200,7 +188,9 @@ class GraphDatabaseBuilder:
     def add_event_body_parts(self) -> None:
         for i, bodyPart in idToBodyPartMap.items():
             self.nodeOutputHandler.add(
-                nodeId=EventContextId(eventType=bodyPart, eventId=i),
+                nodeId=self.nodeIdFormat.format(
+                    EventContextId(eventType=bodyPart, eventId=i)
+                ),
                 nodeLabels=[NodeLabel.MATCH_EVENT_CONTEXT],
                 nodeProperties={NodeField.TEXT: bodyPart},
             )
@@ -208,7 +198,9 @@ class GraphDatabaseBuilder:
     def add_event_situations(self) -> None:
         for i, eventSituation in idToEventSituationMap.items():
             self.nodeOutputHandler.add(
-                nodeId=EventContextId(eventType=eventSituation, eventId=i),
+                nodeId=self.nodeIdFormat.format(
+                    EventContextId(eventType=eventSituation, eventId=i)
+                ),
                 nodeLabels=[NodeLabel.MATCH_EVENT_CONTEXT],
                 nodeProperties={NodeField.TEXT: eventSituation},
             )
@@ -216,7 +208,9 @@ class GraphDatabaseBuilder:
     def add_pitch_locations(self) -> None:
         for i, pitchLocation in idToPitchLocationMap.items():
             self.nodeOutputHandler.add(
-                nodeId=EventContextId(eventType=pitchLocation, eventId=i),
+                nodeId=self.nodeIdFormat.format(
+                    EventContextId(eventType=pitchLocation, eventId=i)
+                ),
                 nodeLabels=[NodeLabel.MATCH_EVENT_CONTEXT],
                 nodeProperties={NodeField.TEXT: pitchLocation},
             )
@@ -224,7 +218,7 @@ class GraphDatabaseBuilder:
     def add_players(self, playerToIdMap: Dict[str, int]) -> None:
         for player, i in playerToIdMap.items():
             self.nodeOutputHandler.add(
-                nodeId=PlayerId(playerId=i),
+                nodeId=self.nodeIdFormat.format(PlayerId(playerId=i)),
                 nodeLabels=[NodeLabel.ENTITY, NodeLabel.PLAYER],
                 nodeProperties={NodeField.TEXT: player},
             )
@@ -232,7 +226,9 @@ class GraphDatabaseBuilder:
     def add_shot_outcomes(self) -> None:
         for i, shotOutcome in idToShotOutcomeMap.items():
             self.nodeOutputHandler.add(
-                nodeId=EventContextId(eventType=shotOutcome, eventId=i),
+                nodeId=self.nodeIdFormat.format(
+                    EventContextId(eventType=shotOutcome, eventId=i)
+                ),
                 nodeLabels=[NodeLabel.MATCH_EVENT_CONTEXT],
                 nodeProperties={NodeField.TEXT: shotOutcome},
             )
@@ -240,7 +236,9 @@ class GraphDatabaseBuilder:
     def add_shot_placements(self) -> None:
         for i, shotPlacement in idToShotPlacementMap.items():
             self.nodeOutputHandler.add(
-                nodeId=EventContextId(eventType=shotPlacement, eventId=i),
+                nodeId=self.nodeIdFormat.format(
+                    EventContextId(eventType=shotPlacement, eventId=i)
+                ),
                 nodeLabels=[NodeLabel.MATCH_EVENT_CONTEXT],
                 nodeProperties={NodeField.TEXT: shotPlacement},
             )
@@ -250,13 +248,23 @@ class GraphDatabaseBuilder:
         remappedEventData: pd.DataFrame,
         teamToIdMap: Dict[str, int],
         playerToIdMap: Dict[str, int],
+        matchDates: Optional[Dict[Hashable, str]] = None,
+        commentaryTemplates: Optional[CommentaryTemplates] = None,
     ) -> None:
-        remappedEventData = replace_nan_with_none_in_dataframe(
-            dataframe=remappedEventData
-        )
-        for _, row in tqdm(remappedEventData.iterrows(), total=len(remappedEventData)):
-            matchId = MatchId(matchId=row["id_odsp"])
-            matchEventId = MatchEventId(matchEventId=row["id_event"])
+        # with matchDates, the event time, isGoal and match date are denormalised onto the HAS_MATCH_EVENT,
+        # EVENT_TEAM and PLAYER_1 relations of each event. With commentaryTemplates the text is replaced by a
+        # HAS_COMMENTARY relation to its template, see add_commentary_templates
+        with self.metricsRecorder.stage(name="replace_nan_with_none"):
+            remappedEventData = replace_nan_with_none_in_dataframe(
+                dataframe=remappedEventData
+            )
+        if commentaryTemplates is not None:
+            templateIds, templateParameters = commentaryTemplates.event_splits(eventData=remappedEventData)
+        for i, (_, row) in enumerate(tqdm(remappedEventData.iterrows(), total=len(remappedEventData))):
+            matchId = self.nodeIdFormat.format(MatchId(matchId=row["id_odsp"]))
+            matchEventId = self.nodeIdFormat.format(
+                MatchEventId(matchEventId=row["id_event"])
+            )
             eventType1 = idToEventTypeMap.get(row["event_type"], None)
             eventType2 = idToEventTypeMap.get(row["event_type2"], None)
             matchEventNodeLabels = [NodeLabel.MATCH_EVENT, eventType1, eventType2]
@@ -266,49 +274,72 @@ class GraphDatabaseBuilder:
                 nodeProperties={
                     NodeField.IS_FAST_BREAK: bool(row["fast_break"]),
                     NodeField.IS_GOAL: bool(row["is_goal"]),
-                    NodeField.TEXT: row["text"],
+                    NodeField.TEXT: row["text"] if commentaryTemplates is None else None,
                     NodeField.MATCH_EVENT_TIME: row["time"],
                     NodeField.SORT_ORDER: row["sort_order"],
                 },
             )
+            eventProperties = None
+            if matchDates is not None:
+                eventProperties = {
+                    RelationField.MATCH_EVENT_TIME: row["time"],
+                    RelationField.IS_GOAL: bool(row["is_goal"]),
+                    RelationField.MATCH_DATE: matchDates.get(row["id_odsp"]),
+                }
             self.relationsOutputHandler.add(
                 startNodeId=matchId,
                 endNodeId=matchEventId,
                 relationType=GeneralRelationType.HAS_MATCH_EVENT,
+                relationProperties=eventProperties,
             )
             self.relationsOutputHandler.add(
                 startNodeId=matchEventId,
-                endNodeId=TeamId(teamId=int(teamToIdMap[row["event_team"]])),
+                endNodeId=self.nodeIdFormat.cached(
+                    TeamId, int(teamToIdMap[row["event_team"]])
+                ),
                 relationType=EventRelationType.EVENT_TEAM,
+                relationProperties=eventProperties,
             )
             self.relationsOutputHandler.add(
                 startNodeId=matchEventId,
-                endNodeId=TeamId(teamId=int(teamToIdMap[row["opponent"]])),
+                endNodeId=self.nodeIdFormat.cached(
+                    TeamId, int(teamToIdMap[row["opponent"]])
+                ),
                 relationType=EventRelationType.OPPONENT_TEAM,
             )
             # player + player2 pairs are always distinct from playerIn + playerOut pairs
             if row["player"] is not None:
                 self.relationsOutputHandler.add(
                     startNodeId=matchEventId,
-                    endNodeId=PlayerId(playerId=int(playerToIdMap[row["player"]])),
+                    endNodeId=self.nodeIdFormat.cached(
+                        PlayerId, int(playerToIdMap[row["player"]])
+                    ),
                     relationType=EventRelationType.PLAYER_1,
+                    relationProperties=eventProperties,
                 )
             if row["player2"] is not None:
                 self.relationsOutputHandler.add(
                     startNodeId=matchEventId,
-                    endNodeId=PlayerId(playerId=int(playerToIdMap[row["player2"]])),
+                    endNodeId=self.nodeIdFormat.cached(
+                        PlayerId, int(playerToIdMap[row["player2"]])
+                    ),
                     relationType=EventRelationType.PLAYER_2,
                 )
             if row["player_in"] is not None:
                 self.relationsOutputHandler.add(
                     startNodeId=matchEventId,
-                    endNodeId=PlayerId(playerId=int(playerToIdMap[row["player_in"]])),
+                    endNodeId=self.nodeIdFormat.cached(
+                        PlayerId, int(playerToIdMap[row["player_in"]])
+                    ),
                     relationType=EventRelationType.PLAYER_1,
+                    relationProperties=eventProperties,
                 )
             if row["player_out"] is not None:
                 self.relationsOutputHandler.add(
                     startNodeId=matchEventId,
-                    endNodeId=PlayerId(playerId=int(playerToIdMap[row["player_out"]])),
+                    endNodeId=self.nodeIdFormat.cached(
+                        PlayerId, int(playerToIdMap[row["player_out"]])
+                    ),
                     relationType=EventRelationType.PLAYER_2,
                 )
 
@@ -316,9 +347,9 @@ class GraphDatabaseBuilder:
                 shotPlacementId = int(row["shot_place"])
                 self.relationsOutputHandler.add(
                     startNodeId=matchEventId,
-                    endNodeId=EventContextId(
-                        eventType=idToShotPlacementMap[shotPlacementId],
-                        eventId=shotPlacementId,
+                    endNodeId=self.nodeIdFormat.cached(
+                        EventContextId,
+                        idToShotPlacementMap[shotPlacementId], shotPlacementId
                     ),
                     relationType=EventRelationType.SHOT_PLACEMENT,
                 )
@@ -327,9 +358,9 @@ class GraphDatabaseBuilder:
                 shotOutcomeId = int(row["shot_outcome"])
                 self.relationsOutputHandler.add(
                     startNodeId=matchEventId,
-                    endNodeId=EventContextId(
-                        eventType=idToShotOutcomeMap[shotOutcomeId],
-                        eventId=shotOutcomeId,
+                    endNodeId=self.nodeIdFormat.cached(
+                        EventContextId,
+                        idToShotOutcomeMap[shotOutcomeId], shotOutcomeId
                     ),
                     relationType=EventRelationType.SHOT_OUTCOME,
                 )
@@ -338,9 +369,9 @@ class GraphDatabaseBuilder:
                 pitchLocationId = int(row["location"])
                 self.relationsOutputHandler.add(
                     startNodeId=matchEventId,
-                    endNodeId=EventContextId(
-                        eventType=idToPitchLocationMap[pitchLocationId],
-                        eventId=pitchLocationId,
+                    endNodeId=self.nodeIdFormat.cached(
+                        EventContextId,
+                        idToPitchLocationMap[pitchLocationId], pitchLocationId
                     ),
                     relationType=EventRelationType.PITCH_LOCATION,
                 )
@@ -349,8 +380,9 @@ class GraphDatabaseBuilder:
                 bodyPartId = int(row["bodypart"])
                 self.relationsOutputHandler.add(
                     startNodeId=matchEventId,
-                    endNodeId=EventContextId(
-                        eventType=idToBodyPartMap[bodyPartId], eventId=bodyPartId
+                    endNodeId=self.nodeIdFormat.cached(
+                        EventContextId,
+                        idToBodyPartMap[bodyPartId], bodyPartId
                     ),
                     relationType=EventRelationType.BODY_PART,
                 )
@@ -359,9 +391,9 @@ class GraphDatabaseBuilder:
                 assistMethodId = int(row["assist_method"])
                 self.relationsOutputHandler.add(
                     startNodeId=matchEventId,
-                    endNodeId=EventContextId(
-                        eventType=idToAssistMethodMap[assistMethodId],
-                        eventId=assistMethodId,
+                    endNodeId=self.nodeIdFormat.cached(
+                        EventContextId,
+                        idToAssistMethodMap[assistMethodId], assistMethodId
                     ),
                     relationType=EventRelationType.ASSIST_METHOD,
                 )
@@ -370,9 +402,120 @@ class GraphDatabaseBuilder:
                 eventSituationId = int(row["situation"])
                 self.relationsOutputHandler.add(
                     startNodeId=matchEventId,
-                    endNodeId=EventContextId(
-                        eventType=idToEventSituationMap[eventSituationId],
-                        eventId=eventSituationId,
+                    endNodeId=self.nodeIdFormat.cached(
+                        EventContextId,
+                        idToEventSituationMap[eventSituationId], eventSituationId
                     ),
                     relationType=EventRelationType.EVENT_SITUATION,
                 )
+
+            if commentaryTemplates is not None and templateIds[i] >= 0:
+                self.relationsOutputHandler.add(
+                    startNodeId=matchEventId,
+                    endNodeId=self.nodeIdFormat.cached(
+                        CommentaryTemplateId, int(templateIds[i])
+                    ),
+                    relationType=GeneralRelationType.HAS_COMMENTARY,
+                    relationProperties={
+                        RelationField.COMMENTARY_PARAMETERS: templateParameters[i]
+                    },
+                )
+
+    def add_football_events_columnar(
+        self,
+        eventData: pd.DataFrame,
+        teamToIdMap: Dict[str, int],
+        playerToIdMap: Dict[str, int],
+        matchDates: Optional[Dict[Hashable, str]] = None,
+        commentaryTemplates: Optional[CommentaryTemplates] = None,
+    ) -> None:
+        # whole-column equivalent of add_football_events, producing identical node and relation rows
+        eventData = eventData.dropna(axis=0, how="all")
+        with self.metricsRecorder.stage(name="node_columns"):
+            nodeColumns = match_event_node_columns(
+                eventData=eventData,
+                nodeIdFormat=self.nodeIdFormat,
+                internCommentary=commentaryTemplates is not None,
+            )
+        with self.metricsRecorder.stage(name="relation_columns"):
+            relationColumns = match_event_relation_columns(
+                eventData=eventData,
+                teamToIdMap=teamToIdMap,
+                playerToIdMap=playerToIdMap,
+                nodeIdFormat=self.nodeIdFormat,
+                matchDates=matchDates,
+            )
+        self._add_node_columns(nodeColumns=nodeColumns)
+        self._add_relation_columns(relationColumns=relationColumns)
+        if commentaryTemplates is not None:
+            # a batch of its own, its relations have their own properties
+            with self.metricsRecorder.stage(name="commentary_columns"):
+                relationColumns = commentary_relation_columns(
+                    eventData=eventData,
+                    commentaryTemplates=commentaryTemplates,
+                    nodeIdFormat=self.nodeIdFormat,
+                )
+            self._add_relation_columns(relationColumns=relationColumns)
+
+    def add_next_event_relations(
+        self,
+        eventData: pd.DataFrame,
+        lastEventForMatch: Optional[pd.DataFrame] = None,
+    ) -> pd.DataFrame:
+        # NEXT_EVENT relations between consecutive events of a match, for both the row-by-row and the columnar
+        # events. Returns the last event of every match so far, for the next chunk to continue from
+        eventData = eventData.dropna(axis=0, how="all")
+        with self.metricsRecorder.stage(name="event_sequence"):
+            eventSequence = match_event_sequence(
+                eventData=eventData, lastEventForMatch=lastEventForMatch
+            )
+        with self.metricsRecorder.stage(name="relation_columns"):
+            relationColumns = next_event_relation_columns(
+                eventSequence=eventSequence, nodeIdFormat=self.nodeIdFormat
+            )
+        self._add_relation_columns(relationColumns=relationColumns)
+        return last_event_for_match(eventSequence=eventSequence)
+
+    def add_season_stats(self, seasonStats: pd.DataFrame) -> None:
+        # SEASON_STATS nodes from SeasonStatsAggregator.result, linked to their player or team and season
+        with self.metricsRecorder.stage(name="node_columns"):
+            nodeColumns = season_stats_node_columns(
+                seasonStats=seasonStats, nodeIdFormat=self.nodeIdFormat
+            )
+        self._add_node_columns(nodeColumns=nodeColumns)
+        with self.metricsRecorder.stage(name="relation_columns"):
+            relationColumns = season_stats_relation_columns(
+                seasonStats=seasonStats, nodeIdFormat=self.nodeIdFormat
+            )
+        self._add_relation_columns(relationColumns=relationColumns)
+
+    def add_player_rosters(self, playerRosters: pd.DataFrame) -> None:
+        # PLAYED_FOR relations from PlayerRosterAggregator.result, with the season and appearances as properties
+        with self.metricsRecorder.stage(name="relation_columns"):
+            relationColumns = played_for_relation_columns(
+                playerRosters=playerRosters, nodeIdFormat=self.nodeIdFormat
+            )
+        self._add_relation_columns(relationColumns=relationColumns)
+
+    def add_commentary_templates(self, templateToIdMap: Dict[str, int]) -> None:
+        # one COMMENTARY_TEMPLATE node per template, shared by the events whose text differs only in the names
+        with self.metricsRecorder.stage(name="node_columns"):
+            nodeColumns = commentary_template_node_columns(
+                templateToIdMap=templateToIdMap, nodeIdFormat=self.nodeIdFormat
+            )
+        self._add_node_columns(nodeColumns=nodeColumns)
+
+    def _add_node_columns(self, nodeColumns: NodeColumns) -> None:
+        self.nodeOutputHandler.add_many(
+            nodeIds=nodeColumns.nodeIds,
+            nodeLabels=nodeColumns.nodeLabels,
+            nodeProperties=nodeColumns.nodeProperties,
+        )
+
+    def _add_relation_columns(self, relationColumns: RelationColumns) -> None:
+        self.relationsOutputHandler.add_many(
+            startNodeIds=relationColumns.startNodeIds,
+            endNodeIds=relationColumns.endNodeIds,
+            relationTypes=relationColumns.relationTypes,
+            relationProperties=relationColumns.relationProperties,
+        )
@@ -0,0 +1,253 @@
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from datamodel.existing_data_maps.pitch_location_map import idToPitchLocationMap
+from datamodel.existing_data_maps.shot_placement import idToShotPlacementMap
+from datamodel.node_field import NodeField
+from datamodel.node_ids import BaseNodeId
+from datamodel.node_ids import EventContextId
+from datamodel.node_ids import MatchEventId
+from datamodel.node_ids import MatchId
+from datamodel.node_ids import PlayerId
+from datamodel.node_ids import TeamId
+from datamodel.node_labels import NodeLabel
+from datamodel.relations import EventRelationType
+from datamodel.relations import GeneralRelationType
+from store.csr_graph import CsrDirection, CsrGraph
+
+
+def csr_rows(
+    indptr: np.ndarray, indices: np.ndarray, rows: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    # (row, neighbour) pairs of several CSR rows at once, without a Python loop over the rows
+    starts = indptr[rows]
+    counts = indptr[rows + 1] - starts
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(rows, counts), indices[np.repeat(starts, counts) + offsets]
+
+
+class FootballGraphQueries:
+    # Read-only queries over a saved CSR graph. Every query is a few CSR slices plus label bitmap and property
+    # lookups on the memory-mapped arrays, so answers don't need a Neo4j server.
+    # Results are node IDs in the format of the graph, e.g. "MEVabc" or their integer form with --integerIds.
+    # The arrays are used as plain ndarray views of the memory maps and the CSR arrays are looked up once per
+    # relation type and direction, so a warm query costs tens of microseconds (see the readme)
+    def __init__(self, graph: CsrGraph):
+        self.graph = graph
+        self.integerIds = graph.nodeIds.dtype.kind == "i"
+        self._nodeIds = graph.nodeIds.view(np.ndarray)
+        self._nodeIdOrder = graph.nodeIdOrder.view(np.ndarray)
+        self._csrArrays: Dict[Tuple[str, str], Tuple[np.ndarray, np.ndarray]] = {}
+        self._sortOrder: Optional[np.ndarray] = None
+        self._labelNodes: Dict[str, np.ndarray] = {}
+        self._labelMasks: Dict[str, np.ndarray] = {}
+
+    def _node_index(self, nodeId: BaseNodeId) -> int:
+        # a scalar binary search, without the array conversions of CsrGraph.node_index
+        graphNodeId = int(nodeId) if self.integerIds else nodeId.string_id()
+        position = int(
+            self._nodeIds.searchsorted(graphNodeId, sorter=self._nodeIdOrder)
+        )
+        if position < self.graph.nodeCount:
+            nodeIndex = int(self._nodeIdOrder[position])
+            if self._nodeIds[nodeIndex] == graphNodeId:
+                return nodeIndex
+        raise KeyError(graphNodeId)
+
+    def _csr(
+        self, relationType: str, direction: str = CsrDirection.OUT
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        arrays = self._csrArrays.get((relationType, direction))
+        if arrays is None:
+            indptr, indices = self.graph.csr(
+                relationType=relationType, direction=direction
+            )
+            arrays = self._csrArrays[(relationType, direction)] = (
+                indptr.view(np.ndarray),
+                indices.view(np.ndarray),
+            )
+        return arrays
+
+    def _neighbors(
+        self, nodeIndex: int, relationType: str, direction: str = CsrDirection.OUT
+    ) -> np.ndarray:
+        indptr, indices = self._csr(relationType=relationType, direction=direction)
+        return indices[indptr[nodeIndex] : indptr[nodeIndex + 1]]
+
+    def _sort_order(self) -> np.ndarray:
+        if self._sortOrder is None:
+            self._sortOrder = self.graph.node_property(field=NodeField.SORT_ORDER).view(
+                np.ndarray
+            )
+        return self._sortOrder
+
+    def _label_mask(self, label: str) -> np.ndarray:
+        # per-label boolean index over all nodes, computed from the bitmap on first use
+        mask = self._labelMasks.get(label)
+        if mask is None:
+            if label in self.graph.labels:
+                mask = self.graph.label_mask(label=label)
+            else:
+                mask = np.zeros(self.graph.nodeCount, dtype=bool)
+            self._labelMasks[label] = mask
+        return mask
+
+    def nodes_with_label(self, label: str) -> np.ndarray:
+        nodes = self._labelNodes.get(label)
+        if nodes is None:
+            nodes = self._labelNodes[label] = np.flatnonzero(self._label_mask(label))
+        return nodes
+
+    def _in_neighbors(self, nodeIndex: int, relationTypes: Iterable[str]) -> np.ndarray:
+        neighbors = [
+            self._neighbors(
+                nodeIndex=nodeIndex,
+                relationType=relationType,
+                direction=CsrDirection.IN,
+            )
+            for relationType in relationTypes
+        ]
+        if len(neighbors) == 1:
+            return neighbors[0]
+        return np.concatenate([np.empty(0, dtype=np.int64)] + neighbors)
+
+    def node_ids(self, nodeIndices: np.ndarray) -> List[Union[str, int]]:
+        return self.graph.node_id(nodeIndices).tolist()
+
+    def match_events(self, matchId: str) -> List[Union[str, int]]:
+        # events of a match, ordered by their sortOrder property
+        events = self._neighbors(
+            nodeIndex=self._node_index(MatchId(matchId=matchId)),
+            relationType=GeneralRelationType.HAS_MATCH_EVENT,
+        )
+        sortOrder = self._sort_order()[events]
+        return self.node_ids(events[np.argsort(sortOrder, kind="stable")])
+
+    def events_after(self, matchEventId: str, count: int = 1) -> List[Union[str, int]]:
+        # the next events of the same match, following the NEXT_EVENT relations (--nextEventRelations)
+        eventIndex = self._node_index(MatchEventId(matchEventId=matchEventId))
+        events = []
+        while len(events) < count:
+            nextEvents = self._neighbors(
+                nodeIndex=eventIndex, relationType=GeneralRelationType.NEXT_EVENT
+            )
+            if len(nextEvents) == 0:
+                break
+            eventIndex = int(nextEvents[0])
+            events.append(eventIndex)
+        return self.node_ids(np.array(events, dtype=np.int64))
+
+    def team_match_chain(self, teamId: int) -> List[Union[str, int]]:
+        # the team's matches in chronological order, following the NEXT relations between them
+        teamIndex = self._node_index(TeamId(teamId=teamId))
+        matches = np.unique(
+            self._in_neighbors(
+                nodeIndex=teamIndex,
+                relationTypes=[
+                    GeneralRelationType.HOME_TEAM,
+                    GeneralRelationType.AWAY_TEAM,
+                ],
+            )
+        )
+        if len(matches) == 0:
+            return []
+        # date node IDs sort chronologically, in both the string and the integer form
+        _, dateIndices = csr_rows(
+            *self._csr(
+                relationType=GeneralRelationType.ON_DATE, direction=CsrDirection.IN
+            ),
+            rows=matches,
+        )
+        matchDates = self._nodeIds[dateIndices]
+        previousMatches, nextMatches = csr_rows(
+            *self._csr(relationType=GeneralRelationType.NEXT), rows=matches
+        )
+        ownNext = np.isin(nextMatches, matches)
+        previousMatches, nextMatches = previousMatches[ownNext], nextMatches[ownNext]
+        # a match also has the opponent's NEXT relation. If that leads to a later match of this team too,
+        # the earlier of the two successors is this team's next match
+        order = np.lexsort(
+            (matchDates[np.searchsorted(matches, nextMatches)], previousMatches)
+        )
+        previousMatches, nextMatches = previousMatches[order], nextMatches[order]
+        firstSuccessor = np.r_[True, previousMatches[1:] != previousMatches[:-1]]
+        successor = dict(
+            zip(
+                previousMatches[firstSuccessor].tolist(),
+                nextMatches[firstSuccessor].tolist(),
+            )
+        )
+        firstMatches = np.setdiff1d(matches, nextMatches[firstSuccessor])
+        matchIndex = int(
+            firstMatches[np.argmin(matchDates[np.searchsorted(matches, firstMatches)])]
+        )
+        chain = []
+        while matchIndex is not None and len(chain) < len(matches):
+            chain.append(matchIndex)
+            matchIndex = successor.get(matchIndex)
+        return self.node_ids(np.array(chain, dtype=np.int64))
+
+    def player_events(
+        self,
+        playerId: int,
+        label: Optional[str] = None,
+        relationTypes: Iterable[str] = (
+            EventRelationType.PLAYER_1,
+            EventRelationType.PLAYER_2,
+        ),
+    ) -> List[Union[str, int]]:
+        # events a player took part in through PLAYER_1 and/or PLAYER_2, optionally only those with an event-type label
+        events = np.unique(
+            self._in_neighbors(
+                nodeIndex=self._node_index(PlayerId(playerId=playerId)),
+                relationTypes=relationTypes,
+            )
+        )
+        if label is not None:
+            events = events[self._label_mask(label)[events]]
+        return self.node_ids(events)
+
+    def shots(
+        self,
+        shotPlacementId: Optional[int] = None,
+        pitchLocationId: Optional[int] = None,
+    ) -> List[Union[str, int]]:
+        # shot attempts, optionally only those with the given SHOT_PLACEMENT and/or PITCH_LOCATION context
+        contexts = [
+            (
+                relationType,
+                self._node_index(
+                    EventContextId(
+                        eventType=idToContextMap[contextId], eventId=contextId
+                    )
+                ),
+            )
+            for contextId, idToContextMap, relationType in (
+                (
+                    shotPlacementId,
+                    idToShotPlacementMap,
+                    EventRelationType.SHOT_PLACEMENT,
+                ),
+                (
+                    pitchLocationId,
+                    idToPitchLocationMap,
+                    EventRelationType.PITCH_LOCATION,
+                ),
+            )
+            if contextId is not None
+        ]
+        if not contexts:
+            return self.node_ids(self.nodes_with_label(NodeLabel.SHOT_ATTEMPT))
+        # start from the events of the first context and check the others on each event's own relation,
+        # instead of intersecting with every shot of the graph
+        (relationType, contextIndex), *otherContexts = contexts
+        shots = self._in_neighbors(nodeIndex=contextIndex, relationTypes=[relationType])
+        shots = shots[self._label_mask(NodeLabel.SHOT_ATTEMPT)[shots]]
+        for relationType, contextIndex in otherContexts:
+            # an event has at most one context of each type
+            indptr, indices = self._csr(relationType=relationType)
+            starts = indptr[shots]
+            hasContext = indptr[shots + 1] > starts
+            shots = shots[hasContext][indices[starts[hasContext]] == contextIndex]
+        return self.node_ids(np.sort(shots))
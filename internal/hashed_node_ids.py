@@ -0,0 +1,88 @@
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from datamodel.existing_data_maps.assist_method_map import idToAssistMethodMap
+from datamodel.existing_data_maps.body_part_map import idToBodyPartMap
+from datamodel.existing_data_maps.event_situation import idToEventSituationMap
+from datamodel.existing_data_maps.pitch_location_map import idToPitchLocationMap
+from datamodel.existing_data_maps.shot_outcome import idToShotOutcomeMap
+from datamodel.existing_data_maps.shot_placement import idToShotPlacementMap
+from datamodel.node_ids import EventContextId
+from datamodel.node_ids import MatchEventId
+from datamodel.node_ids import MatchId
+from datamodel.node_ids import NodeIdFormat
+from internal.columnar import column_node_ids
+from store.build_manifest import BuildManifest
+from store.graph_integrity import HashedIdCollisionDetector
+from utils.input_readers import read_match_events
+from utils.input_readers import read_match_metadata
+
+DEFAULT_ID_CHUNK_SIZE = 1000000
+EVENT_CONTEXT_MAPS = [
+    idToAssistMethodMap,
+    idToBodyPartMap,
+    idToEventSituationMap,
+    idToPitchLocationMap,
+    idToShotOutcomeMap,
+    idToShotPlacementMap,
+]
+
+
+def _add_column(
+    detector: HashedIdCollisionDetector, nodeIdClass: type, values: pd.Series
+) -> None:
+    detector.add(
+        integerIds=column_node_ids(
+            nodeIdClass=nodeIdClass,
+            values=values,
+            nodeIdFormat=NodeIdFormat(integerIds=True),
+        ),
+        stringIds=column_node_ids(
+            nodeIdClass=nodeIdClass, values=values, nodeIdFormat=NodeIdFormat()
+        ),
+    )
+
+
+def check_hashed_node_ids(
+    matchMetadataFilepath: Union[str, Path],
+    matchEventsFilepath: Union[str, Path],
+    buildManifest: Optional[BuildManifest] = None,
+    chunkSize: Optional[int] = None,
+) -> None:
+    # run before an export with integer IDs, so a collision fails the run before anything is written, whether it
+    # then runs in worker processes, checkpointed or resumed. Only the ID columns of the inputs are read, plus the
+    # matches and events an incremental build has emitted before
+    detector = HashedIdCollisionDetector()
+    matchIds = read_match_metadata(
+        matchMetadataFilepath=matchMetadataFilepath, columns=["id_odsp"]
+    )["id_odsp"]
+    if buildManifest is not None:
+        matchIds = pd.concat([matchIds, pd.Series(sorted(buildManifest.matchIds))])
+    _add_column(detector=detector, nodeIdClass=MatchId, values=matchIds)
+    for eventChunk in read_match_events(
+        matchEventsFilepath=matchEventsFilepath,
+        columns=["id_event"],
+        chunkSize=chunkSize or DEFAULT_ID_CHUNK_SIZE,
+    ):
+        _add_column(
+            detector=detector, nodeIdClass=MatchEventId, values=eventChunk["id_event"]
+        )
+    if buildManifest is not None and len(buildManifest.eventIds):
+        _add_column(
+            detector=detector,
+            nodeIdClass=MatchEventId,
+            values=pd.Series(buildManifest.eventIds, dtype=object),
+        )
+    contextIds = [
+        EventContextId(eventType=eventType, eventId=i)
+        for contextMap in EVENT_CONTEXT_MAPS
+        for i, eventType in contextMap.items()
+    ]
+    detector.add(
+        integerIds=np.array([int(nodeId) for nodeId in contextIds]),
+        stringIds=np.array([nodeId.string_id() for nodeId in contextIds]),
+    )
+    detector.check()
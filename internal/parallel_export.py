@@ -0,0 +1,176 @@
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, Hashable, Optional, Union
+
+import numpy as np
+
+from internal.checkpointed_events import add_checkpointed_football_events
+from internal.commentary_templates import CommentaryTemplates
+from internal.database_builders import create_database_builder
+from internal.export_stages import add_football_events
+from internal.metered_graph_database_builder import MeteredGraphDatabaseBuilder
+from store.export_checkpoint import ExportCheckpoint
+from utils.event_shards import EventShards, attach_worker_queues
+from utils.input_readers import read_match_events
+from utils.stage_metrics import MetricsRecorder
+
+
+def process_match_events_in_parallel(
+    matchEventsFilepath: Union[str, Path],
+    outputDirectory: Union[str, Path],
+    teamToIdMap: Dict[str, int],
+    playerToIdMap: Dict[str, int],
+    columnar: bool,
+    nextEventRelations: bool,
+    matchDates: Optional[Dict[Hashable, str]],
+    commentaryTemplates: Optional[CommentaryTemplates],
+    chunkSize: int,
+    workers: int,
+    outputOptions: Dict[str, Any],
+    logger: logging.Logger,
+    existingEventIds: Optional[np.ndarray] = None,
+    metricsRecorder: Optional[MetricsRecorder] = None,
+    checkpoint: Optional[ExportCheckpoint] = None,
+) -> None:
+    # team and player nodes are written once by the parent, workers only reference their IDs. The parent also
+    # parses the events once and streams each worker the events of its matches while it parses the next chunks
+    metricsRecorder = metricsRecorder or MetricsRecorder()
+    parts = [
+        None if checkpoint is None else checkpoint.part(partIndex=shardIndex)
+        for shardIndex in range(workers)
+    ]
+    # resumed workers skip the chunks they have committed
+    firstRow = min(0 if part is None else part.committedRows for part in parts)
+    eventShards = EventShards(shardCount=workers, firstRow=firstRow)
+    try:
+        # every worker reads its queue until the end of the events, so there is a process per shard
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=attach_worker_queues,
+            initargs=eventShards.worker_initializer_args(),
+        ) as executor:
+            futures = [
+                executor.submit(
+                    process_match_events_shard,
+                    matchEventsFilepath=matchEventsFilepath,
+                    eventShards=eventShards,
+                    outputDirectory=outputDirectory,
+                    teamToIdMap=teamToIdMap,
+                    playerToIdMap=playerToIdMap,
+                    columnar=columnar,
+                    nextEventRelations=nextEventRelations,
+                    matchDates=matchDates,
+                    commentaryTemplates=commentaryTemplates,
+                    chunkSize=chunkSize,
+                    shardIndex=shardIndex,
+                    outputOptions=outputOptions,
+                    checkpoint=parts[shardIndex],
+                )
+                for shardIndex in range(workers)
+            ]
+            try:
+                logger.info(msg="Streaming football events to the workers by match")
+                with metricsRecorder.stage(name="shard_match_events"):
+                    eventShards.write(
+                        eventChunks=metricsRecorder.chunks(
+                            name="read_match_events",
+                            chunks=read_match_events(
+                                matchEventsFilepath=matchEventsFilepath,
+                                chunkSize=chunkSize,
+                                firstRow=firstRow,
+                            ),
+                        ),
+                        existingEventIds=existingEventIds,
+                        # workers only finish after the last chunk, one that is done before has failed
+                        workersStopped=lambda: any(future.done() for future in futures),
+                    )
+                for future in as_completed(futures):
+                    workerReport = future.result()
+                    metricsRecorder.add_worker_report(report=workerReport)
+                    logger.info(
+                        msg=f"Finished match events part file {workerReport['shardIndex']}"
+                    )
+            except BaseException:
+                eventShards.abort()
+                # the error of a failed worker says more than the parent's
+                failedFutures = [
+                    future
+                    for future in futures
+                    if future.done()
+                    and not future.cancelled()
+                    and future.exception() is not None
+                ]
+                if failedFutures:
+                    raise failedFutures[0].exception()
+                raise
+    finally:
+        eventShards.close()
+
+
+def process_match_events_shard(
+    matchEventsFilepath: Union[str, Path],
+    eventShards: EventShards,
+    outputDirectory: Union[str, Path],
+    teamToIdMap: Dict[str, int],
+    playerToIdMap: Dict[str, int],
+    columnar: bool,
+    nextEventRelations: bool,
+    matchDates: Optional[Dict[Hashable, str]],
+    commentaryTemplates: Optional[CommentaryTemplates],
+    chunkSize: int,
+    shardIndex: int,
+    outputOptions: Dict[str, Any],
+    checkpoint: Optional[ExportCheckpoint] = None,
+) -> Dict[str, Any]:
+    # every event of a match lands in the same shard, so each part file is self-contained per match
+    metricsRecorder = MetricsRecorder(
+        traceMemory=outputOptions.get("traceMemory", False)
+    )
+    if checkpoint is not None:
+        # each chunk goes to its own files, committed to this shard's part checkpoint
+        add_checkpointed_football_events(
+            matchEventsFilepath=matchEventsFilepath,
+            checkpoint=checkpoint,
+            teamToIdMap=teamToIdMap,
+            playerToIdMap=playerToIdMap,
+            columnar=columnar,
+            nextEventRelations=nextEventRelations,
+            matchDates=matchDates,
+            commentaryTemplates=commentaryTemplates,
+            chunkSize=chunkSize,
+            outputOptions=outputOptions,
+            metricsRecorder=metricsRecorder,
+            eventShards=eventShards,
+        )
+        checkpoint.finish()
+    else:
+        databaseBuilder = MeteredGraphDatabaseBuilder(
+            databaseBuilder=create_database_builder(
+                outputDirectory=outputDirectory,
+                outputOptions=outputOptions,
+                partIndex=shardIndex,
+            ),
+            recorder=metricsRecorder,
+            meterHandlers=outputOptions.get("meterHandlers", False),
+        )
+        lastEventForMatch = None
+        for shardEvents, _ in metricsRecorder.chunks(
+            name="read_match_events",
+            chunks=eventShards.chunks(shardIndex=shardIndex),
+        ):
+            lastEventForMatch = add_football_events(
+                eventData=shardEvents,
+                databaseBuilder=databaseBuilder,
+                teamToIdMap=teamToIdMap,
+                playerToIdMap=playerToIdMap,
+                columnar=columnar,
+                nextEventRelations=nextEventRelations,
+                matchDates=matchDates,
+                commentaryTemplates=commentaryTemplates,
+                lastEventForMatch=lastEventForMatch,
+            )
+        with metricsRecorder.stage(name="close"):
+            databaseBuilder.close()
+    metricsRecorder.close()
+    return {"shardIndex": shardIndex, **metricsRecorder.report()}
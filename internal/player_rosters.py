@@ -0,0 +1,135 @@
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from datamodel.relations import RelationField
+from internal.season_stats import category_values
+from store.graph_integrity import SortedKeySet
+from store.id_registry import IdDimension, IdRegistry
+
+# the event columns the rosters are derived from
+PLAYER_ROSTER_COLUMNS = ["id_odsp", "event_team", "player", "player_in"]
+# player_in is the substitute coming on for the event_team
+APPEARANCE_PLAYER_COLUMNS = ["player", "player_in"]
+APPEARANCE_KEYS = ["playerId", "teamId", "matchIndex"]
+PLAYER_ROSTER_KEYS = ["playerId", "teamId", "seasonId"]
+
+
+class PlayerRosterAggregator:
+    # PLAYED_FOR rosters: per player, team and season the first and last match date and the number of matches the
+    # player appeared in for the team, as player or player_in of an event of that event_team. Appearances are
+    # deduplicated with 64-bit hashes of (player, team, match), so a match whose events are split across chunks
+    # counts once, and apart from the hashes only the per roster totals are kept
+    def __init__(self, matchMetadata: pd.DataFrame, idRegistry: IdRegistry):
+        self.idRegistry = idRegistry
+        matchMetadata = matchMetadata.drop_duplicates(subset=["id_odsp"])
+        self.matchIndex = pd.Index(matchMetadata["id_odsp"])
+        self.matchSeasonIds = idRegistry.lookup(
+            dimension=IdDimension.SEASON, values=matchMetadata["season"]
+        )
+        self.matchDates = pd.to_datetime(
+            matchMetadata["date"], errors="coerce"
+        ).to_numpy(dtype="datetime64[D]")
+        self.appearanceKeys = SortedKeySet()
+        self.totals: Optional[pd.DataFrame] = None
+
+    def _ids(self, names: pd.Series, dimension: str) -> np.ndarray:
+        return category_values(
+            values=names,
+            mapValues=lambda values: self.idRegistry.lookup(
+                dimension=dimension, values=values
+            ),
+        )
+
+    def add(self, eventData: pd.DataFrame) -> None:
+        matchIndices = category_values(
+            values=eventData["id_odsp"], mapValues=self.matchIndex.get_indexer
+        )
+        teamIds = self._ids(names=eventData["event_team"], dimension=IdDimension.TEAM)
+        eventMask = (
+            eventData["id_odsp"].notnull() & eventData["event_team"].notnull()
+        ).to_numpy()
+        appearances: List[pd.DataFrame] = []
+        for column in APPEARANCE_PLAYER_COLUMNS:
+            mask = eventMask & eventData[column].notnull().to_numpy()
+            appearances.append(
+                pd.DataFrame(
+                    {
+                        "playerId": self._ids(
+                            names=eventData[column], dimension=IdDimension.PLAYER
+                        )[mask],
+                        "teamId": teamIds[mask],
+                        "matchIndex": matchIndices[mask],
+                    }
+                )
+            )
+        appearance = pd.concat(appearances, ignore_index=True)
+        # names or matches missing from the registry or the metadata resolve to -1
+        appearance = appearance[(appearance[APPEARANCE_KEYS] >= 0).all(axis=1)]
+        appearance = appearance.drop_duplicates(ignore_index=True)
+        keys = pd.util.hash_pandas_object(appearance, index=False).to_numpy()
+        newAppearances = ~self.appearanceKeys.contains(keys=keys)
+        self.appearanceKeys.add(keys=keys[newAppearances])
+        appearance = appearance[newAppearances]
+        matchIndices = appearance["matchIndex"].to_numpy()
+        partials = [
+            pd.DataFrame(
+                {
+                    "playerId": appearance["playerId"].to_numpy(),
+                    "teamId": appearance["teamId"].to_numpy(),
+                    "seasonId": self.matchSeasonIds[matchIndices],
+                    RelationField.FIRST_APPEARANCE: self.matchDates[matchIndices],
+                    RelationField.LAST_APPEARANCE: self.matchDates[matchIndices],
+                    RelationField.APPEARANCES: np.ones(
+                        len(matchIndices), dtype=np.int64
+                    ),
+                }
+            )
+        ]
+        if self.totals is not None:
+            partials.insert(0, self.totals)
+        self.totals = (
+            pd.concat(partials, ignore_index=True)
+            .groupby(PLAYER_ROSTER_KEYS, sort=False)
+            .agg(
+                {
+                    RelationField.FIRST_APPEARANCE: "min",
+                    RelationField.LAST_APPEARANCE: "max",
+                    RelationField.APPEARANCES: "sum",
+                }
+            )
+            .reset_index()
+        )
+
+    def result(self) -> pd.DataFrame:
+        # one row per player, team and season, with the season and ISO dates as the relation properties
+        if self.totals is None:
+            playerRosters = pd.DataFrame(
+                {
+                    "playerId": np.zeros(0, dtype=np.int64),
+                    "teamId": np.zeros(0, dtype=np.int64),
+                    "seasonId": np.zeros(0, dtype=np.int64),
+                    RelationField.FIRST_APPEARANCE: np.zeros(0, dtype="datetime64[ns]"),
+                    RelationField.LAST_APPEARANCE: np.zeros(0, dtype="datetime64[ns]"),
+                    RelationField.APPEARANCES: np.zeros(0, dtype=np.int64),
+                }
+            )
+        else:
+            playerRosters = self.totals.astype(
+                {"playerId": np.int64, "teamId": np.int64, "seasonId": np.int64}
+            )
+        playerRosters = playerRosters.sort_values(
+            by=PLAYER_ROSTER_KEYS, kind="mergesort", ignore_index=True
+        )
+        playerRosters[RelationField.SEASON] = np.array(
+            self.idRegistry.names[IdDimension.SEASON], dtype=object
+        )[playerRosters["seasonId"].to_numpy()]
+        for field in (RelationField.FIRST_APPEARANCE, RelationField.LAST_APPEARANCE):
+            # matches without a valid date leave the dates empty
+            playerRosters[field] = (
+                pd.to_datetime(playerRosters[field])
+                .dt.strftime("%Y-%m-%d")
+                .astype(object)
+            )
+        return playerRosters
@@ -0,0 +1,179 @@
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from datamodel.existing_data_maps.assist_method_map import idToAssistMethodMap
+from datamodel.existing_data_maps.event_types import idToEventTypeMap
+from datamodel.existing_data_maps.shot_outcome import idToShotOutcomeMap
+from datamodel.node_field import NodeField
+from datamodel.node_ids import BaseNodeId
+from datamodel.node_labels import NodeLabel
+from store.id_registry import IdDimension, IdRegistry
+
+# the event columns the aggregates are computed from
+SEASON_STATS_COLUMNS = [
+    "id_odsp",
+    "event_type",
+    "event_team",
+    "player",
+    "player2",
+    "is_goal",
+    "shot_outcome",
+    "assist_method",
+]
+SEASON_STATS_KEYS = ["entityLetter", "entityId", "seasonId"]
+
+_eventTypeIds = {label: i for i, label in idToEventTypeMap.items()}
+SHOT_EVENT_TYPE = _eventTypeIds[NodeLabel.SHOT_ATTEMPT]
+YELLOW_CARD_EVENT_TYPES = [_eventTypeIds[NodeLabel.YELLOW_CARD]]
+# a second yellow card is a sending off as well
+RED_CARD_EVENT_TYPES = [
+    _eventTypeIds[NodeLabel.SECOND_YELLOW_CARD],
+    _eventTypeIds[NodeLabel.RED_CARD],
+]
+_shotOutcomeIds = {outcome: i for i, outcome in idToShotOutcomeMap.items()}
+ON_TARGET_SHOT_OUTCOME = _shotOutcomeIds["ON_TARGET"]
+ASSIST_METHODS = [i for i, method in idToAssistMethodMap.items() if method is not None]
+
+
+def category_values(
+    values: pd.Series, mapValues: Callable[[pd.Index], np.ndarray]
+) -> np.ndarray:
+    # categorical columns are mapped once per category and taken by code, nulls are masked out by the callers
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return mapValues(values.cat.categories)[values.cat.codes.to_numpy()]
+    return mapValues(pd.Index(values))
+
+
+class SeasonStatsAggregator:
+    # Goals, shots, shots on target, assists and cards per player and season and per team and season, summed
+    # chunk by chunk with groupbys over the event columns. Players get the events they are the player of and the
+    # assists of goals they are player2 of, teams every event of their event_team. Seasons come from the match
+    def __init__(self, matchMetadata: pd.DataFrame, idRegistry: IdRegistry):
+        self.idRegistry = idRegistry
+        matchMetadata = matchMetadata.drop_duplicates(subset=["id_odsp"])
+        self.matchToSeasonId = pd.Series(
+            idRegistry.lookup(
+                dimension=IdDimension.SEASON, values=matchMetadata["season"]
+            ),
+            index=matchMetadata["id_odsp"].to_numpy(),
+        )
+        self.totals: Optional[pd.DataFrame] = None
+
+    def _entity_stats(
+        self,
+        entityLetter: str,
+        dimension: str,
+        names: pd.Series,
+        seasonIds: np.ndarray,
+        counts: Dict[str, np.ndarray],
+    ) -> pd.DataFrame:
+        mask = names.notnull().to_numpy()
+        entityIds = category_values(
+            values=names,
+            mapValues=lambda values: self.idRegistry.lookup(
+                dimension=dimension, values=values
+            ),
+        )
+        return (
+            pd.DataFrame(
+                {
+                    "entityLetter": entityLetter,
+                    "entityId": entityIds[mask],
+                    "seasonId": seasonIds[mask],
+                    **{field: count[mask] for field, count in counts.items()},
+                }
+            )
+            .groupby(SEASON_STATS_KEYS, sort=False)
+            .sum()
+            .reset_index()
+        )
+
+    def add(self, eventData: pd.DataFrame) -> None:
+        seasonIds = category_values(
+            values=eventData["id_odsp"],
+            mapValues=lambda matchIds: self.matchToSeasonId.reindex(
+                matchIds
+            ).to_numpy(),
+        )
+        eventTypes = eventData["event_type"]
+        isGoal = eventData["is_goal"].to_numpy() == 1
+        counts = {
+            NodeField.GOALS: isGoal,
+            NodeField.SHOTS: (eventTypes == SHOT_EVENT_TYPE).to_numpy(),
+            NodeField.SHOTS_ON_TARGET: (
+                eventData["shot_outcome"] == ON_TARGET_SHOT_OUTCOME
+            ).to_numpy(),
+            NodeField.YELLOW_CARDS: eventTypes.isin(YELLOW_CARD_EVENT_TYPES).to_numpy(),
+            NodeField.RED_CARDS: eventTypes.isin(RED_CARD_EVENT_TYPES).to_numpy(),
+        }
+        counts = {field: count.astype(np.int64) for field, count in counts.items()}
+        assists = (
+            isGoal & eventData["assist_method"].isin(ASSIST_METHODS).to_numpy()
+        ).astype(np.int64)
+        partials: List[pd.DataFrame] = [
+            self._entity_stats(
+                entityLetter=BaseNodeId.Letters.PLAYER,
+                dimension=IdDimension.PLAYER,
+                names=eventData["player"],
+                seasonIds=seasonIds,
+                counts=counts,
+            ),
+            self._entity_stats(
+                entityLetter=BaseNodeId.Letters.PLAYER,
+                dimension=IdDimension.PLAYER,
+                names=eventData["player2"],
+                seasonIds=seasonIds,
+                counts={NodeField.ASSISTS: assists},
+            ),
+            self._entity_stats(
+                entityLetter=BaseNodeId.Letters.TEAM,
+                dimension=IdDimension.TEAM,
+                names=eventData["event_team"],
+                seasonIds=seasonIds,
+                counts={**counts, NodeField.ASSISTS: assists},
+            ),
+        ]
+        if self.totals is not None:
+            partials.insert(0, self.totals)
+        # only the running totals are kept, so memory is bounded by players and teams times seasons
+        self.totals = (
+            pd.concat(partials, ignore_index=True)
+            .groupby(SEASON_STATS_KEYS, sort=False)
+            .sum()
+            .reset_index()
+        )
+
+    def result(self) -> pd.DataFrame:
+        # one row per player or team and season, with its name and season as text
+        if self.totals is None:
+            seasonStats = pd.DataFrame(
+                columns=SEASON_STATS_KEYS + NodeField.SEASON_STATS_FIELDS
+            )
+        else:
+            seasonStats = self.totals.reindex(
+                columns=SEASON_STATS_KEYS + NodeField.SEASON_STATS_FIELDS
+            ).fillna(0)
+        seasonStats = seasonStats.astype(
+            {
+                "entityId": np.int64,
+                "seasonId": np.int64,
+                **{field: np.int64 for field in NodeField.SEASON_STATS_FIELDS},
+            }
+        ).sort_values(by=SEASON_STATS_KEYS, kind="mergesort", ignore_index=True)
+        seasonNames = np.array(
+            [str(season) for season in self.idRegistry.names[IdDimension.SEASON]],
+            dtype=object,
+        )[seasonStats["seasonId"].to_numpy()]
+        entityNames = np.empty(len(seasonStats), dtype=object)
+        for entityLetter, dimension in (
+            (BaseNodeId.Letters.PLAYER, IdDimension.PLAYER),
+            (BaseNodeId.Letters.TEAM, IdDimension.TEAM),
+        ):
+            mask = (seasonStats["entityLetter"] == entityLetter).to_numpy()
+            entityNames[mask] = np.array(
+                self.idRegistry.names[dimension], dtype=object
+            )[seasonStats["entityId"].to_numpy()[mask]]
+        seasonStats["text"] = entityNames + " " + seasonNames
+        return seasonStats
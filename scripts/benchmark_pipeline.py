@@ -0,0 +1,331 @@
+import json
+import logging
+import multiprocessing
+import platform
+import shutil
+import subprocess
+import sys
+
+sys.path.append("../")
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Union
+
+import fire
+import numpy as np
+import pandas as pd
+
+from internal.database_builders import create_database_builder
+from internal.export_options import ExportOptions
+from internal.export_stages import (
+    DEFAULT_SHARD_CHUNK_SIZE,
+    process_match_metadata_file,
+)
+from internal.football_graph_export import (
+    RUN_REPORT_FILE_NAME,
+    export_football_graph,
+    process_match_events_file,
+)
+from internal.metered_graph_database_builder import MeteredGraphDatabaseBuilder
+from utils.logger import get_logger
+from utils.stage_metrics import MetricsRecorder
+from utils.synthetic_data import write_synthetic_files
+
+# columnar and the output options of create_database_builder per benchmarked mode
+BENCHMARK_MODES: Dict[str, Dict[str, Any]] = {
+    "rows": {},
+    "columnar": {"columnar": True},
+    "typed": {"columnar": True, "typedNodeFiles": True},
+    "integer": {"columnar": True, "integerIds": True},
+    "pipelined": {"columnar": True, "pipelined": True},
+    "parquet": {"columnar": True, "parquetOutput": True},
+    "csr": {"columnar": True, "csrOutput": True},
+}
+# stages that are slower than the baseline by more than this are logged as regressions, unless they are too short
+# for the difference to be more than noise
+REGRESSION_THRESHOLD = 0.1
+REGRESSION_MIN_SECONDS = 0.05
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(
+    matchMetadataFilepath: Union[str, Path],
+    matchEventsFilepath: Union[str, Path],
+    outputDirectory: Union[str, Path],
+    mode: str,
+    chunkSize: Optional[int],
+    traceMemory: bool,
+    logOutputFilename: Union[str, Path],
+) -> Dict[str, Any]:
+    # one single-process export, with every builder stage and output handler metered
+    logger = get_logger(logOutputFilename=logOutputFilename)
+    modeOptions = BENCHMARK_MODES[mode]
+    outputOptions = {
+        "compressionLevel": 9,
+        "pipelined": False,
+        "compressionThreads": 1,
+        **modeOptions,
+    }
+    shutil.rmtree(outputDirectory, ignore_errors=True)
+    Path(outputDirectory).mkdir(parents=True)
+    recorder = MetricsRecorder(traceMemory=traceMemory)
+    databaseBuilder = MeteredGraphDatabaseBuilder(
+        databaseBuilder=create_database_builder(
+            outputDirectory=outputDirectory, outputOptions=outputOptions
+        ),
+        recorder=recorder,
+        meterHandlers=True,
+    )
+    teamToIdMap = process_match_metadata_file(
+        matchMetadataFilepath=matchMetadataFilepath,
+        databaseBuilder=databaseBuilder,
+        logger=logger,
+    )
+    process_match_events_file(
+        matchEventsFilepath=matchEventsFilepath,
+        databaseBuilder=databaseBuilder,
+        teamToIdMap=teamToIdMap,
+        logger=logger,
+        columnar=modeOptions.get("columnar", False),
+        chunkSize=chunkSize,
+    )
+    with recorder.stage(name="close"):
+        databaseBuilder.close()
+    recorder.close()
+    report = recorder.report()
+    # reading, remapping and ID maps happen between the builder stages
+    report["outsideStagesSeconds"] = round(
+        report["wallSeconds"]
+        - sum(
+            stage["wallSeconds"]
+            for name, stage in report["stages"].items()
+            if "/" not in name
+        ),
+        6,
+    )
+    report["outputBytes"] = sum(
+        path.stat().st_size
+        for path in Path(outputDirectory).rglob("*")
+        if path.is_file()
+    )
+    return report
+
+
+def run_parallel_benchmark(
+    matchMetadataFilepath: Union[str, Path],
+    matchEventsFilepath: Union[str, Path],
+    outputDirectory: Union[str, Path],
+    workers: int,
+    chunkSize: Optional[int],
+    traceMemory: bool,
+) -> Dict[str, Any]:
+    # a columnar export with the match events split across workers, timed by its own run report. The parent's
+    # shard_match_events stage is the time it parses and streams the events, while the workers write them
+    shutil.rmtree(outputDirectory, ignore_errors=True)
+    Path(outputDirectory).mkdir(parents=True)
+    export_football_graph(
+        matchMetadataFilepath=matchMetadataFilepath,
+        matchEventsFilepath=matchEventsFilepath,
+        outputDirectory=outputDirectory,
+        exportOptions=ExportOptions(
+            columnar=True,
+            chunkSize=chunkSize or DEFAULT_SHARD_CHUNK_SIZE,
+            workers=workers,
+            traceMemory=traceMemory,
+        ),
+    )
+    with open(f"{outputDirectory}/{RUN_REPORT_FILE_NAME}") as file:
+        report = json.load(file)
+    return {
+        key: report[key]
+        for key in [
+            "wallSeconds",
+            "cpuSeconds",
+            "maxRssBytes",
+            "stages",
+            "workers",
+            "outputBytes",
+        ]
+    }
+
+
+def run_benchmark_process(
+    benchmark=run_benchmark, **benchmarkOptions
+) -> Dict[str, Any]:
+    # each export runs in a new interpreter, so its peak memory (ru_maxrss only ever grows within a process) doesn't
+    # include the runs before it
+    with ProcessPoolExecutor(
+        max_workers=1, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        return executor.submit(benchmark, **benchmarkOptions).result()
+
+
+def log_regressions(
+    results: Dict[str, Any], baseline: Dict[str, Any], logger: logging.Logger
+) -> None:
+    baselineRuns = {(run["mode"], run["matchCount"]): run for run in baseline["runs"]}
+    for run in results["runs"]:
+        baselineRun = baselineRuns.get((run["mode"], run["matchCount"]))
+        if baselineRun is None:
+            continue
+        timings = {"total": (run["wallSeconds"], baselineRun["wallSeconds"])}
+        for name, stage in run["stages"].items():
+            if name in baselineRun["stages"]:
+                timings[name] = (
+                    stage["wallSeconds"],
+                    baselineRun["stages"][name]["wallSeconds"],
+                )
+        for name, (seconds, baselineSeconds) in timings.items():
+            if max(
+                seconds, baselineSeconds
+            ) >= REGRESSION_MIN_SECONDS and seconds > baselineSeconds * (
+                1 + REGRESSION_THRESHOLD
+            ):
+                logger.warning(
+                    msg=f"{run['mode']} with {run['matchCount']} matches: {name} took {seconds:.3f}s, "
+                    f"{seconds / baselineSeconds - 1:.0%} more than the baseline's {baselineSeconds:.3f}s"
+                )
+
+
+def add_run(
+    results: Dict[str, Any],
+    mode: str,
+    matchCount: int,
+    eventCount: int,
+    report: Dict[str, Any],
+    logger: logging.Logger,
+) -> None:
+    results["runs"].append(
+        {
+            "mode": mode,
+            "matchCount": matchCount,
+            "eventCount": eventCount,
+            "eventsPerSecond": round(eventCount / report["wallSeconds"], 1),
+            **report,
+        }
+    )
+    logger.info(
+        msg=f"{mode} with {matchCount} matches took {report['wallSeconds']:.2f}s"
+    )
+
+
+def benchmark_pipeline(
+    benchmarkDirectory: Union[str, Path],
+    matchCounts: Iterable[int] = (1000,),
+    modes: Iterable[str] = ("rows", "columnar"),
+    chunkSize: Optional[int] = None,
+    seed: int = 0,
+    traceMemory: bool = False,
+    resultsFile: Optional[Union[str, Path]] = None,
+    baselineFile: Optional[Union[str, Path]] = None,
+    workers: Iterable[int] = (),
+) -> None:
+    # Generates synthetic input files of each size (kept under <benchmarkDirectory>/data/<matchCount>_<seed> and reused
+    # by later runs with the same seed), exports them in each mode and saves the timings as JSON. With a
+    # baselineFile of an earlier version, stages that got slower are logged. Each of the worker counts adds a
+    # parallel columnar export, as mode workers_<n>
+    matchCounts = [matchCounts] if isinstance(matchCounts, int) else list(matchCounts)
+    modes = [modes] if isinstance(modes, str) else list(modes)
+    workers = [workers] if isinstance(workers, int) else list(workers)
+    unknownModes = set(modes) - set(BENCHMARK_MODES)
+    if unknownModes:
+        raise ValueError(
+            f"Unknown modes {sorted(unknownModes)}, choose from {list(BENCHMARK_MODES)}"
+        )
+    Path(benchmarkDirectory).mkdir(parents=True, exist_ok=True)
+    logOutputFilename = f"{benchmarkDirectory}/benchmark_{datetime.now().date()}.log"
+    logger = get_logger(logOutputFilename=logOutputFilename)
+    results = {
+        "createdAt": datetime.now().isoformat(timespec="seconds"),
+        "gitCommit": git_commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "seed": seed,
+        "chunkSize": chunkSize,
+        "traceMemory": traceMemory,
+        "cpuCount": multiprocessing.cpu_count(),
+        "runs": [],
+    }
+    for matchCount in matchCounts:
+        dataDirectory = Path(f"{benchmarkDirectory}/data/{matchCount}_{seed}")
+        matchMetadataFilepath = dataDirectory / "ginf.csv"
+        matchEventsFilepath = dataDirectory / "events.csv"
+        if not matchEventsFilepath.exists():
+            logger.info(msg=f"Generating {matchCount} synthetic matches")
+            write_synthetic_files(
+                outputDirectory=dataDirectory, matchCount=matchCount, seed=seed
+            )
+        eventCount = sum(
+            len(chunk)
+            for chunk in pd.read_csv(
+                matchEventsFilepath, usecols=["id_event"], chunksize=1000000
+            )
+        )
+        for mode in modes:
+            logger.info(msg=f"Benchmarking {mode} with {matchCount} matches")
+            report = run_benchmark_process(
+                matchMetadataFilepath=matchMetadataFilepath,
+                matchEventsFilepath=matchEventsFilepath,
+                outputDirectory=f"{benchmarkDirectory}/output/{mode}_{matchCount}",
+                mode=mode,
+                chunkSize=chunkSize,
+                traceMemory=traceMemory,
+                logOutputFilename=logOutputFilename,
+            )
+            add_run(
+                results=results,
+                mode=mode,
+                matchCount=matchCount,
+                eventCount=eventCount,
+                report=report,
+                logger=logger,
+            )
+        for workerCount in workers:
+            mode = f"workers_{workerCount}"
+            logger.info(msg=f"Benchmarking {mode} with {matchCount} matches")
+            report = run_benchmark_process(
+                benchmark=run_parallel_benchmark,
+                matchMetadataFilepath=matchMetadataFilepath,
+                matchEventsFilepath=matchEventsFilepath,
+                outputDirectory=f"{benchmarkDirectory}/output/{mode}_{matchCount}",
+                workers=workerCount,
+                chunkSize=chunkSize,
+                traceMemory=traceMemory,
+            )
+            add_run(
+                results=results,
+                mode=mode,
+                matchCount=matchCount,
+                eventCount=eventCount,
+                report=report,
+                logger=logger,
+            )
+    resultsFile = (
+        resultsFile
+        or f"{benchmarkDirectory}/benchmark_{datetime.now():%Y%m%d_%H%M%S}.json"
+    )
+    with open(resultsFile, "w") as file:
+        json.dump(results, file, indent=2)
+    logger.info(msg=f"Saved benchmark results to {resultsFile}")
+    if baselineFile is not None:
+        with open(baselineFile) as file:
+            log_regressions(results=results, baseline=json.load(file), logger=logger)
+
+
+if __name__ == "__main__":
+    fire.Fire(benchmark_pipeline)
@@ -0,0 +1,121 @@
+import sys
+
+sys.path.append("../")
+from glob import glob
+from pathlib import Path
+from typing import List, Union
+
+import fire
+import pandas as pd
+
+from datamodel.node_field import NodeField, NodeFieldType
+from store.graph_output_handlers.csr_output_handlers.csr_graph_store import (
+    CsrGraphStore,
+)
+
+BOOLEAN_VALUES = {"True": 1.0, "true": 1.0, "False": 0.0, "false": 0.0}
+
+
+def _read_csv_file(dataFile: str, header: List[str]) -> pd.DataFrame:
+    try:
+        return pd.read_csv(
+            dataFile,
+            header=None,
+            names=header,
+            dtype=str,
+            escapechar="\\",
+            keep_default_na=False,
+            na_values=[""],
+        )
+    except pd.errors.EmptyDataError:
+        # stages that only write some of the files leave the others empty
+        return pd.DataFrame(columns=header)
+
+
+def _read_csv_files(headerFile: str, dataFiles: List[str]) -> pd.DataFrame:
+    # neo4j-admin import layout: a header file plus header-less (part) data files
+    header = open(headerFile).read().strip().split(",")
+    return pd.concat(
+        [pd.DataFrame(columns=header)]
+        + [_read_csv_file(dataFile=dataFile, header=header) for dataFile in dataFiles],
+        ignore_index=True,
+    )
+
+
+def _add_nodes(graphStore: CsrGraphStore, nodes: pd.DataFrame) -> None:
+    nodeProperties = {}
+    for column in nodes.columns:
+        if column in (NodeField.ID, NodeField.LABEL):
+            continue
+        # typed headers carry the neo4j-admin type, e.g. homeOdds:float
+        field = column.split(":")[0]
+        fieldType = NodeField.TYPES.get(field, NodeFieldType.STRING)
+        if fieldType == NodeFieldType.BOOLEAN:
+            nodeProperties[field] = nodes[column].map(BOOLEAN_VALUES).tolist()
+        elif fieldType != NodeFieldType.STRING:
+            nodeProperties[field] = pd.to_numeric(nodes[column]).tolist()
+    graphStore.add_nodes(
+        nodeIds=nodes[NodeField.ID].tolist(),
+        nodeLabels=[labels.split(";") for labels in nodes[NodeField.LABEL]],
+        nodeProperties=nodeProperties,
+    )
+
+
+def build_csr_graph(
+    processedFileDirectory: Union[str, Path],
+    csrGraphDirectory: Union[str, Path],
+    integerIds: bool = False,
+) -> None:
+    # builds the CSR graph of internal.graph_queries from the (optionally typed) node and relation files of a
+    # previous run, so those can be queried locally without re-processing the input files
+    graphStore = CsrGraphStore(directory=csrGraphDirectory, integerIds=integerIds)
+    graphStore.open()
+    nodeFiles = sorted(
+        glob(f"{processedFileDirectory}/football_event_graph_nodes*.csv.gz")
+    )
+    if nodeFiles:
+        _add_nodes(
+            graphStore=graphStore,
+            nodes=_read_csv_files(f"{processedFileDirectory}/nodes.csv", nodeFiles),
+        )
+    for headerFile in sorted(glob(f"{processedFileDirectory}/*_nodes_header.csv")):
+        kind = Path(headerFile).name[: -len("_nodes_header.csv")]
+        _add_nodes(
+            graphStore=graphStore,
+            nodes=_read_csv_files(
+                headerFile,
+                sorted(
+                    glob(
+                        f"{processedFileDirectory}/football_event_graph_{kind}_nodes*.csv.gz"
+                    )
+                ),
+            ),
+        )
+    relationFiles = [
+        (
+            f"{processedFileDirectory}/relations.csv",
+            f"{processedFileDirectory}/football_event_graph_relations*.csv.gz",
+        )
+    ]
+    # relation types written with properties have a file and header of their own, only their topology is kept
+    for headerFile in sorted(glob(f"{processedFileDirectory}/*_relations_header.csv")):
+        relationType = Path(headerFile).name[: -len("_relations_header.csv")]
+        relationFiles.append(
+            (
+                headerFile,
+                f"{processedFileDirectory}/football_event_graph_{relationType}_relations*.csv.gz",
+            )
+        )
+    for headerFile, dataFilePattern in relationFiles:
+        relations = _read_csv_files(headerFile, sorted(glob(dataFilePattern)))
+        startIds, endIds, relationTypes = (
+            relations[column].to_numpy(dtype=object) for column in relations.columns[:3]
+        )
+        graphStore.add_relations(
+            startNodeIds=startIds, endNodeIds=endIds, relationTypes=relationTypes
+        )
+    graphStore.close()
+
+
+if __name__ == "__main__":
+    fire.Fire(build_csr_graph)
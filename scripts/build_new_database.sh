@@ -17,6 +17,35 @@ then
   exit 1;
 fi
 
+# set ID_TYPE=INTEGER for files written with --integerIds
+ID_TYPE=${ID_TYPE:-STRING}
+
+# the data file names are regular expressions, so part files written with --workers and chunk files written with
+# --checkpointed are picked up as well
+NODE_FILES=()
+if [ -f "${PROCESSED_FILE_DIRECTORY}/nodes.csv" ]
+then
+  NODE_FILES+=(--nodes "${PROCESSED_FILE_DIRECTORY}/nodes.csv,${PROCESSED_FILE_DIRECTORY}/football_event_graph_nodes(_part_[0-9]+)?(_chunk_[0-9]+)?\.csv\.gz")
+fi
+# one typed header per node kind when the files were written with --typedNodeFiles
+for NODE_HEADER in "${PROCESSED_FILE_DIRECTORY}"/*_nodes_header.csv
+do
+  [ -f "${NODE_HEADER}" ] || continue
+  NODE_KIND=$(basename "${NODE_HEADER}" _nodes_header.csv)
+  compgen -G "${PROCESSED_FILE_DIRECTORY}/football_event_graph_${NODE_KIND}_nodes*.csv.gz" > /dev/null || continue
+  NODE_FILES+=(--nodes "${NODE_HEADER},${PROCESSED_FILE_DIRECTORY}/football_event_graph_${NODE_KIND}_nodes(_part_[0-9]+)?(_chunk_[0-9]+)?\.csv\.gz")
+done
+
+# relation types written with properties have their own typed header
+RELATION_FILES=(--relationships "${PROCESSED_FILE_DIRECTORY}/relations.csv,${PROCESSED_FILE_DIRECTORY}/football_event_graph_relations(_part_[0-9]+)?(_chunk_[0-9]+)?\.csv\.gz")
+for RELATION_HEADER in "${PROCESSED_FILE_DIRECTORY}"/*_relations_header.csv
+do
+  [ -f "${RELATION_HEADER}" ] || continue
+  RELATION_TYPE=$(basename "${RELATION_HEADER}" _relations_header.csv)
+  compgen -G "${PROCESSED_FILE_DIRECTORY}/football_event_graph_${RELATION_TYPE}_relations*.csv.gz" > /dev/null || continue
+  RELATION_FILES+=(--relationships "${RELATION_HEADER},${PROCESSED_FILE_DIRECTORY}/football_event_graph_${RELATION_TYPE}_relations(_part_[0-9]+)?(_chunk_[0-9]+)?\.csv\.gz")
+done
+
 # note: DB must be called "neo4j" in community edition, because managing multiple named databases requires Enterprise
 ${NEO4J_FOLDER}/bin/neo4j-admin import \
     --verbose \
@@ -25,7 +54,7 @@ ${NEO4J_FOLDER}/bin/neo4j-admin import \
     --skip-bad-relationships true \
     --ignore-empty-strings true \
     --multiline-fields true \
-    --id-type STRING \
+    --id-type ${ID_TYPE} \
     --max-memory 6G \
-    --nodes "${PROCESSED_FILE_DIRECTORY}/nodes.csv,${PROCESSED_FILE_DIRECTORY}/football_event_graph_nodes.csv.gz" \
-    --relationships "${PROCESSED_FILE_DIRECTORY}/relations.csv,${PROCESSED_FILE_DIRECTORY}/football_event_graph_relations.csv.gz"
+    "${NODE_FILES[@]}" \
+    "${RELATION_FILES[@]}"
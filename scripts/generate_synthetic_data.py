@@ -0,0 +1,9 @@
+import sys
+
+sys.path.append("../")
+import fire
+
+from utils.synthetic_data import write_synthetic_files
+
+if __name__ == "__main__":
+    fire.Fire(write_synthetic_files)
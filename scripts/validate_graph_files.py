@@ -0,0 +1,49 @@
+import json
+import sys
+
+sys.path.append("../")
+from pathlib import Path
+from typing import Optional, Union
+
+import fire
+
+from store.graph_integrity import (
+    DEFAULT_FILE_CHUNK_SIZE,
+    INTEGRITY_REPORT_FILE_NAME,
+    validate_graph_files,
+)
+from utils.logger import get_logger
+
+
+def validate_processed_files(
+    processedFileDirectory: Union[str, Path],
+    integerIds: bool = False,
+    reportFile: Optional[Union[str, Path]] = None,
+    chunkSize: int = DEFAULT_FILE_CHUNK_SIZE,
+) -> None:
+    # checks the node and relation files of a run for duplicate node IDs and relations with a missing endpoint,
+    # before they are handed to neo4j-admin import. Exits with 1 if any are found
+    logger = get_logger()
+    report = validate_graph_files(
+        processedFileDirectory=processedFileDirectory,
+        integerIds=integerIds,
+        chunkSize=chunkSize,
+    )
+    reportFile = reportFile or f"{processedFileDirectory}/{INTEGRITY_REPORT_FILE_NAME}"
+    with open(reportFile, "w") as file:
+        json.dump(report, file, indent=2)
+    logger.info(
+        msg=f"Read {report['nodes']} nodes and {report['relations']} relations from {len(report['files'])} files"
+    )
+    if report["valid"]:
+        logger.info(msg="No duplicate node IDs or relations with a missing endpoint")
+        return
+    logger.error(
+        msg=f"Found {report['duplicateNodes']['count']} duplicate node IDs and "
+        f"{report['orphanRelations']['count']} relations with a missing endpoint, see {reportFile}"
+    )
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    fire.Fire(validate_processed_files)
@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+from glob import glob
+from pathlib import Path
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Union
+
+import numpy as np
+import pandas as pd
+
+from store.id_registry import IdDimension, IdRegistry
+
+MANIFEST_FILE_NAME = "build_manifest.json"
+# the event IDs are kept apart from the match-level keys of the manifest, as a sorted array
+EVENT_IDS_FILE_PREFIX = "build_manifest_event_ids"
+
+
+class BuildManifest:
+    # What previous successful runs have already emitted, so incremental runs only emit what's new. A full build
+    # starts a new manifest (load=False) instead of adding to the one of an earlier database
+    def __init__(self, directory: Union[str, Path], load: bool = True):
+        self.directory = directory
+        manifest = {}
+        if load and os.path.exists(self.file_name):
+            with open(self.file_name) as file:
+                manifest = json.load(file)
+        self.matchIds = set(manifest.get("matchIds", []))
+        self.eventIds = np.zeros(0, dtype=str)
+        if manifest.get("eventIdsFile") is not None:
+            self.eventIds = np.load(
+                f"{self.directory}/{manifest['eventIdsFile']}", allow_pickle=False
+            )
+        self.addedEventIds: List[np.ndarray] = []
+        self.dates = set(manifest.get("dates", []))
+        self.contextNodesAdded = manifest.get("contextNodesAdded", False)
+        # registry IDs of the league, country, season, team and player nodes, kept apart from the registry, which
+        # also holds the names of runs that didn't finish
+        self.nodeIds: Dict[str, Set[int]] = {
+            dimension: set(manifest.get("nodeIds", {}).get(dimension, []))
+            for dimension in IdDimension.ALL
+        }
+        self.lastMatchForTeam = pd.DataFrame(
+            manifest.get("lastMatchForTeam", []), columns=["team", "date", "id_odsp"]
+        )
+
+    @property
+    def file_name(self) -> str:
+        return f"{self.directory}/{MANIFEST_FILE_NAME}"
+
+    def new_matches(self, matchMetadata: pd.DataFrame) -> pd.DataFrame:
+        return matchMetadata[~matchMetadata["id_odsp"].isin(self.matchIds)]
+
+    def new_nodes(
+        self, dimension: str, idMap: Dict[Hashable, int]
+    ) -> Dict[Hashable, int]:
+        nodeIds = self.nodeIds[dimension]
+        return {name: i for name, i in idMap.items() if i not in nodeIds}
+
+    def add_nodes(self, dimension: str, nodeIds: Iterable[int]) -> None:
+        self.nodeIds[dimension].update(int(i) for i in nodeIds)
+
+    def add_matches(self, remappedMetadata: pd.DataFrame) -> None:
+        self.matchIds.update(remappedMetadata["id_odsp"])
+        self.dates.update(remappedMetadata["date"])
+        appearances = pd.concat(
+            [self.lastMatchForTeam]
+            + [
+                remappedMetadata[[teamColumn, "date", "id_odsp"]].set_axis(
+                    ["team", "date", "id_odsp"], axis=1
+                )
+                for teamColumn in ("ht", "at")
+            ],
+            ignore_index=True,
+        )
+        self.lastMatchForTeam = (
+            appearances.sort_values(by=["team", "date", "id_odsp"], kind="mergesort")
+            .drop_duplicates(subset=["team"], keep="last")
+            .reset_index(drop=True)
+        )
+
+    def add_events(self, eventIds: Iterable[str]) -> None:
+        # merged into the sorted event IDs when the manifest is saved
+        self.addedEventIds.append(np.asarray(pd.Series(eventIds).dropna(), dtype=str))
+
+    def _save_event_ids(self) -> str:
+        # Named after their content, so writing them doesn't touch the event IDs the current manifest refers to,
+        # and only renaming the new manifest into place commits them
+        self.eventIds = np.unique(np.concatenate([self.eventIds] + self.addedEventIds))
+        self.addedEventIds = []
+        eventIdsHash = hashlib.sha256(self.eventIds.tobytes()).hexdigest()[:16]
+        eventIdsFileName = f"{EVENT_IDS_FILE_PREFIX}_{eventIdsHash}.npy"
+        temporaryFileName = f"{self.directory}/{eventIdsFileName}.tmp"
+        with open(temporaryFileName, "wb") as file:
+            np.save(file, self.eventIds, allow_pickle=False)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporaryFileName, f"{self.directory}/{eventIdsFileName}")
+        return eventIdsFileName
+
+    def save(self) -> None:
+        Path(self.directory).mkdir(parents=True, exist_ok=True)
+        eventIdsFileName = self._save_event_ids()
+        manifest = {
+            "matchIds": sorted(self.matchIds),
+            "eventIdsFile": eventIdsFileName,
+            "dates": sorted(self.dates),
+            "contextNodesAdded": self.contextNodesAdded,
+            "nodeIds": {
+                dimension: sorted(nodeIds)
+                for dimension, nodeIds in self.nodeIds.items()
+            },
+            "lastMatchForTeam": [
+                [int(team), date, matchId]
+                for team, date, matchId in self.lastMatchForTeam.itertuples(index=False)
+            ],
+        }
+        temporaryFileName = f"{self.file_name}.tmp"
+        with open(temporaryFileName, "w") as file:
+            json.dump(manifest, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporaryFileName, self.file_name)
+        # the event IDs of earlier manifests, and of runs that failed before committing theirs
+        for fileName in glob(f"{self.directory}/{EVENT_IDS_FILE_PREFIX}_*.npy*"):
+            if os.path.basename(fileName) != eventIdsFileName:
+                os.remove(fileName)
+
+
+def save_build_state(
+    idRegistry: IdRegistry, buildManifest: Optional[BuildManifest]
+) -> None:
+    # The registry only ever appends names, so it's saved first and renaming the manifest into place commits the
+    # run. After a crash in between, the next run finds the new names in the registry but not in the manifest,
+    # and emits their nodes again
+    idRegistry.save()
+    if buildManifest is not None:
+        buildManifest.save()
@@ -0,0 +1,179 @@
+import json
+from pathlib import Path
+from typing import Dict, List, Sequence, Union
+
+import numpy as np
+
+GRAPH_FILE_NAME = "graph.json"
+
+
+class CsrFiles:
+    # file layout of a saved CSR graph, every array is a plain .npy file that np.load can memory-map
+
+    @staticmethod
+    def graph(directory: Union[str, Path]) -> str:
+        return f"{directory}/{GRAPH_FILE_NAME}"
+
+    @staticmethod
+    def node_ids(directory: Union[str, Path]) -> str:
+        return f"{directory}/node_ids.npy"
+
+    @staticmethod
+    def node_id_order(directory: Union[str, Path]) -> str:
+        return f"{directory}/node_id_order.npy"
+
+    @staticmethod
+    def label_bitmap(directory: Union[str, Path]) -> str:
+        return f"{directory}/label_bitmap.npy"
+
+    @staticmethod
+    def node_property(directory: Union[str, Path], field: str) -> str:
+        return f"{directory}/properties/{field}.npy"
+
+    @staticmethod
+    def relations(
+        directory: Union[str, Path], relationType: str, direction: str, array: str
+    ) -> str:
+        return f"{directory}/relations/{relationType}/{direction}_{array}.npy"
+
+
+class CsrDirection:
+
+    OUT = "out"
+    IN = "in"
+    ALL = [OUT, IN]
+
+
+def csr_arrays(
+    sources: np.ndarray, targets: np.ndarray, nodeCount: int, indexType: type
+) -> Sequence[np.ndarray]:
+    # a stable sort keeps the emission order of each node's relations, e.g. the order of a NEXT chain
+    order = np.argsort(sources, kind="stable")
+    indptr = np.zeros(nodeCount + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=nodeCount), out=indptr[1:])
+    return indptr, targets[order].astype(indexType)
+
+
+def save_csr_graph(
+    directory: Union[str, Path],
+    nodeIds: np.ndarray,
+    labels: List[str],
+    labelBitmap: np.ndarray,
+    nodeProperties: Dict[str, np.ndarray],
+    relations: Dict[str, Sequence[np.ndarray]],
+) -> None:
+    # relations maps each relation type to its (source indices, target indices)
+    nodeCount = len(nodeIds)
+    indexType = np.int32 if nodeCount < np.iinfo(np.int32).max else np.int64
+    Path(f"{directory}/properties").mkdir(parents=True, exist_ok=True)
+    np.save(CsrFiles.node_ids(directory), nodeIds)
+    np.save(CsrFiles.node_id_order(directory), np.argsort(nodeIds, kind="stable"))
+    np.save(CsrFiles.label_bitmap(directory), labelBitmap)
+    for field, values in nodeProperties.items():
+        np.save(CsrFiles.node_property(directory, field), values)
+    for relationType, (sources, targets) in relations.items():
+        Path(f"{directory}/relations/{relationType}").mkdir(parents=True, exist_ok=True)
+        for direction, (fromNodes, toNodes) in (
+            (CsrDirection.OUT, (sources, targets)),
+            (CsrDirection.IN, (targets, sources)),
+        ):
+            indptr, indices = csr_arrays(
+                sources=fromNodes,
+                targets=toNodes,
+                nodeCount=nodeCount,
+                indexType=indexType,
+            )
+            np.save(
+                CsrFiles.relations(directory, relationType, direction, "indptr"), indptr
+            )
+            np.save(
+                CsrFiles.relations(directory, relationType, direction, "indices"),
+                indices,
+            )
+    # written last, so a directory without it is an unfinished graph
+    with open(CsrFiles.graph(directory), "w") as file:
+        json.dump(
+            {
+                "nodeCount": nodeCount,
+                "labels": labels,
+                "relationTypes": sorted(relations),
+                "nodeProperties": sorted(nodeProperties),
+            },
+            file,
+        )
+
+
+class CsrGraph:
+    # read side of a saved CSR graph. With mmap every array is memory-mapped, so opening copies nothing
+    def __init__(self, directory: Union[str, Path], mmap: bool = True):
+        self.directory = directory
+        self.mmapMode = "r" if mmap else None
+        with open(CsrFiles.graph(directory)) as file:
+            graph = json.load(file)
+        self.nodeCount: int = graph["nodeCount"]
+        self.labels: List[str] = graph["labels"]
+        self.relationTypes: List[str] = graph["relationTypes"]
+        self.nodePropertyFields: List[str] = graph["nodeProperties"]
+        self.nodeIds = self._load(CsrFiles.node_ids(directory))
+        self.nodeIdOrder = self._load(CsrFiles.node_id_order(directory))
+        self.labelBitmap = self._load(CsrFiles.label_bitmap(directory))
+        self._arrays: Dict[str, np.ndarray] = {}
+
+    def _load(self, fileName: str) -> np.ndarray:
+        return np.load(fileName, mmap_mode=self.mmapMode)
+
+    def _cached(self, fileName: str) -> np.ndarray:
+        array = self._arrays.get(fileName)
+        if array is None:
+            array = self._arrays[fileName] = self._load(fileName)
+        return array
+
+    def node_index(self, nodeIds: Union[str, int, Sequence]) -> np.ndarray:
+        # binary search over the sorted node IDs, unknown IDs resolve to -1
+        nodeIds = np.asarray(nodeIds, dtype=self.nodeIds.dtype)
+        if self.nodeCount == 0:
+            return np.full(nodeIds.shape, -1)
+        positions = np.searchsorted(self.nodeIds, nodeIds, sorter=self.nodeIdOrder)
+        positions = np.minimum(positions, self.nodeCount - 1)
+        indices = np.asarray(self.nodeIdOrder[positions])
+        return np.where(self.nodeIds[indices] == nodeIds, indices, -1)
+
+    def label_mask(self, label: str) -> np.ndarray:
+        bit = np.uint64(1) << np.uint64(self.labels.index(label))
+        return (self.labelBitmap & bit) != 0
+
+    def nodes_with_label(self, label: str) -> np.ndarray:
+        return np.flatnonzero(self.label_mask(label=label))
+
+    def node_property(self, field: str) -> np.ndarray:
+        return self._cached(CsrFiles.node_property(self.directory, field))
+
+    def csr(
+        self, relationType: str, direction: str = CsrDirection.OUT
+    ) -> Sequence[np.ndarray]:
+        if relationType not in self.relationTypes:
+            empty = np.empty(0, dtype=np.int64)
+            return np.zeros(self.nodeCount + 1, dtype=np.int64), empty
+        return (
+            self._cached(
+                CsrFiles.relations(self.directory, relationType, direction, "indptr")
+            ),
+            self._cached(
+                CsrFiles.relations(self.directory, relationType, direction, "indices")
+            ),
+        )
+
+    def neighbors(
+        self, nodeIndex: int, relationType: str, direction: str = CsrDirection.OUT
+    ) -> np.ndarray:
+        indptr, indices = self.csr(relationType=relationType, direction=direction)
+        return indices[indptr[nodeIndex] : indptr[nodeIndex + 1]]
+
+    def degrees(
+        self, relationType: str, direction: str = CsrDirection.OUT
+    ) -> np.ndarray:
+        indptr, _ = self.csr(relationType=relationType, direction=direction)
+        return np.diff(indptr)
+
+    def node_id(self, nodeIndices: Union[int, Sequence[int]]) -> np.ndarray:
+        return self.nodeIds[nodeIndices]
@@ -0,0 +1,133 @@
+import json
+import os
+import shutil
+from datetime import datetime
+from glob import glob
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+CHECKPOINT_FILE_PREFIX = "football_graph_checkpoint"
+STAGING_DIRECTORY_PREFIX = "checkpoint_staging"
+
+
+class ExportCheckpoint:
+    # A checkpointed export writes each stage, and each chunk of match events, into a staging directory and only
+    # moves the files into the output directory once they are complete. The checkpoint file lists the committed
+    # stages and the row ranges of the committed chunks, so a resumed run continues after them and an interrupted
+    # one never leaves half-written files next to the committed ones. Worker processes keep their own part
+    # checkpoint, because each of them reads every chunk for its own matches.
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        runKey: Dict[str, Any],
+        resume: bool = False,
+        partIndex: Optional[int] = None,
+    ):
+        self.directory = directory
+        # compared as JSON, the way it is stored
+        self.runKey = json.loads(json.dumps(runKey, default=str))
+        self.resume = resume
+        self.partIndex = partIndex
+        partSuffix = "" if partIndex is None else f"_part_{partIndex:04d}"
+        self.fileName = f"{directory}/{CHECKPOINT_FILE_PREFIX}{partSuffix}.json"
+        self.stagingDirectory = f"{directory}/{STAGING_DIRECTORY_PREFIX}{partSuffix}"
+        if not resume and partIndex is None:
+            self._discard_previous_run()
+        checkpoint = self._load(fileName=self.fileName) or {}
+        if checkpoint and checkpoint["runKey"] != self.runKey:
+            raise ValueError(
+                f"{self.fileName} was written for other input files or options, "
+                "run without resume to start over"
+            )
+        self.stages: Dict[str, List[str]] = checkpoint.get("stages", {})
+        self.chunks: List[Dict[str, Any]] = checkpoint.get("chunks", [])
+        # whatever is left in the staging directory was written by an interrupted stage or chunk
+        shutil.rmtree(self.stagingDirectory, ignore_errors=True)
+        Path(self.stagingDirectory).mkdir(parents=True)
+
+    @staticmethod
+    def _load(fileName: str) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(fileName):
+            return None
+        with open(fileName) as file:
+            return json.load(file)
+
+    @staticmethod
+    def _committed_files(checkpoint: Dict[str, Any]) -> Iterator[str]:
+        for fileNames in checkpoint.get("stages", {}).values():
+            yield from fileNames
+        for chunk in checkpoint.get("chunks", []):
+            yield from chunk["files"]
+
+    def _discard_previous_run(self) -> None:
+        # a new run replaces everything earlier checkpointed runs committed, including their workers' part files
+        for fileName in glob(f"{self.directory}/{CHECKPOINT_FILE_PREFIX}*.json"):
+            for committedFile in self._committed_files(self._load(fileName=fileName)):
+                if os.path.exists(f"{self.directory}/{committedFile}"):
+                    os.remove(f"{self.directory}/{committedFile}")
+            os.remove(fileName)
+        for stagingDirectory in glob(f"{self.directory}/{STAGING_DIRECTORY_PREFIX}*"):
+            shutil.rmtree(stagingDirectory)
+
+    def part(self, partIndex: int) -> "ExportCheckpoint":
+        return ExportCheckpoint(
+            directory=self.directory,
+            runKey=self.runKey,
+            resume=self.resume,
+            partIndex=partIndex,
+        )
+
+    def is_committed(self, stage: str) -> bool:
+        return stage in self.stages
+
+    @property
+    def committedRows(self) -> int:
+        # chunks are committed in file order, so they always cover the rows up to here
+        return self.chunks[-1]["lastRow"] if self.chunks else 0
+
+    def commit_stage(self, stage: str) -> Dict[str, str]:
+        renamedFiles = self._move_staged_files()
+        self.stages[stage] = [Path(fileName).name for fileName in renamedFiles.values()]
+        self._save()
+        return renamedFiles
+
+    def commit_chunk(self, rows: int) -> Dict[str, str]:
+        renamedFiles = self._move_staged_files()
+        self.chunks.append(
+            {
+                "firstRow": self.committedRows,
+                "lastRow": self.committedRows + rows,
+                "files": [Path(fileName).name for fileName in renamedFiles.values()],
+            }
+        )
+        self._save()
+        return renamedFiles
+
+    def _move_staged_files(self) -> Dict[str, str]:
+        # the staging directory is inside the output directory, so the files are renamed, never copied
+        renamedFiles = {}
+        for path in sorted(Path(self.stagingDirectory).iterdir()):
+            with open(path, "rb") as file:
+                os.fsync(file.fileno())
+            committedFileName = f"{self.directory}/{path.name}"
+            os.replace(path, committedFileName)
+            renamedFiles[str(path)] = committedFileName
+        return renamedFiles
+
+    def _save(self) -> None:
+        checkpoint = {
+            "runKey": self.runKey,
+            "updatedAt": datetime.now().isoformat(timespec="seconds"),
+            "stages": self.stages,
+            "chunks": self.chunks,
+        }
+        temporaryFileName = f"{self.fileName}.tmp"
+        with open(temporaryFileName, "w") as file:
+            json.dump(checkpoint, file, indent=2)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporaryFileName, self.fileName)
+
+    def finish(self) -> None:
+        # the checkpoint file stays, so resuming a finished run skips everything
+        shutil.rmtree(self.stagingDirectory, ignore_errors=True)
@@ -0,0 +1,282 @@
+from glob import glob
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from datamodel.node_ids import BaseNodeId
+
+INTEGRITY_REPORT_FILE_NAME = "football_graph_integrity_report.json"
+BUFFER_SIZE = 100000
+DEFAULT_SAMPLE_SIZE = 10
+DEFAULT_FILE_CHUNK_SIZE = 1000000
+
+
+class SortedKeySet:
+    # uint64 keys in sorted runs that are merged like a binary counter, so there are never more than log2(n) runs
+    # to search and adding a batch costs a sort of at most the keys added since the last merge of that size
+    def __init__(self):
+        self.runs: List[np.ndarray] = []
+
+    def __len__(self) -> int:
+        return sum(len(run) for run in self.runs)
+
+    def contains(self, keys: np.ndarray) -> np.ndarray:
+        found = np.zeros(len(keys), dtype=bool)
+        for run in self.runs:
+            positions = np.minimum(np.searchsorted(run, keys), len(run) - 1)
+            found |= run[positions] == keys
+        return found
+
+    def add(self, keys: np.ndarray) -> None:
+        # keys must be unique and not in the set yet
+        if len(keys) == 0:
+            return
+        run = np.sort(keys)
+        while self.runs and len(self.runs[-1]) <= len(run):
+            run = np.sort(np.concatenate([self.runs.pop(), run]), kind="mergesort")
+        self.runs.append(run)
+
+
+class GraphIntegrityValidator:
+    # Checks the graph while it is emitted. Node IDs are kept as uint64 keys (the integer IDs themselves, otherwise
+    # a 64-bit hash of the string ID), so duplicates are found when they are added and every relation endpoint is
+    # looked up among the nodes emitted so far. Relations with an endpoint that hasn't been emitted yet are kept
+    # aside and looked up again in report(), the ones still missing an endpoint then are orphans.
+    # IDs are buffered and checked in batches, so the row-by-row builder only pays for appending to a list
+    def __init__(self, integerIds: bool = False, sampleSize: int = DEFAULT_SAMPLE_SIZE):
+        self.integerIds = integerIds
+        self.sampleSize = sampleSize
+        self.nodeKeys = SortedKeySet()
+        self.nodeCount = 0
+        self.relationCount = 0
+        self.relationTypeCounts: Dict[str, int] = {}
+        self.duplicateNodeCount = 0
+        self.duplicateNodeSamples: List[str] = []
+        self.pendingRelations: List[Dict[str, np.ndarray]] = []
+        self._nodeBuffer: List[str] = []
+        self._relationBuffer: List[List[str]] = [[], [], []]
+
+    def _keys(self, nodeIds: np.ndarray) -> np.ndarray:
+        if self.integerIds:
+            return nodeIds.astype(np.int64).view(np.uint64)
+        return pd.util.hash_array(nodeIds)
+
+    def add_nodes(self, nodeIds: Sequence[Union[BaseNodeId, str]]) -> None:
+        self._nodeBuffer.extend(map(str, nodeIds))
+        if len(self._nodeBuffer) >= BUFFER_SIZE:
+            self._check_nodes()
+
+    def add_relations(
+        self,
+        startNodeIds: Sequence[Union[BaseNodeId, str]],
+        endNodeIds: Sequence[Union[BaseNodeId, str]],
+        relationTypes: Sequence[str],
+    ) -> None:
+        startBuffer, endBuffer, typeBuffer = self._relationBuffer
+        startBuffer.extend(map(str, startNodeIds))
+        endBuffer.extend(map(str, endNodeIds))
+        typeBuffer.extend(relationTypes)
+        if len(typeBuffer) >= BUFFER_SIZE:
+            # the buffered nodes first, relations often point at nodes emitted just before them
+            self._check_nodes()
+            self._check_relations()
+
+    def _check_nodes(self) -> None:
+        if not self._nodeBuffer:
+            return
+        nodeIds = np.array(self._nodeBuffer, dtype=object)
+        self._nodeBuffer = []
+        keys = self._keys(nodeIds=nodeIds)
+        # repeated within the batch or already emitted by an earlier one
+        order = np.argsort(keys, kind="stable")
+        duplicates = np.zeros(len(keys), dtype=bool)
+        duplicates[order[1:]] = keys[order[1:]] == keys[order[:-1]]
+        duplicates |= self.nodeKeys.contains(keys=keys)
+        self.nodeCount += len(keys)
+        if duplicates.any():
+            self.duplicateNodeCount += int(duplicates.sum())
+            self.duplicateNodeSamples.extend(
+                nodeIds[duplicates][
+                    : self.sampleSize - len(self.duplicateNodeSamples)
+                ].tolist()
+            )
+        self.nodeKeys.add(keys=np.unique(keys[~duplicates]))
+
+    def _check_relations(self) -> None:
+        startIds, endIds, relationTypes = (
+            np.array(values, dtype=object) for values in self._relationBuffer
+        )
+        self._relationBuffer = [[], [], []]
+        if len(relationTypes) == 0:
+            return
+        self.relationCount += len(relationTypes)
+        # counted with a hash table, sorting the object array of types would be much slower
+        for relationType, count in pd.Series(relationTypes).value_counts().items():
+            self.relationTypeCounts[relationType] = self.relationTypeCounts.get(
+                relationType, 0
+            ) + int(count)
+        startKeys = self._keys(nodeIds=startIds)
+        endKeys = self._keys(nodeIds=endIds)
+        missing = ~(
+            self.nodeKeys.contains(keys=startKeys)
+            & self.nodeKeys.contains(keys=endKeys)
+        )
+        if missing.any():
+            self.pendingRelations.append(
+                {
+                    "startIds": startIds[missing],
+                    "endIds": endIds[missing],
+                    "relationTypes": relationTypes[missing],
+                    "startKeys": startKeys[missing],
+                    "endKeys": endKeys[missing],
+                }
+            )
+
+    def _orphans(self, pending: Dict[str, np.ndarray]) -> Dict[str, Dict[str, Any]]:
+        missingStart = ~self.nodeKeys.contains(keys=pending["startKeys"])
+        missingEnd = ~self.nodeKeys.contains(keys=pending["endKeys"])
+        orphans = {}
+        for relationType in pd.unique(
+            pending["relationTypes"][missingStart | missingEnd]
+        ):
+            typeMask = pending["relationTypes"] == relationType
+            orphanIndices = np.flatnonzero(typeMask & (missingStart | missingEnd))
+            orphans[relationType] = {
+                "count": len(orphanIndices),
+                "missingStart": int((typeMask & missingStart).sum()),
+                "missingEnd": int((typeMask & missingEnd).sum()),
+                "samples": [
+                    [pending["startIds"][i], relationType, pending["endIds"][i]]
+                    for i in orphanIndices[: self.sampleSize]
+                ],
+            }
+        return orphans
+
+    def report(self) -> Dict[str, Any]:
+        self._check_nodes()
+        self._check_relations()
+        orphans: Dict[str, Dict[str, Any]] = {}
+        if self.pendingRelations:
+            orphans = self._orphans(
+                pending={
+                    field: np.concatenate(
+                        [relations[field] for relations in self.pendingRelations]
+                    )
+                    for field in self.pendingRelations[0]
+                }
+            )
+        orphanCount = sum(typeOrphans["count"] for typeOrphans in orphans.values())
+        return {
+            "valid": self.duplicateNodeCount == 0 and orphanCount == 0,
+            "nodes": self.nodeCount,
+            "relations": self.relationCount,
+            "relationTypes": dict(sorted(self.relationTypeCounts.items())),
+            "duplicateNodes": {
+                "count": self.duplicateNodeCount,
+                "samples": self.duplicateNodeSamples,
+            },
+            "orphanRelations": {"count": orphanCount, "byType": orphans},
+        }
+
+
+class HashedIdCollisionDetector:
+    # Integer IDs of the node kinds without a numeric key (matches, events, event contexts) are a 59-bit hash of
+    # their string ID, so two different nodes can get the same integer ID. The (integer ID, 64-bit hash of the
+    # string ID) pairs are kept as uint64 columns, an integer ID that comes with more than one string ID is a
+    # collision
+    def __init__(self, sampleSize: int = DEFAULT_SAMPLE_SIZE):
+        self.sampleSize = sampleSize
+        self.integerKeys: List[np.ndarray] = []
+        self.stringKeys: List[np.ndarray] = []
+
+    def add(self, integerIds: np.ndarray, stringIds: np.ndarray) -> None:
+        # the same node can be added any number of times, e.g. once per event of a match
+        integerKeys = integerIds.astype(np.int64).view(np.uint64)
+        stringKeys = pd.util.hash_array(stringIds.astype(object))
+        order = np.lexsort((stringKeys, integerKeys))
+        integerKeys, stringKeys = integerKeys[order], stringKeys[order]
+        unique = np.ones(len(order), dtype=bool)
+        unique[1:] = (integerKeys[1:] != integerKeys[:-1]) | (
+            stringKeys[1:] != stringKeys[:-1]
+        )
+        self.integerKeys.append(integerKeys[unique])
+        self.stringKeys.append(stringKeys[unique])
+
+    def collisions(self) -> List[int]:
+        if not self.integerKeys:
+            return []
+        integerKeys = np.concatenate(self.integerKeys)
+        stringKeys = np.concatenate(self.stringKeys)
+        order = np.lexsort((stringKeys, integerKeys))
+        integerKeys, stringKeys = integerKeys[order], stringKeys[order]
+        sameInteger = integerKeys[1:] == integerKeys[:-1]
+        colliding = sameInteger & (stringKeys[1:] != stringKeys[:-1])
+        return [
+            int(key)
+            for key in np.unique(integerKeys[1:][colliding].view(np.int64))[
+                : self.sampleSize
+            ]
+        ]
+
+    def check(self) -> None:
+        collisions = self.collisions()
+        if collisions:
+            raise ValueError(
+                "Hashed integer node IDs collide, rerun without --integerIds. "
+                f"Colliding IDs: {collisions}"
+            )
+
+
+def _read_id_columns(
+    dataFiles: List[str], columns: List[int], chunkSize: int
+) -> Iterator[pd.DataFrame]:
+    # only the ID (and type) columns are kept, but the C parser still has to read every field for the quoting
+    for dataFile in dataFiles:
+        try:
+            yield from pd.read_csv(
+                dataFile,
+                header=None,
+                usecols=columns,
+                dtype=str,
+                escapechar="\\",
+                na_filter=False,
+                chunksize=chunkSize,
+            )
+        except pd.errors.EmptyDataError:
+            # stages that only write some of the files leave the others empty
+            continue
+
+
+def validate_graph_files(
+    processedFileDirectory: Union[str, Path],
+    integerIds: bool = False,
+    chunkSize: int = DEFAULT_FILE_CHUNK_SIZE,
+    sampleSize: int = DEFAULT_SAMPLE_SIZE,
+) -> Dict[str, Any]:
+    # validates the (optionally typed, part and chunk) neo4j-admin import files of a run. Every node file is
+    # read before the relations, so no relation has to be kept aside
+    validator = GraphIntegrityValidator(integerIds=integerIds, sampleSize=sampleSize)
+    nodeFiles = sorted(
+        glob(f"{processedFileDirectory}/football_event_graph_*nodes*.csv.gz")
+    )
+    for chunk in _read_id_columns(
+        dataFiles=nodeFiles, columns=[0], chunkSize=chunkSize
+    ):
+        validator.add_nodes(nodeIds=chunk[0].to_numpy())
+    # including the files of the relation types written with properties
+    relationFiles = sorted(
+        glob(f"{processedFileDirectory}/football_event_graph_*relations*.csv.gz")
+    )
+    for chunk in _read_id_columns(
+        dataFiles=relationFiles, columns=[0, 1, 2], chunkSize=chunkSize
+    ):
+        validator.add_relations(
+            startNodeIds=chunk[0].to_numpy(),
+            endNodeIds=chunk[1].to_numpy(),
+            relationTypes=chunk[2].to_numpy(),
+        )
+    report = validator.report()
+    report["files"] = [Path(fileName).name for fileName in nodeFiles + relationFiles]
+    return report
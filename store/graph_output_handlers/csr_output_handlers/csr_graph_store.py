@@ -0,0 +1,120 @@
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple, Union
+
+import numpy as np
+
+from datamodel.node_field import NodeField, NodeFieldType
+from datamodel.node_ids import BaseNodeId
+from store.csr_graph import save_csr_graph
+
+MAX_LABELS = 64
+
+
+class CsrGraphStore:
+    # In-memory state shared by CsrNodes and CsrRelations: a dense integer index per node ID, label bitmasks and
+    # per relation type the (source, target) index chunks. Saved as a CSR graph once both handlers are closed.
+    def __init__(self, directory: Union[str, Path], integerIds: bool = False):
+        self.directory = directory
+        # the node IDs are saved as int64 when they are written in their integer form
+        self.integerIds = integerIds
+        self.nodeIndex: Dict[str, int] = {}
+        self.nodeLabelMasks: List[int] = []
+        self.labels: Dict[str, int] = {}
+        self.nodeProperties: Dict[str, List[Tuple[np.ndarray, np.ndarray]]] = {}
+        self.relations: Dict[str, List[Tuple[np.ndarray, np.ndarray]]] = {}
+        self._labelMasks: Dict[tuple, int] = {}
+        self.openHandlers = 0
+
+    def node_indices(self, nodeIds: Sequence[Union[BaseNodeId, str]]) -> np.ndarray:
+        # relations can reference nodes that haven't been added yet, they get their index (and no labels) here
+        nodeIndex = self.nodeIndex
+        indices = np.fromiter(
+            (nodeIndex.setdefault(str(nodeId), len(nodeIndex)) for nodeId in nodeIds),
+            dtype=np.int64,
+            count=len(nodeIds),
+        )
+        self.nodeLabelMasks.extend([0] * (len(nodeIndex) - len(self.nodeLabelMasks)))
+        return indices
+
+    def label_mask(self, nodeLabels: Sequence[str]) -> int:
+        key = tuple(nodeLabels)
+        mask = self._labelMasks.get(key)
+        if mask is None:
+            mask = 0
+            for label in nodeLabels:
+                bit = self.labels.setdefault(label, len(self.labels))
+                if bit >= MAX_LABELS:
+                    raise ValueError(
+                        f"The label bitmap holds at most {MAX_LABELS} labels"
+                    )
+                mask |= 1 << bit
+            self._labelMasks[key] = mask
+        return mask
+
+    def add_nodes(
+        self,
+        nodeIds: Sequence[Union[BaseNodeId, str]],
+        nodeLabels: Sequence[List[str]],
+        nodeProperties: Dict[str, Sequence[Any]],
+    ) -> None:
+        indices = self.node_indices(nodeIds=nodeIds)
+        for i, labels in zip(indices, nodeLabels):
+            self.nodeLabelMasks[i] |= self.label_mask(nodeLabels=labels)
+        # only numeric properties are kept, as float columns with NaN for missing values
+        for field, values in nodeProperties.items():
+            if NodeField.TYPES.get(field, NodeFieldType.STRING) == NodeFieldType.STRING:
+                continue
+            column = np.array(
+                [np.nan if value is None else value for value in values],
+                dtype=np.float64,
+            )
+            self.nodeProperties.setdefault(field, []).append((indices, column))
+
+    def add_relations(
+        self,
+        startNodeIds: Sequence[Union[BaseNodeId, str]],
+        endNodeIds: Sequence[Union[BaseNodeId, str]],
+        relationTypes: Sequence[str],
+    ) -> None:
+        sources = self.node_indices(nodeIds=startNodeIds)
+        targets = self.node_indices(nodeIds=endNodeIds)
+        relationTypes = np.asarray(relationTypes, dtype=object)
+        for relationType in dict.fromkeys(relationTypes):
+            mask = relationTypes == relationType
+            self.relations.setdefault(relationType, []).append(
+                (sources[mask], targets[mask])
+            )
+
+    def open(self) -> None:
+        self.openHandlers += 1
+
+    def close(self) -> None:
+        self.openHandlers -= 1
+        if self.openHandlers == 0:
+            self.save()
+
+    def save(self) -> None:
+        nodeCount = len(self.nodeIndex)
+        nodeIds = np.array(list(self.nodeIndex), dtype=str)
+        if self.integerIds:
+            nodeIds = nodeIds.astype(np.int64)
+        nodeProperties = {}
+        for field, chunks in self.nodeProperties.items():
+            values = np.full(nodeCount, np.nan)
+            for indices, column in chunks:
+                values[indices] = column
+            nodeProperties[field] = values
+        save_csr_graph(
+            directory=self.directory,
+            nodeIds=nodeIds,
+            labels=list(self.labels),
+            labelBitmap=np.array(self.nodeLabelMasks, dtype=np.uint64),
+            nodeProperties=nodeProperties,
+            relations={
+                relationType: (
+                    np.concatenate([sources for sources, _ in chunks]),
+                    np.concatenate([targets for _, targets in chunks]),
+                )
+                for relationType, chunks in self.relations.items()
+            },
+        )
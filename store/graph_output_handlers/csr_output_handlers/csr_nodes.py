@@ -0,0 +1,40 @@
+from typing import Any, Dict, List, Sequence, Union
+
+from datamodel.node_field import NodeField
+from datamodel.node_ids import BaseNodeId
+from datamodel.node_labels import NodeLabel
+from store.graph_output_handlers.csr_output_handlers.csr_graph_store import (
+    CsrGraphStore,
+)
+from store.graph_output_handlers.output_handler_base import NodeOutputHandlerBase
+
+
+class CsrNodes(NodeOutputHandlerBase):
+    def __init__(self, graphStore: CsrGraphStore):
+        self.graphStore = graphStore
+        self.graphStore.open()
+
+    def add(
+        self,
+        nodeId: Union[BaseNodeId, str],
+        nodeLabels: List[NodeLabel],
+        nodeProperties: Dict[NodeField, Any],
+    ) -> None:
+        self.add_many(
+            nodeIds=[nodeId],
+            nodeLabels=[nodeLabels],
+            nodeProperties={key: [value] for key, value in nodeProperties.items()},
+        )
+
+    def add_many(
+        self,
+        nodeIds: Sequence[Union[BaseNodeId, str]],
+        nodeLabels: Sequence[List[NodeLabel]],
+        nodeProperties: Dict[NodeField, Sequence[Any]],
+    ) -> None:
+        self.graphStore.add_nodes(
+            nodeIds=nodeIds, nodeLabels=nodeLabels, nodeProperties=nodeProperties
+        )
+
+    def close(self) -> None:
+        self.graphStore.close()
@@ -0,0 +1,44 @@
+from typing import Any, Dict, Optional, Sequence, Union
+
+from datamodel.node_ids import BaseNodeId
+from datamodel.relations import BaseRelationType, RelationField
+from store.graph_output_handlers.csr_output_handlers.csr_graph_store import (
+    CsrGraphStore,
+)
+from store.graph_output_handlers.output_handler_base import RelationOutputHandlerBase
+
+
+class CsrRelations(RelationOutputHandlerBase):
+    def __init__(self, graphStore: CsrGraphStore):
+        self.graphStore = graphStore
+        self.graphStore.open()
+
+    def add(
+        self,
+        startNodeId: Union[BaseNodeId, str],
+        endNodeId: Union[BaseNodeId, str],
+        relationType: BaseRelationType,
+        relationProperties: Optional[Dict[RelationField, Any]] = None,
+    ) -> None:
+        self.add_many(
+            startNodeIds=[startNodeId],
+            endNodeIds=[endNodeId],
+            relationTypes=[relationType],
+        )
+
+    def add_many(
+        self,
+        startNodeIds: Sequence[Union[BaseNodeId, str]],
+        endNodeIds: Sequence[Union[BaseNodeId, str]],
+        relationTypes: Sequence[BaseRelationType],
+        relationProperties: Optional[Dict[RelationField, Sequence[Any]]] = None,
+    ) -> None:
+        # the CSR graph only holds the topology, relation properties aren't kept
+        self.graphStore.add_relations(
+            startNodeIds=startNodeIds,
+            endNodeIds=endNodeIds,
+            relationTypes=relationTypes,
+        )
+
+    def close(self) -> None:
+        self.graphStore.close()
@@ -0,0 +1,134 @@
+import time
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from datamodel.node_field import NodeField
+from datamodel.node_ids import BaseNodeId
+from datamodel.node_labels import NodeLabel
+from datamodel.relations import BaseRelationType, RelationField
+from store.graph_output_handlers.output_handler_base import NodeOutputHandlerBase
+from store.graph_output_handlers.output_handler_base import RelationOutputHandlerBase
+from utils.stage_metrics import MetricsRecorder
+
+
+class MeteredNodes(NodeOutputHandlerBase):
+    # passes everything on to the wrapped handler, recording the rows and the time spent in it
+    def __init__(
+        self, nodeOutputHandler: NodeOutputHandlerBase, recorder: MetricsRecorder
+    ):
+        self.nodeOutputHandler = nodeOutputHandler
+        self.recorder = recorder
+        self.name = type(nodeOutputHandler).__name__
+
+    def add(
+        self,
+        nodeId: Union[BaseNodeId, str],
+        nodeLabels: List[NodeLabel],
+        nodeProperties: Dict[NodeField, Any],
+    ) -> None:
+        start = time.perf_counter()
+        self.nodeOutputHandler.add(
+            nodeId=nodeId, nodeLabels=nodeLabels, nodeProperties=nodeProperties
+        )
+        self.recorder.add_handler_call(
+            handler=self.name, seconds=time.perf_counter() - start, nodeRows=1
+        )
+
+    def add_many(
+        self,
+        nodeIds: Sequence[Union[BaseNodeId, str]],
+        nodeLabels: Sequence[List[NodeLabel]],
+        nodeProperties: Dict[NodeField, Sequence[Any]],
+    ) -> None:
+        start = time.perf_counter()
+        self.nodeOutputHandler.add_many(
+            nodeIds=nodeIds, nodeLabels=nodeLabels, nodeProperties=nodeProperties
+        )
+        self.recorder.add_handler_call(
+            handler=self.name,
+            seconds=time.perf_counter() - start,
+            nodeRows=len(nodeIds),
+        )
+
+    def flush(self) -> None:
+        start = time.perf_counter()
+        self.nodeOutputHandler.flush()
+        self.recorder.add_handler_call(
+            handler=self.name, seconds=time.perf_counter() - start
+        )
+
+    def output_file_stats(self) -> Dict[str, Dict[str, Any]]:
+        return self.nodeOutputHandler.output_file_stats()
+
+    def close(self) -> None:
+        start = time.perf_counter()
+        self.nodeOutputHandler.close()
+        self.recorder.add_handler_call(
+            handler=self.name, seconds=time.perf_counter() - start
+        )
+
+
+class MeteredRelations(RelationOutputHandlerBase):
+    # passes everything on to the wrapped handler, recording the rows and the time spent in it
+    def __init__(
+        self,
+        relationOutputHandler: RelationOutputHandlerBase,
+        recorder: MetricsRecorder,
+    ):
+        self.relationOutputHandler = relationOutputHandler
+        self.recorder = recorder
+        self.name = type(relationOutputHandler).__name__
+
+    def add(
+        self,
+        startNodeId: Union[BaseNodeId, str],
+        endNodeId: Union[BaseNodeId, str],
+        relationType: BaseRelationType,
+        relationProperties: Optional[Dict[RelationField, Any]] = None,
+    ) -> None:
+        start = time.perf_counter()
+        self.relationOutputHandler.add(
+            startNodeId=startNodeId,
+            endNodeId=endNodeId,
+            relationType=relationType,
+            relationProperties=relationProperties,
+        )
+        self.recorder.add_handler_call(
+            handler=self.name, seconds=time.perf_counter() - start, relationRows=1
+        )
+
+    def add_many(
+        self,
+        startNodeIds: Sequence[Union[BaseNodeId, str]],
+        endNodeIds: Sequence[Union[BaseNodeId, str]],
+        relationTypes: Sequence[BaseRelationType],
+        relationProperties: Optional[Dict[RelationField, Sequence[Any]]] = None,
+    ) -> None:
+        start = time.perf_counter()
+        self.relationOutputHandler.add_many(
+            startNodeIds=startNodeIds,
+            endNodeIds=endNodeIds,
+            relationTypes=relationTypes,
+            relationProperties=relationProperties,
+        )
+        self.recorder.add_handler_call(
+            handler=self.name,
+            seconds=time.perf_counter() - start,
+            relationRows=len(startNodeIds),
+        )
+
+    def flush(self) -> None:
+        start = time.perf_counter()
+        self.relationOutputHandler.flush()
+        self.recorder.add_handler_call(
+            handler=self.name, seconds=time.perf_counter() - start
+        )
+
+    def output_file_stats(self) -> Dict[str, Dict[str, Any]]:
+        return self.relationOutputHandler.output_file_stats()
+
+    def close(self) -> None:
+        start = time.perf_counter()
+        self.relationOutputHandler.close()
+        self.recorder.add_handler_call(
+            handler=self.name, seconds=time.perf_counter() - start
+        )
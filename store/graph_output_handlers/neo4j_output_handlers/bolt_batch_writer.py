@@ -0,0 +1,151 @@
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Deque, Dict, List, Optional, Tuple, Type
+
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_SESSIONS = 4
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_RETRY_DELAY = 1.0
+# full batches held back while the rows of the dependency aren't committed, before it is flushed early
+DEFAULT_MAX_DEFERRED_BATCHES = 20
+
+
+def create_bolt_driver(
+    uri: str, user: str, password: str, maxConnectionPoolSize: int = DEFAULT_SESSIONS
+) -> Any:
+    # imported here, so the CSV output handlers don't need the driver installed
+    from neo4j import GraphDatabase
+
+    return GraphDatabase.driver(
+        uri, auth=(user, password), max_connection_pool_size=maxConnectionPoolSize
+    )
+
+
+def transient_errors() -> Tuple[Type[Exception], ...]:
+    # deadlocks and lock timeouts are TransientErrors, a lost connection is worth another try as well. Anything
+    # else (syntax, constraint or auth errors) would fail again
+    try:
+        from neo4j.exceptions import ServiceUnavailable, SessionExpired, TransientError
+    except ImportError:
+        return ()
+    return TransientError, ServiceUnavailable, SessionExpired
+
+
+def _run_rows(tx: Any, query: str, rows: List[Dict[str, Any]]) -> None:
+    tx.run(query, rows=rows).consume()
+
+
+class BoltBatchWriter:
+    # Buffers rows per parameterized UNWIND query and writes full batches on a pool of sessions, each batch in its
+    # own transaction. The driver only needs session(database=...) and write_transaction(), so a fake can stand in.
+    # Rows of a dependency (e.g. the nodes a relation batch MATCHes) must be committed before a batch is written:
+    # while the dependency has uncommitted rows, full batches are held back, and the dependency is flushed once
+    # for all of them at the next flush (a stage boundary) or when maxDeferredBatches have piled up.
+    # Batches of the same lane (e.g. relations MERGEd onto the few TEAM nodes) are written one after another, so
+    # they don't wait on each other's locks, the others run on the pool. Only transient errors are retried.
+    def __init__(
+        self,
+        driver: Any,
+        database: Optional[str] = None,
+        batchSize: int = DEFAULT_BATCH_SIZE,
+        sessions: int = DEFAULT_SESSIONS,
+        maxRetries: int = DEFAULT_MAX_RETRIES,
+        retryDelay: float = DEFAULT_RETRY_DELAY,
+        dependency: Optional["BoltBatchWriter"] = None,
+        maxDeferredBatches: int = DEFAULT_MAX_DEFERRED_BATCHES,
+        retryableErrors: Optional[Tuple[Type[Exception], ...]] = None,
+    ):
+        self.driver = driver
+        self.database = database
+        self.batchSize = batchSize
+        self.sessions = sessions
+        self.maxRetries = maxRetries
+        self.retryDelay = retryDelay
+        self.dependency = dependency
+        self.maxDeferredBatches = maxDeferredBatches
+        self.retryableErrors = (
+            transient_errors() if retryableErrors is None else retryableErrors
+        )
+        # rows added since the last flush, which a dependent writer has to wait for
+        self.uncommitted = False
+        self._rows: Dict[str, List[Dict[str, Any]]] = {}
+        self._lanes: Dict[str, Optional[str]] = {}
+        self._deferred: List[Tuple[str, List[Dict[str, Any]]]] = []
+        self._pending: Deque[Future] = deque()
+        self._executor = ThreadPoolExecutor(max_workers=sessions)
+        self._laneExecutors: Dict[str, ThreadPoolExecutor] = {}
+
+    def run(self, query: str) -> None:
+        # auto-commit query outside the batches, e.g. schema changes that can't share a transaction with writes
+        with self.driver.session(database=self.database) as session:
+            session.run(query).consume()
+
+    def add(
+        self, query: str, rows: List[Dict[str, Any]], lane: Optional[str] = None
+    ) -> None:
+        self.uncommitted = True
+        self._lanes[query] = lane
+        bufferedRows = self._rows.setdefault(query, [])
+        bufferedRows.extend(rows)
+        while len(bufferedRows) >= self.batchSize:
+            self._submit(query=query, rows=bufferedRows[: self.batchSize])
+            del bufferedRows[: self.batchSize]
+
+    def _submit(self, query: str, rows: List[Dict[str, Any]]) -> None:
+        self._deferred.append((query, rows))
+        if self.dependency is not None and self.dependency.uncommitted:
+            if len(self._deferred) < self.maxDeferredBatches:
+                return
+            self.dependency.flush()
+        self._write_deferred()
+
+    def _write_deferred(self) -> None:
+        deferred, self._deferred = self._deferred, []
+        for query, rows in deferred:
+            self._write_async(query=query, rows=rows)
+
+    def _write_async(self, query: str, rows: List[Dict[str, Any]]) -> None:
+        # a couple of batches per session in flight keeps the sessions busy without buffering the whole input
+        while len(self._pending) >= 2 * self.sessions:
+            self._pending.popleft().result()
+        lane = self._lanes.get(query)
+        executor = self._executor
+        if lane is not None:
+            executor = self._laneExecutors.get(lane)
+            if executor is None:
+                executor = self._laneExecutors[lane] = ThreadPoolExecutor(max_workers=1)
+        self._pending.append(executor.submit(self._write_batch, query=query, rows=rows))
+
+    def _write_batch(self, query: str, rows: List[Dict[str, Any]]) -> None:
+        # every query MERGEs, so a batch that failed half-way can safely be written again
+        for attempt in range(self.maxRetries + 1):
+            try:
+                with self.driver.session(database=self.database) as session:
+                    session.write_transaction(_run_rows, query, rows)
+                return
+            except self.retryableErrors:
+                if attempt == self.maxRetries:
+                    raise
+                time.sleep(self.retryDelay * 2**attempt)
+
+    def flush(self) -> None:
+        # writes the held back and partial batches and waits until every batch is committed
+        if self.dependency is not None:
+            self.dependency.flush()
+        for query, rows in self._rows.items():
+            if rows:
+                self._deferred.append((query, rows))
+        self._rows = {}
+        self._write_deferred()
+        while self._pending:
+            self._pending.popleft().result()
+        self.uncommitted = False
+
+    def close(self) -> None:
+        try:
+            self.flush()
+        finally:
+            self._executor.shutdown()
+            for executor in self._laneExecutors.values():
+                executor.shutdown()
@@ -0,0 +1,152 @@
+import math
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from datamodel.node_field import NodeField, NodeFieldType
+from datamodel.node_ids import BaseNodeId
+from datamodel.node_labels import NodeLabel
+from store.graph_output_handlers.neo4j_output_handlers.bolt_batch_writer import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_SESSIONS,
+    BoltBatchWriter,
+)
+from store.graph_output_handlers.output_handler_base import NodeOutputHandlerBase
+
+NODE_ID_PROPERTY = "nodeId"
+# every node has one of these labels, so MERGE and the relation MATCHes can look nodes up by index
+INDEXED_LABELS = [
+    NodeLabel.COMMENTARY_TEMPLATE,
+    NodeLabel.COUNTRY,
+    NodeLabel.DATE,
+    NodeLabel.LEAGUE,
+    NodeLabel.MATCH,
+    NodeLabel.MATCH_EVENT,
+    NodeLabel.MATCH_EVENT_CONTEXT,
+    NodeLabel.MONTH,
+    NodeLabel.PLAYER,
+    NodeLabel.SEASON,
+    NodeLabel.SEASON_STATS,
+    NodeLabel.TEAM,
+    NodeLabel.YEAR,
+]
+
+CONVERTERS: Dict[str, Callable[[Any], Any]] = {
+    NodeFieldType.BOOLEAN: bool,
+    # the driver packs date objects as Cypher dates
+    NodeFieldType.DATE: lambda value: (
+        date.fromisoformat(value) if isinstance(value, str) else value
+    ),
+    NodeFieldType.FLOAT: float,
+    NodeFieldType.INT: int,
+    NodeFieldType.STRING: lambda value: value,
+    NodeFieldType.STRING_ARRAY: list,
+}
+
+
+def _is_null(value: Any) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def _property_value(field: str, value: Any) -> Any:
+    # the driver only packs builtin types, so numpy scalars are unwrapped
+    if isinstance(value, np.generic):
+        value = value.item()
+    return CONVERTERS[NodeField.TYPES.get(field, NodeFieldType.STRING)](value)
+
+
+def _labels_pattern(labels: Sequence[str]) -> str:
+    return "".join(f":`{label}`" for label in labels)
+
+
+class BoltNodes(NodeOutputHandlerBase):
+    # MERGEs nodes into a running database, one parameterized UNWIND query per label combination
+    def __init__(
+        self,
+        driver: Any,
+        database: Optional[str] = None,
+        batchSize: int = DEFAULT_BATCH_SIZE,
+        sessions: int = DEFAULT_SESSIONS,
+        maxRetries: int = DEFAULT_MAX_RETRIES,
+        createIndexes: bool = True,
+        closeDriver: bool = False,
+    ):
+        self.writer = BoltBatchWriter(
+            driver=driver,
+            database=database,
+            batchSize=batchSize,
+            sessions=sessions,
+            maxRetries=maxRetries,
+        )
+        self.closeDriver = closeDriver
+        self._queries: Dict[tuple, str] = {}
+        if createIndexes:
+            for label in INDEXED_LABELS:
+                self.writer.run(
+                    query=f"CREATE INDEX IF NOT EXISTS FOR (n:`{label}`) ON (n.{NODE_ID_PROPERTY})"
+                )
+
+    def _query(self, nodeLabels: Sequence[str]) -> str:
+        key = tuple(nodeLabels)
+        query = self._queries.get(key)
+        if query is None:
+            query = self._queries[key] = (
+                "UNWIND $rows AS row "
+                f"MERGE (n{_labels_pattern(labels=nodeLabels)} {{{NODE_ID_PROPERTY}: row.nodeId}}) "
+                "SET n += row.properties"
+            )
+        return query
+
+    def add(
+        self,
+        nodeId: Union[BaseNodeId, str],
+        nodeLabels: List[NodeLabel],
+        nodeProperties: Dict[NodeField, Any],
+    ) -> None:
+        self.add_many(
+            nodeIds=[nodeId],
+            nodeLabels=[nodeLabels],
+            nodeProperties={key: [value] for key, value in nodeProperties.items()},
+        )
+
+    def add_many(
+        self,
+        nodeIds: Sequence[Union[BaseNodeId, str]],
+        nodeLabels: Sequence[List[NodeLabel]],
+        nodeProperties: Dict[NodeField, Sequence[Any]],
+    ) -> None:
+        unknownFields = set(nodeProperties.keys()).difference(
+            NodeField.ALL[2:] + NodeField.SEASON_STATS_FIELDS
+        )
+        if unknownFields:
+            raise ValueError(
+                f"dict contains fields not in fieldnames: {', '.join(map(repr, unknownFields))}"
+            )
+        fields = list(nodeProperties.keys())
+        rowsByQuery: Dict[str, List[Dict[str, Any]]] = {}
+        for nodeId, labels, *values in zip(
+            nodeIds, nodeLabels, *nodeProperties.values()
+        ):
+            # empty properties are left unset, as neo4j-admin import does with --ignore-empty-strings
+            rowsByQuery.setdefault(self._query(nodeLabels=labels), []).append(
+                {
+                    "nodeId": str(nodeId),
+                    "properties": {
+                        field: _property_value(field=field, value=value)
+                        for field, value in zip(fields, values)
+                        if not _is_null(value)
+                    },
+                }
+            )
+        for query, rows in rowsByQuery.items():
+            self.writer.add(query=query, rows=rows)
+
+    def flush(self) -> None:
+        self.writer.flush()
+
+    def close(self) -> None:
+        self.writer.close()
+        if self.closeDriver:
+            self.writer.driver.close()
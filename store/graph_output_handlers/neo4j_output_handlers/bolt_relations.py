@@ -0,0 +1,235 @@
+import math
+from operator import itemgetter
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from datamodel.node_field import NodeFieldType
+from datamodel.node_ids import BaseNodeId
+from datamodel.node_labels import NodeLabel
+from datamodel.relations import (
+    BaseRelationType,
+    EventRelationType,
+    GeneralRelationType,
+    RelationField,
+)
+from store.graph_output_handlers.neo4j_output_handlers.bolt_batch_writer import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_SESSIONS,
+    BoltBatchWriter,
+)
+from store.graph_output_handlers.neo4j_output_handlers.bolt_nodes import (
+    CONVERTERS,
+    NODE_ID_PROPERTY,
+    BoltNodes,
+)
+from store.graph_output_handlers.output_handler_base import RelationOutputHandlerBase
+
+# (start, end) labels of each relation type, so both ends are found through the nodeId indexes
+RELATION_ENDPOINT_LABELS: Dict[str, Tuple[str, str]] = {
+    EventRelationType.EVENT_TEAM: (NodeLabel.MATCH_EVENT, NodeLabel.TEAM),
+    EventRelationType.OPPONENT_TEAM: (NodeLabel.MATCH_EVENT, NodeLabel.TEAM),
+    EventRelationType.PLAYER_1: (NodeLabel.MATCH_EVENT, NodeLabel.PLAYER),
+    EventRelationType.PLAYER_2: (NodeLabel.MATCH_EVENT, NodeLabel.PLAYER),
+    EventRelationType.SHOT_PLACEMENT: (
+        NodeLabel.MATCH_EVENT,
+        NodeLabel.MATCH_EVENT_CONTEXT,
+    ),
+    EventRelationType.SHOT_OUTCOME: (
+        NodeLabel.MATCH_EVENT,
+        NodeLabel.MATCH_EVENT_CONTEXT,
+    ),
+    EventRelationType.PITCH_LOCATION: (
+        NodeLabel.MATCH_EVENT,
+        NodeLabel.MATCH_EVENT_CONTEXT,
+    ),
+    EventRelationType.BODY_PART: (NodeLabel.MATCH_EVENT, NodeLabel.MATCH_EVENT_CONTEXT),
+    EventRelationType.ASSIST_METHOD: (
+        NodeLabel.MATCH_EVENT,
+        NodeLabel.MATCH_EVENT_CONTEXT,
+    ),
+    EventRelationType.EVENT_SITUATION: (
+        NodeLabel.MATCH_EVENT,
+        NodeLabel.MATCH_EVENT_CONTEXT,
+    ),
+    GeneralRelationType.AWAY_TEAM: (NodeLabel.MATCH, NodeLabel.TEAM),
+    GeneralRelationType.HOME_TEAM: (NodeLabel.MATCH, NodeLabel.TEAM),
+    GeneralRelationType.HAS_MATCH_EVENT: (NodeLabel.MATCH, NodeLabel.MATCH_EVENT),
+    GeneralRelationType.IN_COUNTRY: (NodeLabel.LEAGUE, NodeLabel.COUNTRY),
+    GeneralRelationType.IN_LEAGUE: (NodeLabel.MATCH, NodeLabel.LEAGUE),
+    GeneralRelationType.IN_MONTH: (NodeLabel.DATE, NodeLabel.MONTH),
+    GeneralRelationType.IN_SEASON: (NodeLabel.SEASON, NodeLabel.MATCH),
+    GeneralRelationType.IN_YEAR: (NodeLabel.MONTH, NodeLabel.YEAR),
+    GeneralRelationType.NEXT: (NodeLabel.MATCH, NodeLabel.MATCH),
+    GeneralRelationType.NEXT_EVENT: (NodeLabel.MATCH_EVENT, NodeLabel.MATCH_EVENT),
+    GeneralRelationType.ON_DATE: (NodeLabel.DATE, NodeLabel.MATCH),
+    GeneralRelationType.PLAYED_FOR: (NodeLabel.PLAYER, NodeLabel.TEAM),
+    GeneralRelationType.PLAYER_SEASON_STATS: (NodeLabel.PLAYER, NodeLabel.SEASON_STATS),
+    GeneralRelationType.TEAM_SEASON_STATS: (NodeLabel.TEAM, NodeLabel.SEASON_STATS),
+    GeneralRelationType.FOR_SEASON: (NodeLabel.SEASON_STATS, NodeLabel.SEASON),
+    GeneralRelationType.HAS_COMMENTARY: (
+        NodeLabel.MATCH_EVENT,
+        NodeLabel.COMMENTARY_TEMPLATE,
+    ),
+}
+# labels with few nodes that a large share of the relations of a type start or end at. Concurrent transactions
+# MERGEing onto the same node wait for its lock, so the batches of these types are written one at a time per label
+CONTENDED_LABELS = {
+    NodeLabel.COMMENTARY_TEMPLATE,
+    NodeLabel.COUNTRY,
+    NodeLabel.LEAGUE,
+    NodeLabel.MATCH_EVENT_CONTEXT,
+    NodeLabel.MONTH,
+    NodeLabel.SEASON,
+    NodeLabel.TEAM,
+    NodeLabel.YEAR,
+}
+
+
+def relation_lane(relationType: BaseRelationType) -> Optional[str]:
+    for label in RELATION_ENDPOINT_LABELS.get(relationType, ()):
+        if label in CONTENDED_LABELS:
+            return label
+    return None
+
+
+def _label_pattern(label: Optional[str]) -> str:
+    return "" if label is None else f":`{label}`"
+
+
+def _is_null(value: Any) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def _property_value(field: str, value: Any) -> Any:
+    if isinstance(value, np.generic):
+        value = value.item()
+    return CONVERTERS[RelationField.TYPES.get(field, NodeFieldType.STRING)](value)
+
+
+def _key_pattern(relationType: BaseRelationType) -> str:
+    # relations of a type with key properties are MERGEd on them, so e.g. every season gets its own PLAYED_FOR
+    keys = RelationField.KEYS.get(relationType, [])
+    if not keys:
+        return ""
+    return " {" + ", ".join(f"{key}: row.properties.{key}" for key in keys) + "}"
+
+
+class BoltRelations(RelationOutputHandlerBase):
+    # MERGEs relations between existing nodes, one parameterized UNWIND query per relation type.
+    # Relations whose nodes don't exist are skipped, like neo4j-admin import --skip-bad-relationships
+    def __init__(
+        self,
+        driver: Any,
+        database: Optional[str] = None,
+        batchSize: int = DEFAULT_BATCH_SIZE,
+        sessions: int = DEFAULT_SESSIONS,
+        maxRetries: int = DEFAULT_MAX_RETRIES,
+        nodeOutputHandler: Optional[BoltNodes] = None,
+        closeDriver: bool = False,
+    ):
+        self.writer = BoltBatchWriter(
+            driver=driver,
+            database=database,
+            batchSize=batchSize,
+            sessions=sessions,
+            maxRetries=maxRetries,
+            dependency=None if nodeOutputHandler is None else nodeOutputHandler.writer,
+        )
+        self.closeDriver = closeDriver
+        self._queries: Dict[tuple, str] = {}
+        self._lanes: Dict[str, Optional[str]] = {}
+
+    def _query(self, relationType: BaseRelationType, properties: bool = False) -> str:
+        key = (relationType, properties)
+        query = self._queries.get(key)
+        if query is None:
+            startLabel, endLabel = RELATION_ENDPOINT_LABELS.get(
+                relationType, (None, None)
+            )
+            query = (
+                "UNWIND $rows AS row "
+                f"MATCH (a{_label_pattern(label=startLabel)} {{{NODE_ID_PROPERTY}: row.startNodeId}}) "
+                f"MATCH (b{_label_pattern(label=endLabel)} {{{NODE_ID_PROPERTY}: row.endNodeId}}) "
+            )
+            if properties:
+                query += (
+                    f"MERGE (a)-[r:`{relationType}`{_key_pattern(relationType=relationType)}]->(b) "
+                    "SET r += row.properties"
+                )
+            else:
+                query += f"MERGE (a)-[:`{relationType}`]->(b)"
+            self._queries[key] = query
+            self._lanes[query] = relation_lane(relationType=relationType)
+        return query
+
+    def add(
+        self,
+        startNodeId: Union[BaseNodeId, str],
+        endNodeId: Union[BaseNodeId, str],
+        relationType: BaseRelationType,
+        relationProperties: Optional[Dict[RelationField, Any]] = None,
+    ) -> None:
+        self.add_many(
+            startNodeIds=[startNodeId],
+            endNodeIds=[endNodeId],
+            relationTypes=[relationType],
+            relationProperties=(
+                None
+                if relationProperties is None
+                else {key: [value] for key, value in relationProperties.items()}
+            ),
+        )
+
+    def add_many(
+        self,
+        startNodeIds: Sequence[Union[BaseNodeId, str]],
+        endNodeIds: Sequence[Union[BaseNodeId, str]],
+        relationTypes: Sequence[BaseRelationType],
+        relationProperties: Optional[Dict[RelationField, Sequence[Any]]] = None,
+    ) -> None:
+        rowsByQuery: Dict[str, List[Dict[str, Any]]] = {}
+        if relationProperties:
+            fields = list(relationProperties.keys())
+            for startNodeId, endNodeId, relationType, *values in zip(
+                startNodeIds, endNodeIds, relationTypes, *relationProperties.values()
+            ):
+                # empty properties are left unset, like the empty fields of the import files, and types without
+                # fields are MERGEd without them
+                rowsByQuery.setdefault(
+                    self._query(
+                        relationType=relationType,
+                        properties=bool(RelationField.fields(relationType)),
+                    ),
+                    [],
+                ).append(
+                    {
+                        "startNodeId": str(startNodeId),
+                        "endNodeId": str(endNodeId),
+                        "properties": {
+                            field: _property_value(field=field, value=value)
+                            for field, value in zip(fields, values)
+                            if not _is_null(value)
+                        },
+                    }
+                )
+        else:
+            for startNodeId, endNodeId, relationType in zip(
+                startNodeIds, endNodeIds, relationTypes
+            ):
+                rowsByQuery.setdefault(
+                    self._query(relationType=relationType), []
+                ).append({"startNodeId": str(startNodeId), "endNodeId": str(endNodeId)})
+        for query, rows in rowsByQuery.items():
+            # in end node order, so concurrent batches lock the nodes they share in the same order
+            rows.sort(key=itemgetter("endNodeId"))
+            self.writer.add(query=query, rows=rows, lane=self._lanes[query])
+
+    def flush(self) -> None:
+        self.writer.flush()
+
+    def close(self) -> None:
+        self.writer.close()
+        if self.closeDriver:
+            self.writer.driver.close()
@@ -1,48 +1,219 @@
 import csv
-import gzip
 import os
-from typing import Any, Dict, List
+from glob import glob
+from itertools import repeat
+from pathlib import Path
+from typing import Any, Dict, IO, List, Optional, Sequence, Union
+
+import numpy as np
 
 from datamodel.node_ids import BaseNodeId
-from datamodel.node_field import NodeField
+from datamodel.node_field import NodeField, NodeFieldType
+from datamodel.node_kinds import NodeKind
 from datamodel.node_labels import NodeLabel
+from store.graph_output_handlers.neo4j_output_handlers.typed_nodes_files import (
+    FORMATTERS,
+    TypedNodesFiles,
+)
 from store.graph_output_handlers.output_handler_base import NodeOutputHandlerBase
+from utils.gzip_writers import gzip_file_stats, open_gzip_text_file
 
 
 class NodesFile(NodeOutputHandlerBase):
-    def __init__(self, fileName):
+    # Nodes go to one file with the columns of NodeField.ALL and the header in nodes.csv. SEASON_STATS nodes have
+    # columns of their own, they go to the file and typed header --typedNodeFiles writes them to
+    def __init__(
+        self,
+        fileName,
+        writeHeader: bool = True,
+        compressionLevel: int = 9,
+        pipelined: bool = False,
+        compressionThreads: int = 1,
+    ):
         self.fileName = fileName
-        open(f"{os.path.dirname(self.fileName)}/nodes.csv", "w").write(
-            ",".join(NodeField.ALL)
-        )
-        self.file = gzip.open(self.fileName, "wt")
-        self.csv = csv.DictWriter(
+        self.fileOptions = {
+            "compressionLevel": compressionLevel,
+            "pipelined": pipelined,
+            "compressionThreads": compressionThreads,
+        }
+        # part files written in parallel share the header file written by the parent process
+        if writeHeader:
+            # the import script picks up every season stats file in the directory, so those of earlier runs go
+            self.remove_season_stats_files(fileName=self.fileName)
+            open(f"{os.path.dirname(self.fileName)}/nodes.csv", "w").write(
+                ",".join(NodeField.ALL)
+            )
+        self.file = open_gzip_text_file(fileName=self.fileName, **self.fileOptions)
+        self.csv = csv.writer(
             self.file,
-            fieldnames=NodeField.ALL,
             escapechar="\\",
             quotechar='"',
             quoting=csv.QUOTE_ALL,
         )
+        self.seasonStatsFile: Optional[IO[str]] = None
+        self.seasonStatsWriter: Any = None
 
     @staticmethod
-    def _escape_backslashes(data):
-        return {
-            key: value.replace("\\", "\\\\") if isinstance(value, str) else value
-            for key, value in data.items()
-        }
+    def season_stats_file_name(fileName: Union[str, Path]) -> str:
+        # the nodes file name with the kind in it, e.g. football_event_graph_season_stats_nodes_part_0001.csv.gz
+        directory, baseName = os.path.split(fileName)
+        prefix, separator, suffix = baseName.rpartition("nodes")
+        return f"{directory}/{prefix}{NodeKind.SEASON_STATS}_{separator}{suffix}"
+
+    @staticmethod
+    def remove_season_stats_files(fileName: Union[str, Path]) -> None:
+        # the season stats header and the season stats files of every part and chunk next to fileName
+        seasonStatsFilePattern = NodesFile.season_stats_file_name(fileName).replace(
+            ".csv.gz", "*.csv.gz"
+        )
+        for seasonStatsFileName in [
+            TypedNodesFiles.header_file_name(
+                os.path.dirname(fileName), NodeKind.SEASON_STATS
+            )
+        ] + glob(seasonStatsFilePattern):
+            if os.path.exists(seasonStatsFileName):
+                os.remove(seasonStatsFileName)
+
+    def _season_stats_writer(self) -> Any:
+        if self.seasonStatsWriter is None:
+            # written by the process and chunk that aggregates the season stats, renamed into place like the
+            # typed relation headers
+            headerFileName = TypedNodesFiles.header_file_name(
+                os.path.dirname(self.fileName), NodeKind.SEASON_STATS
+            )
+            temporaryFileName = f"{headerFileName}.{os.getpid()}.tmp"
+            with open(temporaryFileName, "w") as file:
+                file.write(
+                    ",".join(
+                        NodeField.typed_header(field)
+                        for field in NodeKind.SEASON_STATS_FIELDS
+                    )
+                )
+            os.replace(temporaryFileName, headerFileName)
+            self.seasonStatsFile = open_gzip_text_file(
+                fileName=self.season_stats_file_name(self.fileName), **self.fileOptions
+            )
+            self.seasonStatsWriter = csv.writer(
+                self.seasonStatsFile,
+                escapechar="\\",
+                quotechar='"',
+                quoting=csv.QUOTE_MINIMAL,
+            )
+        return self.seasonStatsWriter
+
+    @staticmethod
+    def _escape_backslashes(values: Sequence[Any]) -> List[Any]:
+        return [
+            value.replace("\\", "\\\\") if isinstance(value, str) else value
+            for value in values
+        ]
 
     def add(
         self,
-        nodeId: BaseNodeId,
+        nodeId: Union[BaseNodeId, str],
         nodeLabels: List[NodeLabel],
         nodeProperties: Dict[NodeField, Any],
     ) -> None:
-        row = {
-            NodeField.ID: str(nodeId),
-            NodeField.LABEL: ";".join((label for label in nodeLabels)),
-        }
-        row.update(self._escape_backslashes(data=nodeProperties))
-        self.csv.writerow(row)
+        self.add_many(
+            nodeIds=[nodeId],
+            nodeLabels=[nodeLabels],
+            nodeProperties={key: [value] for key, value in nodeProperties.items()},
+        )
+
+    def add_many(
+        self,
+        nodeIds: Sequence[Union[BaseNodeId, str]],
+        nodeLabels: Sequence[List[NodeLabel]],
+        nodeProperties: Dict[NodeField, Sequence[Any]],
+    ) -> None:
+        if any(NodeLabel.SEASON_STATS in labels for labels in nodeLabels):
+            self._add_season_stats(
+                nodeIds=nodeIds, nodeLabels=nodeLabels, nodeProperties=nodeProperties
+            )
+            return
+        unknownFields = set(nodeProperties.keys()).difference(NodeField.ALL)
+        if unknownFields:
+            raise ValueError(
+                f"dict contains fields not in fieldnames: {', '.join(map(repr, unknownFields))}"
+            )
+        # rows are written positionally in NodeField.ALL order, missing properties are left empty
+        propertyColumns = [
+            self._escape_backslashes(values=nodeProperties[field])
+            if field in nodeProperties
+            else repeat("")
+            for field in NodeField.ALL[2:]
+        ]
+        self.csv.writerows(
+            zip(
+                map(str, nodeIds),
+                (";".join(labels) for labels in nodeLabels),
+                *propertyColumns,
+            )
+        )
+
+    def _add_season_stats(
+        self,
+        nodeIds: Sequence[Union[BaseNodeId, str]],
+        nodeLabels: Sequence[List[NodeLabel]],
+        nodeProperties: Dict[NodeField, Sequence[Any]],
+    ) -> None:
+        # formatted like the season stats file of TypedNodesFiles, the other nodes of a batch go to the nodes file
+        seasonStatsMask = np.array(
+            [NodeLabel.SEASON_STATS in labels for labels in nodeLabels], dtype=bool
+        )
+        propertyColumns = {}
+        for field, values in nodeProperties.items():
+            column = np.empty(len(seasonStatsMask), dtype=object)
+            column[:] = list(values)
+            propertyColumns[field] = column
+        unknownFields = set(nodeProperties.keys()).difference(
+            NodeKind.SEASON_STATS_FIELDS
+        )
+        if unknownFields:
+            raise ValueError(
+                f"{NodeKind.SEASON_STATS} nodes have no fields {', '.join(map(repr, unknownFields))}"
+            )
+        nodeIdStrings = np.array([str(nodeId) for nodeId in nodeIds], dtype=object)
+        columns = [
+            nodeIdStrings[seasonStatsMask],
+            [
+                ";".join(labels)
+                for labels, isSeasonStats in zip(nodeLabels, seasonStatsMask)
+                if isSeasonStats
+            ],
+        ]
+        for field in NodeKind.SEASON_STATS_FIELDS[2:]:
+            if field in propertyColumns:
+                formatter = FORMATTERS[NodeField.TYPES.get(field, NodeFieldType.STRING)]
+                columns.append(
+                    [formatter(v) for v in propertyColumns[field][seasonStatsMask]]
+                )
+            else:
+                columns.append([""] * int(seasonStatsMask.sum()))
+        self._season_stats_writer().writerows(zip(*columns))
+        if not seasonStatsMask.all():
+            self.add_many(
+                nodeIds=nodeIdStrings[~seasonStatsMask],
+                nodeLabels=[
+                    labels
+                    for labels, isSeasonStats in zip(nodeLabels, seasonStatsMask)
+                    if not isSeasonStats
+                ],
+                nodeProperties={
+                    field: column[~seasonStatsMask]
+                    for field, column in propertyColumns.items()
+                },
+            )
+
+    def output_file_stats(self) -> Dict[str, Dict[str, Any]]:
+        fileStats = {self.fileName: gzip_file_stats(file=self.file)}
+        if self.seasonStatsFile is not None:
+            fileStats[self.season_stats_file_name(self.fileName)] = gzip_file_stats(
+                file=self.seasonStatsFile
+            )
+        return fileStats
 
     def close(self) -> None:
         self.file.close()
+        if self.seasonStatsFile is not None:
+            self.seasonStatsFile.close()
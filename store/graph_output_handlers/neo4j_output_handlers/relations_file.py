@@ -1,42 +1,195 @@
 import csv
-import gzip
 import os
+from glob import glob
 from pathlib import Path
-from typing import Union
+from typing import Any, Dict, IO, Optional, Sequence, Union
 
+import numpy as np
+
+from datamodel.node_field import NodeFieldType
 from datamodel.node_ids import BaseNodeId
-from datamodel.relations import BaseRelationType, Relation
+from datamodel.relations import BaseRelationType, Relation, RelationField
+from store.graph_output_handlers.neo4j_output_handlers.typed_nodes_files import (
+    FORMATTERS,
+)
 from store.graph_output_handlers.output_handler_base import RelationOutputHandlerBase
+from utils.gzip_writers import gzip_file_stats, open_gzip_text_file
 
 
 class RelationsFile(RelationOutputHandlerBase):
-    def __init__(self, fileName: Union[str, Path]):
+    # Relations without properties all go to one file, with the header in relations.csv. Relations added with
+    # properties go to a file per relation type, with the typed header of RelationField.fields. Types without
+    # fields are written to the one file, without the properties, so a batch can mix both
+    def __init__(
+        self,
+        fileName: Union[str, Path],
+        writeHeader: bool = True,
+        compressionLevel: int = 9,
+        pipelined: bool = False,
+        compressionThreads: int = 1,
+    ):
         self.fileName = fileName
-        open(f"{os.path.dirname(self.fileName)}/relations.csv", "w").write(
-            ",".join(Relation.ALL)
-        )
-        self.file = gzip.open(self.fileName, "wt")
-        self.csv = csv.DictWriter(
+        self.fileOptions = {
+            "compressionLevel": compressionLevel,
+            "pipelined": pipelined,
+            "compressionThreads": compressionThreads,
+        }
+        if writeHeader:
+            # the import script picks up every typed relations file in the directory, so those of earlier runs go
+            self.remove_typed_files(fileName=self.fileName)
+            open(f"{os.path.dirname(self.fileName)}/relations.csv", "w").write(
+                ",".join(Relation.ALL)
+            )
+        self.file = open_gzip_text_file(fileName=self.fileName, **self.fileOptions)
+        self.csv = csv.writer(
             self.file,
-            fieldnames=Relation.ALL,
             escapechar="\\",
             quotechar='"',
             quoting=csv.QUOTE_ALL,
         )
+        self.propertyFiles: Dict[str, IO[str]] = {}
+        self.propertyWriters: Dict[str, Any] = {}
+
+    @staticmethod
+    def header_file_name(fileName: Union[str, Path], relationType: str) -> str:
+        return (
+            f"{os.path.dirname(fileName)}/{relationType.lower()}_relations_header.csv"
+        )
+
+    @staticmethod
+    def property_file_name(fileName: Union[str, Path], relationType: str) -> str:
+        # the relations file name with the type in it, e.g. football_event_graph_played_for_relations_part_0001.csv.gz
+        directory, baseName = os.path.split(fileName)
+        prefix, separator, suffix = baseName.rpartition("relations")
+        return f"{directory}/{prefix}{relationType.lower()}_{separator}{suffix}"
+
+    @staticmethod
+    def remove_typed_files(fileName: Union[str, Path]) -> None:
+        # the typed headers and the typed relations files of every part and chunk next to fileName
+        for relationType in RelationField.FIELDS:
+            typedFilePattern = RelationsFile.property_file_name(
+                fileName, relationType
+            ).replace(".csv.gz", "*.csv.gz")
+            for typedFileName in [
+                RelationsFile.header_file_name(fileName, relationType)
+            ] + glob(typedFilePattern):
+                if os.path.exists(typedFileName):
+                    os.remove(typedFileName)
+
+    def _write_typed_header(self, relationType: str) -> None:
+        # written by every process and chunk that writes relations of the type, only those get a header. Renamed
+        # into place, so processes writing the same header at once never leave a partial one
+        headerFileName = self.header_file_name(self.fileName, relationType)
+        temporaryFileName = f"{headerFileName}.{os.getpid()}.tmp"
+        with open(temporaryFileName, "w") as file:
+            file.write(",".join(Relation.typed_header(relationType)))
+        os.replace(temporaryFileName, headerFileName)
+
+    def _property_writer(self, relationType: str) -> Any:
+        writer = self.propertyWriters.get(relationType)
+        if writer is None:
+            self._write_typed_header(relationType=relationType)
+            self.propertyFiles[relationType] = open_gzip_text_file(
+                fileName=self.property_file_name(self.fileName, relationType),
+                **self.fileOptions,
+            )
+            writer = self.propertyWriters[relationType] = csv.writer(
+                self.propertyFiles[relationType],
+                escapechar="\\",
+                quotechar='"',
+                quoting=csv.QUOTE_MINIMAL,
+            )
+        return writer
 
     def add(
         self,
-        startNodeId: BaseNodeId,
-        endNodeId: BaseNodeId,
+        startNodeId: Union[BaseNodeId, str],
+        endNodeId: Union[BaseNodeId, str],
         relationType: BaseRelationType,
+        relationProperties: Optional[Dict[RelationField, Any]] = None,
     ) -> None:
-        self.csv.writerow(
-            {
-                Relation.START_ID: str(startNodeId),
-                Relation.END_ID: str(endNodeId),
-                Relation.TYPE: relationType,
-            }
+        self.add_many(
+            startNodeIds=[startNodeId],
+            endNodeIds=[endNodeId],
+            relationTypes=[relationType],
+            relationProperties=(
+                None
+                if relationProperties is None
+                else {key: [value] for key, value in relationProperties.items()}
+            ),
         )
 
+    def add_many(
+        self,
+        startNodeIds: Sequence[Union[BaseNodeId, str]],
+        endNodeIds: Sequence[Union[BaseNodeId, str]],
+        relationTypes: Sequence[BaseRelationType],
+        relationProperties: Optional[Dict[RelationField, Sequence[Any]]] = None,
+    ) -> None:
+        if not relationProperties:
+            self.csv.writerows(
+                zip(map(str, startNodeIds), map(str, endNodeIds), relationTypes)
+            )
+            return
+        startNodeIdStrings = np.array(
+            [str(nodeId) for nodeId in startNodeIds], dtype=object
+        )
+        endNodeIdStrings = np.array(
+            [str(nodeId) for nodeId in endNodeIds], dtype=object
+        )
+        relationTypes = np.asarray(relationTypes, dtype=object)
+        propertyColumns = {}
+        for field, values in relationProperties.items():
+            column = np.empty(len(relationTypes), dtype=object)
+            column[:] = list(values)
+            propertyColumns[field] = column
+        plainMask = np.zeros(len(relationTypes), dtype=bool)
+        for relationType in dict.fromkeys(relationTypes):
+            mask = relationTypes == relationType
+            fields = RelationField.fields(relationType)
+            if not fields:
+                plainMask |= mask
+                continue
+            unknownFields = set(relationProperties.keys()).difference(fields)
+            if unknownFields:
+                raise ValueError(
+                    f"{relationType} relations have no fields {', '.join(map(repr, unknownFields))}"
+                )
+            columns = [
+                startNodeIdStrings[mask],
+                endNodeIdStrings[mask],
+                relationTypes[mask],
+            ]
+            for field in fields:
+                if field in propertyColumns:
+                    formatter = FORMATTERS[
+                        RelationField.TYPES.get(field, NodeFieldType.STRING)
+                    ]
+                    columns.append([formatter(v) for v in propertyColumns[field][mask]])
+                else:
+                    columns.append([""] * int(mask.sum()))
+            self._property_writer(relationType=relationType).writerows(zip(*columns))
+        if plainMask.any():
+            self.csv.writerows(
+                zip(
+                    startNodeIdStrings[plainMask],
+                    endNodeIdStrings[plainMask],
+                    relationTypes[plainMask],
+                )
+            )
+
+    def output_file_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            self.fileName: gzip_file_stats(file=self.file),
+            **{
+                self.property_file_name(self.fileName, relationType): gzip_file_stats(
+                    file=file
+                )
+                for relationType, file in self.propertyFiles.items()
+            },
+        }
+
     def close(self) -> None:
         self.file.close()
+        for file in self.propertyFiles.values():
+            file.close()
@@ -0,0 +1,191 @@
+import csv
+import math
+from pathlib import Path
+from typing import Any, Callable, Dict, IO, List, Optional, Sequence, Union
+
+import numpy as np
+
+from datamodel.node_field import NodeField, NodeFieldType
+from datamodel.node_ids import BaseNodeId
+from datamodel.node_kinds import NodeKind
+from datamodel.node_labels import NodeLabel
+from store.graph_output_handlers.output_handler_base import NodeOutputHandlerBase
+from utils.gzip_writers import gzip_file_stats, open_gzip_text_file
+
+
+def _is_null(value: Any) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def _format_int(value: Any) -> Any:
+    return "" if _is_null(value) else int(value)
+
+
+def _format_float(value: Any) -> Any:
+    return "" if _is_null(value) else float(value)
+
+
+def _format_boolean(value: Any) -> str:
+    return "" if _is_null(value) else ("true" if value else "false")
+
+
+def _format_string(value: Any) -> Any:
+    if _is_null(value):
+        return ""
+    return value.replace("\\", "\\\\") if isinstance(value, str) else value
+
+
+def _format_date(value: Any) -> Any:
+    # ISO dates, as strings or date objects
+    if _is_null(value):
+        return ""
+    return value if isinstance(value, str) else value.isoformat()
+
+
+def _format_string_array(value: Any) -> Any:
+    # joined with the default array delimiter of neo4j-admin import, an empty array leaves the property unset
+    if _is_null(value):
+        return ""
+    return ";".join(_format_string(element) for element in value)
+
+
+FORMATTERS: Dict[str, Callable[[Any], Any]] = {
+    NodeFieldType.BOOLEAN: _format_boolean,
+    NodeFieldType.DATE: _format_date,
+    NodeFieldType.FLOAT: _format_float,
+    NodeFieldType.INT: _format_int,
+    NodeFieldType.STRING: _format_string,
+    NodeFieldType.STRING_ARRAY: _format_string_array,
+}
+
+
+class TypedNodesFiles(NodeOutputHandlerBase):
+    # writes one file per node kind, each with only its own columns and a typed neo4j-admin header
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        partIndex: Optional[int] = None,
+        writeHeader: bool = True,
+        chunkIndex: Optional[int] = None,
+        compressionLevel: int = 9,
+        pipelined: bool = False,
+        compressionThreads: int = 1,
+    ):
+        self.directory = directory
+        self.partIndex = partIndex
+        self.chunkIndex = chunkIndex
+        self.fileOptions = {
+            "compressionLevel": compressionLevel,
+            "pipelined": pipelined,
+            "compressionThreads": compressionThreads,
+        }
+        self.files: Dict[str, IO[str]] = {}
+        self.writers: Dict[str, Any] = {}
+        self._kindCache: Dict[tuple, str] = {}
+        # every header is written up front, because part files of a kind may all come from other processes
+        if writeHeader:
+            for kind in set(NodeKind.LABEL_TO_KIND.values()):
+                open(self.header_file_name(directory, kind), "w").write(
+                    ",".join(
+                        NodeField.typed_header(field) for field in NodeKind.fields(kind)
+                    )
+                )
+
+    @staticmethod
+    def header_file_name(directory: Union[str, Path], kind: str) -> str:
+        return f"{directory}/{kind}_nodes_header.csv"
+
+    @staticmethod
+    def data_file_name(
+        directory: Union[str, Path],
+        kind: str,
+        partIndex: Optional[int] = None,
+        chunkIndex: Optional[int] = None,
+    ) -> str:
+        partSuffix = "" if partIndex is None else f"_part_{partIndex:04d}"
+        if chunkIndex is not None:
+            partSuffix += f"_chunk_{chunkIndex:06d}"
+        return f"{directory}/football_event_graph_{kind}_nodes{partSuffix}.csv.gz"
+
+    def _writer(self, kind: str) -> Any:
+        writer = self.writers.get(kind)
+        if writer is None:
+            self.files[kind] = open_gzip_text_file(
+                fileName=self.data_file_name(
+                    self.directory, kind, self.partIndex, self.chunkIndex
+                ),
+                **self.fileOptions,
+            )
+            writer = csv.writer(
+                self.files[kind],
+                escapechar="\\",
+                quotechar='"',
+                quoting=csv.QUOTE_MINIMAL,
+            )
+            self.writers[kind] = writer
+        return writer
+
+    def _kind(self, nodeLabels: List[NodeLabel]) -> str:
+        key = tuple(nodeLabels)
+        kind = self._kindCache.get(key)
+        if kind is None:
+            kind = self._kindCache[key] = NodeKind.of(nodeLabels=nodeLabels)
+        return kind
+
+    def add(
+        self,
+        nodeId: Union[BaseNodeId, str],
+        nodeLabels: List[NodeLabel],
+        nodeProperties: Dict[NodeField, Any],
+    ) -> None:
+        self.add_many(
+            nodeIds=[nodeId],
+            nodeLabels=[nodeLabels],
+            nodeProperties={key: [value] for key, value in nodeProperties.items()},
+        )
+
+    def add_many(
+        self,
+        nodeIds: Sequence[Union[BaseNodeId, str]],
+        nodeLabels: Sequence[List[NodeLabel]],
+        nodeProperties: Dict[NodeField, Sequence[Any]],
+    ) -> None:
+        kinds = np.array([self._kind(nodeLabels=labels) for labels in nodeLabels])
+        labelStrings = np.array([";".join(labels) for labels in nodeLabels], dtype=object)
+        nodeIdStrings = np.array([str(nodeId) for nodeId in nodeIds], dtype=object)
+        propertyColumns = {}
+        for field, values in nodeProperties.items():
+            column = np.empty(len(nodeIdStrings), dtype=object)
+            column[:] = list(values)
+            propertyColumns[field] = column
+
+        for kind in np.unique(kinds):
+            mask = kinds == kind
+            fields = NodeKind.fields(kind)
+            unknownFields = set(nodeProperties.keys()).difference(fields)
+            if unknownFields:
+                raise ValueError(
+                    f"{kind} nodes have no fields {', '.join(map(repr, unknownFields))}"
+                )
+            columns = [nodeIdStrings[mask], labelStrings[mask]]
+            for field in fields[2:]:
+                if field in propertyColumns:
+                    formatter = FORMATTERS[
+                        NodeField.TYPES.get(field, NodeFieldType.STRING)
+                    ]
+                    columns.append([formatter(v) for v in propertyColumns[field][mask]])
+                else:
+                    columns.append([""] * int(mask.sum()))
+            self._writer(kind=kind).writerows(zip(*columns))
+
+    def output_file_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            self.data_file_name(
+                self.directory, kind, self.partIndex, self.chunkIndex
+            ): gzip_file_stats(file=file)
+            for kind, file in self.files.items()
+        }
+
+    def close(self) -> None:
+        for file in self.files.values():
+            file.close()
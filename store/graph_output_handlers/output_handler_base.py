@@ -1,22 +1,51 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Sequence, Union
 
 from datamodel.node_field import NodeField
 from datamodel.node_ids import BaseNodeId
 from datamodel.node_labels import NodeLabel
-from datamodel.relations import BaseRelationType
+from datamodel.relations import BaseRelationType, RelationField
 
 
 class RelationOutputHandlerBase:
     def add(
         self,
-        startNodeId: BaseNodeId,
-        endNodeId: BaseNodeId,
+        startNodeId: Union[BaseNodeId, str],
+        endNodeId: Union[BaseNodeId, str],
         relationType: BaseRelationType,
+        relationProperties: Optional[Dict[RelationField, Any]] = None,
     ) -> None:
         raise NotImplementedError(
             "Can't use RelationOutputHandlerBase as an output handler"
         )
 
+    def add_many(
+        self,
+        startNodeIds: Sequence[Union[BaseNodeId, str]],
+        endNodeIds: Sequence[Union[BaseNodeId, str]],
+        relationTypes: Sequence[BaseRelationType],
+        relationProperties: Optional[Dict[RelationField, Sequence[Any]]] = None,
+    ) -> None:
+        # handlers without a batched writer fall back to one add per relation
+        relationProperties = relationProperties or {}
+        propertyNames = list(relationProperties.keys())
+        for startNodeId, endNodeId, relationType, *propertyValues in zip(
+            startNodeIds, endNodeIds, relationTypes, *relationProperties.values()
+        ):
+            self.add(
+                startNodeId=startNodeId,
+                endNodeId=endNodeId,
+                relationType=relationType,
+                relationProperties=dict(zip(propertyNames, propertyValues)) or None,
+            )
+
+    def flush(self) -> None:
+        # only handlers that hold back rows, e.g. for batched database writes, have anything to do here
+        pass
+
+    def output_file_stats(self) -> Dict[str, Dict[str, Any]]:
+        # per gzip file written, the bytes before compression and the time spent compressing
+        return {}
+
     def close(self) -> None:
         raise NotImplementedError(
             "Can't use RelationOutputHandlerBase as an output handler"
@@ -26,7 +55,7 @@ class RelationOutputHandlerBase:
 class NodeOutputHandlerBase:
     def add(
         self,
-        nodeId: BaseNodeId,
+        nodeId: Union[BaseNodeId, str],
         nodeLabels: List[NodeLabel],
         nodeProperties: Dict[NodeField, Any],
     ) -> None:
@@ -34,6 +63,31 @@ class NodeOutputHandlerBase:
             "Can't use NodeOutputHandlerBase as an output handler"
         )
 
+    def add_many(
+        self,
+        nodeIds: Sequence[Union[BaseNodeId, str]],
+        nodeLabels: Sequence[List[NodeLabel]],
+        nodeProperties: Dict[NodeField, Sequence[Any]],
+    ) -> None:
+        # handlers without a batched writer fall back to one add per node
+        propertyNames = list(nodeProperties.keys())
+        for nodeId, labels, *propertyValues in zip(
+            nodeIds, nodeLabels, *nodeProperties.values()
+        ):
+            self.add(
+                nodeId=nodeId,
+                nodeLabels=labels,
+                nodeProperties=dict(zip(propertyNames, propertyValues)),
+            )
+
+    def flush(self) -> None:
+        # only handlers that hold back rows, e.g. for batched database writes, have anything to do here
+        pass
+
+    def output_file_stats(self) -> Dict[str, Dict[str, Any]]:
+        # per gzip file written, the bytes before compression and the time spent compressing
+        return {}
+
     def close(self) -> None:
         raise NotImplementedError(
             "Can't use NodeOutputHandlerBase as an output handler"
@@ -0,0 +1,163 @@
+import math
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pyarrow as pa
+
+from datamodel.node_field import NodeField, NodeFieldType
+from datamodel.node_ids import BaseNodeId
+from datamodel.node_kinds import NodeKind
+from datamodel.node_labels import NodeLabel
+from store.graph_output_handlers.output_handler_base import NodeOutputHandlerBase
+from store.graph_output_handlers.parquet_output_handlers.parquet_table_buffer import (
+    DEFAULT_COMPRESSION,
+    DEFAULT_ROW_GROUP_SIZE,
+    ParquetTableBuffer,
+    dictionary_field,
+)
+
+NODE_ID_COLUMN = "nodeId"
+LABELS_COLUMN = "labels"
+
+ARROW_TYPES: Dict[str, pa.DataType] = {
+    NodeFieldType.BOOLEAN: pa.bool_(),
+    NodeFieldType.DATE: pa.date32(),
+    NodeFieldType.FLOAT: pa.float64(),
+    NodeFieldType.INT: pa.int64(),
+    NodeFieldType.STRING: pa.string(),
+    NodeFieldType.STRING_ARRAY: pa.list_(pa.string()),
+}
+
+
+def _is_null(value: Any) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def _string_value(value: Any) -> Optional[str]:
+    # some text properties are numbers, e.g. season years
+    return None if _is_null(value) else str(value)
+
+
+def _field_type(field: str) -> str:
+    return NodeField.TYPES.get(field, NodeFieldType.STRING)
+
+
+def node_id_type(integerIds: bool = False) -> pa.DataType:
+    return pa.int64() if integerIds else pa.string()
+
+
+def node_schema(kind: str, integerIds: bool = False) -> pa.Schema:
+    return pa.schema(
+        [
+            pa.field(NODE_ID_COLUMN, node_id_type(integerIds=integerIds)),
+            dictionary_field(LABELS_COLUMN),
+        ]
+        + [
+            pa.field(field, ARROW_TYPES[_field_type(field)])
+            for field in NodeKind.fields(kind)[2:]
+        ]
+    )
+
+
+class ParquetNodes(NodeOutputHandlerBase):
+    # writes one Parquet file per node kind (its defining label), with only that kind's typed columns
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        partIndex: Optional[int] = None,
+        rowGroupSize: int = DEFAULT_ROW_GROUP_SIZE,
+        compression: str = DEFAULT_COMPRESSION,
+        integerIds: bool = False,
+    ):
+        self.directory = directory
+        self.partIndex = partIndex
+        self.rowGroupSize = rowGroupSize
+        self.compression = compression
+        # the node ID column is int64 when the IDs are written in their integer form
+        self.integerIds = integerIds
+        self.tables: Dict[str, ParquetTableBuffer] = {}
+        self._kindCache: Dict[tuple, str] = {}
+
+    @staticmethod
+    def file_name(
+        directory: Union[str, Path], kind: str, partIndex: Optional[int] = None
+    ) -> str:
+        partSuffix = "" if partIndex is None else f"_part_{partIndex:04d}"
+        return f"{directory}/nodes/{kind}/{kind}_nodes{partSuffix}.parquet"
+
+    def _table(self, kind: str) -> ParquetTableBuffer:
+        table = self.tables.get(kind)
+        if table is None:
+            table = self.tables[kind] = ParquetTableBuffer(
+                fileName=self.file_name(self.directory, kind, self.partIndex),
+                schema=node_schema(kind=kind, integerIds=self.integerIds),
+                rowGroupSize=self.rowGroupSize,
+                compression=self.compression,
+            )
+        return table
+
+    def _kind(self, nodeLabels: List[NodeLabel]) -> str:
+        key = tuple(nodeLabels)
+        kind = self._kindCache.get(key)
+        if kind is None:
+            kind = self._kindCache[key] = NodeKind.of(nodeLabels=nodeLabels)
+        return kind
+
+    def add(
+        self,
+        nodeId: Union[BaseNodeId, str],
+        nodeLabels: List[NodeLabel],
+        nodeProperties: Dict[NodeField, Any],
+    ) -> None:
+        self.add_many(
+            nodeIds=[nodeId],
+            nodeLabels=[nodeLabels],
+            nodeProperties={key: [value] for key, value in nodeProperties.items()},
+        )
+
+    def add_many(
+        self,
+        nodeIds: Sequence[Union[BaseNodeId, str]],
+        nodeLabels: Sequence[List[NodeLabel]],
+        nodeProperties: Dict[NodeField, Sequence[Any]],
+    ) -> None:
+        kinds = np.array([self._kind(nodeLabels=labels) for labels in nodeLabels])
+        labelStrings = np.array(
+            [";".join(labels) for labels in nodeLabels], dtype=object
+        )
+        convertNodeId: Callable[[Any], Any] = int if self.integerIds else str
+        nodeIdValues = np.array(
+            [convertNodeId(str(nodeId)) for nodeId in nodeIds], dtype=object
+        )
+        propertyColumns = {}
+        for field, values in nodeProperties.items():
+            column = np.empty(len(nodeIdValues), dtype=object)
+            column[:] = list(values)
+            if _field_type(field) == NodeFieldType.STRING:
+                column[:] = [_string_value(value) for value in column]
+            propertyColumns[field] = column
+
+        for kind in np.unique(kinds):
+            mask = kinds == kind
+            fields = NodeKind.fields(kind)
+            unknownFields = set(nodeProperties.keys()).difference(fields)
+            if unknownFields:
+                raise ValueError(
+                    f"{kind} nodes have no fields {', '.join(map(repr, unknownFields))}"
+                )
+            columns = {
+                NODE_ID_COLUMN: nodeIdValues[mask],
+                LABELS_COLUMN: labelStrings[mask],
+            }
+            for field in fields[2:]:
+                columns[field] = (
+                    propertyColumns[field][mask]
+                    if field in propertyColumns
+                    else [None] * int(mask.sum())
+                )
+            self._table(kind=kind).append(columns=columns)
+
+    def close(self) -> None:
+        for table in self.tables.values():
+            table.close()
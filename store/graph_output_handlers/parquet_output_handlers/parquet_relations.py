@@ -0,0 +1,158 @@
+from datetime import date
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pyarrow as pa
+
+from datamodel.node_ids import BaseNodeId
+from datamodel.node_field import NodeFieldType
+from datamodel.relations import BaseRelationType, RelationField
+from store.graph_output_handlers.output_handler_base import RelationOutputHandlerBase
+from store.graph_output_handlers.parquet_output_handlers.parquet_nodes import (
+    ARROW_TYPES,
+    node_id_type,
+)
+from store.graph_output_handlers.parquet_output_handlers.parquet_table_buffer import (
+    DEFAULT_COMPRESSION,
+    DEFAULT_ROW_GROUP_SIZE,
+    ParquetTableBuffer,
+    dictionary_field,
+)
+
+START_NODE_ID_COLUMN = "startNodeId"
+END_NODE_ID_COLUMN = "endNodeId"
+TYPE_COLUMN = "type"
+
+
+def _field_type(field: str) -> str:
+    return RelationField.TYPES.get(field, NodeFieldType.STRING)
+
+
+def _date_value(value: Any) -> Optional[date]:
+    # ISO date strings are parsed, Arrow only converts date objects
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def relation_schema(fields: Sequence[str] = (), integerIds: bool = False) -> pa.Schema:
+    return pa.schema(
+        [
+            pa.field(START_NODE_ID_COLUMN, node_id_type(integerIds=integerIds)),
+            pa.field(END_NODE_ID_COLUMN, node_id_type(integerIds=integerIds)),
+            dictionary_field(TYPE_COLUMN),
+        ]
+        + [pa.field(field, ARROW_TYPES[_field_type(field)]) for field in fields]
+    )
+
+
+class ParquetRelations(RelationOutputHandlerBase):
+    # writes one Parquet file per relation type, with the RelationField columns of the type if it is added with
+    # properties
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        partIndex: Optional[int] = None,
+        rowGroupSize: int = DEFAULT_ROW_GROUP_SIZE,
+        compression: str = DEFAULT_COMPRESSION,
+        integerIds: bool = False,
+    ):
+        self.directory = directory
+        self.partIndex = partIndex
+        self.rowGroupSize = rowGroupSize
+        self.compression = compression
+        self.integerIds = integerIds
+        self.tables: Dict[str, ParquetTableBuffer] = {}
+
+    @staticmethod
+    def file_name(
+        directory: Union[str, Path],
+        relationType: BaseRelationType,
+        partIndex: Optional[int] = None,
+    ) -> str:
+        partSuffix = "" if partIndex is None else f"_part_{partIndex:04d}"
+        return f"{directory}/relations/{relationType}/{relationType}_relations{partSuffix}.parquet"
+
+    def _table(
+        self, relationType: BaseRelationType, fields: Sequence[str]
+    ) -> ParquetTableBuffer:
+        table = self.tables.get(relationType)
+        if table is None:
+            table = self.tables[relationType] = ParquetTableBuffer(
+                fileName=self.file_name(self.directory, relationType, self.partIndex),
+                schema=relation_schema(fields=fields, integerIds=self.integerIds),
+                rowGroupSize=self.rowGroupSize,
+                compression=self.compression,
+            )
+        return table
+
+    def add(
+        self,
+        startNodeId: Union[BaseNodeId, str],
+        endNodeId: Union[BaseNodeId, str],
+        relationType: BaseRelationType,
+        relationProperties: Optional[Dict[RelationField, Any]] = None,
+    ) -> None:
+        self.add_many(
+            startNodeIds=[startNodeId],
+            endNodeIds=[endNodeId],
+            relationTypes=[relationType],
+            relationProperties=(
+                None
+                if relationProperties is None
+                else {key: [value] for key, value in relationProperties.items()}
+            ),
+        )
+
+    def add_many(
+        self,
+        startNodeIds: Sequence[Union[BaseNodeId, str]],
+        endNodeIds: Sequence[Union[BaseNodeId, str]],
+        relationTypes: Sequence[BaseRelationType],
+        relationProperties: Optional[Dict[RelationField, Sequence[Any]]] = None,
+    ) -> None:
+        convertNodeId: Callable[[Any], Any] = int if self.integerIds else str
+        startNodeIdValues = np.array(
+            [convertNodeId(str(nodeId)) for nodeId in startNodeIds], dtype=object
+        )
+        endNodeIdValues = np.array(
+            [convertNodeId(str(nodeId)) for nodeId in endNodeIds], dtype=object
+        )
+        relationTypes = np.asarray(relationTypes, dtype=object)
+        propertyColumns = {}
+        for field, values in (relationProperties or {}).items():
+            column = np.empty(len(relationTypes), dtype=object)
+            column[:] = list(values)
+            if _field_type(field) == NodeFieldType.DATE:
+                column[:] = [_date_value(value) for value in column]
+            propertyColumns[field] = column
+        for relationType in dict.fromkeys(relationTypes):
+            mask = relationTypes == relationType
+            # types without fields are written without the properties
+            fields: List[str] = []
+            if propertyColumns:
+                fields = RelationField.fields(relationType)
+                unknownFields = set(propertyColumns).difference(fields)
+                if fields and unknownFields:
+                    raise ValueError(
+                        f"{relationType} relations have no fields {', '.join(map(repr, unknownFields))}"
+                    )
+            columns = {
+                START_NODE_ID_COLUMN: startNodeIdValues[mask],
+                END_NODE_ID_COLUMN: endNodeIdValues[mask],
+                TYPE_COLUMN: relationTypes[mask],
+            }
+            for field in fields:
+                columns[field] = (
+                    propertyColumns[field][mask]
+                    if field in propertyColumns
+                    else [None] * int(mask.sum())
+                )
+            self._table(relationType=relationType, fields=fields).append(
+                columns=columns
+            )
+
+    def close(self) -> None:
+        for table in self.tables.values():
+            table.close()
@@ -0,0 +1,64 @@
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+DEFAULT_ROW_GROUP_SIZE = 100000
+DEFAULT_COMPRESSION = "snappy"
+
+
+def dictionary_field(name: str) -> pa.Field:
+    # for low-cardinality string columns such as labels and relation types
+    return pa.field(name, pa.dictionary(pa.int32(), pa.string()))
+
+
+class ParquetTableBuffer:
+    # Collects the column values of one Parquet file and writes them a row group at a time.
+    # The file is only created once it has rows, so kinds or types that never occur leave no empty files.
+    def __init__(
+        self,
+        fileName: Union[str, Path],
+        schema: pa.Schema,
+        rowGroupSize: int = DEFAULT_ROW_GROUP_SIZE,
+        compression: str = DEFAULT_COMPRESSION,
+    ):
+        self.fileName = fileName
+        self.schema = schema
+        self.rowGroupSize = rowGroupSize
+        self.compression = compression
+        self._columns: Dict[str, List[Any]] = {name: [] for name in schema.names}
+        self._writer: Optional[pq.ParquetWriter] = None
+
+    def append(self, columns: Dict[str, Iterable[Any]]) -> None:
+        for name, values in columns.items():
+            self._columns[name].extend(values)
+        if len(self._columns[self.schema.names[0]]) >= self.rowGroupSize:
+            self.flush()
+
+    def _array(self, field: pa.Field, values: List[Any]) -> pa.Array:
+        if pa.types.is_dictionary(field.type):
+            return pa.array(
+                values, type=field.type.value_type, from_pandas=True
+            ).dictionary_encode()
+        return pa.array(values, type=field.type, from_pandas=True)
+
+    def flush(self) -> None:
+        if not self._columns[self.schema.names[0]]:
+            return
+        table = pa.Table.from_arrays(
+            [self._array(field, self._columns[field.name]) for field in self.schema],
+            schema=self.schema,
+        )
+        if self._writer is None:
+            Path(self.fileName).parent.mkdir(parents=True, exist_ok=True)
+            self._writer = pq.ParquetWriter(
+                self.fileName, schema=self.schema, compression=self.compression
+            )
+        self._writer.write_table(table, row_group_size=self.rowGroupSize)
+        self._columns = {name: [] for name in self.schema.names}
+
+    def close(self) -> None:
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
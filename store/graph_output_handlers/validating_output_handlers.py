@@ -0,0 +1,109 @@
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from datamodel.node_field import NodeField
+from datamodel.node_ids import BaseNodeId
+from datamodel.node_labels import NodeLabel
+from datamodel.relations import BaseRelationType, RelationField
+from store.graph_integrity import GraphIntegrityValidator
+from store.graph_output_handlers.output_handler_base import NodeOutputHandlerBase
+from store.graph_output_handlers.output_handler_base import RelationOutputHandlerBase
+
+
+class ValidatingNodes(NodeOutputHandlerBase):
+    # passes everything on to the wrapped handler, registering the node IDs with the validator
+    def __init__(
+        self,
+        nodeOutputHandler: NodeOutputHandlerBase,
+        validator: GraphIntegrityValidator,
+    ):
+        self.nodeOutputHandler = nodeOutputHandler
+        self.validator = validator
+
+    def add(
+        self,
+        nodeId: Union[BaseNodeId, str],
+        nodeLabels: List[NodeLabel],
+        nodeProperties: Dict[NodeField, Any],
+    ) -> None:
+        self.nodeOutputHandler.add(
+            nodeId=nodeId, nodeLabels=nodeLabels, nodeProperties=nodeProperties
+        )
+        self.validator.add_nodes(nodeIds=[nodeId])
+
+    def add_many(
+        self,
+        nodeIds: Sequence[Union[BaseNodeId, str]],
+        nodeLabels: Sequence[List[NodeLabel]],
+        nodeProperties: Dict[NodeField, Sequence[Any]],
+    ) -> None:
+        self.nodeOutputHandler.add_many(
+            nodeIds=nodeIds, nodeLabels=nodeLabels, nodeProperties=nodeProperties
+        )
+        self.validator.add_nodes(nodeIds=nodeIds)
+
+    def flush(self) -> None:
+        self.nodeOutputHandler.flush()
+
+    def output_file_stats(self) -> Dict[str, Dict[str, Any]]:
+        return self.nodeOutputHandler.output_file_stats()
+
+    def close(self) -> None:
+        self.nodeOutputHandler.close()
+
+
+class ValidatingRelations(RelationOutputHandlerBase):
+    # passes everything on to the wrapped handler, checking the endpoints with the validator
+    def __init__(
+        self,
+        relationOutputHandler: RelationOutputHandlerBase,
+        validator: GraphIntegrityValidator,
+    ):
+        self.relationOutputHandler = relationOutputHandler
+        self.validator = validator
+
+    def add(
+        self,
+        startNodeId: Union[BaseNodeId, str],
+        endNodeId: Union[BaseNodeId, str],
+        relationType: BaseRelationType,
+        relationProperties: Optional[Dict[RelationField, Any]] = None,
+    ) -> None:
+        self.relationOutputHandler.add(
+            startNodeId=startNodeId,
+            endNodeId=endNodeId,
+            relationType=relationType,
+            relationProperties=relationProperties,
+        )
+        self.validator.add_relations(
+            startNodeIds=[startNodeId],
+            endNodeIds=[endNodeId],
+            relationTypes=[relationType],
+        )
+
+    def add_many(
+        self,
+        startNodeIds: Sequence[Union[BaseNodeId, str]],
+        endNodeIds: Sequence[Union[BaseNodeId, str]],
+        relationTypes: Sequence[BaseRelationType],
+        relationProperties: Optional[Dict[RelationField, Sequence[Any]]] = None,
+    ) -> None:
+        self.relationOutputHandler.add_many(
+            startNodeIds=startNodeIds,
+            endNodeIds=endNodeIds,
+            relationTypes=relationTypes,
+            relationProperties=relationProperties,
+        )
+        self.validator.add_relations(
+            startNodeIds=startNodeIds,
+            endNodeIds=endNodeIds,
+            relationTypes=relationTypes,
+        )
+
+    def flush(self) -> None:
+        self.relationOutputHandler.flush()
+
+    def output_file_stats(self) -> Dict[str, Dict[str, Any]]:
+        return self.relationOutputHandler.output_file_stats()
+
+    def close(self) -> None:
+        self.relationOutputHandler.close()
@@ -0,0 +1,85 @@
+import json
+import os
+from pathlib import Path
+from typing import Dict, Hashable, Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+
+class IdDimension:
+
+    COUNTRY = "country"
+    LEAGUE = "league"
+    PLAYER = "player"
+    SEASON = "season"
+    TEAM = "team"
+    ALL = [COUNTRY, LEAGUE, PLAYER, SEASON, TEAM]
+
+
+class IdRegistry:
+    # IDs are positions in a per-dimension list of names, so existing names keep their ID across runs and
+    # new names are appended in sorted order, which makes the assignment independent of hash randomization
+    def __init__(self, directory: Optional[Union[str, Path]] = None):
+        self.directory = directory
+        self.names: Dict[str, List[Hashable]] = {}
+        self.nameToId: Dict[str, Dict[Hashable, int]] = {}
+        self._indexes: Dict[str, pd.Index] = {}
+        for dimension in IdDimension.ALL:
+            names = self._load(dimension=dimension)
+            self.names[dimension] = names
+            self.nameToId[dimension] = {name: i for i, name in enumerate(names)}
+
+    def _file_name(self, dimension: str) -> str:
+        return f"{self.directory}/{dimension}_ids.json"
+
+    def _load(self, dimension: str) -> List[Hashable]:
+        if self.directory is None or not os.path.exists(self._file_name(dimension)):
+            return []
+        with open(self._file_name(dimension)) as file:
+            return json.load(file)
+
+    def register(self, dimension: str, names: Iterable[Hashable]) -> Dict[Hashable, int]:
+        nameToId = self.nameToId[dimension]
+        newNames = {
+            name for name in names if name not in nameToId and not pd.isnull(name)
+        }
+        for name in sorted(newNames, key=str):
+            nameToId[name] = len(self.names[dimension])
+            self.names[dimension].append(name)
+        if newNames:
+            self._indexes.pop(dimension, None)
+        return nameToId
+
+    def id_map(self, dimension: str, names: Iterable[Hashable]) -> Dict[Hashable, int]:
+        # registers the names and returns the map restricted to them
+        names = list(names)
+        nameToId = self.register(dimension=dimension, names=names)
+        return {name: nameToId[name] for name in names if not pd.isnull(name)}
+
+    def lookup(self, dimension: str, values: pd.Series) -> np.ndarray:
+        # vectorized hash lookup for whole columns, unknown names resolve to -1
+        index = self._indexes.get(dimension)
+        if index is None:
+            index = self._indexes[dimension] = pd.Index(self.names[dimension])
+        return index.get_indexer(values)
+
+    def save(self) -> None:
+        if self.directory is None:
+            return
+        Path(self.directory).mkdir(parents=True, exist_ok=True)
+        for dimension in IdDimension.ALL:
+            # written next to the target and renamed, so an interrupted run never leaves a truncated registry
+            temporaryFileName = f"{self._file_name(dimension)}.tmp"
+            with open(temporaryFileName, "w") as file:
+                json.dump(self.names[dimension], file, default=_to_json)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temporaryFileName, self._file_name(dimension))
+
+
+def _to_json(value):
+    # numpy scalars from dataframe columns
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Can't store {value!r} in the ID registry")
@@ -0,0 +1,201 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Union
+
+# the code a stage's output depends on, relative to the package directory
+PACKAGE_DIRECTORY = Path(__file__).resolve().parent.parent
+SOURCE_FILE_PATTERNS = [
+    "datamodel/**/*.py",
+    "internal/*.py",
+    "store/**/*.py",
+    "utils/*.py",
+    "scripts/process_files_for_neo4j_import.py",
+]
+HASH_BLOCK_SIZE = 1 << 20
+# entries beyond the most recently used ones, or unused for longer, are removed at the end of a run
+DEFAULT_MAX_ENTRIES = 200
+DEFAULT_MAX_AGE_DAYS = 30
+
+
+def file_content_hash(filepath: Union[str, Path]) -> str:
+    # streamed, so input files of any size are hashed in constant memory
+    contentHash = hashlib.sha256()
+    with open(filepath, "rb") as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b""):
+            contentHash.update(block)
+    return contentHash.hexdigest()
+
+
+def source_code_hash(patterns: Iterable[str] = SOURCE_FILE_PATTERNS) -> str:
+    # any change to the code that writes the stages invalidates every cached stage
+    sourceFiles = sorted(
+        {path for pattern in patterns for path in PACKAGE_DIRECTORY.glob(pattern)}
+    )
+    codeHash = hashlib.sha256()
+    for path in sourceFiles:
+        codeHash.update(str(path.relative_to(PACKAGE_DIRECTORY)).encode())
+        codeHash.update(file_content_hash(filepath=path).encode())
+    return codeHash.hexdigest()
+
+
+def _json_hash(value: Any) -> str:
+    return hashlib.sha256(
+        json.dumps(value, default=str, sort_keys=True).encode()
+    ).hexdigest()
+
+
+class StageCache:
+    # Finished checkpoint stages keyed on the content hashes of their input files, the code and the options that
+    # shape their output. A stage whose key is in the cache is copied into the staging directory instead of being
+    # rebuilt, and committed like a fresh one, so the export is assembled from cached and fresh files. Entries are
+    # written to a temporary directory and renamed, so an interrupted run never leaves a partial entry. Using an
+    # entry touches it, and prune removes the least recently used entries beyond maxEntries or maxAgeDays.
+    # idRegistryNames are the names each ID registry dimension held before the run, a stage is only keyed on the
+    # dimensions it reads
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        options: Dict[str, Any],
+        idRegistryNames: Optional[Dict[str, List[Any]]] = None,
+        maxEntries: int = DEFAULT_MAX_ENTRIES,
+        maxAgeDays: float = DEFAULT_MAX_AGE_DAYS,
+    ):
+        self.directory = directory
+        self.codeHash = source_code_hash()
+        # the options and the registry names are serialized and hashed once per run, not per key
+        self.optionsHash = _json_hash(value=options)
+        self.idNamesHashes = {
+            dimension: _json_hash(value=names)
+            for dimension, names in (idRegistryNames or {}).items()
+        }
+        self.maxEntries = maxEntries
+        self.maxAgeDays = maxAgeDays
+        self.fileHashes: Dict[str, str] = {}
+        self.usedEntries: Set[str] = set()
+        self.hits: List[str] = []
+        self.misses: List[str] = []
+        self.pruned: List[str] = []
+        Path(directory).mkdir(parents=True, exist_ok=True)
+
+    def _file_hash(self, filepath: Union[str, Path]) -> str:
+        # every stage of a run reads the same input files, they are only hashed once
+        filepath = str(filepath)
+        if filepath not in self.fileHashes:
+            self.fileHashes[filepath] = file_content_hash(filepath=filepath)
+        return self.fileHashes[filepath]
+
+    def key(
+        self,
+        stage: str,
+        inputFiles: Iterable[Union[str, Path]],
+        chunkIndex: Optional[int] = None,
+        idDimensions: Iterable[str] = (),
+    ) -> str:
+        # the chunk index is part of the file names of a stage
+        return _json_hash(
+            value={
+                "stage": stage,
+                "inputFiles": [self._file_hash(filepath) for filepath in inputFiles],
+                "chunkIndex": chunkIndex,
+                "code": self.codeHash,
+                "options": self.optionsHash,
+                "idNames": {
+                    dimension: self.idNamesHashes.get(dimension)
+                    for dimension in idDimensions
+                },
+            }
+        )
+
+    def _entry_directory(self, stage: str, key: str) -> str:
+        return f"{self.directory}/{stage}_{key[:32]}"
+
+    def restore(
+        self,
+        stage: str,
+        inputFiles: Iterable[Union[str, Path]],
+        stagingDirectory: Union[str, Path],
+        chunkIndex: Optional[int] = None,
+        idDimensions: Iterable[str] = (),
+    ) -> bool:
+        entryDirectory = self._entry_directory(
+            stage=stage,
+            key=self.key(
+                stage=stage,
+                inputFiles=inputFiles,
+                chunkIndex=chunkIndex,
+                idDimensions=idDimensions,
+            ),
+        )
+        if not os.path.isdir(entryDirectory):
+            self.misses.append(stage)
+            return False
+        for path in sorted(Path(entryDirectory).iterdir()):
+            shutil.copyfile(path, f"{stagingDirectory}/{path.name}")
+        self._use(entryDirectory=entryDirectory)
+        self.hits.append(stage)
+        return True
+
+    def store(
+        self,
+        stage: str,
+        inputFiles: Iterable[Union[str, Path]],
+        stagingDirectory: Union[str, Path],
+        chunkIndex: Optional[int] = None,
+        idDimensions: Iterable[str] = (),
+    ) -> None:
+        # called with the finished stage still in the staging directory, before it is committed
+        entryDirectory = self._entry_directory(
+            stage=stage,
+            key=self.key(
+                stage=stage,
+                inputFiles=inputFiles,
+                chunkIndex=chunkIndex,
+                idDimensions=idDimensions,
+            ),
+        )
+        if not os.path.isdir(entryDirectory):
+            temporaryDirectory = f"{entryDirectory}.tmp"
+            shutil.rmtree(temporaryDirectory, ignore_errors=True)
+            Path(temporaryDirectory).mkdir()
+            for path in sorted(Path(stagingDirectory).iterdir()):
+                shutil.copyfile(path, f"{temporaryDirectory}/{path.name}")
+            os.replace(temporaryDirectory, entryDirectory)
+        self._use(entryDirectory=entryDirectory)
+
+    def _use(self, entryDirectory: str) -> None:
+        os.utime(entryDirectory)
+        self.usedEntries.add(Path(entryDirectory).name)
+
+    def prune(self) -> None:
+        # entries of this run are always kept, temporary directories of interrupted runs go once they are too old
+        entries = sorted(
+            (path for path in Path(self.directory).iterdir() if path.is_dir()),
+            key=lambda path: path.stat().st_mtime,
+            reverse=True,
+        )
+        oldestUse = time.time() - self.maxAgeDays * 24 * 60 * 60
+        keptEntries = 0
+        for path in entries:
+            if path.name in self.usedEntries:
+                keptEntries += 1
+                continue
+            temporary = path.name.endswith(".tmp")
+            if path.stat().st_mtime >= oldestUse and (
+                temporary or keptEntries < self.maxEntries
+            ):
+                keptEntries += not temporary
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            self.pruned.append(path.name)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "directory": str(self.directory),
+            "hits": self.hits,
+            "misses": self.misses,
+            "pruned": self.pruned,
+        }
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# the package modules are imported the way the scripts import them, e.g. "from store.stage_cache import ..."
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
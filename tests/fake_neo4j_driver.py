@@ -0,0 +1,104 @@
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+
+class FakeTransientError(Exception):
+    pass
+
+
+class FakeGraph:
+    # What the UNWIND queries of BoltNodes and BoltRelations would have committed: node IDs, relations and the
+    # relation rows whose nodes weren't committed when their transaction ran. failures is the number of
+    # transactions that raise failureType before writing anything
+    def __init__(
+        self,
+        failures: int = 0,
+        failureType: type = FakeTransientError,
+        writeSeconds: float = 0.0,
+    ):
+        self.failures = failures
+        self.failureType = failureType
+        self.writeSeconds = writeSeconds
+        self.nodeIds: Set[str] = set()
+        self.relations: Set[Tuple[str, str, str]] = set()
+        self.missingEndpoints = 0
+        self.transactions: List[str] = []
+        self.autoCommitQueries: List[str] = []
+        self.running: Dict[str, int] = {}
+        self.maxRunning: Dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    def write(self, query: str, rows: List[Dict[str, Any]]) -> None:
+        with self.lock:
+            self.transactions.append(query)
+            if self.failures:
+                self.failures -= 1
+                raise self.failureType("fake failure")
+            self.running[query] = self.running.get(query, 0) + 1
+            self.maxRunning[query] = max(
+                self.maxRunning.get(query, 0), self.running[query]
+            )
+        # long enough for concurrent batches to overlap
+        time.sleep(self.writeSeconds)
+        with self.lock:
+            self.running[query] -= 1
+            if "row.nodeId" in query:
+                self.nodeIds.update(row["nodeId"] for row in rows)
+                return
+            relationType = query.split("[")[1].split("`")[1]
+            for row in rows:
+                if (
+                    row["startNodeId"] in self.nodeIds
+                    and row["endNodeId"] in self.nodeIds
+                ):
+                    self.relations.add(
+                        (row["startNodeId"], row["endNodeId"], relationType)
+                    )
+                else:
+                    self.missingEndpoints += 1
+
+
+class FakeResult:
+    def consume(self) -> None:
+        pass
+
+
+class FakeTransaction:
+    def __init__(self, graph: FakeGraph):
+        self.graph = graph
+
+    def run(self, query: str, rows: List[Dict[str, Any]]) -> FakeResult:
+        self.graph.write(query=query, rows=rows)
+        return FakeResult()
+
+
+class FakeSession:
+    def __init__(self, graph: FakeGraph):
+        self.graph = graph
+
+    def __enter__(self) -> "FakeSession":
+        return self
+
+    def __exit__(self, *exceptionInfo: Any) -> None:
+        pass
+
+    def run(self, query: str) -> FakeResult:
+        self.graph.autoCommitQueries.append(query)
+        return FakeResult()
+
+    def write_transaction(self, work: Any, *args: Any) -> Any:
+        return work(FakeTransaction(graph=self.graph), *args)
+
+
+class FakeDriver:
+    # the part of the neo4j driver BoltBatchWriter uses, writing into a FakeGraph
+    def __init__(self, graph: Optional[FakeGraph] = None):
+        self.graph = graph or FakeGraph()
+        self.closed = False
+
+    def session(self, database: Optional[str] = None) -> FakeSession:
+        return FakeSession(graph=self.graph)
+
+    def close(self) -> None:
+        self.closed = True
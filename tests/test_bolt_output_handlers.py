@@ -0,0 +1,138 @@
+import pytest
+
+from datamodel.node_labels import NodeLabel
+from datamodel.relations import EventRelationType, GeneralRelationType
+from store.graph_output_handlers.neo4j_output_handlers.bolt_batch_writer import (
+    BoltBatchWriter,
+)
+from store.graph_output_handlers.neo4j_output_handlers.bolt_nodes import BoltNodes
+from store.graph_output_handlers.neo4j_output_handlers.bolt_relations import (
+    BoltRelations,
+    relation_lane,
+)
+from tests.fake_neo4j_driver import FakeDriver, FakeGraph, FakeTransientError
+
+
+def bolt_handlers(
+    driver: FakeDriver, batchSize: int = 10, maxDeferredBatches: int = 20
+):
+    nodes = BoltNodes(driver=driver, batchSize=batchSize, sessions=4)
+    relations = BoltRelations(
+        driver=driver, batchSize=batchSize, sessions=4, nodeOutputHandler=nodes
+    )
+    relations.writer.maxDeferredBatches = maxDeferredBatches
+    relations.writer.retryDelay = nodes.writer.retryDelay = 0
+    relations.writer.retryableErrors = nodes.writer.retryableErrors = (
+        FakeTransientError,
+    )
+    return nodes, relations
+
+
+def add_events(
+    nodes: BoltNodes, relations: BoltRelations, first: int, count: int
+) -> None:
+    eventIds = [f"MEV{i}" for i in range(first, first + count)]
+    nodes.add_many(
+        nodeIds=eventIds,
+        nodeLabels=[[NodeLabel.MATCH_EVENT]] * count,
+        nodeProperties={},
+    )
+    relations.add_many(
+        startNodeIds=eventIds,
+        endNodeIds=[f"TEAM{i % 3}" for i in range(first, first + count)],
+        relationTypes=[EventRelationType.EVENT_TEAM] * count,
+    )
+    relations.add_many(
+        startNodeIds=eventIds[1:],
+        endNodeIds=eventIds[:-1],
+        relationTypes=[GeneralRelationType.NEXT_EVENT] * (count - 1),
+    )
+
+
+def test_relations_are_written_after_their_nodes_are_committed():
+    driver = FakeDriver()
+    nodes, relations = bolt_handlers(driver=driver, maxDeferredBatches=3)
+    nodes.add_many(
+        nodeIds=["TEAM0", "TEAM1", "TEAM2"],
+        nodeLabels=[[NodeLabel.TEAM]] * 3,
+        nodeProperties={},
+    )
+    for first in range(0, 500, 100):
+        add_events(nodes=nodes, relations=relations, first=first, count=100)
+    nodes.close()
+    relations.close()
+    assert driver.graph.missingEndpoints == 0
+    assert len(driver.graph.nodeIds) == 503
+    assert len(driver.graph.relations) == 500 + 5 * 99
+    assert driver.closed is False
+
+
+def test_the_node_writer_is_flushed_once_per_stage(monkeypatch):
+    driver = FakeDriver()
+    nodes, relations = bolt_handlers(driver=driver)
+    nodeFlushes = []
+    flush = nodes.writer.flush
+    monkeypatch.setattr(nodes.writer, "flush", lambda: nodeFlushes.append(1) or flush())
+    nodes.add_many(
+        nodeIds=["TEAM0", "TEAM1", "TEAM2"],
+        nodeLabels=[[NodeLabel.TEAM]] * 3,
+        nodeProperties={},
+    )
+    # 10 relation batches, fewer than maxDeferredBatches, are all held back until the stage ends
+    add_events(nodes=nodes, relations=relations, first=0, count=50)
+    assert nodeFlushes == []
+    relations.flush()
+    assert nodeFlushes == [1]
+    assert driver.graph.missingEndpoints == 0
+    nodes.close()
+    relations.close()
+
+
+def test_contended_relation_types_are_written_one_batch_at_a_time():
+    assert relation_lane(EventRelationType.EVENT_TEAM) == NodeLabel.TEAM
+    assert relation_lane(GeneralRelationType.NEXT_EVENT) is None
+    driver = FakeDriver(graph=FakeGraph(writeSeconds=0.01))
+    nodes, relations = bolt_handlers(driver=driver)
+    nodes.add_many(
+        nodeIds=["TEAM0", "TEAM1", "TEAM2"],
+        nodeLabels=[[NodeLabel.TEAM]] * 3,
+        nodeProperties={},
+    )
+    add_events(nodes=nodes, relations=relations, first=0, count=200)
+    nodes.close()
+    relations.close()
+    maxRunning = {
+        query.split("[")[1].split("`")[1]: running
+        for query, running in driver.graph.maxRunning.items()
+        if "[" in query
+    }
+    assert maxRunning[EventRelationType.EVENT_TEAM] == 1
+    assert maxRunning[GeneralRelationType.NEXT_EVENT] > 1
+
+
+def test_transient_errors_are_retried():
+    driver = FakeDriver(graph=FakeGraph(failures=2))
+    writer = BoltBatchWriter(
+        driver=driver, batchSize=2, retryDelay=0, retryableErrors=(FakeTransientError,)
+    )
+    writer.add(
+        query="UNWIND $rows AS row MERGE (n {nodeId: row.nodeId})",
+        rows=[{"nodeId": "A"}],
+    )
+    writer.close()
+    assert driver.graph.nodeIds == {"A"}
+    assert len(driver.graph.transactions) == 3
+
+
+def test_other_errors_are_not_retried():
+    driver = FakeDriver(graph=FakeGraph(failures=1, failureType=ValueError))
+    writer = BoltBatchWriter(
+        driver=driver, batchSize=2, retryDelay=0, retryableErrors=(FakeTransientError,)
+    )
+    writer.add(
+        query="UNWIND $rows AS row MERGE (n {nodeId: row.nodeId})",
+        rows=[{"nodeId": "A"}],
+    )
+    with pytest.raises(ValueError):
+        writer.close()
+    assert len(driver.graph.transactions) == 1
@@ -0,0 +1,31 @@
+import json
+
+import pandas as pd
+
+from store.build_manifest import EVENT_IDS_FILE_PREFIX, BuildManifest
+
+
+def test_event_ids_are_saved_sorted_apart_from_the_match_level_keys(tmp_path):
+    buildManifest = BuildManifest(directory=tmp_path)
+    buildManifest.add_events(eventIds=pd.Series(["b2", "a1", None], dtype="category"))
+    buildManifest.add_events(eventIds=["c3", "a1"])
+    buildManifest.save()
+    with open(buildManifest.file_name) as file:
+        assert "eventIds" not in json.load(file)
+    assert BuildManifest(directory=tmp_path).eventIds.tolist() == ["a1", "b2", "c3"]
+    # the event IDs of a run that didn't commit its manifest are neither loaded nor kept
+    uncommittedManifest = BuildManifest(directory=tmp_path)
+    uncommittedManifest.add_events(eventIds=["d4"])
+    uncommittedManifest._save_event_ids()
+    reloadedManifest = BuildManifest(directory=tmp_path)
+    assert reloadedManifest.eventIds.tolist() == ["a1", "b2", "c3"]
+    reloadedManifest.add_events(eventIds=["e5"])
+    reloadedManifest.save()
+    assert len(list(tmp_path.glob(f"{EVENT_IDS_FILE_PREFIX}_*"))) == 1
+    assert BuildManifest(directory=tmp_path).eventIds.tolist() == [
+        "a1",
+        "b2",
+        "c3",
+        "e5",
+    ]
+    assert BuildManifest(directory=tmp_path, load=False).eventIds.tolist() == []
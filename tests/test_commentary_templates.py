@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+from internal.commentary_templates import (
+    CommentaryTemplates,
+    render_commentary,
+    split_commentaries,
+    split_commentary,
+)
+from utils.synthetic_data import write_synthetic_files
+
+
+def test_names_are_cut_out_whole_and_longest_first():
+    template, parameters = split_commentary(
+        text="Goal! Tom Smith Jr (Hull 100%) from Tom Smith. Hullcity wins.",
+        names=["Tom Smith", "Tom Smith Jr", "hull", np.nan, "a;b"],
+    )
+    assert template == "Goal! %s (%s 100%%) from %s. Hullcity wins."
+    assert parameters == ["Tom Smith Jr", "Hull", "Tom Smith"]
+    assert (
+        render_commentary(template=template, parameters=parameters)
+        == "Goal! Tom Smith Jr (Hull 100%) from Tom Smith. Hullcity wins."
+    )
+
+
+def test_every_event_is_split_once_and_looked_up_by_id(tmp_path):
+    _, matchEventsFilepath = write_synthetic_files(
+        outputDirectory=tmp_path, matchCount=10
+    )
+    events = pd.read_csv(matchEventsFilepath)
+    commentaryTemplates = CommentaryTemplates()
+    for firstRow in range(0, len(events), 300):
+        commentaryTemplates.add(eventData=events.iloc[firstRow : firstRow + 300])
+    commentaryTemplates.finish()
+    templateToIdMap = commentaryTemplates.templateToIdMap
+    assert list(templateToIdMap) == sorted(templateToIdMap)
+    assert len(templateToIdMap) < events["text"].nunique()
+    # looked up in a different order, with events that weren't collected, one of them without text
+    lookedUp = events.sample(frac=1, random_state=0).reset_index(drop=True)
+    lookedUp.loc[0, ["id_event", "text"]] = ["without text", None]
+    lookedUp.loc[1, "id_event"] = "not collected"
+    templateIds, parameters = commentaryTemplates.event_splits(eventData=lookedUp)
+    templates, expectedParameters = split_commentaries(eventData=lookedUp)
+    idToTemplate = {i: template for template, i in templateToIdMap.items()}
+    assert templateIds[0] == -1 and parameters[0] is None
+    assert [idToTemplate.get(i) for i in templateIds] == list(templates)
+    assert list(parameters) == list(expectedParameters)
+    for text, i, eventParameters in zip(
+        lookedUp["text"][1:], templateIds[1:], parameters[1:]
+    ):
+        assert (
+            render_commentary(template=idToTemplate[i], parameters=eventParameters)
+            == text
+        )
@@ -0,0 +1,487 @@
+import csv
+import gzip
+import json
+import shutil
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List, Set
+
+import pandas as pd
+import pytest
+
+import internal.checkpointed_events
+from datamodel.node_field import NodeField
+from datamodel.node_ids import MatchId
+from datamodel.node_labels import NodeLabel
+from internal.database_builders import CSR_GRAPH_DIRECTORY
+from internal.export_options import ExportOptions
+from internal.football_graph_export import (
+    RUN_REPORT_FILE_NAME,
+    export_football_graph,
+)
+from store.csr_graph import CsrDirection, CsrGraph
+from store.export_checkpoint import CHECKPOINT_FILE_PREFIX
+from store.graph_output_handlers.neo4j_output_handlers.nodes_file import NodesFile
+from store.graph_integrity import validate_graph_files
+from utils.synthetic_data import write_synthetic_files
+
+
+@pytest.fixture(scope="module")
+def inputFiles(tmp_path_factory):
+    return write_synthetic_files(
+        outputDirectory=tmp_path_factory.mktemp("input"), matchCount=30
+    )
+
+
+def export(inputFiles, outputDirectory: Path, **options) -> Path:
+    matchMetadataFilepath, matchEventsFilepath = inputFiles
+    export_football_graph(
+        matchMetadataFilepath=matchMetadataFilepath,
+        matchEventsFilepath=matchEventsFilepath,
+        outputDirectory=outputDirectory,
+        exportOptions=ExportOptions(**options),
+    )
+    return outputDirectory
+
+
+def output_rows(outputDirectory: Path) -> Dict[str, List[str]]:
+    # the lines of every node and relation file, by file name
+    outputRows = {}
+    for path in sorted(outputDirectory.glob("football_event_graph_*.csv.gz")):
+        with gzip.open(path, "rt") as file:
+            outputRows[path.name] = file.read().splitlines()
+    return outputRows
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {},
+        {"chunkSize": 500, "nextEventRelations": True},
+        {
+            "typedNodeFiles": True,
+            "integerIds": True,
+            "eventRelationProperties": True,
+            "internCommentary": True,
+        },
+    ],
+)
+def test_row_and_columnar_builders_write_the_same_files(inputFiles, tmp_path, options):
+    rowOutput = output_rows(export(inputFiles, tmp_path / "rows", **options))
+    columnarOutput = output_rows(
+        export(inputFiles, tmp_path / "columnar", columnar=True, **options)
+    )
+    assert rowOutput.keys() == columnarOutput.keys()
+    assert rowOutput == columnarOutput
+
+
+def test_a_resumed_checkpointed_run_writes_the_same_files(
+    inputFiles, tmp_path, monkeypatch
+):
+    options = {"checkpointed": True, "chunkSize": 400, "nextEventRelations": True}
+    uninterrupted = output_rows(
+        export(inputFiles, tmp_path / "uninterrupted", **options)
+    )
+    # the third chunk of match events dies halfway through writing its files
+    addFootballEvents = internal.checkpointed_events.add_football_events
+    calls = []
+
+    def failing_add_football_events(**kwargs):
+        calls.append(1)
+        if len(calls) == 3:
+            kwargs["databaseBuilder"].flush()
+            raise RuntimeError("killed")
+        return addFootballEvents(**kwargs)
+
+    monkeypatch.setattr(
+        internal.checkpointed_events, "add_football_events", failing_add_football_events
+    )
+    with pytest.raises(RuntimeError):
+        export(inputFiles, tmp_path / "resumed", **options)
+    monkeypatch.undo()
+    with open(tmp_path / "resumed" / f"{CHECKPOINT_FILE_PREFIX}.json") as file:
+        assert len(json.load(file)["chunks"]) == 2
+    resumed = output_rows(
+        export(inputFiles, tmp_path / "resumed", resume=True, **options)
+    )
+    assert resumed == uninterrupted
+
+
+def test_a_failed_worker_stops_the_streamed_parallel_run(
+    inputFiles, tmp_path, monkeypatch
+):
+    options = {
+        "checkpointed": True,
+        "chunkSize": 300,
+        "nextEventRelations": True,
+        "workers": 2,
+    }
+    uninterrupted = output_rows(
+        export(inputFiles, tmp_path / "uninterrupted", **options)
+    )
+    # the forked workers inherit the patch, each dies on its third chunk while the parent is still streaming
+    addFootballEvents = internal.checkpointed_events.add_football_events
+    calls = []
+
+    def failing_add_football_events(**kwargs):
+        calls.append(1)
+        if len(calls) == 3:
+            raise RuntimeError("killed")
+        return addFootballEvents(**kwargs)
+
+    monkeypatch.setattr(
+        internal.checkpointed_events, "add_football_events", failing_add_football_events
+    )
+    with pytest.raises(RuntimeError, match="killed"):
+        export(inputFiles, tmp_path / "resumed", **options)
+    monkeypatch.undo()
+    resumed = output_rows(
+        export(inputFiles, tmp_path / "resumed", resume=True, **options)
+    )
+    assert resumed == uninterrupted
+
+
+def test_an_incremental_run_adds_to_a_full_run_with_a_registry(inputFiles, tmp_path):
+    matchMetadataFilepath, matchEventsFilepath = inputFiles
+    matchMetadata = pd.read_csv(matchMetadataFilepath)
+    matchEvents = pd.read_csv(matchEventsFilepath)
+    firstMatches = matchMetadata.iloc[:12]
+    firstInputFiles = (tmp_path / "ginf_first.csv", tmp_path / "events_first.csv")
+    firstMatches.to_csv(firstInputFiles[0], index=False)
+    matchEvents[matchEvents["id_odsp"].isin(firstMatches["id_odsp"])].to_csv(
+        firstInputFiles[1], index=False
+    )
+    idRegistryDirectory = tmp_path / "registry"
+    # the first run is a full build, only writing the registry and its manifest
+    export(
+        firstInputFiles,
+        tmp_path / "first",
+        idRegistryDirectory=idRegistryDirectory,
+        nextEventRelations=True,
+    )
+    export(
+        inputFiles,
+        tmp_path / "delta",
+        idRegistryDirectory=idRegistryDirectory,
+        incremental=True,
+        nextEventRelations=True,
+    )
+    fullReport = validate_graph_files(
+        processedFileDirectory=export(
+            inputFiles, tmp_path / "full", nextEventRelations=True
+        )
+    )
+    # the first run and the delta together are a valid graph of the same size as a full build
+    combinedDirectory = tmp_path / "combined"
+    combinedDirectory.mkdir()
+    for run in ("first", "delta"):
+        for path in (tmp_path / run).glob("football_event_graph_*.csv.gz"):
+            shutil.copy(
+                path,
+                combinedDirectory
+                / path.name.replace(
+                    "football_event_graph_", f"football_event_graph_{run}_"
+                ),
+            )
+    combinedReport = validate_graph_files(processedFileDirectory=combinedDirectory)
+    assert combinedReport["valid"]
+    assert combinedReport["nodes"] == fullReport["nodes"]
+    assert combinedReport["relationTypes"] == fullReport["relationTypes"]
+
+
+def test_new_players_keep_the_cached_metadata_stage(inputFiles, tmp_path):
+    matchMetadataFilepath, matchEventsFilepath = inputFiles
+    matchEvents = pd.read_csv(matchEventsFilepath)
+    renamed = matchEvents["player"] == matchEvents["player"].dropna().iloc[0]
+    options = {
+        "idRegistryDirectory": tmp_path / "registry",
+        "stageCacheDirectory": tmp_path / "cache",
+    }
+    stageCacheReports = []
+    # each run only changes events.csv, the second registers a new player
+    for run, eventsChange in enumerate(
+        [{}, {"player": "new player"}, {"time": 1}], start=1
+    ):
+        runEvents = matchEvents.copy()
+        for column, value in eventsChange.items():
+            runEvents.loc[renamed, column] = value
+        runEventsFilepath = tmp_path / f"events_{run}.csv"
+        runEvents.to_csv(runEventsFilepath, index=False)
+        outputDirectory = export(
+            (matchMetadataFilepath, runEventsFilepath),
+            tmp_path / f"run{run}",
+            **options,
+        )
+        with open(outputDirectory / RUN_REPORT_FILE_NAME) as file:
+            stageCacheReports.append(json.load(file)["stageCache"])
+    # the first run fills the registry, so the second has other team names before it than the first
+    assert "metadata_nodes" in stageCacheReports[1]["misses"]
+    # the player registered by the second run doesn't change the IDs of the metadata stage
+    assert stageCacheReports[2]["hits"] == ["metadata_nodes"]
+    assert stageCacheReports[2]["misses"] == ["player_nodes"]
+
+
+def test_pipelined_compression_writes_the_same_files(inputFiles, tmp_path):
+    output = output_rows(export(inputFiles, tmp_path / "default", columnar=True))
+    pipelinedOutput = output_rows(
+        export(
+            inputFiles,
+            tmp_path / "pipelined",
+            columnar=True,
+            pipelinedCompression=True,
+            compressionThreads=2,
+        )
+    )
+    assert pipelinedOutput == output
+
+
+def registry_node_rows(outputDirectory: Path) -> Set[str]:
+    # the league, country, season, team and player nodes, whose IDs come from the registry
+    return {
+        row
+        for row in output_rows(outputDirectory)["football_event_graph_nodes.csv.gz"]
+        if row.split(",")[1].strip('"')
+        in ("LEAGUE", "COUNTRY", "SEASON", "ENTITY;TEAM", "ENTITY;PLAYER")
+    }
+
+
+def test_registry_ids_are_stable_across_runs(inputFiles, tmp_path):
+    matchMetadataFilepath, matchEventsFilepath = inputFiles
+    matchMetadata = pd.read_csv(matchMetadataFilepath)
+    matchEvents = pd.read_csv(matchEventsFilepath)
+    # the first run only sees the last matches, so the full run registers names that sort before its own
+    lastMatches = matchMetadata.iloc[-10:]
+    lastInputFiles = (tmp_path / "ginf_last.csv", tmp_path / "events_last.csv")
+    lastMatches.to_csv(lastInputFiles[0], index=False)
+    matchEvents[matchEvents["id_odsp"].isin(lastMatches["id_odsp"])].to_csv(
+        lastInputFiles[1], index=False
+    )
+    idRegistryDirectory = tmp_path / "registry"
+    lastRows = registry_node_rows(
+        export(
+            lastInputFiles, tmp_path / "last", idRegistryDirectory=idRegistryDirectory
+        )
+    )
+    fullRows = registry_node_rows(
+        export(inputFiles, tmp_path / "full", idRegistryDirectory=idRegistryDirectory)
+    )
+    repeatedRows = registry_node_rows(
+        export(
+            inputFiles, tmp_path / "repeated", idRegistryDirectory=idRegistryDirectory
+        )
+    )
+    assert lastRows < fullRows
+    assert repeatedRows == fullRows
+
+
+def test_parquet_tables_hold_the_nodes_and_relations_of_the_csv_files(
+    inputFiles, tmp_path
+):
+    pq = pytest.importorskip("pyarrow.parquet")
+    csvOutput = output_rows(export(inputFiles, tmp_path / "csv", columnar=True))
+    parquetDirectory = export(
+        inputFiles, tmp_path / "parquet", columnar=True, parquetOutput=True
+    )
+    nodeTables = {
+        path.parent.name: pq.read_table(path).to_pandas()
+        for path in parquetDirectory.glob("nodes/*/*.parquet")
+    }
+    relationTables = [
+        pq.read_table(path).to_pandas()
+        for path in parquetDirectory.glob("relations/*/*.parquet")
+    ]
+    csvNodeIds = [
+        row[0] for row in csv.reader(csvOutput["football_event_graph_nodes.csv.gz"])
+    ]
+    assert sorted(
+        nodeId for table in nodeTables.values() for nodeId in table["nodeId"]
+    ) == sorted(csvNodeIds)
+    csvRelations = Counter(
+        tuple(row[:3])
+        for row in csv.reader(csvOutput["football_event_graph_relations.csv.gz"])
+    )
+    assert (
+        Counter(
+            relation
+            for table in relationTables
+            for relation in zip(
+                table["startNodeId"], table["endNodeId"], table["type"].astype(str)
+            )
+        )
+        == csvRelations
+    )
+    # typed columns, with nulls instead of empty strings for missing odds
+    matches = nodeTables["match"]
+    assert matches["homeOdds"].dtype == "float64"
+    assert matches["over25GoalOdds"].isnull().any()
+
+
+def test_csr_neighbours_are_the_relations_of_the_csv_files(inputFiles, tmp_path):
+    csvOutput = output_rows(
+        export(inputFiles, tmp_path / "csv", columnar=True, nextEventRelations=True)
+    )
+    csrGraph = CsrGraph(
+        directory=export(
+            inputFiles,
+            tmp_path / "csr",
+            columnar=True,
+            nextEventRelations=True,
+            csrOutput=True,
+        )
+        / CSR_GRAPH_DIRECTORY
+    )
+    # the end nodes of each start node and relation type, in the order they were written
+    csvNeighbours = defaultdict(list)
+    csvReverseNeighbours = defaultdict(list)
+    for startNodeId, endNodeId, relationType, *_ in csv.reader(
+        csvOutput["football_event_graph_relations.csv.gz"]
+    ):
+        csvNeighbours[relationType, startNodeId].append(endNodeId)
+        csvReverseNeighbours[relationType, endNodeId].append(startNodeId)
+    assert sorted(csrGraph.relationTypes) == sorted(
+        {relationType for relationType, _ in csvNeighbours}
+    )
+    for neighbours, direction in (
+        (csvNeighbours, CsrDirection.OUT),
+        (csvReverseNeighbours, CsrDirection.IN),
+    ):
+        for (relationType, nodeId), nodeNeighbours in neighbours.items():
+            nodeIndex = csrGraph.node_index(nodeId)
+            assert nodeIndex >= 0
+            assert (
+                csrGraph.node_id(
+                    csrGraph.neighbors(
+                        nodeIndex=int(nodeIndex),
+                        relationType=relationType,
+                        direction=direction,
+                    )
+                ).tolist()
+                == nodeNeighbours
+            )
+        assert sum(
+            csrGraph.degrees(relationType=relationType, direction=direction).sum()
+            for relationType in csrGraph.relationTypes
+        ) == sum(len(nodeNeighbours) for nodeNeighbours in neighbours.values())
+
+
+def test_season_stats_of_the_csv_export_are_the_event_counts(inputFiles, tmp_path):
+    csvOutput = output_rows(export(inputFiles, tmp_path / "csv", seasonStats=True))
+    typedOutput = output_rows(
+        export(inputFiles, tmp_path / "typed", seasonStats=True, typedNodeFiles=True)
+    )
+    seasonStatsFileName = "football_event_graph_season_stats_nodes.csv.gz"
+    assert csvOutput[seasonStatsFileName] == typedOutput[seasonStatsFileName]
+    header = (tmp_path / "csv" / "season_stats_nodes_header.csv").read_text()
+    assert header == (tmp_path / "typed" / "season_stats_nodes_header.csv").read_text()
+    # goals and shots of every team and season, SEASON_STATS nodes of teams are named after the team and season
+    seasonStats = pd.read_csv(
+        tmp_path / "csv" / seasonStatsFileName, names=header.split(",")
+    )
+    teamStats = seasonStats[seasonStats["nodeId:ID"].str.startswith("SST")]
+    matchMetadataFilepath, matchEventsFilepath = inputFiles
+    events = pd.read_csv(matchEventsFilepath).merge(
+        pd.read_csv(matchMetadataFilepath)[["id_odsp", "season"]], on="id_odsp"
+    )
+    events["shot"] = events["event_type"] == 1
+    expected = events.groupby(["event_team", "season"])[["is_goal", "shot"]].sum()
+    expected = {
+        f"{team} {season}": (goals, shots)
+        for (team, season), goals, shots in expected.itertuples(name=None)
+        if goals or shots
+    }
+    actual = {
+        text: (goals, shots)
+        for text, goals, shots in teamStats[
+            ["text", "goals:int", "shots:int"]
+        ].itertuples(index=False, name=None)
+        if goals or shots
+    }
+    assert expected and actual == expected
+
+
+def test_played_for_relations_are_the_appearances_of_the_events(inputFiles, tmp_path):
+    # chunks of 500 events split matches, whose appearances still count once
+    outputDirectory = export(
+        inputFiles,
+        tmp_path,
+        playedForRelations=True,
+        checkpointed=True,
+        chunkSize=500,
+    )
+    nodeNames = {}
+    for path in outputDirectory.glob("football_event_graph_nodes*.csv.gz"):
+        with gzip.open(path, "rt") as file:
+            for row in csv.reader(file, escapechar="\\"):
+                nodeNames[row[0]] = row[-1]
+    header = (outputDirectory / "played_for_relations_header.csv").read_text()
+    playedFor = {}
+    for path in outputDirectory.glob("football_event_graph_played_for_*.csv.gz"):
+        relations = pd.read_csv(path, names=header.split(","), dtype=str)
+        for row in relations.itertuples(index=False, name=None):
+            player, team, _, season, firstAppearance, lastAppearance, count = row
+            playedFor[nodeNames[player], nodeNames[team], int(season)] = (
+                firstAppearance,
+                lastAppearance,
+                int(count),
+            )
+    matchMetadataFilepath, matchEventsFilepath = inputFiles
+    events = pd.read_csv(matchEventsFilepath)
+    appearances = (
+        pd.concat(
+            [
+                events[["id_odsp", "event_team", column]].rename(
+                    columns={column: "name"}
+                )
+                for column in ("player", "player_in")
+            ]
+        )
+        .dropna()
+        .merge(
+            pd.read_csv(matchMetadataFilepath)[["id_odsp", "season", "date"]],
+            on="id_odsp",
+        )
+    )
+    expected = appearances.groupby(["name", "event_team", "season"]).agg(
+        firstAppearance=("date", "min"),
+        lastAppearance=("date", "max"),
+        appearances=("id_odsp", "nunique"),
+    )
+    expected = {key: tuple(values) for key, *values in expected.itertuples(name=None)}
+    assert expected and playedFor == expected
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_match_nodes_are_written_like_the_row_builder_wrote_them(
+    inputFiles, tmp_path, columnar
+):
+    # the metadata rows as the row builder wrote them before the columns were vectorized, with NaN odds as nan
+    matchMetadataFilepath, _ = inputFiles
+    metadata = pd.read_csv(matchMetadataFilepath)
+    assert metadata["odd_over"].isnull().any()
+    metadata = metadata.where(metadata.notnull(), None)
+    rowNodesFile = NodesFile(fileName=tmp_path / "football_event_graph_nodes.csv.gz")
+    for _, metadataRow in metadata.iterrows():
+        rowNodesFile.add(
+            nodeId=MatchId(matchId=metadataRow["id_odsp"]),
+            nodeLabels=[NodeLabel.MATCH],
+            nodeProperties={
+                NodeField.FULLTIME_HOME_GOALS: metadataRow["fthg"],
+                NodeField.FULLTIME_AWAY_GOALS: metadataRow["ftag"],
+                NodeField.HOME_ODDS: metadataRow["odd_h"],
+                NodeField.AWAY_ODDS: metadataRow["odd_a"],
+                NodeField.DRAW_ODDS: metadataRow["odd_d"],
+                NodeField.OVER_25_GOAL_ODDS: metadataRow["odd_over"],
+                NodeField.UNDER_25_GOAL_ODDS: metadataRow["odd_under"],
+                NodeField.BOTH_TEAMS_TO_SCORE_ODDS: metadataRow["odd_bts"],
+                NodeField.NOT_BOTH_TEAMS_TO_SCORE_ODDS: metadataRow["odd_bts_n"],
+            },
+        )
+    rowNodesFile.close()
+    rowMatchRows = output_rows(tmp_path)["football_event_graph_nodes.csv.gz"]
+    assert any('"nan"' in row for row in rowMatchRows)
+    outputRows = output_rows(export(inputFiles, tmp_path / "export", columnar=columnar))
+    assert [
+        row
+        for row in outputRows["football_event_graph_nodes.csv.gz"]
+        if f'"{NodeLabel.MATCH}",' in row
+    ] == rowMatchRows
@@ -0,0 +1,68 @@
+import gzip
+
+from store.graph_integrity import GraphIntegrityValidator, validate_graph_files
+
+
+def write_gzip_lines(fileName, lines) -> None:
+    with gzip.open(fileName, "wt") as file:
+        file.write("".join(f"{line}\n" for line in lines))
+
+
+def test_duplicates_and_orphans_are_found_while_emitting():
+    validator = GraphIntegrityValidator()
+    validator.add_nodes(nodeIds=["TEAM0", "TEAM1"])
+    validator.add_relations(
+        startNodeIds=["MEV0", "MEV0"],
+        endNodeIds=["TEAM0", "PLAYER0"],
+        relationTypes=["EVENT_TEAM", "PLAYER_1"],
+    )
+    # relations to nodes emitted after them aren't orphans
+    validator.add_nodes(nodeIds=["MEV0", "TEAM1"])
+    report = validator.report()
+    assert report["valid"] is False
+    assert report["nodes"] == 4
+    assert report["relations"] == 2
+    assert report["relationTypes"] == {"EVENT_TEAM": 1, "PLAYER_1": 1}
+    assert report["duplicateNodes"] == {"count": 1, "samples": ["TEAM1"]}
+    assert report["orphanRelations"]["count"] == 1
+    assert list(report["orphanRelations"]["byType"]) == ["PLAYER_1"]
+
+
+def test_integer_ids_are_validated_as_integers():
+    validator = GraphIntegrityValidator(integerIds=True)
+    validator.add_nodes(nodeIds=["1", "2", "-3"])
+    validator.add_relations(
+        startNodeIds=["1", "-3"], endNodeIds=["2", "4"], relationTypes=["NEXT"] * 2
+    )
+    report = validator.report()
+    assert report["duplicateNodes"]["count"] == 0
+    assert report["orphanRelations"]["count"] == 1
+
+
+def test_the_files_of_a_run_are_validated(tmp_path):
+    write_gzip_lines(
+        tmp_path / "football_event_graph_nodes.csv.gz",
+        ["TEAM0,Arsenal,TEAM", "TEAM1,Chelsea,TEAM", 'MEV0,"a, b",MATCH_EVENT'],
+    )
+    write_gzip_lines(
+        tmp_path / "football_event_graph_relations.csv.gz",
+        ["MEV0,TEAM0,EVENT_TEAM", "TEAM0,TEAM1,NEXT"],
+    )
+    report = validate_graph_files(processedFileDirectory=tmp_path)
+    assert report["valid"] is True
+    assert report["nodes"] == 3
+    assert report["relationTypes"] == {"EVENT_TEAM": 1, "NEXT": 1}
+    # a part file of another process repeating a node and relating to one nobody wrote
+    write_gzip_lines(
+        tmp_path / "football_event_graph_nodes_part_0001.csv.gz",
+        ["TEAM1,Chelsea,TEAM", "MEV1,,MATCH_EVENT"],
+    )
+    write_gzip_lines(
+        tmp_path / "football_event_graph_relations_part_0001.csv.gz",
+        ["MEV1,TEAM2,EVENT_TEAM"],
+    )
+    report = validate_graph_files(processedFileDirectory=tmp_path)
+    assert report["valid"] is False
+    assert report["duplicateNodes"] == {"count": 1, "samples": ["TEAM1"]}
+    assert report["orphanRelations"]["count"] == 1
+    assert len(report["files"]) == 4
@@ -0,0 +1,115 @@
+import pandas as pd
+import pytest
+
+from datamodel.node_ids import MatchEventId, MatchId
+from datamodel.node_labels import NodeLabel
+from internal.database_builders import CSR_GRAPH_DIRECTORY
+from internal.export_options import ExportOptions
+from internal.football_graph_export import export_football_graph
+from internal.graph_queries import FootballGraphQueries
+from store.csr_graph import CsrGraph
+from store.id_registry import IdDimension, IdRegistry
+from utils.synthetic_data import write_synthetic_files
+
+
+@pytest.fixture(scope="module")
+def exportedGraph(tmp_path_factory):
+    # the synthetic input files, the queries over their CSR graph and the registry of its IDs
+    matchMetadataFilepath, matchEventsFilepath = write_synthetic_files(
+        outputDirectory=tmp_path_factory.mktemp("input"), matchCount=20
+    )
+    outputDirectory = tmp_path_factory.mktemp("output")
+    export_football_graph(
+        matchMetadataFilepath=matchMetadataFilepath,
+        matchEventsFilepath=matchEventsFilepath,
+        outputDirectory=outputDirectory,
+        exportOptions=ExportOptions(
+            columnar=True,
+            csrOutput=True,
+            nextEventRelations=True,
+            idRegistryDirectory=outputDirectory / "registry",
+        ),
+    )
+    return (
+        pd.read_csv(matchMetadataFilepath),
+        pd.read_csv(matchEventsFilepath),
+        FootballGraphQueries(
+            graph=CsrGraph(directory=outputDirectory / CSR_GRAPH_DIRECTORY)
+        ),
+        IdRegistry(directory=outputDirectory / "registry"),
+    )
+
+
+def event_node_ids(events: pd.DataFrame):
+    return [
+        MatchEventId(matchEventId=matchEventId).string_id()
+        for matchEventId in events["id_event"]
+    ]
+
+
+def test_match_events_follow_their_sort_order(exportedGraph):
+    _, matchEvents, queries, _ = exportedGraph
+    matchId = matchEvents["id_odsp"].iloc[0]
+    events = matchEvents[matchEvents["id_odsp"] == matchId].sort_values(
+        by="sort_order", kind="mergesort"
+    )
+    assert queries.match_events(matchId=matchId) == event_node_ids(events)
+    assert queries.events_after(
+        matchEventId=events["id_event"].iloc[0], count=3
+    ) == event_node_ids(events.iloc[1:4])
+    # the chain ends with the last event of the match
+    assert queries.events_after(
+        matchEventId=events["id_event"].iloc[-2], count=3
+    ) == event_node_ids(events.iloc[-1:])
+
+
+def test_a_team_match_chain_is_in_date_order(exportedGraph):
+    matchMetadata, _, queries, idRegistry = exportedGraph
+    team = matchMetadata["ht"].iloc[0]
+    teamMatches = matchMetadata[
+        (matchMetadata["ht"] == team) | (matchMetadata["at"] == team)
+    ].sort_values(by=["date", "id_odsp"], kind="mergesort")
+    assert queries.team_match_chain(
+        teamId=idRegistry.nameToId[IdDimension.TEAM][team]
+    ) == [MatchId(matchId=matchId).string_id() for matchId in teamMatches["id_odsp"]]
+
+
+def test_shots_are_filtered_by_placement_and_location(exportedGraph):
+    _, matchEvents, queries, _ = exportedGraph
+    shots = matchEvents[
+        (matchEvents["event_type"] == 1) | (matchEvents["event_type2"] == 1)
+    ]
+    assert sorted(queries.shots()) == sorted(event_node_ids(shots))
+    shotPlacementId, pitchLocationId = (
+        shots[["shot_place", "location"]].dropna().astype(int).iloc[0]
+    )
+    placedShots = shots[
+        (shots["shot_place"] == shotPlacementId)
+        & (shots["location"] == pitchLocationId)
+    ]
+    assert 0 < len(placedShots) < len(shots)
+    assert sorted(
+        queries.shots(
+            shotPlacementId=int(shotPlacementId), pitchLocationId=int(pitchLocationId)
+        )
+    ) == sorted(event_node_ids(placedShots))
+
+
+def test_player_events_can_be_filtered_by_label(exportedGraph):
+    _, matchEvents, queries, idRegistry = exportedGraph
+    # a player who committed a foul
+    player = matchEvents.loc[matchEvents["event_type"] == 3, "player"].dropna().iloc[0]
+    playerEvents = matchEvents[
+        matchEvents[["player", "player2", "player_in", "player_out"]]
+        .eq(player)
+        .any(axis=1)
+    ]
+    playerId = idRegistry.nameToId[IdDimension.PLAYER][player]
+    assert sorted(queries.player_events(playerId=playerId)) == sorted(
+        event_node_ids(playerEvents)
+    )
+    fouls = playerEvents[playerEvents["event_type"] == 3]
+    assert len(fouls) > 0
+    assert sorted(
+        queries.player_events(playerId=playerId, label=NodeLabel.FOUL)
+    ) == sorted(event_node_ids(fouls))
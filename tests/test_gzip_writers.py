@@ -0,0 +1,21 @@
+import gzip
+
+import pytest
+
+from utils.gzip_writers import PipelinedGzipWriter, gzip_file_stats
+
+
+@pytest.mark.parametrize("compressionThreads", [1, 3])
+def test_pipelined_writes_are_one_readable_gzip_file(tmp_path, compressionThreads):
+    lines = [f'"MEV{i}","MATCH_EVENT","Goal by player {i}."\n' for i in range(5000)]
+    fileName = tmp_path / "nodes.csv.gz"
+    # small blocks, so the lines are compressed as many blocks (and gzip members with threads)
+    writer = PipelinedGzipWriter(
+        fileName=fileName, compressionThreads=compressionThreads, blockSize=4096
+    )
+    for line in lines:
+        writer.write(line)
+    writer.close()
+    with gzip.open(fileName, "rt") as file:
+        assert file.read() == "".join(lines)
+    assert gzip_file_stats(writer)["uncompressedBytes"] == len("".join(lines))
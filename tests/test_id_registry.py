@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+
+from store.id_registry import IdDimension, IdRegistry
+
+
+def test_saved_ids_are_kept_and_new_names_appended_in_sorted_order(tmp_path):
+    idRegistry = IdRegistry(directory=tmp_path)
+    assert idRegistry.id_map(
+        dimension=IdDimension.TEAM, names=["Chelsea", "Arsenal", np.nan, "Chelsea"]
+    ) == {"Chelsea": 1, "Arsenal": 0}
+    idRegistry.save()
+    reloadedRegistry = IdRegistry(directory=tmp_path)
+    assert reloadedRegistry.id_map(
+        dimension=IdDimension.TEAM, names=["Watford", "Chelsea", "Burnley"]
+    ) == {"Watford": 3, "Chelsea": 1, "Burnley": 2}
+    assert reloadedRegistry.lookup(
+        dimension=IdDimension.TEAM, values=pd.Series(["Burnley", "Everton"])
+    ).tolist() == [2, -1]
+    # an unsaved registry leaves the saved IDs as they were
+    assert IdRegistry(directory=tmp_path).names[IdDimension.TEAM] == [
+        "Arsenal",
+        "Chelsea",
+    ]
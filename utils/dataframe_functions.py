@@ -1,6 +1,47 @@
+from typing import Dict, Hashable
+
+import numpy as np
 import pandas as pd
+from pandas.api.types import is_numeric_dtype
 
 
 def replace_nan_with_none_in_dataframe(dataframe: pd.DataFrame) -> pd.DataFrame:
-    dataframe = dataframe.where(dataframe.notnull(), None)
-    return dataframe.dropna(axis=0, how="all")
+    # Nulls of categorical and object columns become None, numeric columns keep NaN as they can't hold None.
+    # Only the columns with nulls are converted to objects, the others keep their dtypes
+    nullMask = dataframe.isnull().to_numpy()
+    keptRows = ~nullMask.all(axis=1)
+    nullMask = nullMask[keptRows]
+    noneColumns = {}
+    for i, column in enumerate(dataframe.columns):
+        values = dataframe.iloc[:, i]
+        if nullMask[:, i].any() and not is_numeric_dtype(values.dtype):
+            noneColumns[column] = values.to_numpy(dtype=object)[keptRows]
+            noneColumns[column][nullMask[:, i]] = None
+    if not keptRows.all():
+        dataframe = dataframe[keptRows]
+    return dataframe.assign(**noneColumns) if noneColumns else dataframe
+
+
+def shard_indices(values: pd.Series, shardCount: int) -> np.ndarray:
+    # hash_pandas_object uses a fixed key, so shard assignment is stable across processes and runs
+    hashes = pd.util.hash_pandas_object(values, index=False).to_numpy()
+    return (hashes % np.uint64(shardCount)).astype(int)
+
+
+def categorical_ids(values: pd.Series, nameToId: Dict[Hashable, int]) -> pd.Series:
+    # each category is looked up once and the IDs are taken by code, instead of replacing value by value.
+    # Nulls have code -1 and become NaN. Filtered categorical columns keep the categories of the removed rows,
+    # which the map may not have
+    categorical = values.astype("category").cat.remove_unused_categories()
+    categoryIds = np.array(
+        [nameToId[name] for name in categorical.cat.categories], dtype=np.int64
+    )
+    codes = categorical.cat.codes.to_numpy()
+    nullMask = codes < 0
+    ids = (
+        np.full(len(codes), np.nan)
+        if nullMask.any()
+        else np.empty(len(codes), dtype=np.int64)
+    )
+    ids[~nullMask] = categoryIds[codes[~nullMask]]
+    return pd.Series(ids, index=values.index, name=values.name)
@@ -0,0 +1,129 @@
+import multiprocessing
+import queue
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.dataframe_functions import shard_indices
+
+# chunks a shard's queue holds before the parent waits for its worker, which bounds the parent's memory
+DEFAULT_MAX_QUEUED_CHUNKS = 2
+# how often a blocked parent checks for failed workers and a waiting worker for an aborted parent
+POLL_SECONDS = 1.0
+END_OF_EVENTS = None
+
+# the queues of the parent's EventShards, set in every worker process by attach_worker_queues. Queues can only be
+# inherited by processes, not pickled with the tasks submitted to them
+_workerQueues: Optional[List[Any]] = None
+_workerAborted: Any = None
+
+
+def attach_worker_queues(queues: List[Any], aborted: Any) -> None:
+    # the initializer of the worker processes
+    global _workerQueues, _workerAborted
+    _workerQueues = queues
+    _workerAborted = aborted
+
+
+class EventShards:
+    # The match events of a parallel export, parsed once by the parent and streamed to the workers by match while
+    # parsing continues: every chunk is split into a shard per worker, which goes through that worker's bounded
+    # queue, so workers start on the first chunk instead of waiting for the whole file. Every chunk keeps the row
+    # count it had in the input file, which checkpointed workers commit their chunks with
+    def __init__(
+        self,
+        shardCount: int,
+        firstRow: int = 0,
+        maxQueuedChunks: int = DEFAULT_MAX_QUEUED_CHUNKS,
+    ):
+        self.shardCount = shardCount
+        self.firstRow = firstRow
+        self.queues: Optional[List[Any]] = [
+            multiprocessing.Queue(maxsize=maxQueuedChunks) for _ in range(shardCount)
+        ]
+        self.aborted: Any = multiprocessing.Event()
+
+    def __getstate__(self) -> dict:
+        # workers get the queues through attach_worker_queues
+        return {**self.__dict__, "queues": None, "aborted": None}
+
+    def worker_initializer_args(self) -> Tuple[List[Any], Any]:
+        return self.queues, self.aborted
+
+    def _put(
+        self, shardIndex: int, item: Any, workersStopped: Callable[[], bool]
+    ) -> None:
+        # a worker that failed stops reading its queue, the parent would wait for room forever
+        while True:
+            try:
+                self.queues[shardIndex].put(item, timeout=POLL_SECONDS)
+                return
+            except queue.Full:
+                if workersStopped():
+                    raise RuntimeError(
+                        "A worker stopped before all match events were streamed to it"
+                    )
+
+    def write(
+        self,
+        eventChunks: Iterable[pd.DataFrame],
+        existingEventIds: Optional[np.ndarray] = None,
+        workersStopped: Callable[[], bool] = lambda: False,
+    ) -> None:
+        # eventChunks start at the firstRow-th event. Events of earlier runs are dropped here, once for all workers
+        for eventChunk in eventChunks:
+            chunkRows = len(eventChunk)
+            if existingEventIds is not None and len(existingEventIds):
+                eventChunk = eventChunk[~eventChunk["id_event"].isin(existingEventIds)]
+            shards = shard_indices(
+                values=eventChunk["id_odsp"], shardCount=self.shardCount
+            )
+            for shardIndex in range(self.shardCount):
+                self._put(
+                    shardIndex=shardIndex,
+                    item=(eventChunk[shards == shardIndex], chunkRows),
+                    workersStopped=workersStopped,
+                )
+        for shardIndex in range(self.shardCount):
+            self._put(
+                shardIndex=shardIndex,
+                item=END_OF_EVENTS,
+                workersStopped=workersStopped,
+            )
+
+    def _get(self, shardIndex: int) -> Any:
+        queues = self.queues if self.queues is not None else _workerQueues
+        aborted = self.aborted if self.aborted is not None else _workerAborted
+        while True:
+            if aborted.is_set():
+                raise RuntimeError("The parent stopped streaming match events")
+            try:
+                return queues[shardIndex].get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                continue
+
+    def chunks(
+        self, shardIndex: int, firstRow: int = 0
+    ) -> Iterator[Tuple[pd.DataFrame, int]]:
+        # (events of the shard, rows of the whole chunk) for the chunks from the firstRow-th event on. The chunks
+        # before it are still read, they are streamed to every worker
+        chunkStart = self.firstRow
+        while True:
+            item = self._get(shardIndex=shardIndex)
+            if item is END_OF_EVENTS:
+                return
+            shardEvents, chunkRows = item
+            if chunkStart >= firstRow:
+                yield shardEvents, chunkRows
+            chunkStart += chunkRows
+
+    def abort(self) -> None:
+        # workers waiting for events raise instead of writing incomplete part files
+        self.aborted.set()
+
+    def close(self) -> None:
+        # chunks a failed worker never read would keep the parent's queue threads from exiting
+        for shardQueue in self.queues:
+            shardQueue.cancel_join_thread()
+            shardQueue.close()
@@ -0,0 +1,143 @@
+import gzip
+import io
+import queue
+import threading
+import time
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import IO, Any, Dict, List, Optional, Union
+
+DEFAULT_BLOCK_SIZE = 1 << 20
+DEFAULT_QUEUE_SIZE = 16
+
+
+class CountingGzipFile(gzip.GzipFile):
+    # counts the bytes written before compression and the time spent compressing and writing them
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.uncompressedBytes = 0
+        self.compressionSeconds = 0.0
+
+    def write(self, data) -> int:
+        start = time.perf_counter()
+        written = super().write(data)
+        self.compressionSeconds += time.perf_counter() - start
+        self.uncompressedBytes += written
+        return written
+
+
+# Text file object that hands encoded blocks to a background thread, which compresses and writes them.
+# With compressionThreads > 1 each block is compressed on a thread pool as its own gzip member and the members
+# are written in order, which is still a valid single .gz file because gzip readers concatenate members.
+class PipelinedGzipWriter:
+    def __init__(
+        self,
+        fileName: Union[str, Path],
+        compressionLevel: int = 9,
+        compressionThreads: int = 1,
+        blockSize: int = DEFAULT_BLOCK_SIZE,
+        queueSize: int = DEFAULT_QUEUE_SIZE,
+    ):
+        self.fileName = fileName
+        self.compressionLevel = compressionLevel
+        self.blockSize = blockSize
+        self._buffer: List[str] = []
+        self._bufferedCharacters = 0
+        self.uncompressedBytes = 0
+        # time the background thread spent compressing (or waiting for compressed blocks) and writing
+        self.compressionSeconds = 0.0
+        self._error: Optional[BaseException] = None
+        self._file = open(fileName, "wb")
+        self._queue = queue.Queue(maxsize=queueSize)
+        self._executor = (
+            ThreadPoolExecutor(max_workers=compressionThreads)
+            if compressionThreads > 1
+            else None
+        )
+        self._thread = threading.Thread(target=self._write_blocks, daemon=True)
+        self._thread.start()
+
+    def _write_blocks(self) -> None:
+        compressor = zlib.compressobj(self.compressionLevel, zlib.DEFLATED, 31)
+        try:
+            while True:
+                block = self._queue.get()
+                if block is None:
+                    break
+                start = time.perf_counter()
+                if isinstance(block, Future):
+                    self._file.write(block.result())
+                else:
+                    self._file.write(compressor.compress(block))
+                self.compressionSeconds += time.perf_counter() - start
+            if self._executor is None:
+                self._file.write(compressor.flush())
+        except BaseException as ex:
+            self._error = ex
+            # keep draining so the producer never blocks on a full queue
+            while self._queue.get() is not None:
+                pass
+
+    def _raise_background_error(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+    def _flush_buffer(self) -> None:
+        if not self._buffer:
+            return
+        block = "".join(self._buffer).encode("utf-8")
+        self.uncompressedBytes += len(block)
+        self._buffer = []
+        self._bufferedCharacters = 0
+        if self._executor is not None:
+            block = self._executor.submit(
+                gzip.compress, block, compresslevel=self.compressionLevel
+            )
+        self._queue.put(block)
+
+    def write(self, text: str) -> int:
+        self._raise_background_error()
+        self._buffer.append(text)
+        self._bufferedCharacters += len(text)
+        if self._bufferedCharacters >= self.blockSize:
+            self._flush_buffer()
+        return len(text)
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        self._flush_buffer()
+        self._queue.put(None)
+        self._thread.join()
+        if self._executor is not None:
+            self._executor.shutdown()
+        self._file.close()
+        self._raise_background_error()
+
+
+def open_gzip_text_file(
+    fileName: Union[str, Path],
+    compressionLevel: int = 9,
+    pipelined: bool = False,
+    compressionThreads: int = 1,
+) -> IO[str]:
+    if pipelined or compressionThreads > 1:
+        return PipelinedGzipWriter(
+            fileName=fileName,
+            compressionLevel=compressionLevel,
+            compressionThreads=compressionThreads,
+        )
+    # the same file object gzip.open(fileName, "wt") returns, with a GzipFile that counts what is written
+    return io.TextIOWrapper(
+        CountingGzipFile(fileName, "wb", compresslevel=compressionLevel)
+    )
+
+
+def gzip_file_stats(file: IO[str]) -> Dict[str, Any]:
+    # for a file opened with open_gzip_text_file, closed or not
+    gzipFile = getattr(file, "buffer", file)
+    return {
+        "uncompressedBytes": gzipFile.uncompressedBytes,
+        "compressionSeconds": round(gzipFile.compressionSeconds, 6),
+    }
@@ -0,0 +1,163 @@
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+import pandas as pd
+
+PARQUET_SUFFIXES = {".parquet", ".pq"}
+FEATHER_SUFFIXES = {".feather", ".arrow", ".ipc"}
+
+# Only the columns the graph builder uses are read. Names are categoricals, so each distinct name is stored and
+# mapped to its graph ID once and rows only hold integer codes; repeated IDs (id_odsp in the events) likewise.
+# Numeric columns that can be null stay floats, so nulls are NaN masks rather than Python objects.
+MATCH_METADATA_DTYPES: Dict[str, str] = {
+    "id_odsp": "object",
+    "date": "object",
+    "league": "category",
+    "season": "int16",
+    "country": "category",
+    "ht": "category",
+    "at": "category",
+    "fthg": "int8",
+    "ftag": "int8",
+    "odd_h": "float64",
+    "odd_d": "float64",
+    "odd_a": "float64",
+    "odd_over": "float64",
+    "odd_under": "float64",
+    "odd_bts": "float64",
+    "odd_bts_n": "float64",
+}
+MATCH_EVENT_DTYPES: Dict[str, str] = {
+    "id_odsp": "category",
+    "id_event": "object",
+    "sort_order": "int16",
+    "time": "int16",
+    "text": "object",
+    "event_type": "int8",
+    "event_type2": "float32",
+    "event_team": "category",
+    "opponent": "category",
+    "player": "category",
+    "player2": "category",
+    "player_in": "category",
+    "player_out": "category",
+    "shot_place": "float32",
+    "shot_outcome": "float32",
+    "is_goal": "float32",
+    "location": "float32",
+    "bodypart": "float32",
+    "assist_method": "int8",
+    "situation": "float32",
+    "fast_break": "float32",
+}
+
+
+def _dtypes(allDtypes: Dict[str, str], columns: Optional[List[str]]) -> Dict[str, str]:
+    if columns is None:
+        return allDtypes
+    return {column: allDtypes[column] for column in columns}
+
+
+def _is_arrow_file(filepath: Union[str, Path]) -> bool:
+    return Path(filepath).suffix.lower() in PARQUET_SUFFIXES | FEATHER_SUFFIXES
+
+
+def _arrow_to_frame(table: Any, dtypes: Dict[str, str]) -> pd.DataFrame:
+    # dictionary-encoded Arrow columns already arrive as categoricals
+    return table.to_pandas().astype(dtypes)
+
+
+def _skip_batch_rows(batches: Iterator[Any], firstRow: int) -> Iterator[Any]:
+    for batch in batches:
+        if firstRow >= batch.num_rows:
+            firstRow -= batch.num_rows
+            continue
+        yield batch.slice(firstRow)
+        firstRow = 0
+
+
+def _read_arrow_batches(
+    filepath: Union[str, Path], columns: List[str], chunkSize: int
+) -> Iterator[Any]:
+    # imported here, so pyarrow is only needed for Parquet and Feather inputs
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if Path(filepath).suffix.lower() in PARQUET_SUFFIXES:
+        # streams the row groups, only decoding the selected columns
+        yield from pq.ParquetFile(filepath).iter_batches(
+            batch_size=chunkSize, columns=columns
+        )
+        return
+    with pa.memory_map(str(filepath)) as source:
+        reader = pa.ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            batch = reader.get_batch(i).select(columns)
+            for offset in range(0, batch.num_rows, chunkSize):
+                yield batch.slice(offset, chunkSize)
+
+
+def _read_arrow_file(
+    filepath: Union[str, Path],
+    dtypes: Dict[str, str],
+    chunkSize: Optional[int],
+    firstRow: int = 0,
+) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+
+    if chunkSize is not None:
+        return (
+            _arrow_to_frame(table=batch, dtypes=dtypes)
+            for batch in _skip_batch_rows(
+                batches=_read_arrow_batches(
+                    filepath=filepath, columns=list(dtypes), chunkSize=chunkSize
+                ),
+                firstRow=firstRow,
+            )
+        )
+    if Path(filepath).suffix.lower() in PARQUET_SUFFIXES:
+        table = pq.read_table(filepath, columns=list(dtypes))
+    else:
+        table = feather.read_table(filepath, columns=list(dtypes))
+    return _arrow_to_frame(table=table.slice(firstRow), dtypes=dtypes)
+
+
+def read_match_metadata(
+    matchMetadataFilepath: Union[str, Path], columns: Optional[List[str]] = None
+) -> pd.DataFrame:
+    dtypes = _dtypes(allDtypes=MATCH_METADATA_DTYPES, columns=columns)
+    if _is_arrow_file(filepath=matchMetadataFilepath):
+        return _read_arrow_file(
+            filepath=matchMetadataFilepath, dtypes=dtypes, chunkSize=None
+        )
+    return pd.read_csv(
+        filepath_or_buffer=matchMetadataFilepath, usecols=list(dtypes), dtype=dtypes
+    )
+
+
+def read_match_events(
+    matchEventsFilepath: Union[str, Path],
+    columns: Optional[List[str]] = None,
+    chunkSize: Optional[int] = None,
+    firstRow: int = 0,
+) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+    # with a chunkSize this is an iterator of frames, each with its own categories. Reading starts at the
+    # firstRow-th event, e.g. after the chunks a checkpointed run has committed.
+    # Parquet and Feather files are picked by their suffix
+    dtypes = _dtypes(allDtypes=MATCH_EVENT_DTYPES, columns=columns)
+    if _is_arrow_file(filepath=matchEventsFilepath):
+        return _read_arrow_file(
+            filepath=matchEventsFilepath,
+            dtypes=dtypes,
+            chunkSize=chunkSize,
+            firstRow=firstRow,
+        )
+    return pd.read_csv(
+        filepath_or_buffer=matchEventsFilepath,
+        usecols=list(dtypes),
+        dtype=dtypes,
+        chunksize=chunkSize,
+        # the header line is kept
+        skiprows=range(1, firstRow + 1) if firstRow else None,
+    )
@@ -0,0 +1,157 @@
+import resource
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TypeVar
+
+T = TypeVar("T")
+_END_OF_CHUNKS = object()
+
+
+def max_rss_bytes() -> int:
+    # high-water mark of the process' resident memory (ru_maxrss is in kilobytes on Linux)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class StageMetrics:
+    # totals of one stage, summed over every time it ran (e.g. once per chunk of match events)
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.wallSeconds = 0.0
+        self.cpuSeconds = 0.0
+        self.nodeRows = 0
+        self.relationRows = 0
+        self.maxRssBytes = 0
+        self.peakTracedBytes: Optional[int] = None
+
+    @property
+    def rows(self) -> int:
+        return self.nodeRows + self.relationRows
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "wallSeconds": round(self.wallSeconds, 6),
+            "cpuSeconds": round(self.cpuSeconds, 6),
+            "nodeRows": self.nodeRows,
+            "relationRows": self.relationRows,
+            "rowsPerSecond": (
+                round(self.rows / self.wallSeconds, 1) if self.wallSeconds else None
+            ),
+            "maxRssBytes": self.maxRssBytes,
+            "peakTracedBytes": self.peakTracedBytes,
+        }
+
+
+class HandlerMetrics:
+    # rows and time spent inside one output handler, over all stages
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.rows = 0
+        self.seconds = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "rows": self.rows,
+            "seconds": round(self.seconds, 6),
+            "rowsPerSecond": (
+                round(self.rows / self.seconds, 1) if self.seconds else None
+            ),
+        }
+
+
+class MetricsRecorder:
+    # Records wall and CPU time, emitted rows and memory per stage. A stage started inside another one is recorded
+    # as "<outer>/<inner>", its time and rows also count towards the outer stage. With traceMemory every stage also
+    # gets the peak of the Python allocations made during it (tracemalloc slows the run down, so the timings are
+    # then not comparable to runs without it).
+    def __init__(self, traceMemory: bool = False):
+        self.traceMemory = traceMemory
+        self.stages: Dict[str, StageMetrics] = {}
+        self.handlers: Dict[str, HandlerMetrics] = {}
+        self.outputFiles: Dict[str, Dict[str, Any]] = {}
+        self.workerReports: List[Dict[str, Any]] = []
+        self.activeStages: List[StageMetrics] = []
+        self.startTime = time.perf_counter()
+        self.cpuStartTime = time.process_time()
+        if traceMemory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        if self.activeStages:
+            name = f"{self.activeStages[-1].name}/{name}"
+        stage = self.stages.setdefault(name, StageMetrics(name=name))
+        # the traced peak is reset for the outermost stage only, so outer stages still see the peaks within them
+        if self.traceMemory and not self.activeStages:
+            tracemalloc.reset_peak()
+        wallStart, cpuStart = time.perf_counter(), time.process_time()
+        self.activeStages.append(stage)
+        try:
+            yield
+        finally:
+            self.activeStages.pop()
+            stage.calls += 1
+            stage.wallSeconds += time.perf_counter() - wallStart
+            stage.cpuSeconds += time.process_time() - cpuStart
+            stage.maxRssBytes = max_rss_bytes()
+            if self.traceMemory:
+                stage.peakTracedBytes = max(
+                    stage.peakTracedBytes or 0, tracemalloc.get_traced_memory()[1]
+                )
+
+    def chunks(self, name: str, chunks: Iterable[T]) -> Iterator[T]:
+        # records the time taken to produce each chunk (e.g. read it from a file) as a stage
+        iterator = iter(chunks)
+        while True:
+            with self.stage(name=name):
+                chunk = next(iterator, _END_OF_CHUNKS)
+            if chunk is _END_OF_CHUNKS:
+                return
+            yield chunk
+
+    def add_handler_call(
+        self, handler: str, seconds: float, nodeRows: int = 0, relationRows: int = 0
+    ) -> None:
+        handlerMetrics = self.handlers.setdefault(handler, HandlerMetrics(name=handler))
+        handlerMetrics.calls += 1
+        handlerMetrics.rows += nodeRows + relationRows
+        handlerMetrics.seconds += seconds
+        for stage in self.activeStages:
+            stage.nodeRows += nodeRows
+            stage.relationRows += relationRows
+
+    def add_output_files(self, outputFiles: Dict[str, Dict[str, Any]]) -> None:
+        for fileName, stats in outputFiles.items():
+            self.outputFiles.setdefault(str(fileName), {}).update(stats)
+
+    def rename_output_files(self, renamedFiles: Dict[str, str]) -> None:
+        # e.g. files moved out of a checkpoint's staging directory
+        for fileName, newFileName in renamedFiles.items():
+            if fileName in self.outputFiles:
+                self.outputFiles[newFileName] = self.outputFiles.pop(fileName)
+
+    def add_worker_report(self, report: Dict[str, Any]) -> None:
+        # reports of worker processes are kept as they are, only their output files are merged into this one's
+        self.workerReports.append(report)
+        self.add_output_files(outputFiles=report["outputFiles"])
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "wallSeconds": round(time.perf_counter() - self.startTime, 6),
+            "cpuSeconds": round(time.process_time() - self.cpuStartTime, 6),
+            "maxRssBytes": max_rss_bytes(),
+            "stages": {name: stage.to_dict() for name, stage in self.stages.items()},
+            "handlers": {
+                name: handler.to_dict() for name, handler in self.handlers.items()
+            },
+            "outputFiles": self.outputFiles,
+            "workers": self.workerReports,
+        }
+
+    def close(self) -> None:
+        if self.traceMemory:
+            tracemalloc.stop()
@@ -0,0 +1,626 @@
+from pathlib import Path
+from typing import Callable, Dict, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+MATCH_METADATA_COLUMNS = [
+    "id_odsp",
+    "link_odsp",
+    "adv_stats",
+    "date",
+    "league",
+    "season",
+    "country",
+    "ht",
+    "at",
+    "fthg",
+    "ftag",
+    "odd_h",
+    "odd_d",
+    "odd_a",
+    "odd_over",
+    "odd_under",
+    "odd_bts",
+    "odd_bts_n",
+]
+MATCH_EVENT_COLUMNS = [
+    "id_odsp",
+    "id_event",
+    "sort_order",
+    "time",
+    "text",
+    "event_type",
+    "event_type2",
+    "side",
+    "event_team",
+    "opponent",
+    "player",
+    "player2",
+    "player_in",
+    "player_out",
+    "shot_place",
+    "shot_outcome",
+    "is_goal",
+    "location",
+    "bodypart",
+    "assist_method",
+    "situation",
+    "fast_break",
+]
+
+# share of each event_type in the Kaggle events file
+EVENT_TYPE_SHARES = {
+    0: 0.04,
+    1: 0.24,
+    2: 0.05,
+    3: 0.25,
+    4: 0.026,
+    5: 0.0006,
+    6: 0.0006,
+    7: 0.055,
+    8: 0.25,
+    9: 0.046,
+    10: 0.0053,
+    11: 0.0029,
+}
+ASSIST_METHOD_SHARES = {0: 0.3, 1: 0.5, 2: 0.15, 3: 0.03, 4: 0.02}
+# league code prefix and first division number of the Kaggle leagues per country. More leagues are the lower
+# divisions of the same countries, e.g. D2 and E1
+COUNTRY_LEAGUES = {
+    "germany": ("D", 1),
+    "england": ("E", 0),
+    "france": ("F", 1),
+    "italy": ("I", 1),
+    "spain": ("SP", 1),
+}
+FIRST_NAMES = [
+    "Aaron",
+    "Alexis",
+    "Ángel",
+    "Bruno",
+    "Cesc",
+    "David",
+    "Edin",
+    "Fabio",
+    "Franck",
+    "Gianluigi",
+    "Hugo",
+    "Ivan",
+    "James",
+    "João",
+    "Kevin",
+    "Luis",
+    "Marco",
+    "Mesut",
+    "Nicolás",
+    "Pablo",
+    "Paul",
+    "Raphaël",
+    "Sami",
+    "Thomas",
+    "Yaya",
+]
+LAST_NAMES = [
+    "Abate",
+    "Bale",
+    "Boateng",
+    "Cabaye",
+    "Cech",
+    "De Rossi",
+    "Džeko",
+    "Fàbregas",
+    "Gómez",
+    "Hummels",
+    "Jović",
+    "Kroos",
+    "Lewandowski",
+    "Mata",
+    "Müller",
+    "O'Shea",
+    "Özil",
+    "Piqué",
+    "Reus",
+    "Robben",
+    "Silva",
+    "Terry",
+    "Valbuena",
+    "Vidal",
+    "Xavi",
+]
+# teams are named after cities of their league's country
+COUNTRY_CITIES = {
+    "germany": [
+        "Augsburg",
+        "Berlin",
+        "Bielefeld",
+        "Bochum",
+        "Bremen",
+        "Dortmund",
+        "Düsseldorf",
+        "Frankfurt",
+        "Freiburg",
+        "Hamburg",
+        "Hannover",
+        "Köln",
+        "Leipzig",
+        "Leverkusen",
+        "Mainz",
+        "Mönchengladbach",
+        "München",
+        "Nürnberg",
+        "Stuttgart",
+        "Wolfsburg",
+    ],
+    "england": [
+        "Birmingham",
+        "Bournemouth",
+        "Brighton",
+        "Burnley",
+        "Leeds",
+        "Leicester",
+        "Liverpool",
+        "London",
+        "Manchester",
+        "Middlesbrough",
+        "Newcastle",
+        "Norwich",
+        "Nottingham",
+        "Sheffield",
+        "Southampton",
+        "Stoke",
+        "Sunderland",
+        "Swansea",
+        "Watford",
+        "West Bromwich",
+    ],
+    "france": [
+        "Ajaccio",
+        "Angers",
+        "Bastia",
+        "Bordeaux",
+        "Brest",
+        "Caen",
+        "Dijon",
+        "Guingamp",
+        "Lens",
+        "Lille",
+        "Lorient",
+        "Lyon",
+        "Marseille",
+        "Metz",
+        "Monaco",
+        "Montpellier",
+        "Nantes",
+        "Nice",
+        "Reims",
+        "Rennes",
+    ],
+    "italy": [
+        "Bergamo",
+        "Bologna",
+        "Cagliari",
+        "Empoli",
+        "Firenze",
+        "Frosinone",
+        "Genova",
+        "Milano",
+        "Napoli",
+        "Palermo",
+        "Parma",
+        "Pescara",
+        "Roma",
+        "Sassuolo",
+        "Siena",
+        "Torino",
+        "Udine",
+        "Verona",
+        "Catania",
+        "Chievo",
+    ],
+    "spain": [
+        "Almería",
+        "Barcelona",
+        "Bilbao",
+        "Cádiz",
+        "Córdoba",
+        "Eibar",
+        "Elche",
+        "Getafe",
+        "Granada",
+        "Las Palmas",
+        "Leganés",
+        "Madrid",
+        "Málaga",
+        "Osasuna",
+        "San Sebastián",
+        "Sevilla",
+        "Valencia",
+        "Valladolid",
+        "Vigo",
+        "Villarreal",
+    ],
+}
+TEAM_SUFFIXES = ["", " United", " City", " Athletic", " Sporting", " Rovers"]
+
+
+class SyntheticLeagueStructure:
+    # Leagues of teamsPerLeague teams over a number of seasons, like the Kaggle data (5 leagues of ~20 teams, ~380
+    # matches per league season). Every scale has at least the 5 Kaggle leagues and all seasons; more matches than
+    # they hold mean more leagues, so team and player cardinalities grow with the scale the way a larger dataset
+    # would. Each team has a squad of squadSize players; the last transferSlots slots
+    # rotate between the league's teams every season, so some players appear for several teams.
+    def __init__(
+        self,
+        matchCount: int,
+        teamsPerLeague: int = 20,
+        seasons: int = 6,
+        squadSize: int = 30,
+        transferSlots: int = 5,
+        firstSeason: int = 2011,
+    ):
+        self.matchCount = matchCount
+        self.teamsPerLeague = teamsPerLeague
+        self.seasons = seasons
+        self.squadSize = squadSize
+        self.transferSlots = transferSlots
+        self.firstSeason = firstSeason
+        self.matchesPerLeagueSeason = teamsPerLeague * (teamsPerLeague - 1)
+        self.leagueCount = max(
+            len(COUNTRY_LEAGUES),
+            -(-matchCount // (self.matchesPerLeagueSeason * seasons)),
+        )
+        self.teamCount = self.leagueCount * teamsPerLeague
+        self.playerCount = self.teamCount * squadSize
+        self.countryNames = np.array(
+            [self._country_name(i) for i in range(self.leagueCount)], dtype=object
+        )
+        self.leagueNames = np.array(
+            [self._league_name(i) for i in range(self.leagueCount)], dtype=object
+        )
+        self.teamNames = np.array(
+            [self._team_name(i) for i in range(self.teamCount)], dtype=object
+        )
+        self.playerNames = np.array(
+            [self._player_name(i) for i in range(self.playerCount)], dtype=object
+        )
+        # fixed team strengths drive the odds and the share of events of each side
+        self.teamStrengths = np.random.default_rng(0).normal(size=self.teamCount)
+
+    @staticmethod
+    def _country_name(i: int) -> str:
+        return list(COUNTRY_LEAGUES)[i % len(COUNTRY_LEAGUES)]
+
+    def _league_name(self, i: int) -> str:
+        prefix, firstDivision = COUNTRY_LEAGUES[self._country_name(i)]
+        return f"{prefix}{firstDivision + i // len(COUNTRY_LEAGUES)}"
+
+    def _team_name(self, i: int) -> str:
+        # teams are numbered through all divisions of their country, so names are unique
+        league, teamInLeague = divmod(i, self.teamsPerLeague)
+        cities = COUNTRY_CITIES[self._country_name(league)]
+        teamInCountry = (
+            league // len(COUNTRY_LEAGUES) * self.teamsPerLeague + teamInLeague
+        )
+        city, rest = cities[teamInCountry % len(cities)], teamInCountry // len(cities)
+        suffix, number = TEAM_SUFFIXES[rest % len(TEAM_SUFFIXES)], rest // len(
+            TEAM_SUFFIXES
+        )
+        return f"{city}{suffix}" + (f" {number + 1}" if number else "")
+
+    @staticmethod
+    def _player_name(i: int) -> str:
+        first, rest = FIRST_NAMES[i % len(FIRST_NAMES)], i // len(FIRST_NAMES)
+        last, number = LAST_NAMES[rest % len(LAST_NAMES)], rest // len(LAST_NAMES)
+        return f"{first} {last}" + (f" {number + 1}" if number else "")
+
+    def squad_players(
+        self, teams: np.ndarray, seasons: np.ndarray, slots: np.ndarray
+    ) -> np.ndarray:
+        # player index of a squad slot of a team in a season
+        leagues, teamInLeague = np.divmod(teams, self.teamsPerLeague)
+        transfer = slots >= self.squadSize - self.transferSlots
+        slotTeams = np.where(
+            transfer,
+            leagues * self.teamsPerLeague
+            + (teamInLeague + seasons) % self.teamsPerLeague,
+            teams,
+        )
+        return slotTeams * self.squadSize + slots
+
+
+def _choice(
+    rng: np.random.Generator, shares: Dict[int, float], size: int
+) -> np.ndarray:
+    values = np.array(list(shares))
+    probabilities = np.array(list(shares.values()))
+    return values[
+        rng.choice(len(values), size=size, p=probabilities / probabilities.sum())
+    ]
+
+
+def _odds(probabilities: np.ndarray) -> np.ndarray:
+    # bookmaker odds with a ~5% margin
+    return np.round(1 / (probabilities * 1.05), 2)
+
+
+def synthetic_matches(
+    structure: SyntheticLeagueStructure,
+    matchIndices: np.ndarray,
+    rng: np.random.Generator,
+) -> pd.DataFrame:
+    # matches go round robin over the league seasons, so every scale has all leagues and seasons, with random
+    # fixtures between the league's teams
+    leagueSeasons = matchIndices % (structure.leagueCount * structure.seasons)
+    leagues = leagueSeasons % structure.leagueCount
+    seasons = leagueSeasons // structure.leagueCount
+    homeInLeague = rng.integers(0, structure.teamsPerLeague, size=len(matchIndices))
+    awayInLeague = (
+        homeInLeague + rng.integers(1, structure.teamsPerLeague, size=len(matchIndices))
+    ) % structure.teamsPerLeague
+    homeTeams = leagues * structure.teamsPerLeague + homeInLeague
+    awayTeams = leagues * structure.teamsPerLeague + awayInLeague
+    # seasons run from August to May
+    seasonStarts = pd.to_datetime(
+        pd.Series(structure.firstSeason + seasons).astype(str) + "-08-05"
+    )
+    dates = seasonStarts + pd.to_timedelta(
+        rng.integers(0, 290, size=len(matchIndices)), unit="D"
+    )
+    strengthDifference = (
+        structure.teamStrengths[homeTeams] - structure.teamStrengths[awayTeams] + 0.3
+    )
+    homeWin = 1 / (1 + np.exp(-strengthDifference))
+    draw = 0.27 * (1 - np.abs(homeWin - 0.5))
+    overOdds = _odds(rng.uniform(0.4, 0.65, size=len(matchIndices)))
+    bothScoreOdds = _odds(rng.uniform(0.4, 0.6, size=len(matchIndices)))
+    # the over/under and both-teams-to-score odds are missing for about a third of the matches
+    overMissing = rng.random(len(matchIndices)) < 0.3
+    bothScoreMissing = overMissing | (rng.random(len(matchIndices)) < 0.05)
+    return pd.DataFrame(
+        {
+            "id_odsp": [f"S{i:07x}/" for i in matchIndices],
+            "link_odsp": [f"/soccer/synthetic/{i}/" for i in matchIndices],
+            "adv_stats": True,
+            "date": dates.dt.strftime("%Y-%m-%d").to_numpy(),
+            "league": structure.leagueNames[leagues],
+            "season": structure.firstSeason + seasons + 1,
+            "country": structure.countryNames[leagues],
+            "ht": structure.teamNames[homeTeams],
+            "at": structure.teamNames[awayTeams],
+            # the goals are counted from the events
+            "fthg": 0,
+            "ftag": 0,
+            "odd_h": _odds(homeWin * (1 - draw)),
+            "odd_d": _odds(draw),
+            "odd_a": _odds((1 - homeWin) * (1 - draw)),
+            "odd_over": np.where(overMissing, np.nan, overOdds),
+            "odd_under": np.where(
+                overMissing, np.nan, _odds(1 - 1 / (overOdds * 1.05))
+            ),
+            "odd_bts": np.where(bothScoreMissing, np.nan, bothScoreOdds),
+            "odd_bts_n": np.where(
+                bothScoreMissing, np.nan, _odds(1 - 1 / (bothScoreOdds * 1.05))
+            ),
+            "_homeTeam": homeTeams,
+            "_awayTeam": awayTeams,
+            "_season": seasons,
+        }
+    )
+
+
+def _player_team(events: pd.DataFrame) -> pd.Series:
+    return events["player"] + " (" + events["event_team"] + ")"
+
+
+# commentary lines in the style of the Kaggle text column, per event_type
+EVENT_TEXTS: Dict[int, Callable[[pd.DataFrame], pd.Series]] = {
+    0: lambda events: pd.Series("Second half begins.", index=events.index),
+    1: lambda events: events["shot_outcome"]
+    .map(
+        {
+            1: "Attempt saved. ",
+            2: "Attempt missed. ",
+            3: "Attempt blocked. ",
+            4: "Attempt hits the bar. ",
+        }
+    )
+    .where(events["is_goal"] == 0, "Goal! ")
+    + _player_team(events)
+    + events["bodypart"].map(
+        {1: " right footed shot.", 2: " left footed shot.", 3: " header."}
+    ),
+    2: lambda events: "Corner, "
+    + events["event_team"]
+    + ". Conceded by "
+    + events["opponent"]
+    + ".",
+    3: lambda events: "Foul by " + _player_team(events) + ".",
+    4: lambda events: _player_team(events) + " is shown the yellow card.",
+    5: lambda events: "Second yellow card to " + _player_team(events) + ".",
+    6: lambda events: _player_team(events) + " is shown the red card.",
+    7: lambda events: "Substitution, "
+    + events["event_team"]
+    + ". "
+    + events["player_in"]
+    + " replaces "
+    + events["player_out"]
+    + ".",
+    8: lambda events: _player_team(events) + " wins a free kick in the defensive half.",
+    9: lambda events: "Offside, "
+    + events["event_team"]
+    + ". "
+    + events["player2"]
+    + " tries a through ball, but "
+    + events["player"]
+    + " is caught offside.",
+    10: lambda events: "Hand ball by " + _player_team(events) + ".",
+    11: lambda events: "Penalty conceded by "
+    + _player_team(events)
+    + " after a foul in the penalty area.",
+}
+
+
+def _event_texts(events: pd.DataFrame) -> pd.Series:
+    texts = pd.Series(None, index=events.index, dtype=object)
+    for eventType, eventText in EVENT_TEXTS.items():
+        mask = (events["event_type"] == eventType).to_numpy()
+        texts[mask] = eventText(events[mask])
+    return texts
+
+
+def synthetic_events(
+    structure: SyntheticLeagueStructure,
+    matches: pd.DataFrame,
+    rng: np.random.Generator,
+    meanEventsPerMatch: float = 104,
+) -> pd.DataFrame:
+    # events with the null patterns of the Kaggle file: players are missing on announcements and substitutions,
+    # the shot columns are only set on attempts, player2 only on assisted attempts and offsides
+    eventCounts = np.maximum(rng.poisson(meanEventsPerMatch, size=len(matches)), 10)
+    matchRows = np.repeat(np.arange(len(matches)), eventCounts)
+    eventCount = len(matchRows)
+    sortOrder = (
+        np.arange(eventCount)
+        - np.repeat(np.cumsum(eventCounts) - eventCounts, eventCounts)
+        + 1
+    )
+    # minutes increase with the sort order within a match
+    minutes = rng.integers(0, 95, size=eventCount)
+    minutes = minutes[np.lexsort((minutes, matchRows))]
+    eventType = _choice(rng, EVENT_TYPE_SHARES, eventCount)
+    isAttempt = eventType == 1
+    # stronger teams have more of the events
+    homeShare = 1 / (
+        1
+        + np.exp(
+            structure.teamStrengths[matches["_awayTeam"].to_numpy()]
+            - structure.teamStrengths[matches["_homeTeam"].to_numpy()]
+            - 0.2
+        )
+    )
+    side = np.where(rng.random(eventCount) < homeShare[matchRows], 1, 2)
+    homeTeams = matches["_homeTeam"].to_numpy()[matchRows]
+    awayTeams = matches["_awayTeam"].to_numpy()[matchRows]
+    eventTeams = np.where(side == 1, homeTeams, awayTeams)
+    opponents = np.where(side == 1, awayTeams, homeTeams)
+    seasons = matches["_season"].to_numpy()[matchRows]
+
+    # regular starters are involved far more often than the rest of the squad
+    slotWeights = 1 / np.arange(1, structure.squadSize + 1) ** 0.7
+    slotWeights /= slotWeights.sum()
+
+    def squad_players(teams: np.ndarray) -> np.ndarray:
+        slots = rng.choice(structure.squadSize, size=len(teams), p=slotWeights)
+        return structure.playerNames[structure.squad_players(teams, seasons, slots)]
+
+    def masked(values: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        return np.where(mask, values, None)
+
+    isSubstitution = eventType == 7
+    shotOutcome = rng.choice([1, 2, 3, 4], size=eventCount, p=[0.33, 0.4, 0.25, 0.02])
+    assistMethod = np.where(
+        isAttempt, _choice(rng, ASSIST_METHOD_SHARES, eventCount), 0
+    )
+    eventType2 = np.full(eventCount, np.nan)
+    eventType2[isAttempt & (assistMethod > 0) & (rng.random(eventCount) < 0.45)] = 12
+    eventType2[(eventType == 9) & (rng.random(eventCount) < 0.1)] = 13
+    eventType2[np.isin(eventType, [5, 6])] = 14
+    isGoal = isAttempt & (shotOutcome == 1) & (rng.random(eventCount) < 0.32)
+    eventType2[isGoal & (rng.random(eventCount) < 0.02)] = 15
+    hasLocation = isAttempt | (
+        np.isin(eventType, [3, 8]) & (rng.random(eventCount) < 0.4)
+    )
+    events = pd.DataFrame(
+        {
+            "id_odsp": matches["id_odsp"].to_numpy()[matchRows],
+            "sort_order": sortOrder,
+            "time": minutes + 1,
+            "event_type": eventType,
+            "event_type2": eventType2,
+            "side": side,
+            "event_team": structure.teamNames[eventTeams],
+            "opponent": structure.teamNames[opponents],
+            "player": masked(
+                squad_players(eventTeams), (eventType != 0) & ~isSubstitution
+            ),
+            "player2": masked(
+                squad_players(eventTeams),
+                (isAttempt & (assistMethod > 0)) | (eventType == 9),
+            ),
+            "player_in": masked(squad_players(eventTeams), isSubstitution),
+            "player_out": masked(squad_players(eventTeams), isSubstitution),
+            "shot_place": np.where(
+                isAttempt & (shotOutcome != 3),
+                rng.integers(1, 14, size=eventCount),
+                np.nan,
+            ),
+            "shot_outcome": np.where(isAttempt, shotOutcome, np.nan),
+            "is_goal": isGoal.astype(int),
+            "location": np.where(
+                hasLocation, rng.integers(1, 20, size=eventCount), np.nan
+            ),
+            "bodypart": np.where(
+                isAttempt,
+                rng.choice([1, 2, 3], size=eventCount, p=[0.55, 0.3, 0.15]),
+                np.nan,
+            ),
+            "assist_method": assistMethod,
+            "situation": np.where(
+                isAttempt,
+                rng.choice([1, 2, 3, 4], size=eventCount, p=[0.7, 0.12, 0.13, 0.05]),
+                np.nan,
+            ),
+            "fast_break": (isAttempt & (rng.random(eventCount) < 0.03)).astype(int),
+        }
+    )
+    events["id_event"] = events["id_odsp"].str[:-1] + events["sort_order"].astype(str)
+    events["text"] = _event_texts(events)
+    return events[MATCH_EVENT_COLUMNS]
+
+
+def write_synthetic_files(
+    outputDirectory: Union[str, Path],
+    matchCount: int,
+    seed: int = 0,
+    chunkMatches: int = 10000,
+    meanEventsPerMatch: float = 104,
+    **structureOptions,
+) -> Tuple[str, str]:
+    # writes ginf.csv and events.csv chunk by chunk, so 1M matches (~100M events) never have to fit in memory.
+    # The same seed and options always give the same files
+    Path(outputDirectory).mkdir(parents=True, exist_ok=True)
+    matchMetadataFilepath = f"{outputDirectory}/ginf.csv"
+    matchEventsFilepath = f"{outputDirectory}/events.csv"
+    structure = SyntheticLeagueStructure(matchCount=matchCount, **structureOptions)
+    rng = np.random.default_rng(seed)
+    for chunkStart in range(0, matchCount, chunkMatches):
+        matches = synthetic_matches(
+            structure=structure,
+            matchIndices=np.arange(
+                chunkStart, min(chunkStart + chunkMatches, matchCount)
+            ),
+            rng=rng,
+        )
+        events = synthetic_events(
+            structure=structure,
+            matches=matches,
+            rng=rng,
+            meanEventsPerMatch=meanEventsPerMatch,
+        )
+        goalMatches = pd.Categorical(
+            events["id_odsp"], categories=matches["id_odsp"]
+        ).codes
+        for column, side in (("fthg", 1), ("ftag", 2)):
+            goals = (events["is_goal"] == 1).to_numpy() & (
+                events["side"] == side
+            ).to_numpy()
+            matches[column] = np.bincount(goalMatches[goals], minlength=len(matches))
+        writeOptions = {
+            "index": False,
+            "mode": "w" if chunkStart == 0 else "a",
+            "header": chunkStart == 0,
+        }
+        matches[MATCH_METADATA_COLUMNS].to_csv(matchMetadataFilepath, **writeOptions)
+        events.to_csv(matchEventsFilepath, **writeOptions)
+    return matchMetadataFilepath, matchEventsFilepath